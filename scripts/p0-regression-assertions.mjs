@@ -673,7 +673,7 @@ function runAssertions() {
   assertPattern({
     file: "server/moonshine_server/schema.py",
     description: "Schema exposes SLBR tile options for model options",
-    pattern: /tile_size:\s*int\s*=\s*Field\(384,\s*ge=1\)[\s\S]*tile_batch:\s*int\s*=\s*Field\(4,\s*ge=1,\s*le=32\)/,
+    pattern: /tile_size:\s*Union\[Annotated\[int,\s*Field\(ge=1\)\],\s*Literal\["auto"\]\]\s*=\s*Field\(\s*384,[\s\S]*tile_batch:\s*int\s*=\s*Field\(4,\s*ge=1,\s*le=32\)/,
   });
   assertPattern({
     file: "server/moonshine_server/schema.py",
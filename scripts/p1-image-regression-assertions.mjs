@@ -267,7 +267,7 @@ function runAssertions() {
   assertPattern({
     file: "server/moonshine_server/api.py",
     description: "Image APIs apply color stabilization before encoding results",
-    pattern: /def api_inpaint[\s\S]*try_flat_background_fill\([\s\S]*self\.model_manager\(image, mask, req\)[\s\S]*apply_inpaint_color_stabilization[\s\S]*def api_batch_inpaint[\s\S]*req\.inpaint\.model_copy\(deep=True\)[\s\S]*try_flat_background_fill\([\s\S]*apply_inpaint_color_stabilization/,
+    pattern: /def api_inpaint[\s\S]*try_flat_background_fill\([\s\S]*self\.model_manager\(image, mask, req\)[\s\S]*apply_inpaint_color_stabilization[\s\S]*def _iter_batch_inpaint_results[\s\S]*req\.inpaint\.model_copy\(deep=True\)[\s\S]*try_flat_background_fill\([\s\S]*apply_inpaint_color_stabilization/,
   });
   assertPattern({
     file: "src/services/ImageProcessingService.js",
@@ -406,7 +406,7 @@ function runAssertions() {
   assertPattern({
     file: "server/moonshine_server/api.py",
     description: "Backend normalizes Device enum values before constructing the SAM service",
-    pattern: /(?=[\s\S]*def _normalize_device_value\(device\) -> str:)(?=[\s\S]*raw_value = getattr\(device, "value", device\))(?=[\s\S]*normalized\.startswith\("device\."\))(?=[\s\S]*return normalized if normalized in \{"cpu", "cuda", "mps"\} else "cpu")(?=[\s\S]*def _get_sam_service\(self, device: Optional\[str\] = None\) -> SamService:[\s\S]*sam_device = self\._normalize_device_value\(device or self\.config\.device\)[\s\S]*SamService\(self\._model_dir\(\), sam_device\))[\s\S]*/,
+    pattern: /(?=[\s\S]*def _normalize_device_value\(device\) -> str:)(?=[\s\S]*raw_value = getattr\(device, "value", device\))(?=[\s\S]*normalized\.startswith\("device\."\))(?=[\s\S]*return normalized if normalized in \{"cpu", "cuda", "mps"\} else "cpu")(?=[\s\S]*def _get_sam_service\(self, device: Optional\[str\] = None\) -> SamService:[\s\S]*sam_device = self\._normalize_device_value\(device or self\.config\.device\)[\s\S]*SamService\(\s*self\._model_dir\(\),\s*sam_device,)[\s\S]*/,
   });
   assertPattern({
     file: "server/moonshine_server/moonshine/sam_service.py",
@@ -486,7 +486,7 @@ function runAssertions() {
   assertPattern({
     file: "server/moonshine_server/batch_processing.py",
     description: "Lama folder processing writes selected output extension",
-    pattern: /output_format:\s*str = "auto"[\s\S]*save_p = output \/ f"\{stem\}\{output_spec\['extension'\]\}"/,
+    pattern: /def encode_batch_item\([\s\S]*save_p = output \/ f"\{stem\}\{output_spec\['extension'\]\}"[\s\S]*def batch_inpaint\([\s\S]*output_format:\s*str = "auto"/,
   });
   assertPattern({
     file: "server/moonshine_server/moonshine/slbr_runner.py",
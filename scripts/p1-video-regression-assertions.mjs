@@ -602,8 +602,8 @@ function runAssertions() {
   });
   assertPattern({
     file: "server/moonshine_server/api.py",
-    description: "Backend video batch routes SLBR full frames to full inference and local frames through the shared local runner",
-    pattern: /(?=[\s\S]*model_id = str\(req\.model_id or "lama"\)\.strip\(\)\.lower\(\) or "lama")(?=[\s\S]*if model_id == "slbr":[\s\S]*slbr_runner = self\._get_slbr_runner\(\))(?=[\s\S]*apply_scope = str\(getattr\(item, "apply_scope", "full"\) or "full"\))(?=[\s\S]*if apply_scope == "mask":)(?=[\s\S]*slbr_runner\.infer_bgr_local\([\s\S]*local_inference_strategy[\s\S]*local_bbox_empty_ratio_threshold[\s\S]*local_edge_feather_px)(?=[\s\S]*else:[\s\S]*slbr_runner\.infer_bgr\()(?=[\s\S]*processed_bgr = self\.model_manager\(image, mask, inpaint_req\))[\s\S]*/,
+    description: "Backend video batch routes SLBR full and local frames through one shared tile window per image batch",
+    pattern: /(?=[\s\S]*model_id = str\(req\.model_id or "lama"\)\.strip\(\)\.lower\(\) or "lama")(?=[\s\S]*if model_id == "slbr":[\s\S]*slbr_runner = self\._get_slbr_runner\(\))(?=[\s\S]*apply_scope = str\(getattr\(frame_item, "apply_scope", "full"\) or "full"\))(?=[\s\S]*if apply_scope == "mask":)(?=[\s\S]*\[\(frame\["image_bgr"\], frame\["mask"\]\) for frame in window\])(?=[\s\S]*slbr_runner\.infer_bgr_window\([\s\S]*local_inference_strategy[\s\S]*local_bbox_empty_ratio_threshold[\s\S]*local_edge_feather_px)(?=[\s\S]*self\.model_manager\.submit\(\s*image, mask, inpaint_req)[\s\S]*/,
   });
   assertPattern({
     file: "src/pages/VideoPage.vue",
@@ -649,8 +649,8 @@ function runAssertions() {
   });
   assertPattern({
     file: "server/moonshine_server/api.py",
-    description: "Backend caches decoded video mask_path reads inside one batch request",
-    pattern: /(?=[\s\S]*mask_cache = \{\})(?=[\s\S]*mask_cache_key = \([\s\S]*os\.path\.abspath\(item\.mask_path\)[\s\S]*bool\(req\.options\.keep_mask_grayscale\))(?=[\s\S]*cached_mask = mask_cache\.get\(mask_cache_key\))(?=[\s\S]*mask_cache\[mask_cache_key\] = cached_mask)(?=[\s\S]*mask = cached_mask\.copy\(\))[\s\S]*/,
+    description: "Backend caches decoded SLBR video mask_path reads inside one batch request and LaMa/MAT mask plans across batches",
+    pattern: /(?=[\s\S]*mask_cache = \{\})(?=[\s\S]*mask_cache_key = \(os\.path\.abspath\(frame_item\.mask_path\), False\))(?=[\s\S]*cached_mask = mask_cache\.get\(mask_cache_key\))(?=[\s\S]*mask_cache\[mask_cache_key\] = cached_mask)(?=[\s\S]*mask = cached_mask\.copy\(\))(?=[\s\S]*keep_grayscale = bool\(req\.options\.keep_mask_grayscale\)[\s\S]*get_mask_plan_for_path\([\s\S]*variant=keep_grayscale)[\s\S]*/,
   });
   assertPattern({
     file: "server/moonshine_server/api.py",
@@ -702,7 +702,7 @@ function runAssertions() {
   assertPattern({
     file: "server/moonshine_server/api.py",
     description: "Backend applies temporal enhancement only after independent frame repair and falls back safely on errors",
-    pattern: /(?=[\s\S]*is_temporal_enhancement_enabled\([\s\S]*req\.options\.temporal_enhancement[\s\S]*\))(?=[\s\S]*processed_bgr = self\.model_manager\(image, mask, inpaint_req\)\.astype)(?=[\s\S]*temporal_enhancer\.enhance_frame)(?=[\s\S]*"skip_reason": "enhancement-error")(?=[\s\S]*self\._save_processed_frame\([\s\S]*processed_bgr\.astype\(np\.uint8\))[\s\S]*/,
+    pattern: /(?=[\s\S]*is_temporal_enhancement_enabled\([\s\S]*req\.options\.temporal_enhancement[\s\S]*\))(?=[\s\S]*processed_bgr = frame\["future"\]\.result\(\)\.astype)(?=[\s\S]*temporal_enhancer\.enhance_frame)(?=[\s\S]*"skip_reason": "enhancement-error")(?=[\s\S]*pipeline\.write\(\s*self\._save_processed_frame,[\s\S]*queue_frame_write\(\s*item, result_item, processed_bgr\.astype\(np\.uint8\))[\s\S]*/,
   });
   assertPattern({
     file: "server/moonshine_server/api.py",
@@ -727,17 +727,17 @@ function runAssertions() {
   assertPattern({
     file: "server/moonshine_server/moonshine/sam_service.py",
     description: "SAM service can explicitly release cached predictors and image states before processing models run",
-    pattern: /(?=[\s\S]*def release\(self, model_id: Optional\[str\] = None\) -> dict:)(?=[\s\S]*"_predictors", "predictors")(?=[\s\S]*"_sam3_image_predictors", "sam3ImagePredictors")(?=[\s\S]*"_video_predictors", "videoPredictors")(?=[\s\S]*"_text_predictors", "textPredictors")(?=[\s\S]*"_image_cache", "imageCache")(?=[\s\S]*"_sam3_image_cache", "sam3ImageCache")(?=[\s\S]*"_text_image_cache", "textImageCache")(?=[\s\S]*gc\.collect\(\))(?=[\s\S]*torch_gc\(\))[\s\S]*/,
+    pattern: /(?=[\s\S]*def release\(self, model_id: Optional\[str\] = None\) -> dict:)(?=[\s\S]*"_predictors", "predictors")(?=[\s\S]*"_sam3_image_predictors", "sam3ImagePredictors")(?=[\s\S]*"_video_predictors", "videoPredictors")(?=[\s\S]*"_text_predictors", "textPredictors")(?=[\s\S]*"_image_cache", "imageCache")(?=[\s\S]*"_sam3_image_cache", "sam3ImageCache")(?=[\s\S]*"_text_image_cache", "textImageCache")(?=[\s\S]*gpu_housekeeper\.release\("sam_release"\))[\s\S]*/,
   });
   assertPattern({
     file: "server/moonshine_server/api.py",
     description: "Backend releases SAM runtime before image and video processing models run, but skips active SAM video jobs",
-    pattern: /(?=[\s\S]*def _release_sam_runtime\(self, \*, reason: str, force: bool = False\):)(?=[\s\S]*sam_release_before_processing)(?=[\s\S]*sam_video_task_manager\.has_active_tasks\(\))(?=[\s\S]*service\.release\(\))(?=[\s\S]*def api_inpaint[\s\S]*_release_sam_runtime_before_processing\("single_image_inpaint"\)[\s\S]*self\.model_manager)(?=[\s\S]*def api_batch_inpaint[\s\S]*_release_sam_runtime_before_processing\("batch_inpaint"\)[\s\S]*self\.model_manager)(?=[\s\S]*def api_video_batch_inpaint[\s\S]*_release_sam_runtime_before_processing\("video_batch_inpaint"\)[\s\S]*if model_id == "slbr")[\s\S]*/,
+    pattern: /(?=[\s\S]*def _release_sam_runtime\(self, \*, reason: str, force: bool = False\):)(?=[\s\S]*sam_release_before_processing)(?=[\s\S]*sam_video_task_manager\.has_active_tasks\(\))(?=[\s\S]*service\.release\(\))(?=[\s\S]*def api_inpaint[\s\S]*_release_sam_runtime_before_processing\("single_image_inpaint"\)[\s\S]*self\.model_manager)(?=[\s\S]*def _start_batch_inpaint[\s\S]*_release_sam_runtime_before_processing\("batch_inpaint"\)\s*return self\._iter_batch_inpaint_results\(req\))(?=[\s\S]*def api_video_batch_inpaint[\s\S]*_release_sam_runtime_before_processing\("video_batch_inpaint"\)[\s\S]*if model_id == "slbr")[\s\S]*/,
   });
   assertPattern({
     file: "server/moonshine_server/moonshine/sam_video_tasks.py",
     description: "SAM video task manager exposes active-task state so processing cannot unload a running predictor",
-    pattern: /def has_active_tasks\(self\) -> bool:[\s\S]*task\.status not in \{"completed", "failed", "canceled"\}/,
+    pattern: /SAM_VIDEO_TASK_FINISHED_STATUSES = \{"completed", "failed", "canceled"\}[\s\S]*def has_active_tasks\(self\) -> bool:[\s\S]*task\.status not in SAM_VIDEO_TASK_FINISHED_STATUSES/,
   });
   assertAbsentPattern({
     file: "server/moonshine_server/api.py",
@@ -791,8 +791,8 @@ function runAssertions() {
   });
   assertPattern({
     file: "server/moonshine_server/moonshine/sam_service.py",
-    description: "SAM2 video service stages local video paths, registers multiple object prompts, and reports real progress phases",
-    pattern: /(?=[\s\S]*import cv2)(?=[\s\S]*def _emit_progress)(?=[\s\S]*def _stage_video_to_jpeg_frames[\s\S]*progress_callback)(?=[\s\S]*open_video_capture\(video_path\))(?=[\s\S]*write_image_file)(?=[\s\S]*def _normalize_video_objects)(?=[\s\S]*duplicate_ids)(?=[\s\S]*def propagate_video)(?=[\s\S]*input_type: str = "jpegFrameDirectory")(?=[\s\S]*video_path: Optional\[str\])(?=[\s\S]*progress_callback: Optional\[Callable)(?=[\s\S]*emit_frame_loading_progress)(?=[\s\S]*progress_callback=emit_frame_loading_progress)(?=[\s\S]*for prompt_index, prompt in enumerate\(normalized_objects)(?=[\s\S]*predictor\.add_new_points_or_box)(?=[\s\S]*status="propagating")(?=[\s\S]*status="writing_masks")(?=[\s\S]*"objectCount": len\(normalized_objects\))(?=[\s\S]*"type": normalized_input_type)[\s\S]*/,
+    description: "SAM2 video service streams local video paths, registers multiple object prompts, and reports real progress phases",
+    pattern: /(?=[\s\S]*import cv2)(?=[\s\S]*def _emit_progress)(?=[\s\S]*count_video_frames\(source_video_path\))(?=[\s\S]*StreamingVideoFrameLoader\()(?=[\s\S]*open_video_capture\(video_path\))(?=[\s\S]*def _normalize_video_objects)(?=[\s\S]*duplicate_ids)(?=[\s\S]*def propagate_video)(?=[\s\S]*input_type: str = "jpegFrameDirectory")(?=[\s\S]*video_path: Optional\[str\])(?=[\s\S]*progress_callback: Optional\[Callable)(?=[\s\S]*emit_frame_loading_progress)(?=[\s\S]*progress_callback=emit_frame_loading_progress)(?=[\s\S]*for prompt_index, prompt in enumerate\(normalized_objects)(?=[\s\S]*predictor\.add_new_points_or_box)(?=[\s\S]*status="propagating")(?=[\s\S]*status="writing_masks")(?=[\s\S]*"objectCount": len\(normalized_objects\))(?=[\s\S]*"type": normalized_input_type)[\s\S]*/,
   });
   assertPattern({
     file: "server/moonshine_server/plugins/segment_anything2/sam2_video_predictor.py",
@@ -941,8 +941,18 @@ function runAssertions() {
   });
   assertPattern({
     file: "server/moonshine_server/schema.py",
-    description: "SAM2 video API supports path response with a required mask output directory",
-    pattern: /(?=[\s\S]*class MoonshineSamVideoPropagateRequest)(?=[\s\S]*response_type: Literal\["base64", "path"\])(?=[\s\S]*mask_output_dir: Optional\[str\])(?=[\s\S]*if values\.response_type == "path" and not values\.mask_output_dir)[\s\S]*/,
+    description: "SAM2 video API supports path and track responses with a required mask output directory",
+    pattern: /(?=[\s\S]*class MoonshineSamVideoPropagateRequest)(?=[\s\S]*response_type: Literal\["base64", "path", "track"\])(?=[\s\S]*mask_output_dir: Optional\[str\])(?=[\s\S]*if values\.response_type in \{"path", "track"\} and not values\.mask_output_dir)[\s\S]*/,
+  });
+  assertPattern({
+    file: "server/moonshine_server/moonshine/sam_service.py",
+    description: "SAM video service appends propagated masks to per-object mask tracks when track response is requested",
+    pattern: /(?=[\s\S]*from moonshine_server\.mask_tracks import MaskTrackStore)(?=[\s\S]*if normalized_response_type == "track":[\s\S]*mask_tracks = MaskTrackStore\()(?=[\s\S]*if mask_tracks is not None:[\s\S]*mask_tracks\.append\(int\(out_frame_index\), int\(obj_id\), mask_np\))(?=[\s\S]*mask_tracks\.close\(\))[\s\S]*/,
+  });
+  assertPattern({
+    file: "server/moonshine_server/api.py",
+    description: "Video inpaint mask loading resolves mask track references by frame index",
+    pattern: /def _load_mask_from_path\(mask_path: str, keep_grayscale: bool\):\s*track_mask = read_mask_track_ref\(mask_path\)\s*if track_mask is not None:\s*return track_mask/,
   });
   assertPattern({
     file: "server/moonshine_server/moonshine/sam_service.py",
@@ -0,0 +1,95 @@
+"""Per-item allocation benchmark for the ``/api/v1/batch_inpaint`` decode path.
+
+Compares the former path-item flow (read the file, base64 it, decode the
+base64, then re-read both files into base64 request payloads) with the
+current one (decode the files straight to numpy). Run from ``server/``::
+
+    python benchmarks/batch_inpaint_decode.py --width 4096 --height 3072
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.helper import decode_base64_to_image, decode_image_file
+from moonshine_server.mask_image import decode_binary_mask
+
+
+def legacy_item(image_path: str, mask_path: str):
+    with open(image_path, "rb") as image_file:
+        image_b64 = base64.b64encode(image_file.read()).decode("utf-8")
+    image, alpha_channel, infos = decode_base64_to_image(image_b64)
+    mask = decode_binary_mask(mask_path, "path")
+    with open(image_path, "rb") as image_file:
+        request_image = base64.b64encode(image_file.read()).decode("utf-8")
+    with open(mask_path, "rb") as mask_file:
+        request_mask = base64.b64encode(mask_file.read()).decode("utf-8")
+    return image, alpha_channel, infos, mask, request_image, request_mask
+
+
+def current_item(image_path: str, mask_path: str):
+    image, alpha_channel, infos, _ = decode_image_file(image_path)
+    mask = decode_binary_mask(mask_path, "path")
+    return image, alpha_channel, infos, mask
+
+
+def measure(fn, *args, repeat: int = 3) -> tuple[int, int, float]:
+    peak_bytes = 0
+    total_bytes = 0
+    elapsed = 0.0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started_at = time.perf_counter()
+        result = fn(*args)
+        elapsed += time.perf_counter() - started_at
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        total_bytes = sum(stat.size for stat in snapshot.statistics("filename"))
+        peak_bytes = max(peak_bytes, peak)
+        del result
+    return peak_bytes, total_bytes, elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=4096)
+    parser.add_argument("--height", type=int, default=3072)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8)
+    mask = np.zeros((args.height, args.width), dtype=np.uint8)
+    mask[args.height // 4 : args.height // 2, args.width // 4 : args.width // 2] = 255
+
+    with tempfile.TemporaryDirectory(prefix="moonshine-bench-") as root:
+        image_path = str(Path(root) / "image.png")
+        mask_path = str(Path(root) / "mask.png")
+        cv2.imwrite(image_path, image)
+        cv2.imwrite(mask_path, mask)
+        print(f"image file: {Path(image_path).stat().st_size / 1024 / 1024:.1f} MiB")
+
+        for name, fn in (("legacy", legacy_item), ("current", current_item)):
+            peak, retained, seconds = measure(fn, image_path, mask_path, repeat=args.repeat)
+            print(
+                f"{name:>8}: peak {peak / 1024 / 1024:8.1f} MiB | "
+                f"retained {retained / 1024 / 1024:8.1f} MiB | {seconds * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
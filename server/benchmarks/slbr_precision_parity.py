@@ -0,0 +1,72 @@
+"""fp16/bf16 parity and speed check for SLBR against fp32.
+
+Runs every image of a reference folder through SLBR in fp32 and in the
+requested precision, then prints the per-image difference and timings. Run
+from ``server/``::
+
+    python benchmarks/slbr_precision_parity.py --model-dir ~/.cache/moonshine \\
+        --images ./reference --device cuda --precision fp16
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.slbr_runner import (
+    SlbrRunner,
+    gather_images,
+    read_image_bgr,
+)
+
+
+def timed_run(runner: SlbrRunner, images, precision: str, tile_size: int, tile_batch: int) -> float:
+    started_at = time.perf_counter()
+    for image_bgr in images:
+        runner.infer_bgr(image_bgr, tile_size, tile_batch, precision=precision)
+    return time.perf_counter() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", required=True)
+    parser.add_argument("--images", required=True, help="Folder of reference images")
+    parser.add_argument("--device", default="cuda")
+    parser.add_argument("--precision", default="fp16", choices=["fp16", "bf16"])
+    parser.add_argument("--tile-size", type=int, default=384)
+    parser.add_argument("--tile-batch", type=int, default=4)
+    parser.add_argument("--max-abs-tolerance", type=int, default=8)
+    parser.add_argument("--min-psnr", type=float, default=40.0)
+    args = parser.parse_args()
+
+    runner = SlbrRunner(args.model_dir, args.device)
+    images = [read_image_bgr(path) for path in gather_images(Path(args.images))]
+    if not images:
+        raise SystemExit(f"No reference images found in {args.images}")
+
+    report = runner.check_precision_parity(
+        images,
+        args.precision,
+        tile_size=args.tile_size,
+        tile_batch=args.tile_batch,
+        max_abs_tolerance=args.max_abs_tolerance,
+        min_psnr=args.min_psnr,
+    )
+    report["fp32_seconds"] = timed_run(runner, images, "fp32", args.tile_size, args.tile_batch)
+    report["precision_seconds"] = timed_run(
+        runner, images, report["precision"], args.tile_size, args.tile_batch
+    )
+    print(json.dumps(report, indent=2))
+    if not report["passed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,9 @@ import subprocess
 import threading
 import time
 import traceback
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Literal
 import base64 
 import io
 from tqdm import tqdm
@@ -31,11 +32,16 @@ from fastapi import APIRouter, Body, FastAPI, Query, Request, UploadFile
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, Response
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
 from socketio import AsyncServer
 
+from moonshine_server.batch_jobs import (
+    STREAM_MEDIA_TYPES,
+    batch_job_manager,
+    iter_batch_events,
+)
 from moonshine_server.file_manager import FileManager
 from moonshine_server.disk_space import (
     DEFAULT_DISK_SPACE_SAFETY_BYTES,
@@ -46,6 +52,7 @@ from moonshine_server.disk_space import (
 from moonshine_server.helper import (
     load_img,
     decode_base64_to_image,
+    decode_image_file,
     pil_to_bytes,
     numpy_to_bytes,
     concat_alpha_channel,
@@ -60,12 +67,31 @@ from moonshine_server.image_output import (
     resolve_image_output_spec,
 )
 from moonshine_server.mask_image import decode_binary_mask
-from moonshine_server.path_io import read_image_file, to_path
+from moonshine_server.mask_plan import get_mask_plan_for_path
+from moonshine_server.mask_tracks import (
+    close_mask_tracks,
+    open_mask_track,
+    parse_mask_track_ref,
+    read_mask_track_ref,
+)
+from moonshine_server.progress_events import (
+    progress_publisher,
+    sam_video_room,
+    video_batch_room,
+)
+from moonshine_server.video_pipeline import VideoFramePipeline
+from moonshine_server.path_io import read_image_file, to_path, write_image_file
 from moonshine_server.inpaint_color_stabilization import (
     apply_inpaint_color_stabilization,
     try_flat_background_fill,
 )
-from moonshine_server.model.utils import torch_gc
+from moonshine_server.gpu_arbiter import (
+    GPU_PRIORITY_BULK,
+    GPU_PRIORITY_INTERACTIVE,
+    gpu_arbiter,
+)
+from moonshine_server.gpu_housekeeping import gpu_housekeeper
+from moonshine_server.readiness import ReadinessTracker
 from moonshine_server.model_manager import ModelManager
 from moonshine_server.video_temporal_enhancement import (
     VideoTemporalEnhancer,
@@ -77,6 +103,7 @@ from moonshine_server.plugins.remove_bg import RemoveBG
 from moonshine_server.schema import (
     GenInfoResponse,
     ApiConfig,
+    HDStrategy,
     ServerConfigResponse,
     SwitchModelRequest,
     InpaintRequest,
@@ -95,12 +122,16 @@ from moonshine_server.schema import (
     VideoBatchInpaintRequest,
     MoonshineModelRegistryRequest,
     MoonshineSamPredictRequest,
+    MoonshineSamPrepareImageRequest,
+    MoonshineSamTextBatchPredictRequest,
     MoonshineSamTextPredictRequest,
     MoonshineSamVideoPropagateRequest,
 )
 
 
 SAM_VIDEO_POLLING_PATH_PREFIX = "/api/v1/moonshine/sam/video/propagate/jobs/"
+# Handlers that need a warm-up component wait this long before going ahead without it.
+WARM_UP_WAIT_TIMEOUT_S = 120
 
 
 class SamVideoPollingAccessLogFilter(logging.Filter):
@@ -117,10 +148,12 @@ from moonshine_server.moonshine.slbr_runner import (
     SlbrRunner,
     clamp_local_bbox_empty_ratio_threshold,
     clamp_local_edge_feather_px,
+    clamp_image_batch,
     clamp_tile_batch,
-    clamp_tile_size,
     get_overlap_for_tile_size,
     normalize_local_inference_strategy,
+    normalize_slbr_precision,
+    normalize_tile_size_option,
     read_image_bgr,
     recommend_slbr_params,
     iter_folder_local_plans,
@@ -131,9 +164,18 @@ from moonshine_server.moonshine.model_registry import (
     download_task_manager,
     get_model_manifest,
     get_model_manifest_metadata,
+    start_checksum_verifier,
+)
+from moonshine_server.moonshine.sam_service import (
+    SamImageNotCachedError,
+    SamService,
+    SamServiceError,
+)
+from moonshine_server.moonshine.sam_prepare import sam_prepare_queue
+from moonshine_server.moonshine.sam_video_tasks import (
+    SAM_VIDEO_TASK_FINISHED_STATUSES,
+    sam_video_task_manager,
 )
-from moonshine_server.moonshine.sam_service import SamService, SamServiceError
-from moonshine_server.moonshine.sam_video_tasks import sam_video_task_manager
 
 CURRENT_DIR = Path(__file__).parent.absolute().resolve()
 WEB_APP_DIR = CURRENT_DIR / "web_app"
@@ -202,7 +244,7 @@ def api_middleware(app: FastAPI):
         "allow_headers": ["*"],
         "allow_origins": ["*"],
         "allow_credentials": True,
-        "expose_headers": ["X-Seed"],
+        "expose_headers": ["X-Seed", "X-Gpu-Queue-Wait-Ms"],
     }
     app.add_middleware(CORSMiddleware, **cors_options)
 
@@ -216,14 +258,18 @@ class Api:
         self.app = app
         self.config = config
         self.router = APIRouter()
-        self.queue_lock = threading.Lock()
         api_middleware(self.app)
 
         self.file_manager = self._build_file_manager()
-        self.plugins = self._build_plugins()
+        # Plugins and the default model load on the warm-up thread so the
+        # server binds at once; /api/v1/ready reports their progress.
+        self.readiness = ReadinessTracker(("plugins", "model", "modelWarmup"))
+        self.plugins: Dict[str, BasePlugin] = {}
         self.model_manager = self._build_model_manager()
         self._moonshine_runners = {}
         self._sam_services = {}
+        start_checksum_verifier(self._model_dir())
+        gpu_housekeeper.configure(release_ratio=self.config.gpu_release_ratio)
 
         # fmt: off
         self.add_api_route("/api/v1/gen-info", self.api_geninfo, methods=["POST"], response_model=GenInfoResponse)
@@ -240,8 +286,17 @@ class Api:
         self.add_api_route("/api/v1/adjust_mask", self.api_adjust_mask, methods=["POST"])
         self.add_api_route("/api/v1/save_image", self.api_save_image, methods=["POST"])
         self.add_api_route("/api/v1/batch_inpaint", self.api_batch_inpaint, methods=["POST"])
+        self.add_api_route("/api/v1/batch_inpaint/stream", self.api_batch_inpaint_stream, methods=["POST"])
+        self.add_api_route("/api/v1/batch_inpaint/jobs", self.api_batch_inpaint_job_create, methods=["POST"])
+        self.add_api_route("/api/v1/batch_jobs/{task_id}", self.api_batch_job, methods=["GET"])
+        self.add_api_route("/api/v1/batch_jobs/{task_id}/results", self.api_batch_job_results, methods=["GET"])
+        self.add_api_route("/api/v1/batch_jobs/{task_id}/cancel", self.api_batch_job_cancel, methods=["POST"])
         self.add_api_route("/api/v1/health", self.api_health, methods=["GET"])
+        self.add_api_route("/api/v1/ready", self.api_ready, methods=["GET"])
         self.add_api_route("/api/v1/check_cuda", self.api_check_cuda_fixed, methods=["GET"])
+        self.add_api_route("/api/v1/diagnostics/gpu_memory", self.api_gpu_memory_diagnostics, methods=["GET"])
+        self.add_api_route("/api/v1/diagnostics/gpu_queue", self.api_gpu_queue_diagnostics, methods=["GET"])
+        self.add_api_route("/api/v1/diagnostics/sam_video_tasks", self.api_sam_video_task_diagnostics, methods=["GET"])
         self.add_api_route("/api/v1/batch_inpaint_by_folder", self.api_batch_inpaint_by_folder, methods=["POST"])
         self.add_api_route("/api/v1/video_batch_inpaint", self.api_video_batch_inpaint, methods=["POST"])
         self.add_api_route("/api/v1/moonshine/models", self.api_moonshine_models, methods=["GET"])
@@ -252,13 +307,18 @@ class Api:
         self.add_api_route("/api/v1/moonshine/models/tasks/{task_id}", self.api_moonshine_model_task, methods=["GET"])
         self.add_api_route("/api/v1/moonshine/sam/capabilities", self.api_moonshine_sam_capabilities, methods=["GET"])
         self.add_api_route("/api/v1/moonshine/sam/predict", self.api_moonshine_sam_predict, methods=["POST"])
+        self.add_api_route("/api/v1/moonshine/sam/prepare_image", self.api_moonshine_sam_prepare_image, methods=["POST"])
+        self.add_api_route("/api/v1/moonshine/sam/prepare_image", self.api_moonshine_sam_prepare_image_status, methods=["GET"])
         self.add_api_route("/api/v1/moonshine/sam/video/propagate", self.api_moonshine_sam_video_propagate, methods=["POST"])
         self.add_api_route("/api/v1/moonshine/sam/video/propagate/jobs", self.api_moonshine_sam_video_propagate_job_create, methods=["POST"])
         self.add_api_route("/api/v1/moonshine/sam/video/propagate/jobs/{task_id}", self.api_moonshine_sam_video_propagate_job, methods=["GET"])
         self.add_api_route("/api/v1/moonshine/sam/video/propagate/jobs/{task_id}/result", self.api_moonshine_sam_video_propagate_job_result, methods=["GET"])
         self.add_api_route("/api/v1/moonshine/sam/video/propagate/jobs/{task_id}/cancel", self.api_moonshine_sam_video_propagate_job_cancel, methods=["POST"])
         self.add_api_route("/api/v1/moonshine/sam/text/predict", self.api_moonshine_sam_text_predict, methods=["POST"])
+        self.add_api_route("/api/v1/moonshine/sam/text/predict_batch", self.api_moonshine_sam_text_predict_batch, methods=["POST"])
         self.add_api_route("/api/v1/moonshine/image/process", self.api_moonshine_image_process, methods=["POST"])
+        self.add_api_route("/api/v1/moonshine/image/process/stream", self.api_moonshine_image_process_stream, methods=["POST"])
+        self.add_api_route("/api/v1/moonshine/image/process/jobs", self.api_moonshine_image_process_job_create, methods=["POST"])
         self.add_api_route("/api/v1/moonshine/image/inspect_folder_masks", self.api_moonshine_image_inspect_folder_masks, methods=["POST"])
         self.add_api_route("/api/v1/moonshine/image/process_folder", self.api_moonshine_image_process_folder, methods=["POST"])
         
@@ -270,10 +330,24 @@ class Api:
         self.combined_asgi_app = socketio.ASGIApp(self.sio, self.app)
         self.app.mount("/ws", self.combined_asgi_app)
         global_sio = self.sio
+        # Job progress is pushed to per-job rooms; polling keeps working.
+        progress_publisher.attach(self.sio)
+        sam_video_task_manager.add_listener(self._publish_sam_video_progress)
+        sam_video_task_manager.clear_stale_spills()
+        self._start_warm_up()
 
     def add_api_route(self, path: str, endpoint, **kwargs):
         return self.app.add_api_route(path, endpoint, **kwargs)
 
+    @staticmethod
+    def _publish_sam_video_progress(task: dict):
+        progress_publisher.publish(
+            sam_video_room(task["taskId"]),
+            "sam_video_progress",
+            task,
+            final=task["status"] in SAM_VIDEO_TASK_FINISHED_STATUSES,
+        )
+
     def api_save_image(self, file: UploadFile):
         # Sanitize filename to prevent path traversal
         safe_filename = Path(file.filename).name  # Get just the filename component
@@ -305,6 +379,8 @@ class Api:
     def api_switch_model(self, req: SwitchModelRequest) -> ModelInfo:
         if req.name == self.model_manager.name:
             return self.model_manager.current_model
+        # Do not swap the model out from under the warm-up load.
+        self.readiness.wait("model", timeout=WARM_UP_WAIT_TIMEOUT_S)
         try:
             self.model_manager.switch(req.name)
         except RuntimeError as error:
@@ -312,15 +388,17 @@ class Api:
         return self.model_manager.current_model
 
     def api_switch_plugin_model(self, req: SwitchPluginModelRequest):
+        self.readiness.wait("plugins", timeout=WARM_UP_WAIT_TIMEOUT_S)
         if req.plugin_name in self.plugins:
             self.plugins[req.plugin_name].switch_model(req.model_name)
             if req.plugin_name == RemoveBG.name:
                 self.config.remove_bg_model = req.model_name
             if req.plugin_name == RealESRGANUpscaler.name:
                 self.config.realesrgan_model = req.model_name
-            torch_gc()
+            gpu_housekeeper.release("model_switch")
 
     def api_server_config(self) -> ServerConfigResponse:
+        self.readiness.wait("plugins", timeout=WARM_UP_WAIT_TIMEOUT_S)
         plugins = []
         for it in self.plugins.values():
             plugins.append(
@@ -356,9 +434,12 @@ class Api:
                     "recommended": slbr_recommended,
                 }
                 key = (str(self._model_dir()), str(self.config.device))
-                loaded = self._moonshine_runners.get(key, None) is not None and (
-                    self._moonshine_runners[key]._model is not None
-                )
+                runner = self._moonshine_runners.get(key, None)
+                loaded = runner is not None and runner._model is not None
+                if runner is not None:
+                    calibration = runner.tuning_profile(calibrate=False)
+                    if calibration is not None:
+                        model["parameters"]["calibration"] = calibration
             elif model.get("type") == "image":
                 loaded = self.model_manager.name == model_id and self.model_manager.model is not None
             elif model.get("type") == "mask":
@@ -438,7 +519,12 @@ class Api:
             raise HTTPException(status_code=404, detail=f"Unknown model: {model_id}")
 
         cuda_info = self._get_cuda_info()
-        models = build_model_status(self._model_dir(), cuda_info)
+        models = build_model_status(
+            self._model_dir(),
+            cuda_info,
+            force_verify=True,
+            model_ids={model_id},
+        )
         self._attach_moonshine_model_runtime_metadata(models, cuda_info)
         model = next((item for item in models if item.get("id") == model_id), None)
         if model is None:
@@ -600,11 +686,60 @@ class Api:
                 points=req.points,
                 box=req.box,
                 multimask_output=req.multimask_output,
+                image_hash=req.image_hash,
+                image_id=req.image_id,
+                image_identity=req.image_identity,
+                mask_encoding=req.mask_encoding,
             )
+        except SamImageNotCachedError as error:
+            raise HTTPException(status_code=409, detail=str(error))
         except SamServiceError as error:
             raise HTTPException(status_code=422, detail=str(error))
         return JSONResponse(content=jsonable_encoder(result))
 
+    def api_moonshine_sam_prepare_image(self, req: MoonshineSamPrepareImageRequest):
+        """Queue SAM1/SAM2 image embeddings so the first click only runs the decoder."""
+        service = self._get_sam_service()
+        try:
+            model_status = service._get_model_status(req.model_id)
+        except SamServiceError as error:
+            raise HTTPException(status_code=422, detail=str(error))
+        if model_status.get("family") == "sam3":
+            raise HTTPException(
+                status_code=422,
+                detail=f"Image embeddings can only be prepared for SAM1/SAM2.1 models: {req.model_id}",
+            )
+        items = []
+        rejected = []
+        for image in req.images:
+            try:
+                image_hash = service.image_identity(image, req.image_type)
+            except SamServiceError as error:
+                rejected.append({"image": image, "status": "failed", "error": str(error)})
+                continue
+            items.append(
+                {
+                    "image": image,
+                    "imageType": req.image_type,
+                    "imageHash": image_hash,
+                }
+            )
+        queued = sam_prepare_queue.submit(service, req.model_id, items, replace=req.replace)
+        payload = [
+            {key: value for key, value in item.items() if key != "image" or req.image_type == "path"}
+            for item in queued
+        ]
+        return JSONResponse(
+            content=jsonable_encoder(
+                {"modelId": req.model_id, "items": payload + rejected, "pending": len(queued)}
+            )
+        )
+
+    def api_moonshine_sam_prepare_image_status(self, image_hashes: Optional[str] = Query(None)):
+        """Report prepare progress, optionally for a comma separated list of image hashes."""
+        hashes = [value for value in (image_hashes or "").split(",") if value] or None
+        return JSONResponse(content=jsonable_encoder(sam_prepare_queue.status(hashes)))
+
     def api_moonshine_sam_video_propagate(self, req: MoonshineSamVideoPropagateRequest):
         """Run SAM video propagation on a JPEG frame directory or local video path."""
         try:
@@ -698,8 +833,13 @@ class Api:
             raise HTTPException(status_code=422, detail=task.error or task.message)
         if task.status == "canceled":
             raise HTTPException(status_code=409, detail=task.message)
-        if task.status != "completed" or task.result is None:
+        if task.status != "completed" or (task.result is None and task.result_path is None):
             raise HTTPException(status_code=409, detail="SAM video propagation task is not complete")
+        if task.result_path is not None:
+            # Spilled results are streamed from disk instead of loaded back.
+            if not os.path.isfile(task.result_path):
+                raise HTTPException(status_code=410, detail="SAM video propagation result expired")
+            return FileResponse(task.result_path, media_type="application/json")
         return JSONResponse(content=jsonable_encoder(task.result))
 
     def api_moonshine_sam_video_propagate_job_cancel(self, task_id: str):
@@ -720,6 +860,21 @@ class Api:
                 prompt_source=req.prompt_source,
                 prompt_color=req.prompt_color,
                 prompt_noun=req.prompt_noun,
+                mask_encoding=req.mask_encoding,
+            )
+        except SamServiceError as error:
+            raise HTTPException(status_code=422, detail=str(error))
+        return JSONResponse(content=jsonable_encoder(result))
+
+    def api_moonshine_sam_text_predict_batch(self, req: MoonshineSamTextBatchPredictRequest):
+        """Run several SAM3 text prompts on one image in a shared forward."""
+        try:
+            result = self._get_sam_service().predict_text_batch(
+                image=req.image,
+                image_type=req.image_type,
+                model_id=req.model_id,
+                queries=[query.model_dump() for query in req.queries],
+                mask_encoding=req.mask_encoding,
             )
         except SamServiceError as error:
             raise HTTPException(status_code=422, detail=str(error))
@@ -748,6 +903,7 @@ class Api:
         os.environ["HF_HOME"] = str(next_model_dir / "huggingface")
         self._moonshine_runners.clear()
         self._sam_services.clear()
+        start_checksum_verifier(next_model_dir)
 
     def _get_slbr_runner(self) -> SlbrRunner:
         key = (str(self._model_dir()), str(self.config.device))
@@ -770,7 +926,12 @@ class Api:
         key = (str(self._model_dir()), sam_device)
         service = self._sam_services.get(key)
         if service is None:
-            service = SamService(self._model_dir(), sam_device)
+            service = SamService(
+                self._model_dir(),
+                sam_device,
+                embedding_cache_mb=self.config.sam_embedding_cache_mb,
+                embedding_offload=self.config.sam_embedding_offload,
+            )
             self._sam_services[key] = service
         return service
 
@@ -782,6 +943,10 @@ class Api:
         if not force and sam_video_task_manager.has_active_tasks():
             logger.info(f"Skip SAM runtime release: reason={reason}, active SAM video task is running")
             return
+        if force:
+            # Processing releases keep queued prepares and offload embeddings to
+            # CPU; only a forced release (model directory switch) discards them.
+            sam_prepare_queue.clear()
         released_totals = {
             "predictors": 0,
             "sam3ImagePredictors": 0,
@@ -792,7 +957,7 @@ class Api:
             "textImageCache": 0,
         }
         for service in list(self._sam_services.values()):
-            released = service.release()
+            released = service.release() if force else service.offload()
             for key, value in released.items():
                 released_totals[key] = released_totals.get(key, 0) + int(value or 0)
         if any(released_totals.values()):
@@ -807,12 +972,16 @@ class Api:
         raise HTTPException(status_code=422, detail=f"Unsupported Moonshine model: {model_id}")
 
     def _normalize_moonshine_options(self, options):
-        tile_size = clamp_tile_size(getattr(options, "tile_size", 384))
+        tile_size = normalize_tile_size_option(getattr(options, "tile_size", 384))
         tile_batch = clamp_tile_batch(getattr(options, "tile_batch", 4))
         return {
             "tile_size": tile_size,
             "tile_batch": tile_batch,
-            "overlap": get_overlap_for_tile_size(tile_size),
+            "image_batch": clamp_image_batch(getattr(options, "image_batch", 4)),
+            "precision": normalize_slbr_precision(getattr(options, "precision", "fp32")),
+            "overlap": (
+                None if tile_size == "auto" else get_overlap_for_tile_size(tile_size)
+            ),
             "local_inference_strategy": normalize_local_inference_strategy(
                 getattr(options, "local_inference_strategy", "auto")
             ),
@@ -1050,6 +1219,31 @@ class Api:
             },
         )
 
+    def api_ready(self):
+        """Return warm-up state per component; 503 until every component settled."""
+        snapshot = self.readiness.snapshot()
+        return JSONResponse(
+            status_code=503 if snapshot["status"] == "starting" else 200,
+            content=jsonable_encoder(snapshot),
+            headers={
+                "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+                "Pragma": "no-cache",
+                "Expires": "0",
+            },
+        )
+
+    def api_gpu_memory_diagnostics(self):
+        """Return allocator stats and housekeeping counters."""
+        return JSONResponse(content=jsonable_encoder(gpu_housekeeper.stats()))
+
+    def api_gpu_queue_diagnostics(self):
+        """Return per-device GPU queue state and wait times by priority."""
+        return JSONResponse(content=jsonable_encoder(gpu_arbiter.stats()))
+
+    def api_sam_video_task_diagnostics(self):
+        """Return retained SAM video task counts and result memory usage."""
+        return JSONResponse(content=jsonable_encoder(sam_video_task_manager.stats()))
+
     def api_check_cuda_fixed(self):
         """Return CUDA availability, memory and model recommendation details."""
         return JSONResponse(content=jsonable_encoder(self._get_cuda_info()))
@@ -1086,15 +1280,25 @@ class Api:
         rgb_np_img, color_decision = try_flat_background_fill(
             image, mask, req.color_stabilization
         )
+        gpu_queue_wait_ms = 0.0
         if rgb_np_img is None:
+            failed = True
             try:
-                rgb_np_img = self.model_manager(image, mask, req)
+                with gpu_arbiter.acquire(
+                    self.config.device, GPU_PRIORITY_INTERACTIVE, "inpaint"
+                ) as gpu_lease:
+                    gpu_queue_wait_ms = gpu_lease.wait_ms
+                    rgb_np_img = self.model_manager(image, mask, req)
                 rgb_np_img, color_decision = apply_inpaint_color_stabilization(
                     image, mask, rgb_np_img, req.color_stabilization
                 )
+                failed = False
             finally:
-                torch_gc()
-        logger.info(f"process time: {(time.time() - start) * 1000:.2f}ms")
+                gpu_housekeeper.after_item((self.model_manager.name, image.shape), failed=failed)
+        logger.info(
+            f"process time: {(time.time() - start) * 1000:.2f}ms, "
+            f"gpu queue wait: {gpu_queue_wait_ms:.2f}ms"
+        )
 
         rgb_np_img = cv2.cvtColor(rgb_np_img.astype(np.uint8), cv2.COLOR_BGR2RGB)
         rgb_res = concat_alpha_channel(rgb_np_img, alpha_channel)
@@ -1109,10 +1313,14 @@ class Api:
         return Response(
             content=res_img_bytes,
             media_type=f"image/{ext}",
-            headers={"X-Seed": str(req.sd_seed)},
+            headers={
+                "X-Seed": str(req.sd_seed),
+                "X-Gpu-Queue-Wait-Ms": f"{gpu_queue_wait_ms:.2f}",
+            },
         )
 
     def api_run_plugin_gen_image(self, req: RunPluginRequest):
+        self.readiness.wait("plugins", timeout=WARM_UP_WAIT_TIMEOUT_S)
         ext = "png"
         if req.name not in self.plugins:
             raise HTTPException(status_code=422, detail="Plugin not found")
@@ -1121,8 +1329,11 @@ class Api:
                 status_code=422, detail="Plugin does not support output image"
             )
         rgb_np_img, alpha_channel, infos, *_ = decode_base64_to_image(req.image)
-        bgr_or_rgba_np_img = self.plugins[req.name].gen_image(rgb_np_img, req)
-        torch_gc()
+        with gpu_arbiter.acquire(
+            self.config.device, GPU_PRIORITY_INTERACTIVE, f"plugin_{req.name}"
+        ) as gpu_lease:
+            bgr_or_rgba_np_img = self.plugins[req.name].gen_image(rgb_np_img, req)
+        gpu_housekeeper.after_item((req.name, rgb_np_img.shape))
 
         if bgr_or_rgba_np_img.shape[2] == 4:
             rgba_np_img = bgr_or_rgba_np_img
@@ -1138,9 +1349,11 @@ class Api:
                 infos=infos,
             ),
             media_type=f"image/{ext}",
+            headers={"X-Gpu-Queue-Wait-Ms": f"{gpu_lease.wait_ms:.2f}"},
         )
 
     def api_run_plugin_gen_mask(self, req: RunPluginRequest):
+        self.readiness.wait("plugins", timeout=WARM_UP_WAIT_TIMEOUT_S)
         if req.name not in self.plugins:
             raise HTTPException(status_code=422, detail="Plugin not found")
         if not self.plugins[req.name].support_gen_mask:
@@ -1148,12 +1361,16 @@ class Api:
                 status_code=422, detail="Plugin does not support output image"
             )
         rgb_np_img, alpha_channel, infos = decode_base64_to_image(req.image)
-        bgr_or_gray_mask = self.plugins[req.name].gen_mask(rgb_np_img, req)
-        torch_gc()
+        with gpu_arbiter.acquire(
+            self.config.device, GPU_PRIORITY_INTERACTIVE, f"plugin_{req.name}"
+        ) as gpu_lease:
+            bgr_or_gray_mask = self.plugins[req.name].gen_mask(rgb_np_img, req)
+        gpu_housekeeper.after_item((req.name, rgb_np_img.shape))
         res_mask = gen_frontend_mask(bgr_or_gray_mask)
         return Response(
             content=numpy_to_bytes(res_mask, "png"),
             media_type="image/png",
+            headers={"X-Gpu-Queue-Wait-Ms": f"{gpu_lease.wait_ms:.2f}"},
         )
 
     def api_samplers(self) -> List[str]:
@@ -1210,10 +1427,47 @@ class Api:
         return ModelManager(
             name=self.config.model,
             device=torch.device(self.config.device),
+            inference_batch_size=self.config.inference_batch_size,
+            inference_batch_wait_ms=self.config.inference_batch_wait_ms,
+            load_on_init=False,
             no_half=self.config.no_half,
             low_mem=self.config.low_mem,
         )
 
+    def _start_warm_up(self):
+        threading.Thread(
+            target=self._run_warm_up,
+            name="moonshine-warm-up",
+            daemon=True,
+        ).start()
+
+    def _run_warm_up(self):
+        """Build plugins, load the default model and run one dummy forward."""
+        self.readiness.run("plugins", self._warm_up_plugins)
+        model_name = self.model_manager.name
+        if model_name not in self.model_manager.available_models:
+            self.readiness.skip("model", f"{model_name} is not installed")
+            self.readiness.skip("modelWarmup", f"{model_name} is not installed")
+            return
+        if not self.readiness.run("model", self._warm_up_model_load):
+            self.readiness.skip("modelWarmup", "model failed to load")
+            return
+        self.readiness.run("modelWarmup", self._warm_up_model_forward)
+
+    def _warm_up_plugins(self) -> dict:
+        self.plugins = self._build_plugins()
+        return {"plugins": list(self.plugins)}
+
+    def _warm_up_model_load(self) -> dict:
+        self.model_manager.load()
+        return {"name": self.model_manager.name, "device": str(self.model_manager.device)}
+
+    def _warm_up_model_forward(self) -> dict:
+        # Queued behind interactive requests like any other bulk work.
+        with gpu_arbiter.acquire(self.config.device, GPU_PRIORITY_BULK, "warm_up") as gpu_lease:
+            self.model_manager.warm_up()
+        return {"gpuQueueWaitMs": round(gpu_lease.wait_ms, 3)}
+
     @staticmethod
     def _normalize_base64_payload(value: str) -> str:
         if value.startswith("data:image/") or value.startswith(
@@ -1222,15 +1476,6 @@ class Api:
             return value.split(";")[1].split(",")[1]
         return value
 
-    @staticmethod
-    def _detect_base64_image_format(value: str) -> str:
-        encoded = Api._normalize_base64_payload(value)
-        try:
-            with Image.open(io.BytesIO(base64.b64decode(encoded))) as image:
-                return normalize_image_format(image.format)
-        except Exception:
-            return ""
-
     @staticmethod
     def _build_result_meta(spec: dict) -> dict:
         return {
@@ -1272,14 +1517,15 @@ class Api:
 
     def _decode_item_image(self, image_value: str, image_type: str):
         if image_type == "base64":
-            image, alpha_channel, infos = decode_base64_to_image(image_value)
-            return image, alpha_channel, infos, self._detect_base64_image_format(image_value)
+            image_bytes = base64.b64decode(self._normalize_base64_payload(image_value))
+            image, alpha_channel, infos, image_format = decode_image_file(
+                io.BytesIO(image_bytes)
+            )
+            return image, alpha_channel, infos, normalize_image_format(image_format)
 
         if not os.path.exists(image_value):
             raise FileNotFoundError(f"Image file not found: {image_value}")
-        with open(image_value, "rb") as image_file:
-            image_b64 = base64.b64encode(image_file.read()).decode("utf-8")
-        image, alpha_channel, infos = decode_base64_to_image(image_b64)
+        image, alpha_channel, infos, _ = decode_image_file(image_value)
         return image, alpha_channel, infos, image_format_from_path(image_value)
 
     def _decode_item_mask(self, mask_value: str, mask_type: str):
@@ -1310,14 +1556,11 @@ class Api:
             output_file.write(result_bytes)
         return output_path
 
-    def api_moonshine_image_process(self, req: MoonshineImageProcessRequest):
-        """Process SLBR images, optionally applying local results through a mask."""
-        self._release_sam_runtime_before_processing("moonshine_image_process")
-        runner = self._get_moonshine_runner(req.model_id)
-        options = self._normalize_moonshine_options(req.options)
-        results = []
-        start_time = time.time()
-
+    def _iter_moonshine_image_process_results(
+        self, req: MoonshineImageProcessRequest, runner, options: dict
+    ):
+        """Yield one result per SLBR item as soon as it has been encoded."""
+        precision = runner.resolve_precision(options["precision"])
         for index, item in enumerate(
             tqdm(
                 req.data,
@@ -1327,6 +1570,7 @@ class Api:
             )
         ):
             item_id = item.id or f"item_{index}"
+            image_rgb = None
             try:
                 image_rgb, alpha_channel, infos, source_format = self._decode_item_image(
                     item.image, req.image_type
@@ -1342,17 +1586,21 @@ class Api:
                             (image_bgr.shape[1], image_bgr.shape[0]),
                             interpolation=cv2.INTER_NEAREST,
                         )
-                    clean_bgr, local_diagnostics = runner.infer_bgr_local(
-                        image_bgr,
-                        mask,
-                        tile_size=options["tile_size"],
-                        tile_batch=options["tile_batch"],
-                        strategy=options["local_inference_strategy"],
-                        bbox_empty_ratio_threshold=options[
-                            "local_bbox_empty_ratio_threshold"
-                        ],
-                        edge_feather_px=options["local_edge_feather_px"],
-                    )
+                    with gpu_arbiter.acquire(
+                        self.config.device, GPU_PRIORITY_INTERACTIVE, "slbr_image_process"
+                    ) as gpu_lease:
+                        clean_bgr, local_diagnostics = runner.infer_bgr_local(
+                            image_bgr,
+                            mask,
+                            tile_size=options["tile_size"],
+                            tile_batch=options["tile_batch"],
+                            strategy=options["local_inference_strategy"],
+                            bbox_empty_ratio_threshold=options[
+                                "local_bbox_empty_ratio_threshold"
+                            ],
+                            edge_feather_px=options["local_edge_feather_px"],
+                            precision=precision,
+                        )
                     output_spec = self._resolve_result_spec(
                         "png",
                         req.output_quality,
@@ -1360,11 +1608,15 @@ class Api:
                         alpha_channel,
                     )
                 else:
-                    clean_bgr, _ = runner.infer_bgr(
-                        image_bgr,
-                        tile_size=options["tile_size"],
-                        tile_batch=options["tile_batch"],
-                    )
+                    with gpu_arbiter.acquire(
+                        self.config.device, GPU_PRIORITY_INTERACTIVE, "slbr_image_process"
+                    ) as gpu_lease:
+                        clean_bgr, _ = runner.infer_bgr(
+                            image_bgr,
+                            tile_size=options["tile_size"],
+                            tile_batch=options["tile_batch"],
+                            precision=precision,
+                        )
                     output_spec = self._resolve_result_spec(
                         req.output_format,
                         req.output_quality,
@@ -1400,6 +1652,8 @@ class Api:
                         if local_diagnostics
                         else "full"
                     ),
+                    "precision": precision,
+                    "gpuQueueWaitMs": round(gpu_lease.wait_ms, 3),
                     **self._build_result_meta(output_spec),
                 }
                 if local_diagnostics:
@@ -1415,21 +1669,32 @@ class Api:
                             "fallback_reason": local_diagnostics["fallback_reason"] or None,
                         }
                     )
-                results.append(result)
-                torch_gc()
+                gpu_housekeeper.after_item((req.model_id, image_rgb.shape))
+                yield result
             except Exception as e:
+                gpu_housekeeper.after_item(
+                    (req.model_id, getattr(image_rgb, "shape", None)), failed=True
+                )
                 if isinstance(e, DiskSpaceError):
                     raise
                 logger.exception(f"Moonshine image processing failed for {item_id}")
-                results.append(
-                    {
-                        "id": item_id,
-                        "index": index,
-                        "error": str(e),
-                        "success": False,
-                    }
-                )
+                yield {
+                    "id": item_id,
+                    "index": index,
+                    "error": str(e),
+                    "success": False,
+                }
+
+    def _start_moonshine_image_process(self, req: MoonshineImageProcessRequest):
+        self._release_sam_runtime_before_processing("moonshine_image_process")
+        runner = self._get_moonshine_runner(req.model_id)
+        options = self._normalize_moonshine_options(req.options)
+        return self._iter_moonshine_image_process_results(req, runner, options)
 
+    def api_moonshine_image_process(self, req: MoonshineImageProcessRequest):
+        """Process SLBR images, optionally applying local results through a mask."""
+        start_time = time.time()
+        results = list(self._start_moonshine_image_process(req))
         total_time = time.time() - start_time
         summary = summarize_processing_results(results)
         return JSONResponse(
@@ -1443,26 +1708,42 @@ class Api:
             )
         )
 
-    def api_batch_inpaint(self, req: BatchInpaintRequest):
-        """Process a batch of image and mask pairs in one request."""
-        if len(req.data) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Empty data list",
-            )
+    def api_moonshine_image_process_stream(
+        self,
+        req: MoonshineImageProcessRequest,
+        format: Literal["ndjson", "sse"] = Query("ndjson"),
+    ):
+        """Stream each SLBR item result as NDJSON lines or server-sent events."""
+        return StreamingResponse(
+            iter_batch_events(
+                self._start_moonshine_image_process(req),
+                summarize_processing_results,
+                format,
+            ),
+            media_type=STREAM_MEDIA_TYPES[format],
+        )
 
-        self._release_sam_runtime_before_processing("batch_inpaint")
-        results = []
+    def api_moonshine_image_process_job_create(self, req: MoonshineImageProcessRequest):
+        """Start a background SLBR batch whose results are fetched incrementally."""
+        results = self._start_moonshine_image_process(req)
+        task = batch_job_manager.create_task("moonshine_image_process", len(req.data))
+        batch_job_manager.start(task.task_id, results, summarize_processing_results)
+        return JSONResponse(content=jsonable_encoder(task.to_dict()))
 
-        # Create one InpaintRequest and reuse the shared batch params.
+    def _iter_batch_inpaint_results(self, req: BatchInpaintRequest):
+        """Yield one result per image/mask pair as soon as it has been encoded."""
+        # Create one InpaintRequest and reuse the shared batch params. Items are
+        # decoded once to numpy and passed to the model directly, so the request
+        # never carries the per-item image/mask payloads.
         inpaint_req = req.inpaint.model_copy(deep=True)
-
-        start_time = time.time()
+        inpaint_req.image = ""
+        inpaint_req.mask = ""
 
         for i, item in enumerate(
             tqdm(req.data, total=len(req.data), desc="Batch processing", mininterval=1)
         ):
             item_id = item.id or f"item_{i}"
+            image = None
             try:
                 image, alpha_channel, infos, source_format = self._decode_item_image(
                     item.image, req.image_type
@@ -1479,32 +1760,22 @@ class Api:
                         interpolation=cv2.INTER_NEAREST,
                     )
 
-                if req.image_type == "base64":
-                    inpaint_req.image = self._normalize_base64_payload(item.image)
-                else:
-                    with open(item.image, "rb") as image_file:
-                        inpaint_req.image = base64.b64encode(image_file.read()).decode(
-                            "utf-8"
-                        )
-
-                if req.mask_type == "base64":
-                    inpaint_req.mask = self._normalize_base64_payload(item.mask)
-                else:
-                    with open(item.mask, "rb") as mask_file:
-                        inpaint_req.mask = base64.b64encode(mask_file.read()).decode(
-                            "utf-8"
-                        )
-
                 rgb_np_img, color_decision = try_flat_background_fill(
                     image, mask, inpaint_req.color_stabilization
                 )
                 if rgb_np_img is None:
-                    rgb_np_img = self.model_manager(image, mask, inpaint_req)
+                    # One lease per item, so queued interactive requests get in between.
+                    with gpu_arbiter.acquire(
+                        self.config.device, GPU_PRIORITY_BULK, "batch_inpaint"
+                    ):
+                        rgb_np_img = self.model_manager(image, mask, inpaint_req)
                     rgb_np_img, color_decision = apply_inpaint_color_stabilization(
                         image, mask, rgb_np_img, inpaint_req.color_stabilization
                     )
 
-                rgb_np_img = cv2.cvtColor(rgb_np_img.astype(np.uint8), cv2.COLOR_BGR2RGB)
+                rgb_np_img = cv2.cvtColor(
+                    rgb_np_img.astype(np.uint8, copy=False), cv2.COLOR_BGR2RGB
+                )
                 rgb_res = concat_alpha_channel(rgb_np_img, alpha_channel)
 
                 output_spec = self._resolve_result_spec(
@@ -1529,31 +1800,44 @@ class Api:
                 else:
                     result_data = self._build_result_payload(res_img_bytes, output_spec)
 
-                results.append(
-                    {
-                        "id": item_id,
-                        "index": i,
-                        "result": result_data,
-                        "success": True,
-                        **self._build_result_meta(output_spec),
-                    }
-                )
+                result = {
+                    "id": item_id,
+                    "index": i,
+                    "result": result_data,
+                    "success": True,
+                    **self._build_result_meta(output_spec),
+                }
 
             except Exception as e:
                 if isinstance(e, DiskSpaceError):
                     raise
                 logger.error(f"Error processing item {item_id}: {str(e)}")
-                results.append(
-                    {
-                        "id": item_id,
-                        "index": i,
-                        "error": str(e),
-                        "success": False,
-                    }
-                )
-            finally:
-                torch_gc()
+                result = {
+                    "id": item_id,
+                    "index": i,
+                    "error": str(e),
+                    "success": False,
+                }
+            gpu_housekeeper.after_item(
+                (self.model_manager.name, getattr(image, "shape", None)),
+                failed=not result["success"],
+            )
+            yield result
+
+    def _start_batch_inpaint(self, req: BatchInpaintRequest):
+        if len(req.data) == 0:
+            raise HTTPException(
+                status_code=400,
+                detail="Empty data list",
+            )
+
+        self._release_sam_runtime_before_processing("batch_inpaint")
+        return self._iter_batch_inpaint_results(req)
 
+    def api_batch_inpaint(self, req: BatchInpaintRequest):
+        """Process a batch of image and mask pairs in one request."""
+        start_time = time.time()
+        results = list(self._start_batch_inpaint(req))
         total_time = time.time() - start_time
         logger.info(
             f"Batch processing completed in {total_time:.2f}s for {len(req.data)} images"
@@ -1572,6 +1856,56 @@ class Api:
             )
         )
 
+    @staticmethod
+    def _summarize_batch_inpaint(flags: List[dict]) -> dict:
+        return {"success_count": sum(1 for flag in flags if flag["success"])}
+
+    def api_batch_inpaint_stream(
+        self,
+        req: BatchInpaintRequest,
+        format: Literal["ndjson", "sse"] = Query("ndjson"),
+    ):
+        """Stream each batch item result as NDJSON lines or server-sent events."""
+        return StreamingResponse(
+            iter_batch_events(
+                self._start_batch_inpaint(req),
+                self._summarize_batch_inpaint,
+                format,
+            ),
+            media_type=STREAM_MEDIA_TYPES[format],
+        )
+
+    def api_batch_inpaint_job_create(self, req: BatchInpaintRequest):
+        """Start a background batch inpaint whose results are fetched incrementally."""
+        results = self._start_batch_inpaint(req)
+        task = batch_job_manager.create_task("batch_inpaint", len(req.data))
+        batch_job_manager.start(task.task_id, results, self._summarize_batch_inpaint)
+        return JSONResponse(content=jsonable_encoder(task.to_dict()))
+
+    def api_batch_job(self, task_id: str):
+        task = batch_job_manager.get_task(task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Batch job not found")
+        return JSONResponse(content=jsonable_encoder(task.to_dict()))
+
+    def api_batch_job_results(
+        self,
+        task_id: str,
+        cursor: int = Query(0, ge=0),
+        limit: int = Query(0, ge=0),
+    ):
+        """Return buffered results from ``cursor`` on; earlier results are released."""
+        payload = batch_job_manager.take_results(task_id, cursor, limit)
+        if payload is None:
+            raise HTTPException(status_code=404, detail="Batch job not found")
+        return JSONResponse(content=jsonable_encoder(payload))
+
+    def api_batch_job_cancel(self, task_id: str):
+        task = batch_job_manager.cancel_task(task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Batch job not found")
+        return JSONResponse(content=jsonable_encoder(task.to_dict()))
+
     def api_batch_inpaint_by_folder(self, req: BatchInpaintByFolderRequest):
         """Process images from an image folder and masks from a mask folder.
         This wraps the existing batch_processing.batch_inpaint workflow."""
@@ -1601,6 +1935,10 @@ class Api:
                 output_quality=req.output_quality,
                 color_stabilization=req.color_stabilization,
                 return_results=True,
+                workers=req.workers,
+                prefetch=req.prefetch,
+                model_processes=req.model_processes,
+                force=req.force,
             )
             success_count = sum(
                 1 for result in folder_results if result.get("success", False)
@@ -1614,6 +1952,7 @@ class Api:
                 "total_time": total_time,
                 "processed_count": success_count,
                 "success_count": success_count,
+                "resumed_count": sum(1 for result in folder_results if result.get("resumed")),
                 "image_folder": str(image_path),
                 "mask_folder": str(mask_path),
                 "output_folder": str(output_path),
@@ -1737,6 +2076,9 @@ class Api:
                     "local_bbox_empty_ratio_threshold"
                 ],
                 local_edge_feather_px=options["local_edge_feather_px"],
+                force=req.force,
+                image_batch=options["image_batch"],
+                precision=options["precision"],
             )
             total_time = time.time() - start_time
             summary = summarize_processing_results(results)
@@ -1753,6 +2095,7 @@ class Api:
                         "message": status_messages[summary["status"]],
                         "total_time": total_time,
                         "processed_count": len(results),
+                        "resumed_count": sum(1 for result in results if result.get("resumed")),
                         "image_folder": str(image_path),
                         "output_folder": str(output_path),
                         "results": results,
@@ -1801,6 +2144,9 @@ class Api:
 
     @staticmethod
     def _load_mask_from_path(mask_path: str, keep_grayscale: bool):
+        track_mask = read_mask_track_ref(mask_path)
+        if track_mask is not None:
+            return track_mask
         mask_file = to_path(mask_path)
         if not mask_file.is_file():
             raise FileNotFoundError(f"Mask file not found: {mask_path}")
@@ -1896,9 +2242,19 @@ class Api:
         os.makedirs(masks_dir, exist_ok=True)
 
         estimated_snapshot_bytes = 0
+        track_paths = set()
         for frame_item in req.frames:
             estimated_snapshot_bytes += file_size_or_zero(frame_item.image_path)
-            if frame_item.mask_path:
+            track_ref = parse_mask_track_ref(frame_item.mask_path)
+            if track_ref is not None:
+                # Track frames are decoded into PNGs; count them uncompressed.
+                try:
+                    track = open_mask_track(track_ref[0])
+                except (OSError, ValueError):
+                    continue
+                track_paths.add(track_ref[0])
+                estimated_snapshot_bytes += track.width * track.height
+            elif frame_item.mask_path:
                 estimated_snapshot_bytes += file_size_or_zero(frame_item.mask_path)
         estimated_snapshot_bytes += len(json.dumps(req.model_dump(mode="json"), ensure_ascii=False).encode("utf-8"))
         estimated_snapshot_bytes += len(json.dumps(failed_items, ensure_ascii=False).encode("utf-8"))
@@ -1909,17 +2265,33 @@ class Api:
             operation="保存视频失败诊断快照",
         )
 
-        for frame_item in req.frames:
-            if os.path.exists(frame_item.image_path):
-                shutil.copy2(
-                    frame_item.image_path,
-                    os.path.join(frames_dir, os.path.basename(frame_item.image_path)),
-                )
-            if frame_item.mask_path and os.path.exists(frame_item.mask_path):
-                shutil.copy2(
-                    frame_item.mask_path,
-                    os.path.join(masks_dir, os.path.basename(frame_item.mask_path)),
-                )
+        try:
+            for frame_item in req.frames:
+                if os.path.exists(frame_item.image_path):
+                    shutil.copy2(
+                        frame_item.image_path,
+                        os.path.join(frames_dir, os.path.basename(frame_item.image_path)),
+                    )
+                track_ref = parse_mask_track_ref(frame_item.mask_path)
+                if track_ref is not None:
+                    track_path, track_frame = track_ref
+                    try:
+                        track_mask = read_mask_track_ref(frame_item.mask_path)
+                    except (OSError, ValueError) as error:
+                        logger.warning(f"Failure snapshot skips mask {frame_item.mask_path}: {error}")
+                        continue
+                    write_image_file(
+                        os.path.join(masks_dir, f"{track_path.stem}_{track_frame:06d}.png"),
+                        track_mask,
+                    )
+                elif frame_item.mask_path and os.path.exists(frame_item.mask_path):
+                    shutil.copy2(
+                        frame_item.mask_path,
+                        os.path.join(masks_dir, os.path.basename(frame_item.mask_path)),
+                    )
+        finally:
+            for track_path in track_paths:
+                close_mask_tracks(track_path)
 
         request_path = os.path.join(snapshot_dir, "request_snapshot.json")
         with open(request_path, "w", encoding="utf-8") as fp:
@@ -1934,6 +2306,66 @@ class Api:
         )
         return snapshot_dir
 
+    def _prepare_video_inpaint_frame(
+        self, item, req: VideoBatchInpaintRequest, submit_early: bool = True, gpu_lease=None
+    ) -> dict:
+        """Decode one LaMa/MAT video frame and submit its inference; errors are deferred to the caller.
+
+        With ``submit_early`` off the frame is only decoded and the caller runs
+        the model inline. With ``gpu_lease`` the inference is lent out through
+        the batch lease so its yields wait for the frame.
+        """
+        frame = {}
+        try:
+            image, alpha_channel = self._load_image_from_path(item.image_path)
+            frame.update(image=image, alpha_channel=alpha_channel)
+            keep_grayscale = bool(req.options.keep_mask_grayscale)
+            mask_plan = get_mask_plan_for_path(
+                item.mask_path,
+                lambda: self._load_mask_from_path(item.mask_path, keep_grayscale),
+                target_shape=image.shape[:2],
+                variant=keep_grayscale,
+            )
+            mask = mask_plan.mask.copy()
+
+            inpaint_req = req.options.inpaint.model_copy(deep=True)
+            inpaint_req.image = ""
+            inpaint_req.mask = ""
+            mask_nonzero_pixels = mask_plan.nonzero
+            frame.update(
+                mask=mask,
+                mask_plan=mask_plan,
+                mask_nonzero_pixels=mask_nonzero_pixels,
+                inpaint_req=inpaint_req,
+                processed_bgr=None,
+                color_decision=None,
+                future=None,
+            )
+            if mask_nonzero_pixels <= 0:
+                return frame
+
+            processed_bgr, color_decision = try_flat_background_fill(
+                image, mask, inpaint_req.color_stabilization, mask_plan=mask_plan
+            )
+            frame.update(processed_bgr=processed_bgr, color_decision=color_decision)
+            if processed_bgr is None:
+                if inpaint_req.hd_strategy == HDStrategy.ROI:
+                    _, roi_diagnostics = mask_plan.roi_crop_boxes(
+                        inpaint_req.hd_strategy_crop_margin,
+                        **self.model_manager.padding_spec(),
+                    )
+                    frame["roi_diagnostics"] = {
+                        key: value for key, value in roi_diagnostics.items() if key != "roi_boxes"
+                    }
+                if submit_early:
+                    submit = lambda: self.model_manager.submit(
+                        image, mask, inpaint_req, mask_plan=mask_plan
+                    )
+                    frame["future"] = gpu_lease.lend(submit) if gpu_lease else submit()
+        except Exception as error:
+            frame["error"] = error
+        return frame
+
     def api_video_batch_inpaint(self, req: VideoBatchInpaintRequest):
         """
         Process one video frame batch using frame/mask file paths.
@@ -1950,7 +2382,6 @@ class Api:
             batch_number,
             int(getattr(req.options, "total_batches", batch_number) or batch_number),
         )
-        gc_interval = 8
         slbr_runner = None
         slbr_options = None
         mask_cache = {}
@@ -1984,205 +2415,344 @@ class Api:
         logger.info(
             f"本次视频处理总共{total_batches}批次，当前第{batch_number}批，当前批次进度如下："
         )
+        progress_room = video_batch_room(batch_id)
 
-        for index, item in enumerate(
-            tqdm(req.frames, total=total_frames, mininterval=1, leave=False),
-            start=1,
-        ):
-            image = None
-            mask = None
-            alpha_channel = None
-            mask_nonzero_pixels = None
-            should_gc = index % gc_interval == 0
-            try:
-                image, alpha_channel = self._load_image_from_path(item.image_path)
-
-                if model_id == "slbr":
-                    image_bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-                    apply_scope = str(getattr(item, "apply_scope", "full") or "full")
-                    local_diagnostics = None
-                    if apply_scope == "mask":
-                        mask_cache_key = (os.path.abspath(item.mask_path), False)
-                        cached_mask = mask_cache.get(mask_cache_key)
-                        if cached_mask is None:
-                            cached_mask = self._load_mask_from_path(item.mask_path, False)
-                            mask_cache[mask_cache_key] = cached_mask
-                        mask = cached_mask.copy()
-                        if image.shape[:2] != mask.shape[:2]:
-                            mask = cv2.resize(
-                                mask,
-                                (image.shape[1], image.shape[0]),
-                                interpolation=cv2.INTER_NEAREST,
-                            )
-                        mask_nonzero_pixels = int(np.count_nonzero(mask))
-                        if mask_nonzero_pixels <= 0:
-                            self._save_processed_frame(item.output_path, image_bgr, alpha_channel)
-                            results.append(
-                                {
-                                    "frame_index": item.frame_index,
-                                    "output_path": item.output_path,
-                                    "success": True,
-                                    "skipped": True,
-                                    "skip_reason": "empty-mask",
-                                    "apply_scope": apply_scope,
-                                }
-                            )
-                            continue
-                        processed_bgr, local_diagnostics = slbr_runner.infer_bgr_local(
-                            image_bgr,
-                            mask,
-                            tile_size=slbr_options["tile_size"],
-                            tile_batch=slbr_options["tile_batch"],
-                            strategy=slbr_options["local_inference_strategy"],
-                            bbox_empty_ratio_threshold=slbr_options[
-                                "local_bbox_empty_ratio_threshold"
-                            ],
-                            edge_feather_px=slbr_options["local_edge_feather_px"],
-                        )
-                    else:
-                        processed_bgr, _ = slbr_runner.infer_bgr(
-                            image_bgr,
-                            tile_size=slbr_options["tile_size"],
-                            tile_batch=slbr_options["tile_batch"],
-                        )
-                    self._save_processed_frame(
-                        item.output_path, processed_bgr.astype(np.uint8), alpha_channel
-                    )
-                    result_item = {
-                        "frame_index": item.frame_index,
-                        "output_path": item.output_path,
-                        "success": True,
-                        "apply_scope": apply_scope,
-                    }
-                    if local_diagnostics is not None:
-                        result_item["local_diagnostics"] = local_diagnostics
-                    results.append(result_item)
-                else:
-                    mask_cache_key = (
-                        os.path.abspath(item.mask_path),
-                        bool(req.options.keep_mask_grayscale),
-                    )
+        def publish_batch_progress(current: int, status: str = "running"):
+            progress_publisher.publish(
+                progress_room,
+                "video_batch_progress",
+                {
+                    "batchId": batch_id,
+                    "batchNumber": batch_number,
+                    "totalBatches": total_batches,
+                    "status": status,
+                    "current": current,
+                    "total": total_frames,
+                    "progress": current / total_frames if total_frames else 1.0,
+                    "failed": len(failed_items),
+                },
+                final=status != "running",
+            )
+
+        publish_batch_progress(0)
+
+        pipeline = VideoFramePipeline(
+            prefetch_frames=req.options.prefetch_frames,
+            writer_workers=req.options.writer_workers,
+        )
+        lookahead = pipeline.prefetch_frames
+        slbr_frames = {}
+        if model_id == "slbr":
+            prefetch_frame = lambda frame_item: self._load_image_from_path(frame_item.image_path)
+            if lookahead > 0:
+                lookahead = max(lookahead, slbr_options["image_batch"])
+
+            def prepare_slbr_frame(position: int, frame_item):
+                image, alpha_channel = pipeline.take(position, prefetch_frame, frame_item)
+                apply_scope = str(getattr(frame_item, "apply_scope", "full") or "full")
+                frame = {
+                    "image": image,
+                    "image_bgr": cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
+                    "alpha_channel": alpha_channel,
+                    "apply_scope": apply_scope,
+                    "mask": None,
+                    "mask_nonzero_pixels": None,
+                    "processed_bgr": None,
+                    "local_diagnostics": None,
+                    "error": None,
+                }
+                if apply_scope == "mask":
+                    mask_cache_key = (os.path.abspath(frame_item.mask_path), False)
                     cached_mask = mask_cache.get(mask_cache_key)
                     if cached_mask is None:
-                        cached_mask = self._load_mask_from_path(
-                            item.mask_path, req.options.keep_mask_grayscale
-                        )
+                        cached_mask = self._load_mask_from_path(frame_item.mask_path, False)
                         mask_cache[mask_cache_key] = cached_mask
                     mask = cached_mask.copy()
-
                     if image.shape[:2] != mask.shape[:2]:
                         mask = cv2.resize(
                             mask,
                             (image.shape[1], image.shape[0]),
                             interpolation=cv2.INTER_NEAREST,
                         )
+                    frame["mask"] = mask
+                    frame["mask_nonzero_pixels"] = int(np.count_nonzero(mask))
+                return frame
+
+            def run_slbr_window(start: int):
+                # Consecutive frames share tile forwards; each frame keeps its
+                # own result or error so failures stay per frame.
+                window = []
+                for position in range(
+                    start, min(start + slbr_options["image_batch"], total_frames)
+                ):
+                    try:
+                        frame = prepare_slbr_frame(position, req.frames[position])
+                    except Exception as error:
+                        slbr_frames[position] = error
+                        continue
+                    slbr_frames[position] = frame
+                    if frame["mask_nonzero_pixels"] is None or frame["mask_nonzero_pixels"] > 0:
+                        window.append(frame)
+                if not window:
+                    return
+                with pipeline.stage("infer"):
+                    outcomes = slbr_runner.infer_bgr_window(
+                        [(frame["image_bgr"], frame["mask"]) for frame in window],
+                        tile_size=slbr_options["tile_size"],
+                        tile_batch=slbr_options["tile_batch"],
+                        strategy=slbr_options["local_inference_strategy"],
+                        bbox_empty_ratio_threshold=slbr_options[
+                            "local_bbox_empty_ratio_threshold"
+                        ],
+                        edge_feather_px=slbr_options["local_edge_feather_px"],
+                        precision=slbr_options["precision"],
+                    )
+                for frame, outcome in zip(window, outcomes):
+                    if isinstance(outcome, Exception):
+                        frame["error"] = outcome
+                    else:
+                        frame["processed_bgr"], frame["local_diagnostics"] = outcome
+        else:
+            # Upcoming frames are submitted early so the inference scheduler can
+            # batch same-shape crops instead of running one frame at a time.
+            # Models that cannot batch run each frame inline instead, so one
+            # model instance never sees several concurrent forwards.
+            submit_early = self.model_manager.batches_forwards
+            prefetch_frame = lambda frame_item: self._prepare_video_inpaint_frame(
+                frame_item, req, submit_early, gpu_lease
+            )
+            if lookahead > 0 and submit_early:
+                lookahead = max(lookahead, self.model_manager.inference_scheduler.max_batch_size)
+
+        def queue_frame_write(item, result_item: dict, bgr_result: np.ndarray, alpha_channel):
+            results.append(result_item)
+
+            def on_write_error(error: BaseException):
+                if isinstance(error, DiskSpaceError):
+                    raise error
+                result_item.clear()
+                result_item.update(
+                    {
+                        "frame_index": item.frame_index,
+                        "image_path": item.image_path,
+                        "mask_path": item.mask_path,
+                        "output_path": item.output_path,
+                        "success": False,
+                        "error": str(error),
+                    }
+                )
+                failed_items.append(result_item)
+                logger.error(
+                    f"[{batch_id}] frame {item.frame_index} write failed: {str(error)}"
+                )
 
-                    inpaint_req = req.options.inpaint.model_copy(deep=True)
-                    inpaint_req.image = ""
-                    inpaint_req.mask = ""
-                    mask_nonzero_pixels = int(np.count_nonzero(mask))
+            pipeline.write(
+                self._save_processed_frame,
+                item.output_path,
+                bgr_result,
+                alpha_channel,
+                on_error=on_write_error,
+            )
 
-                    if mask_nonzero_pixels <= 0:
-                        self._save_processed_frame(
-                            item.output_path,
-                            cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
+        # The batch holds the device for its whole run and only lets queued
+        # interactive requests in between frames. Lookahead frames are submitted
+        # through the lease, so a yield first waits for their forwards and holds
+        # new submissions until the batch has the device back.
+        gpu_lease = None
+        gpu_leases = ExitStack()
+        try:
+            gpu_lease = gpu_leases.enter_context(
+                gpu_arbiter.acquire(self.config.device, GPU_PRIORITY_BULK, "video_batch_inpaint")
+            )
+            for index, item in enumerate(
+                tqdm(req.frames, total=total_frames, mininterval=1, leave=False),
+                start=1,
+            ):
+                if req.options.stop_on_error and failed_items:
+                    break
+                gpu_lease.yield_point()
+                image = None
+                mask = None
+                alpha_channel = None
+                mask_nonzero_pixels = None
+                frame_failed = False
+                for ahead_index in range(index, min(index + lookahead, total_frames)):
+                    if ahead_index not in slbr_frames:
+                        pipeline.prefetch(ahead_index, prefetch_frame, req.frames[ahead_index])
+                try:
+                    if model_id == "slbr":
+                        if index - 1 not in slbr_frames:
+                            run_slbr_window(index - 1)
+                        frame = slbr_frames.pop(index - 1)
+                        if isinstance(frame, Exception):
+                            raise frame
+                        image = frame["image"]
+                        mask = frame["mask"]
+                        alpha_channel = frame["alpha_channel"]
+                        mask_nonzero_pixels = frame["mask_nonzero_pixels"]
+                        apply_scope = frame["apply_scope"]
+                        if frame.get("error") is not None:
+                            raise frame["error"]
+                        if mask_nonzero_pixels is not None and mask_nonzero_pixels <= 0:
+                            queue_frame_write(
+                                item,
+                                {
+                                    "frame_index": item.frame_index,
+                                    "output_path": item.output_path,
+                                    "success": True,
+                                    "skipped": True,
+                                    "skip_reason": "empty-mask",
+                                    "apply_scope": apply_scope,
+                                },
+                                frame["image_bgr"],
+                                alpha_channel,
+                            )
+                            continue
+                        result_item = {
+                            "frame_index": item.frame_index,
+                            "output_path": item.output_path,
+                            "success": True,
+                            "apply_scope": apply_scope,
+                            "precision": slbr_runner.resolve_precision(
+                                slbr_options["precision"]
+                            ),
+                        }
+                        if frame["local_diagnostics"] is not None:
+                            result_item["local_diagnostics"] = frame["local_diagnostics"]
+                        queue_frame_write(
+                            item,
+                            result_item,
+                            frame["processed_bgr"].astype(np.uint8),
                             alpha_channel,
                         )
+                    else:
+                        frame = pipeline.take(index - 1, prefetch_frame, item)
+                        image = frame.get("image")
+                        mask = frame.get("mask")
+                        alpha_channel = frame.get("alpha_channel")
+                        mask_nonzero_pixels = frame.get("mask_nonzero_pixels")
+                        if frame.get("error") is not None:
+                            raise frame["error"]
+                        inpaint_req = frame["inpaint_req"]
 
-                        results.append(
-                            {
-                                "frame_index": item.frame_index,
-                                "output_path": item.output_path,
-                                "success": True,
-                                "skipped": True,
-                                "skip_reason": "empty-mask",
-                            }
-                        )
-                        continue
+                        if mask_nonzero_pixels <= 0:
+                            queue_frame_write(
+                                item,
+                                {
+                                    "frame_index": item.frame_index,
+                                    "output_path": item.output_path,
+                                    "success": True,
+                                    "skipped": True,
+                                    "skip_reason": "empty-mask",
+                                },
+                                cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
+                                alpha_channel,
+                            )
+                            continue
 
-                    processed_bgr, color_decision = try_flat_background_fill(
-                        image, mask, inpaint_req.color_stabilization
-                    )
-                    if processed_bgr is None:
-                        processed_bgr = self.model_manager(image, mask, inpaint_req).astype(
-                            np.uint8
-                        )
-                        processed_bgr, color_decision = apply_inpaint_color_stabilization(
-                            image,
-                            mask,
-                            processed_bgr,
-                            inpaint_req.color_stabilization,
-                        )
-                    temporal_decision = None
-                    if temporal_enhancer is not None:
-                        try:
-                            processed_bgr, temporal_decision = (
-                                temporal_enhancer.enhance_frame(
-                                    frame_index=item.frame_index,
-                                    image_rgb=image,
-                                    mask=mask,
-                                    independent_bgr=processed_bgr,
-                                    output_path=item.output_path,
-                                    temporal_objects=getattr(item, "temporal_objects", None),
+                        processed_bgr = frame["processed_bgr"]
+                        color_decision = frame["color_decision"]
+                        if processed_bgr is None:
+                            if frame["future"] is not None:
+                                with pipeline.stage("infer_wait"):
+                                    processed_bgr = frame["future"].result().astype(np.uint8)
+                            else:
+                                with pipeline.stage("infer"):
+                                    processed_bgr = self.model_manager(
+                                        image, mask, inpaint_req, mask_plan=frame["mask_plan"]
+                                    ).astype(np.uint8)
+                            with pipeline.stage("color_stabilization"):
+                                processed_bgr, color_decision = apply_inpaint_color_stabilization(
+                                    image,
+                                    mask,
+                                    processed_bgr,
+                                    inpaint_req.color_stabilization,
+                                    mask_plan=frame["mask_plan"],
                                 )
-                            )
-                        except Exception as enhancement_error:
-                            logger.exception(
-                                f"[{batch_id}] temporal enhancement fallback for "
-                                f"frame {item.frame_index}: {str(enhancement_error)}"
-                            )
-                            temporal_decision = {
-                                "enabled": True,
-                                "applied": False,
-                                "fallback": True,
-                                "skip_reason": "enhancement-error",
-                                "error": str(enhancement_error),
-                            }
-                    self._save_processed_frame(
-                        item.output_path, processed_bgr.astype(np.uint8), alpha_channel
-                    )
+                        temporal_decision = None
+                        if temporal_enhancer is not None:
+                            try:
+                                with pipeline.stage("temporal_enhancement"):
+                                    processed_bgr, temporal_decision = (
+                                        temporal_enhancer.enhance_frame(
+                                            frame_index=item.frame_index,
+                                            image_rgb=image,
+                                            mask=mask,
+                                            independent_bgr=processed_bgr,
+                                            output_path=item.output_path,
+                                            temporal_objects=getattr(item, "temporal_objects", None),
+                                            mask_plan=frame["mask_plan"],
+                                        )
+                                    )
+                            except Exception as enhancement_error:
+                                logger.exception(
+                                    f"[{batch_id}] temporal enhancement fallback for "
+                                    f"frame {item.frame_index}: {str(enhancement_error)}"
+                                )
+                                temporal_decision = {
+                                    "enabled": True,
+                                    "applied": False,
+                                    "fallback": True,
+                                    "skip_reason": "enhancement-error",
+                                    "error": str(enhancement_error),
+                                }
 
-                    result_item = {
+                        result_item = {
+                            "frame_index": item.frame_index,
+                            "output_path": item.output_path,
+                            "success": True,
+                        }
+                        if frame.get("roi_diagnostics") is not None:
+                            result_item["roi_diagnostics"] = frame["roi_diagnostics"]
+                        if temporal_decision is not None:
+                            result_item["temporal_enhancement"] = temporal_decision
+                        if color_decision and color_decision.get("applied"):
+                            result_item["color_stabilization"] = color_decision
+                        queue_frame_write(
+                            item, result_item, processed_bgr.astype(np.uint8), alpha_channel
+                        )
+
+                except Exception as error:
+                    frame_failed = True
+                    if isinstance(error, DiskSpaceError):
+                        raise
+                    failed = {
                         "frame_index": item.frame_index,
+                        "image_path": item.image_path,
+                        "mask_path": item.mask_path,
                         "output_path": item.output_path,
-                        "success": True,
+                        "success": False,
+                        "error": str(error),
                     }
-                    if temporal_decision is not None:
-                        result_item["temporal_enhancement"] = temporal_decision
-                    if color_decision and color_decision.get("applied"):
-                        result_item["color_stabilization"] = color_decision
-                    results.append(result_item)
-
-            except Exception as error:
-                should_gc = True
-                if isinstance(error, DiskSpaceError):
-                    raise
-                failed = {
-                    "frame_index": item.frame_index,
-                    "image_path": item.image_path,
-                    "mask_path": item.mask_path,
-                    "output_path": item.output_path,
-                    "success": False,
-                    "error": str(error),
-                }
-                failed_items.append(failed)
-                results.append(failed)
-
-                logger.exception(
-                    f"[{batch_id}] frame {item.frame_index} failed: {str(error)} | "
-                    f"image_shape={getattr(image, 'shape', None)} | "
-                    f"mask_shape={getattr(mask, 'shape', None)} | "
-                    f"mask_nonzero_pixels={mask_nonzero_pixels} | "
-                    f"mask_min={None if mask is None else int(mask.min())} | "
-                    f"mask_max={None if mask is None else int(mask.max())}"
-                )
-                if req.options.stop_on_error:
-                    break
-            finally:
-                if should_gc:
-                    torch_gc()
-
-        torch_gc()
+                    failed_items.append(failed)
+                    results.append(failed)
+
+                    logger.exception(
+                        f"[{batch_id}] frame {item.frame_index} failed: {str(error)} | "
+                        f"image_shape={getattr(image, 'shape', None)} | "
+                        f"mask_shape={getattr(mask, 'shape', None)} | "
+                        f"mask_nonzero_pixels={mask_nonzero_pixels} | "
+                        f"mask_min={None if mask is None else int(mask.min())} | "
+                        f"mask_max={None if mask is None else int(mask.max())}"
+                    )
+                    if req.options.stop_on_error:
+                        break
+                finally:
+                    gpu_housekeeper.after_item(
+                        (model_id, getattr(image, "shape", None)), failed=frame_failed
+                    )
+                    publish_batch_progress(index)
+            pipeline.drain()
+        except Exception:
+            publish_batch_progress(len(results), "failed")
+            raise
+        finally:
+            pipeline.close()
+            gpu_leases.close()
+            # Drop the memory-mapped readers of the mask tracks this batch read.
+            track_refs = (parse_mask_track_ref(item.mask_path) for item in req.frames)
+            for track_path in {track_ref[0] for track_ref in track_refs if track_ref}:
+                close_mask_tracks(track_path)
 
         if temporal_enhancer is not None and len(failed_items) == 0:
             try:
@@ -2208,6 +2778,9 @@ class Api:
             f"success={sum(1 for it in results if it.get('success', False))}, "
             f"failed={len(failed_items)}, elapsed={batch_time:.2f}s"
         )
+        # The HTTP response succeeds with per-frame failures counted in
+        # ``failed_count``; the final event matches it and carries ``failed``.
+        publish_batch_progress(len(results), "completed")
         return JSONResponse(
             content=jsonable_encoder(
                 {
@@ -2220,6 +2793,11 @@ class Api:
                     "batch_time": batch_time,
                     "failure_snapshot_dir": failure_snapshot_dir,
                     "temporal_checkpoint": temporal_checkpoint,
+                    "pipeline": pipeline.stats(),
+                    "gpu_queue": {
+                        "wait_ms": round(gpu_lease.wait_ms, 3),
+                        "yields": gpu_lease.yields,
+                    },
                     "results": results,
                 }
             )
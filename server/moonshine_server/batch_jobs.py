@@ -0,0 +1,274 @@
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from moonshine_server.disk_space import DiskSpaceError
+
+BATCH_JOB_FINISHED_STATUSES = {"completed", "failed", "canceled"}
+BATCH_JOB_RETENTION_SECONDS = 30 * 60
+# Encoded results a job may buffer before its worker waits for the client.
+BATCH_JOB_MAX_PENDING_RESULTS = 16
+STREAM_FORMATS = ("ndjson", "sse")
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def encode_stream_event(event: str, payload: dict, stream_format: str = "ndjson") -> str:
+    """Serialize one streamed batch event as an NDJSON line or an SSE frame."""
+    data = json.dumps(jsonable_encoder(payload), ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return json.dumps(
+        {"event": event, **jsonable_encoder(payload)}, ensure_ascii=False
+    ) + "\n"
+
+
+def _result_flags(result: dict) -> dict:
+    return {
+        "success": bool(result.get("success", False)),
+        "skipped": bool(result.get("skipped", False)),
+    }
+
+
+def iter_batch_events(
+    results: Iterable[dict],
+    summarize: Callable[[List[dict]], dict],
+    stream_format: str = "ndjson",
+) -> Iterator[str]:
+    """Yield one event per finished item followed by a summary event.
+
+    Only the success/skip flags of each item are kept for the summary, so
+    encoded outputs are released as soon as they have been written out.
+    """
+    start_time = time.time()
+    flags: List[dict] = []
+    try:
+        for result in results:
+            flags.append(_result_flags(result))
+            yield encode_stream_event("result", result, stream_format)
+    except Exception as error:
+        yield encode_stream_event(
+            "error",
+            {
+                "error": type(error).__name__,
+                "detail": str(error),
+                "status_code": 507 if isinstance(error, DiskSpaceError) else 500,
+                "processed_count": len(flags),
+            },
+            stream_format,
+        )
+        return
+    yield encode_stream_event(
+        "summary",
+        {
+            "total_time": time.time() - start_time,
+            "processed_count": len(flags),
+            **summarize(flags),
+        },
+        stream_format,
+    )
+
+
+@dataclass
+class BatchJob:
+    task_id: str
+    kind: str
+    total: int = 0
+    status: str = "queued"
+    message: str = "批处理任务已创建"
+    current: int = 0
+    error: str = ""
+    canceled: bool = False
+    summary: Optional[dict] = None
+    results: List[dict] = field(default_factory=list)
+    result_offset: int = 0
+    flags: List[dict] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    completed_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "taskId": self.task_id,
+            "kind": self.kind,
+            "status": self.status,
+            "message": self.message,
+            "current": self.current,
+            "total": self.total,
+            "progress": (
+                max(0.0, min(1.0, self.current / self.total)) if self.total > 0 else 0.0
+            ),
+            "error": self.error,
+            "canceled": self.canceled,
+            "pendingResults": len(self.results),
+            "summary": self.summary,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+            "completedAt": self.completed_at,
+        }
+
+
+class BatchJobManager:
+    """Background batch jobs whose item results are handed out incrementally.
+
+    Results stay buffered only until a client fetches past them with a cursor.
+    Once ``max_pending_results`` are waiting the worker pauses until the client
+    catches up, and a job left unread for ``retention_seconds`` is canceled, so
+    an unpolled job never holds more than that many encoded items.
+    """
+
+    def __init__(
+        self,
+        retention_seconds: float = BATCH_JOB_RETENTION_SECONDS,
+        max_pending_results: int = BATCH_JOB_MAX_PENDING_RESULTS,
+    ):
+        self._tasks: dict[str, BatchJob] = {}
+        self._lock = threading.RLock()
+        self._condition = threading.Condition(self._lock)
+        self.retention_seconds = retention_seconds
+        self.max_pending_results = max(1, int(max_pending_results))
+
+    def _prune_locked(self):
+        now = time.time()
+        expired = [
+            task_id
+            for task_id, task in self._tasks.items()
+            if task.completed_at is not None
+            and now - task.completed_at > self.retention_seconds
+        ]
+        for task_id in expired:
+            self._tasks.pop(task_id, None)
+
+    def create_task(self, kind: str, total: int) -> BatchJob:
+        task = BatchJob(task_id=uuid.uuid4().hex, kind=kind, total=max(0, int(total)))
+        with self._lock:
+            self._prune_locked()
+            self._tasks[task.task_id] = task
+        return task
+
+    def get_task(self, task_id: str) -> Optional[BatchJob]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def has_active_tasks(self) -> bool:
+        with self._lock:
+            return any(
+                task.status not in BATCH_JOB_FINISHED_STATUSES for task in self._tasks.values()
+            )
+
+    def cancel_task(self, task_id: str) -> Optional[BatchJob]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if not task:
+                return None
+            task.canceled = True
+            task.updated_at = time.time()
+            if task.status == "queued":
+                self._finish_locked(task, "canceled", "批处理任务已取消")
+            self._condition.notify_all()
+            return task
+
+    def take_results(self, task_id: str, cursor: int = 0, limit: int = 0) -> Optional[dict]:
+        """Return results from ``cursor`` on and release everything before it."""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if not task:
+                return None
+            drop = max(0, min(int(cursor) - task.result_offset, len(task.results)))
+            if drop:
+                del task.results[:drop]
+                task.result_offset += drop
+                self._condition.notify_all()
+            results = list(task.results if limit <= 0 else task.results[:limit])
+            return {
+                **task.to_dict(),
+                "cursor": task.result_offset,
+                "nextCursor": task.result_offset + len(results),
+                "results": results,
+            }
+
+    def _finish_locked(self, task: BatchJob, status: str, message: str):
+        task.status = status
+        task.message = message
+        task.updated_at = time.time()
+        task.completed_at = task.updated_at
+
+    def run(
+        self,
+        task_id: str,
+        results: Iterable[dict],
+        summarize: Callable[[List[dict]], dict],
+    ) -> None:
+        task = self.get_task(task_id)
+        if not task:
+            return
+        start_time = time.time()
+        iterator = iter(results)
+        try:
+            with self._lock:
+                if task.canceled:
+                    return
+                task.status = "running"
+                task.message = "批处理任务运行中"
+                task.updated_at = time.time()
+            for result in iterator:
+                with self._lock:
+                    task.results.append(result)
+                    task.flags.append(_result_flags(result))
+                    task.current = len(task.flags)
+                    task.updated_at = time.time()
+                    has_room = self._condition.wait_for(
+                        lambda: task.canceled
+                        or len(task.results) < self.max_pending_results,
+                        timeout=self.retention_seconds,
+                    )
+                    if not has_room:
+                        task.canceled = True
+                        task.error = "批处理结果长时间未被领取，任务已停止"
+                    if task.canceled:
+                        break
+        except Exception as error:
+            with self._lock:
+                task.error = str(error)
+                self._finish_locked(task, "failed", str(error) or "批处理任务失败")
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+        with self._lock:
+            task.summary = {
+                "total_time": time.time() - start_time,
+                "processed_count": len(task.flags),
+                **summarize(task.flags),
+            }
+            if task.canceled:
+                self._finish_locked(task, "canceled", "批处理任务已取消")
+            else:
+                self._finish_locked(task, "completed", "批处理任务已完成")
+
+    def start(
+        self,
+        task_id: str,
+        results: Iterable[dict],
+        summarize: Callable[[List[dict]], dict],
+    ) -> threading.Thread:
+        worker = threading.Thread(
+            target=self.run,
+            args=(task_id, results, summarize),
+            daemon=True,
+            name=f"batch-job-{task_id[:8]}",
+        )
+        worker.start()
+        return worker
+
+
+batch_job_manager = BatchJobManager()
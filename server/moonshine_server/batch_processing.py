@@ -1,9 +1,14 @@
 import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Deque, Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
+import torch
 from PIL import Image
 from loguru import logger
 from rich.console import Console
@@ -19,6 +24,7 @@ from rich.progress import (
 
 from moonshine_server.helper import concat_alpha_channel
 from moonshine_server.disk_space import DEFAULT_DISK_SPACE_SAFETY_BYTES, ensure_disk_space
+from moonshine_server.gpu_arbiter import GPU_PRIORITY_BULK, gpu_arbiter
 from moonshine_server.image_output import (
     encode_pil_image,
     image_format_from_path,
@@ -28,7 +34,8 @@ from moonshine_server.inpaint_color_stabilization import (
     apply_inpaint_color_stabilization,
     try_flat_background_fill,
 )
-from moonshine_server.model.utils import torch_gc
+from moonshine_server.folder_manifest import FolderManifest, options_signature
+from moonshine_server.gpu_housekeeping import gpu_housekeeper
 from moonshine_server.model_manager import ModelManager
 from moonshine_server.schema import InpaintRequest
 
@@ -45,6 +52,331 @@ def glob_images(path: Path) -> Dict[str, Path]:
         return res
 
 
+def load_batch_item(image_p: Path, mask_p: Path) -> dict:
+    """Decode one image/mask pair into the arrays the model stage consumes."""
+    with Image.open(image_p) as source_image:
+        infos = dict(source_image.info)
+        source_format = image_format_from_path(image_p) or str(source_image.format or "")
+        alpha_channel = None
+        if source_image.mode == "RGBA":
+            alpha_channel = np.array(source_image.getchannel("A"))
+        img = np.array(source_image.convert("RGB"))
+
+    # 读取蒙版，保留透明通道
+    with Image.open(mask_p) as mask_pil:
+        if mask_pil.mode == 'RGBA':
+            # 从RGBA图像中提取Alpha通道作为蒙版
+            mask_img = np.array(mask_pil.getchannel("A"))
+            # 二值化处理：不透明(>0)的区域设为白色(255)，透明(=0)的区域设为黑色(0)
+            mask_img[mask_img > 0] = 255
+        else:
+            # 如果没有Alpha通道，则按原来的方式处理
+            mask_img = np.array(mask_pil.convert("L"))
+            mask_img = cv2.threshold(mask_img, 127, 255, cv2.THRESH_BINARY)[1]
+
+    mask_resized = mask_img.shape[:2] != img.shape[:2]
+    if mask_resized:
+        mask_img = cv2.resize(
+            mask_img,
+            (img.shape[1], img.shape[0]),
+            interpolation=cv2.INTER_NEAREST,
+        )
+    mask_img[mask_img >= 127] = 255
+    mask_img[mask_img < 127] = 0
+    return {
+        "img": img,
+        "mask": mask_img,
+        "alpha_channel": alpha_channel,
+        "infos": infos,
+        "source_format": source_format,
+        "mask_resized": mask_resized,
+    }
+
+
+def inpaint_batch_item(
+    model_manager: ModelManager, inpaint_request: InpaintRequest, item: dict
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Run the model on a loaded item and return the RGB result and its alpha."""
+    img = item["img"]
+    mask_img = item["mask"]
+    # bgr
+    inpaint_result, color_decision = try_flat_background_fill(
+        img, mask_img, inpaint_request.color_stabilization
+    )
+    if inpaint_result is None:
+        with gpu_arbiter.acquire(model_manager.device, GPU_PRIORITY_BULK, "folder_inpaint"):
+            inpaint_result = model_manager(img, mask_img, inpaint_request)
+        inpaint_result, color_decision = apply_inpaint_color_stabilization(
+            img,
+            mask_img,
+            inpaint_result,
+            inpaint_request.color_stabilization,
+        )
+    inpaint_result = cv2.cvtColor(inpaint_result, cv2.COLOR_BGR2RGB)
+    alpha_channel = item["alpha_channel"]
+    if item.get("concat"):
+        mask_rgb = cv2.cvtColor(mask_img, cv2.COLOR_GRAY2RGB)
+        inpaint_result = cv2.hconcat([img, mask_rgb, inpaint_result])
+        alpha_channel = None
+    return inpaint_result, alpha_channel
+
+
+def encode_batch_item(
+    inpaint_result: np.ndarray,
+    alpha_channel: Optional[np.ndarray],
+    infos: dict,
+    source_format: str,
+    output: Path,
+    stem: str,
+    output_format: str,
+    output_quality: int,
+) -> dict:
+    """Encode and write one result; safe to run in a worker process."""
+    serializable_result = concat_alpha_channel(inpaint_result, alpha_channel)
+    output_spec = resolve_image_output_spec(
+        requested_format=output_format,
+        source_format=source_format,
+        has_alpha=alpha_channel is not None,
+        quality=output_quality,
+    )
+    img_bytes = encode_pil_image(
+        Image.fromarray(serializable_result),
+        output_spec["format"],
+        output_spec["quality"],
+        infos,
+    )
+    save_p = output / f"{stem}{output_spec['extension']}"
+    ensure_disk_space(
+        save_p,
+        len(img_bytes),
+        safety_bytes=DEFAULT_DISK_SPACE_SAFETY_BYTES,
+        operation="保存文件夹批处理结果",
+    )
+    with open(save_p, "wb") as fw:
+        fw.write(img_bytes)
+    return {
+        "output_path": str(save_p),
+        "format": output_spec["format"],
+        "mime_type": output_spec["mime_type"],
+        "extension": output_spec["extension"],
+    }
+
+
+def _device_type(device) -> str:
+    return str(getattr(device, "type", None) or getattr(device, "value", None) or device)
+
+
+def _plan_jobs(image_paths: Dict[str, Path], mask_paths: Dict[str, Path], mask: Path, progress) -> List[dict]:
+    first_mask = list(mask_paths.values())[0]
+    # 检查是否存在模板蒙版文件
+    template_mask_path = mask / "mask_template.png"
+    template_mask_exists = template_mask_path.exists()
+    jobs = []
+    for stem, image_p in image_paths.items():
+        if stem not in mask_paths and mask.is_dir():
+            # 如果存在模板蒙版，则使用模板蒙版
+            if template_mask_exists:
+                mask_p = template_mask_path
+                progress.log(f"使用模板蒙版 {mask_p} 处理 {image_p}")
+            else:
+                # 否则使用第一个蒙版或跳过
+                progress.log(f"mask for {image_p} not found")
+                mask_p = None
+        else:
+            mask_p = mask_paths.get(stem, first_mask)
+        jobs.append({"stem": stem, "image_path": image_p, "mask_path": mask_p})
+    return jobs
+
+
+def _run_pipelined(
+    jobs: List[dict],
+    model: str,
+    device,
+    inpaint_request: InpaintRequest,
+    encode_options: dict,
+    workers: int,
+    prefetch: int,
+    manifest: FolderManifest,
+    progress,
+    task,
+) -> List[dict]:
+    """Run the model on this thread while a process pool decodes and encodes.
+
+    With ``workers == 0`` every stage runs inline, matching the original loop.
+    """
+    model_manager = ModelManager(name=model, device=device)
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        if workers > 0
+        else None
+    )
+    max_pending_encodes = max(1, workers * 2)
+    outcomes: List[Optional[dict]] = [None] * len(jobs)
+    loads: Dict[int, Future] = {}
+    pending_encodes: Deque[Tuple[int, Future]] = deque()
+
+    def finish_encode(index: int, future: Future):
+        outcomes[index].update(future.result())
+        manifest.record(jobs[index]["image_path"], jobs[index]["mask_path"], outcomes[index])
+        progress.update(task, advance=1)
+
+    try:
+        for index, job in enumerate(jobs):
+            if executor is not None:
+                for ahead in range(index, min(index + prefetch + 1, len(jobs))):
+                    ahead_job = jobs[ahead]
+                    if (
+                        ahead not in loads
+                        and ahead_job["mask_path"] is not None
+                        and not ahead_job.get("resumed")
+                    ):
+                        loads[ahead] = executor.submit(
+                            load_batch_item, ahead_job["image_path"], ahead_job["mask_path"]
+                        )
+            if job.get("resumed"):
+                outcomes[index] = job["resumed"]
+                progress.update(task, advance=1)
+                continue
+            if job["mask_path"] is None:
+                outcomes[index] = {
+                    "success": False,
+                    "error": f"mask for {job['image_path']} not found",
+                }
+                progress.update(task, advance=1)
+                continue
+
+            future = loads.pop(index, None)
+            item = (
+                future.result()
+                if future is not None
+                else load_batch_item(job["image_path"], job["mask_path"])
+            )
+            if item["mask_resized"]:
+                progress.log(
+                    f"resize mask {job['mask_path'].name} to image {job['image_path'].name} size: {item['img'].shape[:2]}"
+                )
+            item["concat"] = encode_options["concat"]
+            try:
+                inpaint_result, alpha_channel = inpaint_batch_item(
+                    model_manager, inpaint_request, item
+                )
+            except Exception:
+                gpu_housekeeper.after_item((model, item["img"].shape), failed=True)
+                raise
+            encode_args = (
+                inpaint_result,
+                alpha_channel,
+                item["infos"],
+                item["source_format"],
+                encode_options["output"],
+                job["stem"],
+                encode_options["output_format"],
+                encode_options["output_quality"],
+            )
+            outcomes[index] = {"success": True}
+            if executor is None:
+                outcomes[index].update(encode_batch_item(*encode_args))
+                manifest.record(job["image_path"], job["mask_path"], outcomes[index])
+                progress.update(task, advance=1)
+            else:
+                pending_encodes.append((index, executor.submit(encode_batch_item, *encode_args)))
+                while len(pending_encodes) > max_pending_encodes:
+                    finish_encode(*pending_encodes.popleft())
+            gpu_housekeeper.after_item((model, item["img"].shape))
+        while pending_encodes:
+            finish_encode(*pending_encodes.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        model_manager.release()
+    return outcomes
+
+
+_shard_state: dict = {}
+
+
+def _init_shard_worker(model: str, device, inpaint_request: dict, threads: int):
+    if threads > 0:
+        torch.set_num_threads(threads)
+    _shard_state["model"] = model
+    _shard_state["model_manager"] = ModelManager(name=model, device=device)
+    _shard_state["inpaint_request"] = InpaintRequest(**inpaint_request)
+
+
+def _process_shard_item(job: dict, encode_options: dict) -> dict:
+    item = load_batch_item(job["image_path"], job["mask_path"])
+    item["concat"] = encode_options["concat"]
+    try:
+        inpaint_result, alpha_channel = inpaint_batch_item(
+            _shard_state["model_manager"], _shard_state["inpaint_request"], item
+        )
+    except Exception:
+        gpu_housekeeper.after_item((_shard_state["model"], item["img"].shape), failed=True)
+        raise
+    outcome = encode_batch_item(
+        inpaint_result,
+        alpha_channel,
+        item["infos"],
+        item["source_format"],
+        encode_options["output"],
+        job["stem"],
+        encode_options["output_format"],
+        encode_options["output_quality"],
+    )
+    gpu_housekeeper.after_item((_shard_state["model"], item["img"].shape))
+    return {"success": True, "mask_resized": item["mask_resized"], **outcome}
+
+
+def _run_sharded(
+    jobs: List[dict],
+    model: str,
+    device,
+    inpaint_request: InpaintRequest,
+    encode_options: dict,
+    model_processes: int,
+    manifest: FolderManifest,
+    progress,
+    task,
+) -> List[dict]:
+    """Spread items over ``model_processes`` CPU processes, each with its own model."""
+    threads = max(1, (os.cpu_count() or model_processes) // model_processes)
+    outcomes: List[Optional[dict]] = [None] * len(jobs)
+    futures: Dict[Future, int] = {}
+    with ProcessPoolExecutor(
+        max_workers=model_processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_shard_worker,
+        initargs=(model, device, inpaint_request.model_dump(), threads),
+    ) as executor:
+        for index, job in enumerate(jobs):
+            if job.get("resumed"):
+                outcomes[index] = job["resumed"]
+                progress.update(task, advance=1)
+                continue
+            if job["mask_path"] is None:
+                outcomes[index] = {
+                    "success": False,
+                    "error": f"mask for {job['image_path']} not found",
+                }
+                progress.update(task, advance=1)
+                continue
+            futures[executor.submit(_process_shard_item, job, encode_options)] = index
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                job = jobs[index]
+                outcome = future.result()
+                if outcome.pop("mask_resized"):
+                    progress.log(f"resize mask {job['mask_path'].name} to image {job['image_path'].name}")
+                outcomes[index] = outcome
+                manifest.record(job["image_path"], job["mask_path"], outcome)
+                progress.update(task, advance=1)
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+    return outcomes
+
+
 def batch_inpaint(
     model: str,
     device,
@@ -57,7 +389,20 @@ def batch_inpaint(
     output_quality: int = 95,
     color_stabilization: str = "auto",
     return_results: bool = False,
+    workers: int = 0,
+    prefetch: int = 4,
+    model_processes: int = 1,
+    force: bool = False,
 ):
+    """Inpaint every image in a folder.
+
+    ``workers`` decode/encode processes feed a single model worker, reading up
+    to ``prefetch`` images ahead. On CPU, ``model_processes > 1`` instead shards
+    the folder over that many processes, each loading its own model.
+
+    Finished items are logged to a manifest in ``output``; a rerun with the same
+    options skips items whose inputs and output are unchanged unless ``force``.
+    """
     if image.is_dir() and output.is_file():
         logger.error(
             "invalid --output: when image is a directory, output should be a directory"
@@ -83,12 +428,19 @@ def batch_inpaint(
             inpaint_request = InpaintRequest(**json.load(f))
         logger.info(f"Using config: {inpaint_request}")
 
-    model_manager = ModelManager(name=model, device=device)
-    first_mask = list(mask_paths.values())[0]
+    if model_processes > 1 and _device_type(device) != "cpu":
+        logger.warning(
+            f"model_processes={model_processes} is only supported on CPU; using one model worker"
+        )
+        model_processes = 1
+    encode_options = {
+        "output": output,
+        "concat": concat,
+        "output_format": output_format,
+        "output_quality": output_quality,
+    }
 
     console = Console()
-    processed_count = 0
-    results = []
 
     with Progress(
         SpinnerColumn(),
@@ -101,132 +453,60 @@ def batch_inpaint(
         transient=False,
     ) as progress:
         task = progress.add_task("Batch processing...", total=len(image_paths))
-        # 检查是否存在模板蒙版文件
-        template_mask_path = mask / "mask_template.png"
-        template_mask_exists = template_mask_path.exists()
-        for stem, image_p in image_paths.items():
-            if stem not in mask_paths and mask.is_dir():
-                # 如果存在模板蒙版，则使用模板蒙版
-                if template_mask_exists:
-                    mask_p = template_mask_path
-                    progress.log(f"使用模板蒙版 {mask_p} 处理 {image_p}")
-                else:
-                    # 否则使用第一个蒙版或跳过
-                    progress.log(f"mask for {image_p} not found")
-                    if return_results:
-                        results.append(
-                            {
-                                "index": len(results),
-                                "image_path": str(image_p),
-                                "success": False,
-                                "error": f"mask for {image_p} not found",
-                            }
-                        )
-                    progress.update(task, advance=1)
-                    continue
-            else:
-                mask_p = mask_paths.get(stem, first_mask)
-
-            source_image = Image.open(image_p)
-            infos = source_image.info
-            source_format = image_format_from_path(image_p) or str(source_image.format or "")
-            alpha_channel = None
-            if source_image.mode == "RGBA":
-                alpha_channel = np.array(source_image.getchannel("A"))
-            img = np.array(source_image.convert("RGB"))
-            
-            # 读取蒙版，保留透明通道
-            mask_pil = Image.open(mask_p)
-            if mask_pil.mode == 'RGBA':
-                # 从RGBA图像中提取Alpha通道作为蒙版
-                _, _, _, alpha = mask_pil.split()
-                mask_img = np.array(alpha)
-                # 二值化处理：不透明(>0)的区域设为白色(255)，透明(=0)的区域设为黑色(0)
-                mask_img[mask_img > 0] = 255
-                mask_img[mask_img == 0] = 0
-            else:
-                # 如果没有Alpha通道，则按原来的方式处理
-                mask_img = np.array(mask_pil.convert("L"))
-                mask_img = cv2.threshold(mask_img, 127, 255, cv2.THRESH_BINARY)[1]
-
-            if mask_img.shape[:2] != img.shape[:2]:
-                progress.log(
-                    f"resize mask {mask_p.name} to image {image_p.name} size: {img.shape[:2]}"
-                )
-                mask_img = cv2.resize(
-                    mask_img,
-                    (img.shape[1], img.shape[0]),
-                    interpolation=cv2.INTER_NEAREST,
-                )
-            mask_img[mask_img >= 127] = 255
-            mask_img[mask_img < 127] = 0
-
-            # bgr
-            inpaint_result, color_decision = try_flat_background_fill(
-                img, mask_img, inpaint_request.color_stabilization
-            )
-            if inpaint_result is None:
-                inpaint_result = model_manager(img, mask_img, inpaint_request)
-                inpaint_result, color_decision = apply_inpaint_color_stabilization(
-                    img,
-                    mask_img,
-                    inpaint_result,
-                    inpaint_request.color_stabilization,
-                )
-            inpaint_result = cv2.cvtColor(inpaint_result, cv2.COLOR_BGR2RGB)
-            if concat:
-                mask_img = cv2.cvtColor(mask_img, cv2.COLOR_GRAY2RGB)
-                inpaint_result = cv2.hconcat([img, mask_img, inpaint_result])
-                alpha_channel = None
-
-            serializable_result = concat_alpha_channel(inpaint_result, alpha_channel)
-            output_spec = resolve_image_output_spec(
-                requested_format=output_format,
-                source_format=source_format,
-                has_alpha=alpha_channel is not None,
-                quality=output_quality,
-            )
-            img_bytes = encode_pil_image(
-                Image.fromarray(serializable_result),
-                output_spec["format"],
-                output_spec["quality"],
-                infos,
+        jobs = _plan_jobs(image_paths, mask_paths, mask, progress)
+        manifest = FolderManifest(
+            output,
+            options_signature(
+                model,
+                {"inpaint": inpaint_request.model_dump(mode="json"), **encode_options, "output": None},
+            ),
+            force=force,
+        )
+        for job in jobs:
+            if job["mask_path"] is not None:
+                job["resumed"] = manifest.completed(job["image_path"], job["mask_path"])
+        resumed_count = sum(1 for job in jobs if job.get("resumed"))
+        if resumed_count:
+            progress.log(f"跳过 {resumed_count} 个已完成的图片 (使用 --force 重新处理)")
+        if model_processes > 1:
+            outcomes = _run_sharded(
+                jobs,
+                model,
+                device,
+                inpaint_request,
+                encode_options,
+                model_processes,
+                manifest,
+                progress,
+                task,
             )
-            save_p = output / f"{stem}{output_spec['extension']}"
-            ensure_disk_space(
-                save_p,
-                len(img_bytes),
-                safety_bytes=DEFAULT_DISK_SPACE_SAFETY_BYTES,
-                operation="保存文件夹批处理结果",
+        else:
+            outcomes = _run_pipelined(
+                jobs,
+                model,
+                device,
+                inpaint_request,
+                encode_options,
+                max(0, workers),
+                max(0, prefetch),
+                manifest,
+                progress,
+                task,
             )
-            with open(save_p, "wb") as fw:
-                fw.write(img_bytes)
-            processed_count += 1
-            if return_results:
-                results.append(
-                    {
-                        "index": len(results),
-                        "image_path": str(image_p),
-                        "mask_path": str(mask_p),
-                        "output_path": str(save_p),
-                        "success": True,
-                        "format": output_spec["format"],
-                        "mime_type": output_spec["mime_type"],
-                        "extension": output_spec["extension"],
-                    }
-                )
-            progress.update(task, advance=1)
-            torch_gc()
         # 处理完成后，如果模板蒙版存在，则删除它
-        if template_mask_exists and template_mask_path.exists():
+        template_mask_path = mask / "mask_template.png"
+        if template_mask_path.exists():
             try:
                 template_mask_path.unlink()  # 删除文件
                 progress.log(f"已删除模板蒙版文件: {template_mask_path}")
             except Exception as e:
                 progress.log(f"删除模板蒙版文件失败: {e}")
-            # pid = psutil.Process().pid
-            # memory_info = psutil.Process(pid).memory_info()
-            # memory_in_mb = memory_info.rss / (1024 * 1024)
-            # print(f"原图大小：{img.shape},当前进程的内存占用：{memory_in_mb}MB")
-    model_manager.release()
+
+    results = []
+    for index, (job, outcome) in enumerate(zip(jobs, outcomes)):
+        result = {"index": index, "image_path": str(job["image_path"])}
+        if job["mask_path"] is not None:
+            result["mask_path"] = str(job["mask_path"])
+        results.append({**result, **outcome})
+    processed_count = sum(1 for result in results if result["success"])
     return results if return_results else processed_count
@@ -81,6 +81,10 @@ def run(
         file_okay=False,
         callback=setup_model_dir,
     ),
+    workers: int = Option(0, min=0, max=32, help=BATCH_WORKERS_HELP),
+    prefetch: int = Option(4, min=0, max=64, help=BATCH_PREFETCH_HELP),
+    model_processes: int = Option(1, min=1, max=64, help=BATCH_MODEL_PROCESSES_HELP),
+    force: bool = Option(False, help=BATCH_FORCE_HELP),
 ):
     from moonshine_server.download import cli_download_model, scan_models
 
@@ -91,7 +95,19 @@ def run(
 
     from moonshine_server.batch_processing import batch_inpaint
 
-    batch_inpaint(model, device, image, mask, output, config, concat)
+    batch_inpaint(
+        model,
+        device,
+        image,
+        mask,
+        output,
+        config,
+        concat,
+        workers=workers,
+        prefetch=prefetch,
+        model_processes=model_processes,
+        force=force,
+    )
 
 
 @typer_app.command(help="Start Moonshine Server server")
@@ -121,6 +137,11 @@ def start(
         True,
         help="Release cached SAM predictors before running image/video processing models.",
     ),
+    inference_batch_size: int = Option(4, min=1, max=32, help=INFERENCE_BATCH_SIZE_HELP),
+    inference_batch_wait_ms: float = Option(5.0, min=0, max=1000, help=INFERENCE_BATCH_WAIT_MS_HELP),
+    gpu_release_ratio: float = Option(0.85, min=0, max=1, help=GPU_RELEASE_RATIO_HELP),
+    sam_embedding_cache_mb: int = Option(1024, min=0, help=SAM_EMBEDDING_CACHE_MB_HELP),
+    sam_embedding_offload: bool = Option(True, help=SAM_EMBEDDING_OFFLOAD_HELP),
     device: Device = Option(Device.cpu),
     input: Optional[Path] = Option(None, help=INPUT_HELP),
     mask_dir: Optional[Path] = Option(
@@ -209,6 +230,11 @@ def start(
         local_files_only=local_files_only,
         cpu_textencoder=cpu_textencoder if device == Device.cuda else False,
         sam_release_before_processing=sam_release_before_processing,
+        inference_batch_size=inference_batch_size,
+        inference_batch_wait_ms=inference_batch_wait_ms,
+        gpu_release_ratio=gpu_release_ratio,
+        sam_embedding_cache_mb=sam_embedding_cache_mb,
+        sam_embedding_offload=sam_embedding_offload,
         device=device,
         input=input,
         mask_dir=mask_dir,
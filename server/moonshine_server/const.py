@@ -16,6 +16,15 @@ AVAILABLE_MODELS = ["lama", "anime-lama", "ldm", "zits", "mat", "fcf", "manga",
 
 NO_HALF_HELP = "Use full precision model weights when the selected model supports it."
 LOW_MEM_HELP = "Enable low memory mode when the selected model supports it."
+INFERENCE_BATCH_SIZE_HELP = "Max number of same-shape LaMa/MAT crops batched into one forward. 1 disables batching."
+INFERENCE_BATCH_WAIT_MS_HELP = "Max milliseconds a crop waits for other crops to fill an inference batch."
+BATCH_WORKERS_HELP = "Processes that decode and encode images while one model worker runs inference. 0 runs everything inline."
+BATCH_PREFETCH_HELP = "Images decoded ahead of the model worker when --workers is set."
+BATCH_MODEL_PROCESSES_HELP = "CPU only: shard the folder across this many processes, each loading its own model."
+BATCH_FORCE_HELP = "Reprocess every image instead of skipping items recorded as finished in the output folder manifest."
+GPU_RELEASE_RATIO_HELP = "Release cached GPU memory once reserved memory exceeds this fraction of the device."
+SAM_EMBEDDING_CACHE_MB_HELP = "Memory budget in MB for cached SAM image embeddings. 0 disables the cache."
+SAM_EMBEDDING_OFFLOAD_HELP = "Move cached SAM image embeddings that are not recently used to CPU memory."
 
 DEFAULT_MODEL_DIR = os.path.abspath(
     os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+MANIFEST_FILENAME = ".moonshine_manifest.jsonl"
+MANIFEST_VERSION = 1
+
+
+def options_signature(model_id: str, options: Dict[str, Any]) -> str:
+    """Stable digest of everything that changes a folder run's outputs."""
+    payload = json.dumps(
+        {"model_id": model_id, "options": options},
+        sort_keys=True,
+        default=_json_default,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _json_default(value: Any):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _file_identity(path) -> Optional[Dict[str, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {"size": int(stat.st_size), "mtime_ns": int(stat.st_mtime_ns)}
+
+
+def _path_key(path) -> str:
+    return os.path.abspath(os.fspath(path))
+
+
+class FolderManifest:
+    """Append-only completion log kept next to a folder run's outputs.
+
+    Each finished item appends one JSON line keyed by the input path with the
+    input and mask size/mtime, the options signature and the result. A rerun
+    with the same signature skips items whose inputs and output are unchanged,
+    which costs a few ``stat`` calls per item; failures are always retried.
+    """
+
+    def __init__(self, output_folder, signature: str, force: bool = False):
+        self.path = Path(output_folder) / MANIFEST_FILENAME
+        self.signature = signature
+        self.force = force
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        if force:
+            self._truncate()
+        else:
+            self._load()
+
+    def _truncate(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+        except OSError as error:
+            logger.warning(f"Failed to reset folder manifest {self.path}: {error}")
+
+    def _load(self):
+        if not self.path.is_file():
+            return
+        line_count = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as manifest_file:
+                for line in manifest_file:
+                    line_count += 1
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave a truncated last line behind.
+                        continue
+                    if entry.get("version") != MANIFEST_VERSION or "image_path" not in entry:
+                        continue
+                    self._entries[entry["image_path"]] = entry
+        except OSError as error:
+            logger.warning(f"Failed to read folder manifest {self.path}: {error}")
+            return
+        if line_count > len(self._entries) * 2 + 16:
+            self._compact()
+
+    def _compact(self):
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as manifest_file:
+                for entry in self._entries.values():
+                    manifest_file.write(
+                        json.dumps(entry, ensure_ascii=False, default=_json_default) + "\n"
+                    )
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            logger.warning(f"Failed to compact folder manifest {self.path}: {error}")
+
+    def completed(self, image_path, mask_path=None) -> Optional[dict]:
+        """Return the stored result when the item finished with unchanged inputs."""
+        if self.force:
+            return None
+        with self._lock:
+            entry = self._entries.get(_path_key(image_path))
+        if (
+            not entry
+            or entry.get("status") != "success"
+            or entry.get("signature") != self.signature
+        ):
+            return None
+        if entry.get("image") != _file_identity(image_path):
+            return None
+        expected_mask = _path_key(mask_path) if mask_path else None
+        if entry.get("mask_path") != expected_mask:
+            return None
+        if mask_path and entry.get("mask") != _file_identity(mask_path):
+            return None
+        result = entry.get("result") or {}
+        output_path = result.get("output_path")
+        if not output_path or not os.path.isfile(output_path):
+            return None
+        return {**result, "resumed": True}
+
+    def record(self, image_path, mask_path, result: dict):
+        """Append the outcome of one item; write errors only disable resuming."""
+        entry = {
+            "version": MANIFEST_VERSION,
+            "image_path": _path_key(image_path),
+            "image": _file_identity(image_path),
+            "mask_path": _path_key(mask_path) if mask_path else None,
+            "mask": _file_identity(mask_path) if mask_path else None,
+            "signature": self.signature,
+            "status": "success" if result.get("success") else "failed",
+            "result": {key: value for key, value in result.items() if key != "resumed"},
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=_json_default) + "\n"
+        with self._lock:
+            self._entries[entry["image_path"]] = entry
+            try:
+                with open(self.path, "a", encoding="utf-8") as manifest_file:
+                    manifest_file.write(line)
+            except OSError as error:
+                logger.warning(f"Failed to update folder manifest {self.path}: {error}")
@@ -0,0 +1,223 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+GPU_PRIORITY_INTERACTIVE = 0
+GPU_PRIORITY_BULK = 1
+GPU_PRIORITY_NAMES = {
+    GPU_PRIORITY_INTERACTIVE: "interactive",
+    GPU_PRIORITY_BULK: "bulk",
+}
+
+
+def normalize_gpu_device(device) -> str:
+    """Map torch devices, Device enums and strings onto one queue key."""
+    value = str(getattr(device, "value", device) or "cpu").strip().lower()
+    if value.startswith("device."):
+        value = value.split(".", 1)[1]
+    if value == "cuda":
+        return "cuda:0"
+    return value
+
+
+class GpuLease:
+    """Ownership of one device queue, handed out by ``GpuArbiter.acquire``."""
+
+    def __init__(self, arbiter: "GpuArbiter", device: str, priority: int, label: str):
+        self.arbiter = arbiter
+        self.device = device
+        self.priority = priority
+        self.label = label
+        self.wait_ms = 0.0
+        self.yields = 0
+        self._work_condition = threading.Condition()
+        self._work: Set[Future] = set()
+        self._yielding = False
+
+    def lend(self, start: Callable[[], Future]) -> Future:
+        """Start work that another thread runs on behalf of this lease.
+
+        ``start`` submits the work and returns its future. ``yield_point`` waits
+        for lent work to finish before handing the device over, and new work
+        waits here until the lease has the device back.
+        """
+        with self._work_condition:
+            self._work_condition.wait_for(lambda: not self._yielding)
+            future = start()
+            self._work.add(future)
+        future.add_done_callback(self._work_done)
+        return future
+
+    def _work_done(self, future: Future):
+        with self._work_condition:
+            self._work.discard(future)
+            self._work_condition.notify_all()
+
+    def yield_point(self) -> float:
+        """Hand the device to waiting higher-priority work, then take it back.
+
+        Bulk loops call this between items. It returns at once when nobody with
+        a higher priority is queued; otherwise it drains the work lent out with
+        ``lend`` and returns the milliseconds spent waiting to get the device
+        back.
+        """
+        if not self.arbiter._outranked(self):
+            return 0.0
+        with self._work_condition:
+            self._yielding = True
+            self._work_condition.wait_for(lambda: not self._work)
+        try:
+            return self.arbiter._yield(self)
+        finally:
+            with self._work_condition:
+                self._yielding = False
+                self._work_condition.notify_all()
+
+
+class _DeviceQueue:
+    def __init__(self):
+        self.holder: Optional[int] = None
+        self.holder_label = ""
+        self.holder_priority: Optional[int] = None
+        self.waiting: List[Tuple[int, int]] = []
+        self.acquired = {priority: 0 for priority in GPU_PRIORITY_NAMES}
+        self.wait_ms = {priority: 0.0 for priority in GPU_PRIORITY_NAMES}
+        self.max_wait_ms = {priority: 0.0 for priority in GPU_PRIORITY_NAMES}
+        self.yields = 0
+
+
+class GpuArbiter:
+    """Serialize model work per device, interactive requests ahead of bulk ones.
+
+    FastAPI runs the sync handlers on a thread pool, so a SAM click, a single
+    inpaint and a long video batch can reach the same device at once. Each
+    caller takes the device through ``acquire``; queued interactive callers are
+    always served before queued bulk callers, and bulk loops give the device up
+    at ``GpuLease.yield_point`` between frames. Leases are reentrant per thread.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._devices: Dict[str, _DeviceQueue] = {}
+        self._sequence = itertools.count()
+        self._local = threading.local()
+
+    def _queue_locked(self, device: str) -> _DeviceQueue:
+        queue = self._devices.get(device)
+        if queue is None:
+            queue = self._devices[device] = _DeviceQueue()
+        return queue
+
+    def _held(self) -> Dict[str, GpuLease]:
+        held = getattr(self._local, "leases", None)
+        if held is None:
+            held = self._local.leases = {}
+        return held
+
+    def current_priority(self) -> Optional[int]:
+        """Priority of the most urgent lease held by the calling thread, if any."""
+        held = self._held()
+        if not held:
+            return None
+        return min(lease.priority for lease in held.values())
+
+    def _take(self, queue: _DeviceQueue, priority: int, label: str) -> float:
+        started_at = time.perf_counter()
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(queue.waiting, ticket)
+            while queue.holder is not None or queue.waiting[0] != ticket:
+                self._condition.wait()
+            heapq.heappop(queue.waiting)
+            queue.holder = threading.get_ident()
+            queue.holder_label = label
+            queue.holder_priority = priority
+            wait_ms = (time.perf_counter() - started_at) * 1000
+            queue.acquired[priority] += 1
+            queue.wait_ms[priority] += wait_ms
+            queue.max_wait_ms[priority] = max(queue.max_wait_ms[priority], wait_ms)
+        return wait_ms
+
+    def _give_back(self, queue: _DeviceQueue):
+        with self._condition:
+            queue.holder = None
+            queue.holder_label = ""
+            queue.holder_priority = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def acquire(self, device, priority: int = GPU_PRIORITY_BULK, label: str = ""):
+        """Hold ``device`` for the ``with`` block and yield the ``GpuLease``."""
+        device = normalize_gpu_device(device)
+        held = self._held()
+        lease = held.get(device)
+        if lease is not None:
+            # Nested calls on the owning thread run under the outer lease.
+            yield lease
+            return
+        with self._condition:
+            queue = self._queue_locked(device)
+        lease = GpuLease(self, device, priority, label)
+        lease.wait_ms = self._take(queue, priority, label)
+        held[device] = lease
+        try:
+            yield lease
+        finally:
+            held.pop(device, None)
+            self._give_back(queue)
+
+    def _outranked_locked(self, queue: _DeviceQueue, lease: GpuLease) -> bool:
+        if queue.holder != threading.get_ident():
+            return False
+        return bool(queue.waiting) and queue.waiting[0][0] < lease.priority
+
+    def _outranked(self, lease: GpuLease) -> bool:
+        with self._condition:
+            return self._outranked_locked(self._queue_locked(lease.device), lease)
+
+    def _yield(self, lease: GpuLease) -> float:
+        with self._condition:
+            queue = self._queue_locked(lease.device)
+            if not self._outranked_locked(queue, lease):
+                return 0.0
+            queue.yields += 1
+        lease.yields += 1
+        self._give_back(queue)
+        wait_ms = self._take(queue, lease.priority, lease.label)
+        lease.wait_ms += wait_ms
+        return wait_ms
+
+    def stats(self) -> dict:
+        with self._condition:
+            devices = {}
+            for device, queue in self._devices.items():
+                waiting = {name: 0 for name in GPU_PRIORITY_NAMES.values()}
+                for priority, _ in queue.waiting:
+                    waiting[GPU_PRIORITY_NAMES[priority]] += 1
+                devices[device] = {
+                    "busy": queue.holder is not None,
+                    "holder": queue.holder_label or None,
+                    "holderPriority": GPU_PRIORITY_NAMES.get(queue.holder_priority),
+                    "waiting": waiting,
+                    "yields": queue.yields,
+                    "priorities": {
+                        name: {
+                            "acquired": queue.acquired[priority],
+                            "averageWaitMs": (
+                                round(queue.wait_ms[priority] / queue.acquired[priority], 3)
+                                if queue.acquired[priority]
+                                else 0
+                            ),
+                            "maxWaitMs": round(queue.max_wait_ms[priority], 3),
+                        }
+                        for priority, name in GPU_PRIORITY_NAMES.items()
+                    },
+                }
+            return {"devices": devices}
+
+
+gpu_arbiter = GpuArbiter()
@@ -0,0 +1,130 @@
+import gc
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+import torch
+
+from moonshine_server.model.utils import torch_gc
+
+DEFAULT_GPU_RELEASE_RATIO = 0.85
+DEFAULT_GPU_GC_INTERVAL = 32
+
+
+def _cuda_memory_snapshot() -> Optional[Dict[str, int]]:
+    if not torch.cuda.is_available():
+        return None
+    device = torch.cuda.current_device()
+    return {
+        "allocated": int(torch.cuda.memory_allocated(device)),
+        "reserved": int(torch.cuda.memory_reserved(device)),
+        "max_reserved": int(torch.cuda.max_memory_reserved(device)),
+        "total": int(torch.cuda.get_device_properties(device).total_memory),
+    }
+
+
+class GpuHousekeeper:
+    """Decide when releasing cached GPU blocks is worth it.
+
+    ``torch_gc()`` drops the CUDA caching allocator and runs a full Python gc.
+    Doing that after every item forces the next identical frame to re-allocate
+    everything, so items call ``after_item`` instead and the cache is released
+    only when reserved memory crosses ``release_ratio`` of the device, the
+    model/shape key changes, or the item failed.
+    """
+
+    def __init__(
+        self,
+        release_ratio: float = DEFAULT_GPU_RELEASE_RATIO,
+        gc_interval: int = DEFAULT_GPU_GC_INTERVAL,
+    ):
+        self.release_ratio = release_ratio
+        self.gc_interval = gc_interval
+        self._lock = threading.Lock()
+        self._last_key: Optional[Hashable] = None
+        self._items_since_gc = 0
+        self._counters: Dict[str, Any] = {
+            "items": 0,
+            "releases": 0,
+            "skipped": 0,
+            "gc_collections": 0,
+            "release_reasons": {},
+        }
+        self._last_release_at: Optional[float] = None
+        self._last_snapshot: Optional[Dict[str, int]] = None
+
+    def configure(self, release_ratio: Optional[float] = None, gc_interval: Optional[int] = None):
+        with self._lock:
+            if release_ratio is not None:
+                self.release_ratio = max(0.0, float(release_ratio))
+            if gc_interval is not None:
+                self.gc_interval = max(1, int(gc_interval))
+
+    def _release_reason(self, key: Optional[Hashable], failed: bool) -> Optional[str]:
+        if failed:
+            return "error"
+        if key is not None and self._last_key is not None and key != self._last_key:
+            return "key_changed"
+        snapshot = _cuda_memory_snapshot()
+        self._last_snapshot = snapshot
+        if snapshot and snapshot["total"] > 0:
+            if snapshot["reserved"] >= snapshot["total"] * self.release_ratio:
+                return "memory_pressure"
+        return None
+
+    def after_item(self, key: Optional[Hashable] = None, failed: bool = False) -> bool:
+        """Record one finished item; returns True when cached memory was released."""
+        with self._lock:
+            self._counters["items"] += 1
+            reason = self._release_reason(key, failed)
+            if key is not None:
+                self._last_key = key
+            if reason is None:
+                self._counters["skipped"] += 1
+                self._items_since_gc += 1
+                run_gc = self._items_since_gc >= self.gc_interval
+                if run_gc:
+                    self._items_since_gc = 0
+                    self._counters["gc_collections"] += 1
+        if reason is not None:
+            self.release(reason)
+            return True
+        if run_gc:
+            gc.collect()
+        return False
+
+    def release(self, reason: str = "manual"):
+        """Release cached GPU blocks and run a full gc now."""
+        torch_gc()
+        with self._lock:
+            self._items_since_gc = 0
+            self._counters["releases"] += 1
+            self._counters["gc_collections"] += 1
+            reasons = self._counters["release_reasons"]
+            reasons[reason] = reasons.get(reason, 0) + 1
+            self._last_release_at = time.time()
+            self._last_snapshot = _cuda_memory_snapshot()
+
+    def reset_key(self):
+        with self._lock:
+            self._last_key = None
+
+    def stats(self) -> dict:
+        snapshot = _cuda_memory_snapshot()
+        with self._lock:
+            return {
+                "cuda_available": snapshot is not None,
+                "release_ratio": self.release_ratio,
+                "gc_interval": self.gc_interval,
+                "items": self._counters["items"],
+                "releases": self._counters["releases"],
+                "skipped": self._counters["skipped"],
+                "gc_collections": self._counters["gc_collections"],
+                "release_reasons": dict(self._counters["release_reasons"]),
+                "last_key": None if self._last_key is None else repr(self._last_key),
+                "last_release_at": self._last_release_at,
+                "memory": snapshot,
+            }
+
+
+gpu_housekeeper = GpuHousekeeper()
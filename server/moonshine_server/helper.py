@@ -269,6 +269,114 @@ def boxes_from_mask(mask: np.ndarray) -> List[np.ndarray]:
     return boxes
 
 
+def padded_shape(
+    height: int, width: int, mod: int, square: bool = False, min_size: Optional[int] = None
+) -> Tuple[int, int]:
+    """Return the (height, width) ``pad_img_to_modulo`` would produce."""
+    out_height = ceil_modulo(height, mod)
+    out_width = ceil_modulo(width, mod)
+    if min_size is not None:
+        out_height = max(min_size, out_height)
+        out_width = max(min_size, out_width)
+    if square:
+        out_height = out_width = max(out_height, out_width)
+    return out_height, out_width
+
+
+def crop_window_from_box(box, margin: int, width: int, height: int) -> List[int]:
+    """Grow ``box`` by ``margin`` around its center, shifting the window back inside the image."""
+    box_h = box[3] - box[1]
+    box_w = box[2] - box[0]
+    cx = (box[0] + box[2]) // 2
+    cy = (box[1] + box[3]) // 2
+
+    w = box_w + margin * 2
+    h = box_h + margin * 2
+
+    left = cx - w // 2
+    right = cx + w // 2
+    top = cy - h // 2
+    bottom = cy + h // 2
+
+    l = max(left, 0)
+    r = min(right, width)
+    t = max(top, 0)
+    b = min(bottom, height)
+
+    if left < 0:
+        r += abs(left)
+    if right > width:
+        l -= right - width
+    if top < 0:
+        b += abs(top)
+    if bottom > height:
+        t -= bottom - height
+
+    return [int(max(l, 0)), int(max(t, 0)), int(min(r, width)), int(min(b, height))]
+
+
+def merge_overlapping_boxes(boxes: List[List[int]]) -> List[List[int]]:
+    """Union [l, t, r, b] boxes until no two of them overlap."""
+    merged = [list(box) for box in boxes]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i], merged[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    merged[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    merged.pop(j)
+                    changed = True
+                    break
+            if changed:
+                break
+    return sorted(merged, key=lambda box: (box[1], box[0]))
+
+
+def plan_roi_crop_boxes(
+    mask: np.ndarray,
+    margin: int,
+    mod: int = 8,
+    square: bool = False,
+    min_size: Optional[int] = None,
+) -> Tuple[List[List[int]], Dict]:
+    """Plan merged crop windows around the mask for the ROI HD strategy.
+
+    Returns the windows and diagnostics comparing padded forward pixels with a
+    full-frame forward. Falls back to ``full`` when cropping would not save work.
+    """
+    height, width = mask.shape[:2]
+    boxes = boxes_from_mask(mask)
+    windows = merge_overlapping_boxes(
+        [crop_window_from_box(box, margin, width, height) for box in boxes]
+    )
+    full_height, full_width = padded_shape(height, width, mod, square, min_size)
+    full_pixels = int(full_height * full_width)
+    roi_pixels = 0
+    for l, t, r, b in windows:
+        crop_height, crop_width = padded_shape(b - t, r - l, mod, square, min_size)
+        roi_pixels += int(crop_height * crop_width)
+    pixel_saving_ratio = (full_pixels - roi_pixels) / float(full_pixels) if full_pixels else 0.0
+
+    strategy = "roi"
+    fallback_reason = None
+    if windows and roi_pixels >= full_pixels:
+        strategy = "full"
+        fallback_reason = "roi_not_smaller_than_frame"
+        windows = []
+    return windows, {
+        "strategy": strategy,
+        "fallback_reason": fallback_reason,
+        "mask_box_count": len(boxes),
+        "roi_box_count": len(windows),
+        "full_pixels": full_pixels,
+        "roi_pixels": roi_pixels if strategy == "roi" else full_pixels,
+        "pixel_saving_ratio": max(0.0, pixel_saving_ratio) if strategy == "roi" else 0.0,
+        "roi_boxes": windows,
+    }
+
+
 def only_keep_largest_contour(mask: np.ndarray) -> List[np.ndarray]:
     """
     Args:
@@ -313,29 +421,44 @@ def decode_base64_to_image(
         "data:application/octet-stream;base64,"
     ):
         encoding = encoding.split(";")[1].split(",")[1]
-    image = Image.open(io.BytesIO(base64.b64decode(encoding)))
+    np_img, alpha_channel, infos, _ = decode_image_file(
+        io.BytesIO(base64.b64decode(encoding)), gray=gray
+    )
+    return np_img, alpha_channel, infos
 
-    alpha_channel = None
-    try:
-        image = ImageOps.exif_transpose(image)
-    except:
-        pass
-    # exif_transpose will remove exif rotate info，we must call image.info after exif_transpose
-    infos = image.info
 
-    if gray:
-        image = image.convert("L")
-        np_img = np.array(image)
-    else:
-        if image.mode == "RGBA":
+def decode_image_file(
+    fp, gray=False
+) -> Tuple[np.array, Optional[np.array], Dict, str]:
+    """Decode an image path or binary stream straight to numpy.
+
+    Returns the same arrays and infos as ``decode_base64_to_image`` plus the
+    PIL format name, so callers holding raw bytes or a file path can skip the
+    base64 round trip.
+    """
+    with Image.open(fp) as image:
+        image_format = image.format or ""
+        alpha_channel = None
+        try:
+            image = ImageOps.exif_transpose(image)
+        except:
+            pass
+        # exif_transpose will remove exif rotate info，we must call image.info after exif_transpose
+        infos = image.info
+
+        if gray:
+            image = image.convert("L")
             np_img = np.array(image)
-            alpha_channel = np_img[:, :, -1]
-            np_img = cv2.cvtColor(np_img, cv2.COLOR_RGBA2RGB)
         else:
-            image = image.convert("RGB")
-            np_img = np.array(image)
+            if image.mode == "RGBA":
+                np_img = np.array(image)
+                alpha_channel = np_img[:, :, -1]
+                np_img = cv2.cvtColor(np_img, cv2.COLOR_RGBA2RGB)
+            else:
+                image = image.convert("RGB")
+                np_img = np.array(image)
 
-    return np_img, alpha_channel, infos
+    return np_img, alpha_channel, infos, image_format
 
 
 def encode_pil_to_base64(image: Image, quality: int, infos: Dict) -> bytes:
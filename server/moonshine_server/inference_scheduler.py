@@ -0,0 +1,202 @@
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import torch
+from loguru import logger
+
+from moonshine_server.gpu_arbiter import GPU_PRIORITY_BULK, gpu_arbiter
+
+DEFAULT_INFERENCE_BATCH_SIZE = 4
+DEFAULT_INFERENCE_BATCH_WAIT_MS = 5.0
+
+
+@dataclass
+class _PendingForward:
+    model: object
+    image: np.ndarray
+    mask: np.ndarray
+    config: object
+    future: Future
+    priority: int = GPU_PRIORITY_BULK
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def batch_key(self) -> tuple:
+        return (
+            id(self.model),
+            self.image.shape,
+            self.image.dtype.str,
+            self.mask.shape,
+            self.mask.dtype.str,
+        )
+
+
+class InferenceScheduler:
+    """Collect same-shape padded forwards from concurrent callers into NCHW batches.
+
+    Callers submit already padded RGB crops and receive a Future resolving to the
+    BGR result of ``model.forward_batch``. One worker thread owns every forward,
+    so models are never entered concurrently. Crops submitted under an
+    interactive GPU lease are batched before queued bulk crops.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = DEFAULT_INFERENCE_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_INFERENCE_BATCH_WAIT_MS,
+    ):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self._pending: List[_PendingForward] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {
+            "batches": 0,
+            "items": 0,
+            "maxBatchSize": 0,
+            "fallbackBatches": 0,
+            "queueWaitMs": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1
+
+    def submit(self, model, image: np.ndarray, mask: np.ndarray, config) -> Future:
+        future = Future()
+        priority = gpu_arbiter.current_priority()
+        item = _PendingForward(
+            model=model,
+            image=image,
+            mask=mask,
+            config=config,
+            future=future,
+            priority=GPU_PRIORITY_BULK if priority is None else priority,
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Inference scheduler has been shut down.")
+            self._ensure_worker_locked()
+            self._pending.append(item)
+            self._condition.notify_all()
+        return future
+
+    def stats(self) -> dict:
+        with self._condition:
+            batches = self._stats["batches"]
+            return {
+                "enabled": self.enabled,
+                "maxBatchSize": self.max_batch_size,
+                "maxWaitMs": self.max_wait_ms,
+                "pending": len(self._pending),
+                "batches": batches,
+                "items": self._stats["items"],
+                "largestBatch": self._stats["maxBatchSize"],
+                "fallbackBatches": self._stats["fallbackBatches"],
+                "averageBatchSize": round(self._stats["items"] / batches, 3) if batches else 0,
+                "averageQueueWaitMs": (
+                    round(self._stats["queueWaitMs"] / self._stats["items"], 3)
+                    if self._stats["items"]
+                    else 0
+                ),
+            }
+
+    def shutdown(self):
+        with self._condition:
+            self._closed = True
+            pending = list(self._pending)
+            self._pending.clear()
+            self._condition.notify_all()
+        for item in pending:
+            item.future.cancel()
+
+    def _ensure_worker_locked(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run,
+            name="moonshine-inference-scheduler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _take_batch(self) -> List[_PendingForward]:
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return []
+
+            head = min(self._pending, key=lambda item: item.priority)
+            key = (head.priority, head.batch_key)
+            deadline = head.enqueued_at + self.max_wait_ms / 1000
+            while True:
+                matching = [
+                    item for item in self._pending if (item.priority, item.batch_key) == key
+                ]
+                remaining = deadline - time.perf_counter()
+                if len(matching) >= self.max_batch_size or remaining <= 0 or self._closed:
+                    break
+                self._condition.wait(timeout=remaining)
+
+            batch = matching[: self.max_batch_size]
+            batch_ids = {id(item) for item in batch}
+            self._pending = [item for item in self._pending if id(item) not in batch_ids]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                with self._condition:
+                    if self._closed:
+                        return
+                continue
+            batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_PendingForward]):
+        started_at = time.perf_counter()
+        model = batch[0].model
+        fallback = False
+        try:
+            with torch.inference_mode():
+                try:
+                    results = model.forward_batch(
+                        [item.image for item in batch],
+                        [item.mask for item in batch],
+                        [item.config for item in batch],
+                    )
+                except RuntimeError as error:
+                    if len(batch) == 1 or "out of memory" not in str(error).lower():
+                        raise
+                    # A batch that does not fit is retried one crop at a time.
+                    logger.warning(f"Batched inference out of memory, retry {len(batch)} item(s) serially.")
+                    fallback = True
+                    if torch.cuda.is_available():
+                        torch.cuda.empty_cache()
+                    results = [
+                        model.forward_batch([item.image], [item.mask], [item.config])[0]
+                        for item in batch
+                    ]
+        except BaseException as error:
+            for item in batch:
+                item.future.set_exception(error)
+            return
+
+        with self._condition:
+            self._stats["batches"] += 1
+            self._stats["items"] += len(batch)
+            self._stats["maxBatchSize"] = max(self._stats["maxBatchSize"], len(batch))
+            self._stats["fallbackBatches"] += int(fallback)
+            self._stats["queueWaitMs"] += sum(
+                (started_at - item.enqueued_at) * 1000 for item in batch
+            )
+        for item, result in zip(batch, results):
+            item.future.set_result(result)
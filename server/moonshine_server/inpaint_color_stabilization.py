@@ -70,6 +70,7 @@ def _analyze_mask_context(
     image_rgb: np.ndarray,
     mask: np.ndarray,
     mode: str,
+    mask_plan=None,
 ) -> Optional[Dict[str, Any]]:
     normalized_mode = normalize_color_stabilization_mode(mode)
     if normalized_mode == "off":
@@ -78,32 +79,49 @@ def _analyze_mask_context(
         return None
 
     height, width = image_rgb.shape[:2]
-    mask_bool = _binary_mask(mask)
-    if mask_bool.shape[:2] != (height, width):
-        mask_bool = cv2.resize(mask_bool, (width, height), interpolation=cv2.INTER_NEAREST)
-    mask_area = int(np.count_nonzero(mask_bool))
+    config = _analysis_config(normalized_mode)
+    ring_radius = int(config["ring_radius"])
+    if mask_plan is not None:
+        geometry = mask_plan.dilated_ring(height, width, ring_radius)
+        if geometry is None:
+            return None
+        mask_bool = geometry["mask"]
+        mask_area = geometry["mask_area"]
+    else:
+        mask_bool = _binary_mask(mask)
+        if mask_bool.shape[:2] != (height, width):
+            mask_bool = cv2.resize(mask_bool, (width, height), interpolation=cv2.INTER_NEAREST)
+        mask_area = int(np.count_nonzero(mask_bool))
     if mask_area <= 0:
         return None
     mask_ratio = mask_area / max(1, height * width)
-    config = _analysis_config(normalized_mode)
     if mask_ratio > config["max_mask_ratio"]:
         return None
 
-    bbox = _mask_bbox(mask_bool)
-    if bbox is None:
-        return None
-
-    ring_radius = int(config["ring_radius"])
-    rx1, ry1, rx2, ry2 = _expanded_bbox(bbox, width, height, ring_radius * 2)
-    roi_mask = mask_bool[ry1:ry2, rx1:rx2]
-    if roi_mask.size == 0:
-        return None
-
-    kernel_size = ring_radius * 2 + 1
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
-    dilated = cv2.dilate(roi_mask, kernel, iterations=1)
-    ring = (dilated > 0) & (roi_mask == 0)
-    ring_count = int(np.count_nonzero(ring))
+    if mask_plan is None:
+        bbox = _mask_bbox(mask_bool)
+        if bbox is None:
+            return None
+
+        rx1, ry1, rx2, ry2 = _expanded_bbox(bbox, width, height, ring_radius * 2)
+        roi_mask = mask_bool[ry1:ry2, rx1:rx2]
+        if roi_mask.size == 0:
+            return None
+
+        kernel_size = ring_radius * 2 + 1
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+        dilated = cv2.dilate(roi_mask, kernel, iterations=1)
+        ring = (dilated > 0) & (roi_mask == 0)
+        ring_count = int(np.count_nonzero(ring))
+        roi_mask = roi_mask.astype(bool)
+        feather_alpha = None
+    else:
+        bbox = geometry["bbox"]
+        rx1, ry1, rx2, ry2 = geometry["roi_bbox"]
+        roi_mask = geometry["roi_mask"]
+        ring = geometry["ring"]
+        ring_count = geometry["ring_count"]
+        feather_alpha = mask_plan.feather_alpha(height, width, ring_radius, config["feather_sigma"])
     if ring_count < max(64, min(512, int(mask_area * 0.02))):
         return None
 
@@ -121,8 +139,9 @@ def _analyze_mask_context(
         "mask": mask_bool,
         "bbox": bbox,
         "roi_bbox": (rx1, ry1, rx2, ry2),
-        "roi_mask": roi_mask.astype(bool),
+        "roi_mask": roi_mask,
         "ring": ring,
+        "feather_alpha": feather_alpha,
         "background_samples": background_samples,
         "background_median": np.median(background_samples, axis=0),
         "background_mean": np.mean(background_samples, axis=0),
@@ -137,14 +156,16 @@ def _compose_rgb_with_mask(
     roi_mask: np.ndarray,
     roi_bbox: Tuple[int, int, int, int],
     sigma: float,
+    alpha: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     x1, y1, x2, y2 = roi_bbox
     output = base_rgb.astype(np.float32).copy()
     roi_output = output[y1:y2, x1:x2]
-    alpha = roi_mask.astype(np.float32)
-    if sigma > 0:
-        alpha = cv2.GaussianBlur(alpha, (0, 0), sigmaX=sigma, sigmaY=sigma)
-    alpha = np.clip(alpha, 0.0, 1.0)[:, :, np.newaxis]
+    if alpha is None:
+        alpha = roi_mask.astype(np.float32)
+        if sigma > 0:
+            alpha = cv2.GaussianBlur(alpha, (0, 0), sigmaX=sigma, sigmaY=sigma)
+        alpha = np.clip(alpha, 0.0, 1.0)[:, :, np.newaxis]
     roi_output[:] = roi_output * (1.0 - alpha) + replacement_rgb.astype(np.float32) * alpha
     return np.clip(output, 0, 255).astype(np.uint8)
 
@@ -153,9 +174,10 @@ def try_flat_background_fill(
     image_rgb: np.ndarray,
     mask: np.ndarray,
     mode: str = "auto",
+    mask_plan=None,
 ) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
     try:
-        context = _analyze_mask_context(image_rgb, mask, mode)
+        context = _analyze_mask_context(image_rgb, mask, mode, mask_plan=mask_plan)
         if not context or not context["flat_background"]:
             return None, {"applied": False, "reason": "not-flat-background"}
 
@@ -169,6 +191,7 @@ def try_flat_background_fill(
             context["roi_mask"],
             context["roi_bbox"],
             context["config"]["feather_sigma"],
+            alpha=context["feather_alpha"],
         )
         return cv2.cvtColor(stabilized_rgb, cv2.COLOR_RGB2BGR), {
             "applied": True,
@@ -183,18 +206,21 @@ def apply_inpaint_color_stabilization(
     mask: np.ndarray,
     result_bgr: np.ndarray,
     mode: str = "auto",
+    mask_plan=None,
 ) -> Tuple[np.ndarray, Dict[str, Any]]:
     normalized_mode = normalize_color_stabilization_mode(mode)
     if normalized_mode == "off":
         return result_bgr, {"applied": False, "reason": "disabled"}
 
     try:
-        context = _analyze_mask_context(image_rgb, mask, normalized_mode)
+        context = _analyze_mask_context(image_rgb, mask, normalized_mode, mask_plan=mask_plan)
         if not context:
             return result_bgr, {"applied": False, "reason": "no-context"}
 
         if context["flat_background"]:
-            filled_bgr, decision = try_flat_background_fill(image_rgb, mask, normalized_mode)
+            filled_bgr, decision = try_flat_background_fill(
+                image_rgb, mask, normalized_mode, mask_plan=mask_plan
+            )
             if filled_bgr is not None:
                 return filled_bgr, decision
             return result_bgr, decision
@@ -225,6 +251,7 @@ def apply_inpaint_color_stabilization(
             roi_mask,
             context["roi_bbox"],
             config["feather_sigma"],
+            alpha=context["feather_alpha"],
         )
         return cv2.cvtColor(stabilized_rgb, cv2.COLOR_RGB2BGR), {
             "applied": True,
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from moonshine_server.helper import boxes_from_mask, plan_roi_crop_boxes
+from moonshine_server.mask_tracks import parse_mask_track_ref
+
+MASK_PLAN_CACHE_SIZE = 32
+# Plans memoize full-frame float32 arrays, so the count limit alone can hold
+# hundreds of MB at 4K; the oldest plans are also dropped past this budget.
+MASK_PLAN_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class MaskPlan:
+    """Mask-only geometry shared by every frame that reuses the same mask.
+
+    Video watermark batches apply one mask to hundreds of frames. The plan keeps
+    the thresholded mask and lazily memoizes boxes, crop windows, color
+    stabilization rings, feather alphas and temporal stats so each frame only
+    pays for the image-dependent work.
+    """
+
+    def __init__(self, mask: np.ndarray, key: str = ""):
+        if mask.ndim == 3:
+            mask = mask[:, :, 0] if mask.shape[2] == 1 else cv2.cvtColor(mask, cv2.COLOR_BGR2GRAY)
+        self.mask = np.ascontiguousarray(mask)
+        self.mask.flags.writeable = False
+        self.key = key or mask_digest(self.mask)
+        self.shape: Tuple[int, int] = self.mask.shape[:2]
+        self.binary = self.mask > 127
+        self.binary.flags.writeable = False
+        self.nonzero = int(np.count_nonzero(self.mask))
+        self.masked_pixels = int(np.count_nonzero(self.binary))
+        self._memo: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the mask and every memoized array."""
+        with self._lock:
+            memo = list(self._memo.values())
+        return self.mask.nbytes + self.binary.nbytes + sum(_array_bytes(value) for value in memo)
+
+    def _memoized(self, key: tuple, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = factory()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+    def boxes(self) -> List[np.ndarray]:
+        return self._memoized(("boxes",), lambda: boxes_from_mask(self.mask))
+
+    def roi_crop_boxes(
+        self,
+        margin: int,
+        mod: int = 8,
+        square: bool = False,
+        min_size: Optional[int] = None,
+    ) -> Tuple[List[List[int]], Dict]:
+        return self._memoized(
+            ("roi", int(margin), int(mod), bool(square), min_size),
+            lambda: plan_roi_crop_boxes(self.mask, margin, mod=mod, square=square, min_size=min_size),
+        )
+
+    def resized_binary(self, height: int, width: int) -> np.ndarray:
+        """Return the 0/1 uint8 mask at ``(height, width)``."""
+        def build():
+            binary = self.binary.astype(np.uint8)
+            if binary.shape[:2] != (height, width):
+                binary = cv2.resize(binary, (width, height), interpolation=cv2.INTER_NEAREST)
+            return binary
+
+        return self._memoized(("binary", height, width), build)
+
+    def dilated_ring(
+        self, height: int, width: int, ring_radius: int
+    ) -> Optional[Dict[str, Any]]:
+        """Ring of background pixels around the mask bbox used by color stabilization."""
+        def build():
+            from moonshine_server.inpaint_color_stabilization import (
+                _expanded_bbox,
+                _mask_bbox,
+            )
+
+            mask_bool = self.resized_binary(height, width)
+            bbox = _mask_bbox(mask_bool)
+            if bbox is None:
+                return None
+            rx1, ry1, rx2, ry2 = _expanded_bbox(bbox, width, height, ring_radius * 2)
+            roi_mask = mask_bool[ry1:ry2, rx1:rx2]
+            if roi_mask.size == 0:
+                return None
+            kernel_size = ring_radius * 2 + 1
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+            dilated = cv2.dilate(roi_mask, kernel, iterations=1)
+            ring = (dilated > 0) & (roi_mask == 0)
+            return {
+                "mask": mask_bool,
+                "mask_area": int(np.count_nonzero(mask_bool)),
+                "bbox": bbox,
+                "roi_bbox": (rx1, ry1, rx2, ry2),
+                "roi_mask": roi_mask.astype(bool),
+                "ring": ring,
+                "ring_count": int(np.count_nonzero(ring)),
+            }
+
+        return self._memoized(("ring", height, width, int(ring_radius)), build)
+
+    def feather_alpha(self, height: int, width: int, ring_radius: int, sigma: float) -> Optional[np.ndarray]:
+        """Blurred compose alpha for the ring context's ``roi_mask``."""
+        def build():
+            context = self.dilated_ring(height, width, ring_radius)
+            if context is None:
+                return None
+            alpha = context["roi_mask"].astype(np.float32)
+            if sigma > 0:
+                alpha = cv2.GaussianBlur(alpha, (0, 0), sigmaX=sigma, sigmaY=sigma)
+            return np.clip(alpha, 0.0, 1.0)[:, :, np.newaxis]
+
+        return self._memoized(("feather", height, width, int(ring_radius), float(sigma)), build)
+
+    def temporal_stats(self) -> Dict[str, Any]:
+        from moonshine_server.video_temporal_enhancement import _mask_stats
+
+        return self._memoized(("temporal_stats",), lambda: _mask_stats(self.mask))
+
+    def stabilized_mask(self) -> np.ndarray:
+        from moonshine_server.video_temporal_enhancement import _stabilize_binary_mask
+
+        return self._memoized(("stabilized",), lambda: _stabilize_binary_mask(self.mask))
+
+    def blend_weight(self, stabilized: bool = False, sigma: float = 1.2) -> np.ndarray:
+        """Feathered 0..1 weight restricted to the mask, as used by temporal blending."""
+        def build():
+            source = self.stabilized_mask() if stabilized else self.mask
+            binary = (source > 127).astype(np.float32)
+            mask_float = cv2.GaussianBlur(binary, (0, 0), sigmaX=sigma)
+            mask_float *= binary
+            return np.clip(mask_float, 0.0, 1.0)
+
+        return self._memoized(("blend_weight", bool(stabilized), float(sigma)), build)
+
+
+def _array_bytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_array_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_array_bytes(item) for item in value)
+    return 0
+
+
+def mask_digest(mask: np.ndarray) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(mask.shape).encode("ascii"))
+    digest.update(np.ascontiguousarray(mask).data)
+    return digest.hexdigest()
+
+
+_mask_plan_cache: "OrderedDict[tuple, MaskPlan]" = OrderedDict()
+_mask_plan_lock = threading.Lock()
+
+
+def _remember_plan(cache_key: tuple, plan: MaskPlan) -> MaskPlan:
+    with _mask_plan_lock:
+        existing = _mask_plan_cache.get(cache_key)
+        if existing is not None:
+            _mask_plan_cache.move_to_end(cache_key)
+            return existing
+        _mask_plan_cache[cache_key] = plan
+        while len(_mask_plan_cache) > MASK_PLAN_CACHE_SIZE:
+            _mask_plan_cache.popitem(last=False)
+        # Sizes are re-read here because plans keep memoizing after insertion.
+        total_bytes = sum(cached.nbytes for cached in _mask_plan_cache.values())
+        while len(_mask_plan_cache) > 1 and total_bytes > MASK_PLAN_CACHE_BYTES:
+            _, evicted = _mask_plan_cache.popitem(last=False)
+            total_bytes -= evicted.nbytes
+    return plan
+
+
+def get_mask_plan(mask: np.ndarray) -> MaskPlan:
+    """Return the cached plan for an in-memory mask, keyed by its content hash."""
+    digest = mask_digest(mask)
+    cache_key = ("digest", digest)
+    with _mask_plan_lock:
+        plan = _mask_plan_cache.get(cache_key)
+        if plan is not None:
+            _mask_plan_cache.move_to_end(cache_key)
+            return plan
+    return _remember_plan(cache_key, MaskPlan(mask, key=digest))
+
+
+def get_mask_plan_for_path(
+    mask_path: str,
+    loader: Callable[[], np.ndarray],
+    target_shape: Optional[Tuple[int, int]] = None,
+    variant: Any = None,
+) -> MaskPlan:
+    """Return the cached plan for a mask file, reloading only when its stat changes.
+
+    ``loader`` decodes the file; the result is resized with nearest neighbour to
+    ``target_shape`` when given. ``variant`` separates decodes of the same file
+    with different options (e.g. grayscale vs binary). Track references are
+    read per frame and never cached.
+    """
+    track_ref = parse_mask_track_ref(mask_path)
+    if track_ref is not None:
+        return MaskPlan(_resize_to_target(loader(), target_shape))
+    stat = os.stat(mask_path)
+    cache_key = (
+        "path",
+        os.path.abspath(mask_path),
+        int(stat.st_size),
+        int(stat.st_mtime_ns),
+        tuple(target_shape) if target_shape else None,
+        variant,
+    )
+    with _mask_plan_lock:
+        plan = _mask_plan_cache.get(cache_key)
+        if plan is not None:
+            _mask_plan_cache.move_to_end(cache_key)
+            return plan
+
+    return _remember_plan(cache_key, MaskPlan(_resize_to_target(loader(), target_shape)))
+
+
+def _resize_to_target(mask: np.ndarray, target_shape: Optional[Tuple[int, int]]) -> np.ndarray:
+    if target_shape and mask.shape[:2] != tuple(target_shape):
+        mask = cv2.resize(
+            mask,
+            (target_shape[1], target_shape[0]),
+            interpolation=cv2.INTER_NEAREST,
+        )
+    return mask
+
+
+def clear_mask_plan_cache():
+    with _mask_plan_lock:
+        _mask_plan_cache.clear()
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from moonshine_server.disk_space import DEFAULT_DISK_SPACE_SAFETY_BYTES, ensure_disk_space
+from moonshine_server.path_io import PathInput, to_path
+
+# A track file holds every propagated mask of one object: a small header, then
+# one payload per frame. The ``.idx`` file next to it is a flat array of
+# fixed-size records so readers can memory-map both and jump to any frame.
+MASK_TRACK_SUFFIX = ".mtrk"
+MASK_TRACK_INDEX_SUFFIX = ".idx"
+MASK_TRACK_REF_SEPARATOR = "#"
+MASK_TRACK_MAGIC = b"MNSTRK01"
+MASK_TRACK_HEADER = struct.Struct("<8sII")
+MASK_TRACK_INDEX_DTYPE = np.dtype(
+    [("frame", "<i8"), ("offset", "<i8"), ("length", "<u4"), ("encoding", "<u4")]
+)
+MASK_TRACK_EMPTY = 0
+MASK_TRACK_RLE = 1
+MASK_TRACK_BITS = 2
+MASK_TRACK_READER_CACHE_SIZE = 16
+# Free space is re-checked after this many appended bytes instead of per frame.
+MASK_TRACK_DISK_CHECK_BYTES = 64 * 1024 * 1024
+
+
+def mask_track_ref(track_path: PathInput, frame_index: int) -> str:
+    """Return the ``<track>.mtrk#<frame>`` reference accepted wherever a mask path is."""
+    return f"{os.fspath(track_path)}{MASK_TRACK_REF_SEPARATOR}{int(frame_index)}"
+
+
+def parse_mask_track_ref(value) -> Optional[Tuple[Path, int]]:
+    """Split a track reference into ``(track_path, frame_index)``; None for plain paths."""
+    if not isinstance(value, (str, os.PathLike)):
+        return None
+    head, separator, tail = os.fspath(value).rpartition(MASK_TRACK_REF_SEPARATOR)
+    if not separator or not tail.isdigit() or not head.lower().endswith(MASK_TRACK_SUFFIX):
+        return None
+    return to_path(head), int(tail)
+
+
+def _index_path(track_path: Path) -> Path:
+    return track_path.with_name(track_path.name + MASK_TRACK_INDEX_SUFFIX)
+
+
+def encode_track_frame(mask: np.ndarray) -> Tuple[int, bytes]:
+    """Encode a binary mask as row-major zero-first runs or packed bits, whichever is smaller."""
+    flat = np.ascontiguousarray(mask).reshape(-1) > 127
+    if not flat.any():
+        return MASK_TRACK_EMPTY, b""
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    runs = np.diff(np.concatenate(([0], changes, [flat.size])))
+    if flat[0]:
+        runs = np.concatenate(([0], runs))
+    rle_size = runs.size * 4
+    bits_size = (flat.size + 7) // 8
+    if rle_size <= bits_size:
+        return MASK_TRACK_RLE, runs.astype("<u4").tobytes()
+    return MASK_TRACK_BITS, np.packbits(flat).tobytes()
+
+
+def decode_track_frame(encoding: int, payload, height: int, width: int) -> np.ndarray:
+    """Inverse of ``encode_track_frame``; returns a 0/255 uint8 mask."""
+    pixel_count = int(height) * int(width)
+    if encoding == MASK_TRACK_EMPTY:
+        return np.zeros((height, width), dtype=np.uint8)
+    if encoding == MASK_TRACK_RLE:
+        runs = np.frombuffer(payload, dtype="<u4")
+        values = np.zeros(runs.size, dtype=np.uint8)
+        values[1::2] = 255
+        flat = np.repeat(values, runs)
+    elif encoding == MASK_TRACK_BITS:
+        bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=pixel_count)
+        flat = bits * np.uint8(255)
+    else:
+        raise ValueError(f"Unknown mask track frame encoding: {encoding}")
+    if flat.size != pixel_count:
+        raise ValueError("Mask track frame does not match the track size")
+    return flat.reshape(height, width)
+
+
+class MaskTrackWriter:
+    """Append the masks of one object to a track file and its frame index."""
+
+    def __init__(self, path: PathInput, width: int, height: int):
+        self.path = to_path(path)
+        self.index_path = _index_path(self.path)
+        self.width = int(width)
+        self.height = int(height)
+        self.frame_count = 0
+        self.bytes_written = 0
+        self._data = open(self.path, "wb")
+        self._index = open(self.index_path, "wb")
+        self._data.write(MASK_TRACK_HEADER.pack(MASK_TRACK_MAGIC, self.width, self.height))
+        self._offset = MASK_TRACK_HEADER.size
+
+    def append(self, frame_index: int, mask: np.ndarray) -> dict:
+        if mask.shape[:2] != (self.height, self.width):
+            raise ValueError(
+                f"Mask shape {mask.shape[:2]} does not match track size {(self.height, self.width)}"
+            )
+        encoding, payload = encode_track_frame(mask)
+        record = np.zeros(1, dtype=MASK_TRACK_INDEX_DTYPE)
+        record[0] = (int(frame_index), self._offset, len(payload), encoding)
+        self._data.write(payload)
+        self._index.write(record.tobytes())
+        self._offset += len(payload)
+        self.frame_count += 1
+        self.bytes_written += len(payload) + MASK_TRACK_INDEX_DTYPE.itemsize
+        return {
+            "length": len(payload),
+            "encoding": encoding,
+            "signature": hashlib.blake2b(payload, digest_size=16).hexdigest(),
+        }
+
+    def flush(self):
+        # Payload before index, so a reader never sees a record without its data.
+        self._data.flush()
+        self._index.flush()
+
+    def close(self):
+        if self._data.closed:
+            return
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+
+class MaskTrackStore:
+    """Per-object mask tracks for one propagation run.
+
+    Replaces one JPEG per object per frame: masks are stored losslessly,
+    appended to a single file per object, and returned as ``maskPath`` track
+    references that the video inpaint and temporal paths read by frame index.
+    """
+
+    def __init__(
+        self,
+        output_dir: PathInput,
+        width: int,
+        height: int,
+        *,
+        run_id: Optional[str] = None,
+        operation: str = "SAM 视频蒙版轨迹写入",
+    ):
+        self.output_dir = to_path(output_dir)
+        self.width = int(width)
+        self.height = int(height)
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.operation = operation
+        self._writers: Dict[int, MaskTrackWriter] = {}
+        self._bytes_since_disk_check = MASK_TRACK_DISK_CHECK_BYTES
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(writer.bytes_written for writer in self._writers.values())
+
+    def track_path(self, object_id: int) -> Path:
+        return self.output_dir / f"mask_track_{self.run_id}_o{int(object_id):03d}{MASK_TRACK_SUFFIX}"
+
+    def append(self, frame_index: int, object_id: int, mask: np.ndarray) -> dict:
+        if self._bytes_since_disk_check >= MASK_TRACK_DISK_CHECK_BYTES:
+            ensure_disk_space(
+                self.output_dir,
+                MASK_TRACK_DISK_CHECK_BYTES,
+                safety_bytes=DEFAULT_DISK_SPACE_SAFETY_BYTES,
+                operation=self.operation,
+            )
+            self._bytes_since_disk_check = 0
+        writer = self._writers.get(int(object_id))
+        if writer is None:
+            writer = MaskTrackWriter(self.track_path(object_id), self.width, self.height)
+            self._writers[int(object_id)] = writer
+        entry = writer.append(frame_index, mask)
+        self._bytes_since_disk_check += entry["length"] + MASK_TRACK_INDEX_DTYPE.itemsize
+        return {
+            "objectId": int(object_id),
+            "maskPath": mask_track_ref(writer.path, frame_index),
+            "maskTrack": str(writer.path),
+            "maskFrame": int(frame_index),
+            "maskAssetId": f"{entry['signature'][:12]}:{int(frame_index)}:{int(object_id)}",
+            "maskSize": entry["length"],
+            "maskSignature": entry["signature"],
+        }
+
+    def flush(self):
+        for writer in self._writers.values():
+            writer.flush()
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+
+
+class MaskTrackReader:
+    """Memory-mapped random access to the frames of one track file."""
+
+    def __init__(self, path: PathInput):
+        self.path = to_path(path)
+        with open(self.path, "rb") as file:
+            header = file.read(MASK_TRACK_HEADER.size)
+        if len(header) != MASK_TRACK_HEADER.size:
+            raise ValueError(f"Mask track is truncated: {self.path}")
+        magic, self.width, self.height = MASK_TRACK_HEADER.unpack(header)
+        if magic != MASK_TRACK_MAGIC:
+            raise ValueError(f"Not a mask track file: {self.path}")
+        data_size = self.path.stat().st_size
+        self._data = (
+            np.memmap(self.path, dtype=np.uint8, mode="r")
+            if data_size > MASK_TRACK_HEADER.size
+            else np.zeros(MASK_TRACK_HEADER.size, dtype=np.uint8)
+        )
+        index_bytes = _index_path(self.path).read_bytes()
+        usable = len(index_bytes) - len(index_bytes) % MASK_TRACK_INDEX_DTYPE.itemsize
+        index = np.frombuffer(index_bytes[:usable], dtype=MASK_TRACK_INDEX_DTYPE)
+        # Later records win, and records past the mapped data were still being written.
+        in_bounds = index["offset"] + index["length"] <= self._data.size
+        self._rows = {
+            int(record["frame"]): record for record in index[in_bounds]
+        }
+
+    def __contains__(self, frame_index: int) -> bool:
+        return int(frame_index) in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def frame_indexes(self) -> list[int]:
+        return sorted(self._rows)
+
+    def read(self, frame_index: int) -> Optional[np.ndarray]:
+        record = self._rows.get(int(frame_index))
+        if record is None:
+            return None
+        offset = int(record["offset"])
+        payload = self._data[offset:offset + int(record["length"])]
+        return decode_track_frame(int(record["encoding"]), payload, self.height, self.width)
+
+
+_reader_cache: "OrderedDict[str, Tuple[tuple, MaskTrackReader]]" = OrderedDict()
+_reader_lock = threading.Lock()
+
+
+def open_mask_track(path: PathInput) -> MaskTrackReader:
+    """Return a cached reader, reopened only when the track or its index changed."""
+    track_path = to_path(path)
+    cache_key = os.path.abspath(track_path)
+    data_stat = os.stat(track_path)
+    index_stat = os.stat(_index_path(track_path))
+    signature = (
+        data_stat.st_size,
+        data_stat.st_mtime_ns,
+        index_stat.st_size,
+        index_stat.st_mtime_ns,
+    )
+    with _reader_lock:
+        cached = _reader_cache.get(cache_key)
+        if cached is not None and cached[0] == signature:
+            _reader_cache.move_to_end(cache_key)
+            return cached[1]
+    reader = MaskTrackReader(track_path)
+    with _reader_lock:
+        _reader_cache[cache_key] = (signature, reader)
+        _reader_cache.move_to_end(cache_key)
+        while len(_reader_cache) > MASK_TRACK_READER_CACHE_SIZE:
+            _reader_cache.popitem(last=False)
+    return reader
+
+
+def read_mask_track_ref(value) -> Optional[np.ndarray]:
+    """Decode a ``<track>.mtrk#<frame>`` reference; None when ``value`` is a plain path."""
+    track_ref = parse_mask_track_ref(value)
+    if track_ref is None:
+        return None
+    track_path, frame_index = track_ref
+    if not track_path.is_file():
+        raise FileNotFoundError(f"Mask track not found: {track_path}")
+    mask = open_mask_track(track_path).read(frame_index)
+    if mask is None:
+        raise FileNotFoundError(f"Mask track has no frame {frame_index}: {track_path}")
+    return mask
+
+
+def close_mask_tracks(path: Optional[PathInput] = None):
+    """Drop cached readers so their files can be removed.
+
+    ``path`` limits this to one track, or to every track under a directory.
+    """
+    with _reader_lock:
+        if path is None:
+            _reader_cache.clear()
+            return
+        target = os.path.abspath(to_path(path))
+        prefix = os.path.join(target, "")
+        for cache_key in [key for key in _reader_cache if key == target or key.startswith(prefix)]:
+            _reader_cache.pop(cache_key, None)
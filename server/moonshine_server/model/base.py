@@ -8,7 +8,9 @@ from loguru import logger
 
 from moonshine_server.helper import (
     boxes_from_mask,
+    crop_window_from_box,
     pad_img_to_modulo,
+    plan_roi_crop_boxes,
     resize_max_size,
     switch_mps_device,
 )
@@ -21,6 +23,9 @@ class InpaintModel:
     pad_mod = 8
     pad_to_square = False
     is_erase_model = False
+    # Models whose forward accepts stacked NCHW crops route through the scheduler.
+    batch_forward = False
+    inference_scheduler = None
 
     def __init__(self, device, **kwargs):
         self.device = switch_mps_device(self.name, device)
@@ -42,6 +47,19 @@ class InpaintModel:
         """Run model on RGB image and 0/255 mask, returning BGR image."""
         ...
 
+    def forward_batch(self, images, masks, configs):
+        """Run ``forward`` on same-shape padded crops, returning one BGR image per crop."""
+        return [
+            self.forward(image, mask, config)
+            for image, mask, config in zip(images, masks, configs)
+        ]
+
+    def _scheduled_forward(self, image, mask, config: InpaintRequest):
+        scheduler = self.inference_scheduler
+        if not self.batch_forward or scheduler is None or not scheduler.enabled:
+            return self.forward(image, mask, config)
+        return scheduler.submit(self, image, mask, config).result()
+
     def forward_pre_process(self, image, mask, config):
         return image, mask
 
@@ -58,7 +76,7 @@ class InpaintModel:
         )
 
         image, mask = self.forward_pre_process(image, mask, config)
-        result = self.forward(pad_image, pad_mask, config)
+        result = self._scheduled_forward(pad_image, pad_mask, config)
         result = result[0:origin_height, 0:origin_width, :]
         result, image, mask = self.forward_post_process(result, image, mask, config)
 
@@ -68,12 +86,13 @@ class InpaintModel:
         return result
 
     @torch.no_grad()
-    def __call__(self, image, mask, config: InpaintRequest):
+    def __call__(self, image, mask, config: InpaintRequest, mask_plan=None):
         inpaint_result = None
         if config.hd_strategy == HDStrategy.CROP:
             if max(image.shape) > config.hd_strategy_crop_trigger_size:
                 crop_result = []
-                for box in boxes_from_mask(mask):
+                boxes = mask_plan.boxes() if mask_plan is not None else boxes_from_mask(mask)
+                for box in boxes:
                     crop_image, crop_box = self._run_box(image, mask, box, config)
                     crop_result.append((crop_image, crop_box))
 
@@ -82,6 +101,27 @@ class InpaintModel:
                     x1, y1, x2, y2 = crop_box
                     inpaint_result[y1:y2, x1:x2, :] = crop_image
 
+        elif config.hd_strategy == HDStrategy.ROI:
+            roi_plan_kwargs = {
+                "mod": self.pad_mod,
+                "square": self.pad_to_square,
+                "min_size": self.min_size,
+            }
+            if mask_plan is not None:
+                roi_boxes, roi_plan = mask_plan.roi_crop_boxes(
+                    config.hd_strategy_crop_margin, **roi_plan_kwargs
+                )
+            else:
+                roi_boxes, roi_plan = plan_roi_crop_boxes(
+                    mask, config.hd_strategy_crop_margin, **roi_plan_kwargs
+                )
+            if roi_plan["strategy"] == "roi":
+                inpaint_result = np.ascontiguousarray(image[:, :, ::-1])
+                for l, t, r, b in roi_boxes:
+                    inpaint_result[t:b, l:r, :] = self._pad_forward(
+                        image[t:b, l:r, :], mask[t:b, l:r], config
+                    )
+
         elif config.hd_strategy == HDStrategy.RESIZE:
             if max(image.shape) > config.hd_strategy_resize_limit:
                 origin_size = image.shape[:2]
@@ -115,39 +155,8 @@ class InpaintModel:
         return inpaint_result
 
     def _crop_box(self, image, mask, box, config: InpaintRequest):
-        box_h = box[3] - box[1]
-        box_w = box[2] - box[0]
-        cx = (box[0] + box[2]) // 2
-        cy = (box[1] + box[3]) // 2
         img_h, img_w = image.shape[:2]
-
-        w = box_w + config.hd_strategy_crop_margin * 2
-        h = box_h + config.hd_strategy_crop_margin * 2
-
-        left = cx - w // 2
-        right = cx + w // 2
-        top = cy - h // 2
-        bottom = cy + h // 2
-
-        l = max(left, 0)
-        r = min(right, img_w)
-        t = max(top, 0)
-        b = min(bottom, img_h)
-
-        if left < 0:
-            r += abs(left)
-        if right > img_w:
-            l -= right - img_w
-        if top < 0:
-            b += abs(top)
-        if bottom > img_h:
-            t -= bottom - img_h
-
-        l = max(l, 0)
-        r = min(r, img_w)
-        t = max(t, 0)
-        b = min(b, img_h)
-
+        l, t, r, b = crop_window_from_box(box, config.hd_strategy_crop_margin, img_w, img_h)
         return image[t:b, l:r, :], mask[t:b, l:r], [l, t, r, b]
 
     def _run_box(self, image, mask, box, config: InpaintRequest):
@@ -1665,7 +1665,7 @@ class FcF(InpaintModel):
         return os.path.exists(get_cache_path_by_url(FCF_MODEL_URL))
 
     @torch.no_grad()
-    def __call__(self, image, mask, config: InpaintRequest):
+    def __call__(self, image, mask, config: InpaintRequest, mask_plan=None):
         """
         images: [H, W, C] RGB, not normalized
         masks: [H, W]
@@ -1674,7 +1674,7 @@ class FcF(InpaintModel):
         if image.shape[0] == 512 and image.shape[1] == 512:
             return self._pad_forward(image, mask, config)
 
-        boxes = boxes_from_mask(mask)
+        boxes = mask_plan.boxes() if mask_plan is not None else boxes_from_mask(mask)
         crop_result = []
         config.hd_strategy_crop_margin = 128
         for box in boxes:
@@ -66,6 +66,7 @@ class LaMa(InpaintModel):
     name = "lama"
     pad_mod = 8
     is_erase_model = True
+    batch_forward = True
 
     @staticmethod
     def download():
@@ -122,6 +123,18 @@ class LaMa(InpaintModel):
         cur_res = cv2.cvtColor(cur_res, cv2.COLOR_RGB2BGR)
         return cur_res
 
+    def forward_batch(self, images, masks, configs):
+        """Same as ``forward`` for N same-shape crops stacked into one NCHW batch."""
+        image = torch.from_numpy(np.stack([norm_img(item) for item in images])).to(self.device)
+        mask = np.stack([(norm_img(item) > 0) * 1 for item in masks])
+        mask = torch.from_numpy(mask).to(self.device)
+
+        inpainted_images = self.model(image, mask)
+
+        outputs = inpainted_images.permute(0, 2, 3, 1).detach().cpu().numpy()
+        outputs = np.clip(outputs * 255, 0, 255).astype("uint8")
+        return [cv2.cvtColor(output, cv2.COLOR_RGB2BGR) for output in outputs]
+
 
 class AnimeLaMa(LaMa):
     name = "anime-lama"
@@ -1,4 +1,6 @@
-from typing import Dict, List
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 import numpy as np
 import torch
@@ -6,12 +8,18 @@ from loguru import logger
 
 from moonshine_server.download import scan_models
 from moonshine_server.helper import switch_mps_device
+from moonshine_server.inference_scheduler import (
+    DEFAULT_INFERENCE_BATCH_SIZE,
+    DEFAULT_INFERENCE_BATCH_WAIT_MS,
+    InferenceScheduler,
+)
 from moonshine_server.model import models
-from moonshine_server.model.utils import torch_gc
+from moonshine_server.gpu_housekeeping import gpu_housekeeper
 from moonshine_server.schema import InpaintRequest, ModelInfo, ModelType
 
 
 MAT_CUDA_FALLBACK_MESSAGE = "MAT CPU 初始化失败，当前已自动切换为 LaMa。"
+DEFAULT_WARM_UP_SIZE = 256
 
 
 def _mat_cuda_unavailable(name: str, device) -> bool:
@@ -19,23 +27,36 @@ def _mat_cuda_unavailable(name: str, device) -> bool:
 
 
 class ModelManager:
-    def __init__(self, name: str, device: torch.device, **kwargs):
+    def __init__(
+        self,
+        name: str,
+        device: torch.device,
+        inference_batch_size: int = DEFAULT_INFERENCE_BATCH_SIZE,
+        inference_batch_wait_ms: float = DEFAULT_INFERENCE_BATCH_WAIT_MS,
+        load_on_init: bool = True,
+        **kwargs,
+    ):
         self.name = name
         self.device = device
         self.kwargs = kwargs
         self.available_models: Dict[str, ModelInfo] = {}
+        self.inference_scheduler = InferenceScheduler(
+            max_batch_size=inference_batch_size,
+            max_wait_ms=inference_batch_wait_ms,
+        )
+        self._submit_executor: Optional[ThreadPoolExecutor] = None
+        self._load_lock = threading.Lock()
         self.scan_models()
         self.model = None
         if name in self.available_models:
             if _mat_cuda_unavailable(name, device):
                 logger.warning(MAT_CUDA_FALLBACK_MESSAGE)
-                if "lama" in self.available_models:
-                    self.name = "lama"
-                    self.model = self.init_model("lama", device, **kwargs)
-                else:
+                if "lama" not in self.available_models:
                     logger.warning("Lama model is not installed; the server will start without a loaded model.")
-                return
-            self.model = self.init_model(name, device, **kwargs)
+                    return
+                self.name = "lama"
+            if load_on_init:
+                self.model = self.init_model(self.name, device, **kwargs)
         else:
             logger.warning(
                 f"Default model {name} is not installed. The server will start without a loaded model."
@@ -49,7 +70,7 @@ class ModelManager:
 
     def release(self):
         self.model = None
-        torch_gc()
+        gpu_housekeeper.release("model_release")
 
     def __del__(self):
         try:
@@ -64,10 +85,13 @@ class ModelManager:
                 f"Unsupported model: {name}. Available models: {list(self.available_models.keys())}"
             )
         if name == "mat" and "cuda" not in str(device).lower():
-            return self._init_mat_cpu(device, **kwargs)
-        if name in models:
-            return models[name](device, model_info=self.available_models[name], **kwargs)
-        raise NotImplementedError(f"Unsupported model: {name}")
+            model = self._init_mat_cpu(device, **kwargs)
+        elif name in models:
+            model = models[name](device, model_info=self.available_models[name], **kwargs)
+        else:
+            raise NotImplementedError(f"Unsupported model: {name}")
+        model.inference_scheduler = getattr(self, "inference_scheduler", None)
+        return model
 
     def _init_mat_cpu(self, device, **kwargs):
         """Initialize MAT on CPU while keeping the upstream CUDA default intact."""
@@ -103,26 +127,70 @@ class ModelManager:
         )
         return model
 
+    def _ensure_model_loaded(self):
+        with self._load_lock:
+            if self.model is not None:
+                return
+            self.scan_models()
+            if self.name not in self.available_models:
+                raise RuntimeError(
+                    f"Model {self.name} is not installed. Please install the model before processing."
+                )
+            if _mat_cuda_unavailable(self.name, self.device):
+                raise RuntimeError(MAT_CUDA_FALLBACK_MESSAGE)
+            self.model = self.init_model(
+                self.name,
+                switch_mps_device(self.name, self.device),
+                **self.kwargs,
+            )
+
+    def load(self):
+        """Load the current model now instead of on the first request."""
+        if self.model is None:
+            self._ensure_model_loaded()
+
+    def warm_up(self, size: int = DEFAULT_WARM_UP_SIZE):
+        """Run one dummy forward so lazy device init and kernel selection happen off the request path."""
+        image = np.zeros((size, size, 3), dtype=np.uint8)
+        mask = np.zeros((size, size), dtype=np.uint8)
+        mask[size // 4 : size * 3 // 4, size // 4 : size * 3 // 4] = 255
+        self(image, mask, InpaintRequest())
+
     @torch.inference_mode()
-    def __call__(self, image, mask, config: InpaintRequest):
-        try:
-            if self.model is None:
-                self.scan_models()
-                if self.name not in self.available_models:
-                    raise RuntimeError(
-                        f"Model {self.name} is not installed. Please install the model before processing."
+    def __call__(self, image, mask, config: InpaintRequest, mask_plan=None):
+        # Callers report failures through gpu_housekeeper.after_item(failed=True),
+        # which releases the cache once per failed item.
+        if self.model is None:
+            self._ensure_model_loaded()
+        if mask_plan is not None:
+            return self.model(image, mask, config, mask_plan=mask_plan).astype(np.uint8)
+        return self.model(image, mask, config).astype(np.uint8)
+
+    def submit(self, image, mask, config: InpaintRequest, mask_plan=None) -> Future:
+        """Run ``__call__`` in the background so concurrent frames can share GPU batches."""
+        if self._submit_executor is None:
+            with self._load_lock:
+                if self._submit_executor is None:
+                    self._submit_executor = ThreadPoolExecutor(
+                        max_workers=self.inference_scheduler.max_batch_size,
+                        thread_name_prefix="moonshine-inpaint",
                     )
-                if _mat_cuda_unavailable(self.name, self.device):
-                    raise RuntimeError(MAT_CUDA_FALLBACK_MESSAGE)
-                self.model = self.init_model(
-                    self.name,
-                    switch_mps_device(self.name, self.device),
-                    **self.kwargs,
-                )
-            return self.model(image, mask, config).astype(np.uint8)
-        except Exception:
-            torch_gc()
-            raise
+        return self._submit_executor.submit(self, image, mask, config, mask_plan)
+
+    @property
+    def batches_forwards(self) -> bool:
+        """True when concurrent callers of the current model are batched by the scheduler."""
+        model_cls = type(self.model) if self.model is not None else models.get(self.name)
+        return bool(getattr(model_cls, "batch_forward", False)) and self.inference_scheduler.enabled
+
+    def padding_spec(self) -> dict:
+        """Return the current model's ``pad_img_to_modulo`` layout."""
+        model_cls = type(self.model) if self.model is not None else models.get(self.name)
+        return {
+            "mod": getattr(model_cls, "pad_mod", 8),
+            "square": getattr(model_cls, "pad_to_square", False),
+            "min_size": getattr(model_cls, "min_size", None),
+        }
 
     def scan_models(self) -> List[ModelInfo]:
         available_models = scan_models()
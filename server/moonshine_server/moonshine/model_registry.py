@@ -876,6 +876,11 @@ _model_manifest_cache = {
     "metadata": None,
 }
 _model_manifest_lock = threading.Lock()
+CHECKSUM_CACHE_FILENAME = ".moonshine_checksums.json"
+CHECKSUM_CACHE_VERSION = 1
+_checksum_caches: Dict[str, dict] = {}
+_checksum_cache_lock = threading.Lock()
+_checksum_verifier_threads: Dict[str, threading.Thread] = {}
 
 
 def _env_enabled(name: str) -> bool:
@@ -1120,6 +1125,146 @@ def _sha256_file(path: Path) -> str:
     return digest.hexdigest()
 
 
+def _checksum_cache_path(model_dir: Path) -> Path:
+    return Path(model_dir) / CHECKSUM_CACHE_FILENAME
+
+
+def _checksum_cache_identity(path: Path) -> tuple[str, dict]:
+    resolved_path = path.resolve()
+    stat = resolved_path.stat()
+    return str(resolved_path), {
+        "size": int(stat.st_size),
+        "mtimeNs": int(stat.st_mtime_ns),
+        "inode": int(stat.st_ino),
+    }
+
+
+def _load_checksum_cache_locked(model_dir: Path) -> dict:
+    cache_key = str(model_dir)
+    entries = _checksum_caches.get(cache_key)
+    if entries is not None:
+        return entries
+
+    entries = {}
+    cache_path = _checksum_cache_path(model_dir)
+    try:
+        document = json.loads(cache_path.read_text(encoding="utf-8"))
+        if isinstance(document, dict) and document.get("version") == CHECKSUM_CACHE_VERSION:
+            entries = {
+                str(path): entry
+                for path, entry in (document.get("files") or {}).items()
+                if isinstance(entry, dict) and SHA256_PATTERN.fullmatch(str(entry.get("sha256") or ""))
+            }
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as error:
+        logger.warning(f"Ignore unreadable model checksum cache {cache_path}: {error}")
+    _checksum_caches[cache_key] = entries
+    return entries
+
+
+def _save_checksum_cache_locked(model_dir: Path, entries: dict):
+    cache_path = _checksum_cache_path(model_dir)
+    temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    payload = json.dumps(
+        {"version": CHECKSUM_CACHE_VERSION, "files": entries},
+        ensure_ascii=False,
+        indent=2,
+        sort_keys=True,
+    )
+    try:
+        temp_path.write_text(payload, encoding="utf-8")
+        os.replace(temp_path, cache_path)
+    except OSError as error:
+        # Read-only model bundles still benefit from the in-process cache.
+        logger.debug(f"Model checksum cache is not writable: {cache_path}: {error}")
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+
+
+def record_file_checksum(model_dir: Path, path: Path, sha256: str):
+    """Remember a freshly computed checksum for ``path`` under ``model_dir``."""
+    model_dir = Path(model_dir).expanduser().resolve()
+    resolved_path, identity = _checksum_cache_identity(Path(path))
+    with _checksum_cache_lock:
+        entries = _load_checksum_cache_locked(model_dir)
+        entries[resolved_path] = {**identity, "sha256": sha256, "verifiedAt": _now()}
+        _save_checksum_cache_locked(model_dir, entries)
+
+
+def _cached_sha256_file(model_dir: Path, path: Path, force_verify: bool = False) -> str:
+    """Return the file checksum, hashing only when size/mtime/inode changed."""
+    resolved_path, identity = _checksum_cache_identity(path)
+    if not force_verify:
+        with _checksum_cache_lock:
+            entry = _load_checksum_cache_locked(model_dir).get(resolved_path)
+        if entry and all(entry.get(key) == value for key, value in identity.items()):
+            return str(entry["sha256"])
+
+    actual_sha256 = _sha256_file(path)
+    with _checksum_cache_lock:
+        entries = _load_checksum_cache_locked(model_dir)
+        entries[resolved_path] = {**identity, "sha256": actual_sha256, "verifiedAt": _now()}
+        _save_checksum_cache_locked(model_dir, entries)
+    return actual_sha256
+
+
+def clear_checksum_cache(model_dir: Optional[Path] = None):
+    with _checksum_cache_lock:
+        if model_dir is None:
+            _checksum_caches.clear()
+        else:
+            _checksum_caches.pop(str(Path(model_dir).expanduser().resolve()), None)
+
+
+def _run_checksum_verifier(model_dir: Path):
+    started_at = time.perf_counter()
+    verified_count = 0
+    try:
+        active_manifest, _ = _active_model_manifest()
+        for manifest_item in active_manifest:
+            for file_spec in manifest_item.get("files", []):
+                if not str(file_spec.get("sha256") or "").strip():
+                    continue
+                try:
+                    file_status = _file_status(model_dir, file_spec)
+                except (OSError, ValueError):
+                    logger.debug("Skip model checksum warm-up entry.", exc_info=True)
+                    continue
+                if file_status["actualSha256"]:
+                    verified_count += 1
+        logger.info(
+            f"Model checksum cache ready: {verified_count} file(s) in "
+            f"{time.perf_counter() - started_at:.2f}s ({model_dir})"
+        )
+    except Exception:
+        logger.exception(f"Model checksum verifier failed: {model_dir}")
+    finally:
+        with _checksum_cache_lock:
+            if _checksum_verifier_threads.get(str(model_dir)) is threading.current_thread():
+                _checksum_verifier_threads.pop(str(model_dir), None)
+
+
+def start_checksum_verifier(model_dir: Path) -> threading.Thread:
+    """Fill the checksum cache for installed manifest files in a daemon thread."""
+    model_dir = Path(model_dir).expanduser().resolve()
+    with _checksum_cache_lock:
+        thread = _checksum_verifier_threads.get(str(model_dir))
+        if thread is not None and thread.is_alive():
+            return thread
+        thread = threading.Thread(
+            target=_run_checksum_verifier,
+            args=(model_dir,),
+            name="moonshine-checksum-verifier",
+            daemon=True,
+        )
+        _checksum_verifier_threads[str(model_dir)] = thread
+        thread.start()
+    return thread
+
+
 def _model_license_metadata(model: dict) -> dict:
     model_id = str(model.get("id") or "").lower()
     family = str(model.get("family") or "").lower()
@@ -1136,7 +1281,7 @@ def _model_license_metadata(model: dict) -> dict:
     return UNKNOWN_LICENSE
 
 
-def _file_status(model_dir: Path, file_spec: dict) -> dict:
+def _file_status(model_dir: Path, file_spec: dict, force_verify: bool = False) -> dict:
     relative_path = _safe_relative_path(file_spec.get("path", ""))
     expected_sha256 = str(file_spec.get("sha256") or "").strip().lower()
     canonical_path = model_dir / relative_path
@@ -1201,7 +1346,7 @@ def _file_status(model_dir: Path, file_spec: dict) -> dict:
 
     status["actualSize"] = existing_path.stat().st_size
     if expected_sha256:
-        actual_sha256 = _sha256_file(existing_path)
+        actual_sha256 = _cached_sha256_file(model_dir, existing_path, force_verify=force_verify)
         status["actualSha256"] = actual_sha256
         status["valid"] = actual_sha256 == expected_sha256
     else:
@@ -1261,13 +1406,24 @@ def _recommended_vram_warning(model: dict, cuda_info: Optional[dict]) -> Optiona
     }
 
 
-def build_model_status(model_dir: Path, cuda_info: Optional[dict] = None) -> list[dict]:
+def build_model_status(
+    model_dir: Path,
+    cuda_info: Optional[dict] = None,
+    force_verify: bool = False,
+    model_ids: Optional[set] = None,
+) -> list[dict]:
+    """Build registry status; checksums come from the stat-keyed cache unless ``force_verify``.
+
+    ``model_ids`` limits forced re-hashing to the listed models while the rest
+    still use the cache.
+    """
     model_dir = Path(model_dir).expanduser().resolve()
     models = []
     active_manifest, _ = _active_model_manifest()
     for manifest_item in active_manifest:
+        force_item = force_verify and (model_ids is None or manifest_item.get("id") in model_ids)
         file_statuses = [
-            _file_status(model_dir, file_spec)
+            _file_status(model_dir, file_spec, force_verify=force_item)
             for file_spec in manifest_item.get("files", [])
         ]
         missing_files = [
@@ -1515,6 +1671,8 @@ class ModelDownloadTaskManager:
                     if actual_sha256 != expected_sha256:
                         raise ValueError("模型文件校验失败，请重新下载。")
                 os.replace(part_path, target_path)
+                if expected_sha256:
+                    record_file_checksum(model_dir, target_path, expected_sha256)
                 return
             except Exception as error:
                 last_error = error
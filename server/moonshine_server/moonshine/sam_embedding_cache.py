@@ -0,0 +1,171 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import torch
+
+DEFAULT_SAM_EMBEDDING_CACHE_MB = 1024
+DEFAULT_SAM_EMBEDDING_HOT_ENTRIES = 2
+
+# Attributes that ``set_image`` fills in on each predictor family.
+SAM1_PREDICTOR_STATE = ("features", "original_size", "input_size", "is_image_set")
+SAM2_PREDICTOR_STATE = ("_features", "_orig_hw", "_is_image_set", "_is_batch")
+
+
+def _map_tensors(value: Any, fn: Callable[[torch.Tensor], torch.Tensor]) -> Any:
+    if isinstance(value, torch.Tensor):
+        return fn(value)
+    if isinstance(value, dict):
+        return {key: _map_tensors(item, fn) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_map_tensors(item, fn) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_map_tensors(item, fn) for item in value)
+    return value
+
+
+def _state_bytes(value: Any) -> int:
+    total = 0
+
+    def count(tensor: torch.Tensor) -> torch.Tensor:
+        nonlocal total
+        total += tensor.element_size() * tensor.nelement()
+        return tensor
+
+    _map_tensors(value, count)
+    return total
+
+
+def _state_fields(predictor) -> tuple:
+    return SAM2_PREDICTOR_STATE if hasattr(predictor, "_features") else SAM1_PREDICTOR_STATE
+
+
+def capture_predictor_state(predictor) -> dict:
+    """Snapshot the image embedding a SAM1/SAM2 predictor holds after ``set_image``."""
+    return {name: getattr(predictor, name) for name in _state_fields(predictor)}
+
+
+def predictor_image_size(predictor) -> tuple[int, int]:
+    """Return ``(height, width)`` of the image whose embedding the predictor holds."""
+    if hasattr(predictor, "_orig_hw"):
+        height, width = predictor._orig_hw[-1]
+    else:
+        height, width = predictor.original_size
+    return int(height), int(width)
+
+
+def restore_predictor_state(predictor, state: dict, device: str):
+    """Put a cached embedding back so ``predict`` can skip ``set_image``."""
+    target = torch.device(device)
+    for name, value in state.items():
+        setattr(
+            predictor,
+            name,
+            _map_tensors(value, lambda tensor: tensor.to(target, non_blocking=True)),
+        )
+
+
+class SamEmbeddingCache:
+    """LRU cache of SAM image embeddings bounded by a byte budget.
+
+    Entries are keyed by ``(model_id, device, image_hash)``. The most recent
+    ``hot_entries`` stay on the inference device; with ``offload`` enabled the
+    colder ones are moved to CPU memory so they only cost a host-to-device copy
+    when the user flips back to that image.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_SAM_EMBEDDING_CACHE_MB * 1024 * 1024,
+        offload: bool = True,
+        hot_entries: int = DEFAULT_SAM_EMBEDDING_HOT_ENTRIES,
+    ):
+        self.max_bytes = max(0, int(max_bytes))
+        self.offload = offload
+        self.hot_entries = max(1, int(hot_entries))
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "offloads": 0}
+
+    def configure(self, max_bytes: Optional[int] = None, offload: Optional[bool] = None):
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max(0, int(max_bytes))
+            if offload is not None:
+                self.offload = bool(offload)
+            self._evict_locked()
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry["state"]
+
+    def contains(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: Hashable, state: dict):
+        size = _state_bytes(state)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous["bytes"]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = {"state": state, "bytes": size, "offloaded": False}
+            self._bytes += size
+            self._evict_locked()
+            self._offload_cold_locked()
+
+    def _evict_locked(self):
+        while self._entries and self._bytes > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry["bytes"]
+            self._counters["evictions"] += 1
+
+    def _offload_cold_locked(self):
+        if not self.offload:
+            return
+        cold_count = len(self._entries) - self.hot_entries
+        for entry in list(self._entries.values())[:max(0, cold_count)]:
+            if entry["offloaded"]:
+                continue
+            entry["state"] = _map_tensors(entry["state"], lambda tensor: tensor.to("cpu"))
+            entry["offloaded"] = True
+            self._counters["offloads"] += 1
+
+    def offload_all(self) -> int:
+        """Move every entry to CPU memory; returns how many were on the device."""
+        with self._lock:
+            moved = 0
+            for entry in self._entries.values():
+                if entry["offloaded"]:
+                    continue
+                entry["state"] = _map_tensors(entry["state"], lambda tensor: tensor.to("cpu"))
+                entry["offloaded"] = True
+                moved += 1
+            self._counters["offloads"] += moved
+            return moved
+
+    def discard(self, match: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key)["bytes"]
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "offloadedEntries": sum(1 for entry in self._entries.values() if entry["offloaded"]),
+                **self._counters,
+            }
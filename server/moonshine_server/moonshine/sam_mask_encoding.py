@@ -0,0 +1,90 @@
+import base64
+from typing import Optional
+
+import numpy as np
+
+# ``png`` is the RGBA overlay data URL the client has always received. ``rle``
+# and ``bitmap`` carry only the binary mask and leave the overlay colour to
+# the client, which is far cheaper for large images.
+SAM_MASK_ENCODINGS = ("png", "rle", "bitmap")
+
+
+def normalize_mask_encoding(value: Optional[str]) -> str:
+    encoding = str(value or "png").strip().lower()
+    if encoding not in SAM_MASK_ENCODINGS:
+        raise ValueError(f"Unsupported SAM mask encoding: {value}")
+    return encoding
+
+
+def mask_bbox(mask: np.ndarray) -> Optional[list[int]]:
+    """Return ``[x, y, width, height]`` of the set pixels, or None if empty."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    y0, y1 = int(rows[0]), int(rows[-1]) + 1
+    x0, x1 = int(cols[0]), int(cols[-1]) + 1
+    return [x0, y0, x1 - x0, y1 - y0]
+
+
+def encode_mask_rle(mask: np.ndarray) -> dict:
+    """COCO-style uncompressed RLE: column-major run lengths, zeros first."""
+    mask = np.asarray(mask, dtype=bool)
+    height, width = mask.shape
+    flat = mask.ravel(order="F")
+    if flat.size == 0:
+        counts = []
+    else:
+        changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        counts = np.diff(np.concatenate(([0], changes, [flat.size]))).tolist()
+        if flat[0]:
+            counts.insert(0, 0)
+    return {
+        "encoding": "rle",
+        "size": [height, width],
+        "counts": counts,
+        "bbox": mask_bbox(mask) or [0, 0, 0, 0],
+    }
+
+
+def encode_mask_bitmap(mask: np.ndarray) -> dict:
+    """Crop to the bounding box and bit-pack each row (MSB first, byte padded)."""
+    mask = np.asarray(mask, dtype=bool)
+    height, width = mask.shape
+    bbox = mask_bbox(mask)
+    if bbox is None:
+        return {
+            "encoding": "bitmap",
+            "size": [height, width],
+            "bbox": [0, 0, 0, 0],
+            "rowBytes": 0,
+            "data": "",
+        }
+    x, y, crop_width, crop_height = bbox
+    packed = np.packbits(mask[y:y + crop_height, x:x + crop_width], axis=1)
+    return {
+        "encoding": "bitmap",
+        "size": [height, width],
+        "bbox": bbox,
+        "rowBytes": int(packed.shape[1]),
+        "data": base64.b64encode(packed.tobytes()).decode("ascii"),
+    }
+
+
+def decode_mask(encoded: dict) -> np.ndarray:
+    """Inverse of ``encode_mask_rle``/``encode_mask_bitmap``; returns a bool mask."""
+    height, width = encoded["size"]
+    if encoded["encoding"] == "rle":
+        values = np.zeros(len(encoded["counts"]), dtype=bool)
+        values[1::2] = True
+        flat = np.repeat(values, encoded["counts"])
+        return flat.reshape((height, width), order="F")
+    mask = np.zeros((height, width), dtype=bool)
+    x, y, crop_width, crop_height = encoded["bbox"]
+    if crop_width and crop_height:
+        packed = np.frombuffer(base64.b64decode(encoded["data"]), dtype=np.uint8)
+        packed = packed.reshape(crop_height, encoded["rowBytes"])
+        mask[y:y + crop_height, x:x + crop_width] = np.unpackbits(
+            packed, axis=1, count=crop_width
+        ).astype(bool)
+    return mask
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from loguru import logger
+
+SAM_PREPARE_HISTORY_LIMIT = 256
+
+
+class SamImagePrepareQueue:
+    """Warm SAM image embeddings in one background worker.
+
+    Each submit replaces whatever is still queued, since the client sends its
+    likely-next images in order and that order changes as the user moves on.
+    The worker takes the service lock per image, so interactive predictions
+    still run between two prepared images.
+    """
+
+    def __init__(self, history_limit: int = SAM_PREPARE_HISTORY_LIMIT):
+        self._pending: deque = deque()
+        self._history: "OrderedDict[str, dict]" = OrderedDict()
+        self._history_limit = history_limit
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+
+    def _record_locked(self, image_hash: str, entry: dict):
+        # Base64 payloads are only needed while queued, not in the history.
+        if entry.get("imageType") != "path":
+            entry = {key: value for key, value in entry.items() if key != "image"}
+        self._history.pop(image_hash, None)
+        self._history[image_hash] = {**entry, "updatedAt": time.time()}
+        while len(self._history) > self._history_limit:
+            self._history.popitem(last=False)
+
+    def submit(self, service, model_id: str, items: list[dict], replace: bool = True) -> list[dict]:
+        """Queue ``items`` (``image``, ``imageType``, ``imageHash``) in priority order."""
+        with self._lock:
+            if replace:
+                self._drop_pending_locked("superseded")
+            queued_items = []
+            for item in items:
+                entry = {**item, "modelId": model_id, "status": "queued"}
+                self._pending.append((service, entry))
+                self._record_locked(item["imageHash"], entry)
+                queued_items.append(entry)
+            self._ensure_worker_locked()
+            self._wakeup.notify()
+        return queued_items
+
+    def _drop_pending_locked(self, status: str) -> int:
+        dropped = len(self._pending)
+        for _, entry in self._pending:
+            self._record_locked(entry["imageHash"], {**entry, "status": status})
+        self._pending.clear()
+        return dropped
+
+    def clear(self) -> int:
+        with self._lock:
+            return self._drop_pending_locked("canceled")
+
+    def _ensure_worker_locked(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, daemon=True, name="sam-prepare-image")
+        self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+                service, job = self._pending.popleft()
+                self._record_locked(job["imageHash"], {**job, "status": "running"})
+            try:
+                result = service.prepare_image(
+                    image=job["image"],
+                    image_type=job["imageType"],
+                    model_id=job["modelId"],
+                    image_id=job.get("imageId"),
+                )
+                entry = {**job, "status": "ready", "setImageMs": result.get("setImageMs")}
+            except Exception as error:
+                logger.warning(f"SAM image prepare failed: {job['imageHash']}: {error}")
+                entry = {**job, "status": "failed", "error": str(error)}
+            with self._lock:
+                self._record_locked(job["imageHash"], entry)
+
+    def status(self, image_hashes: Optional[list[str]] = None) -> dict:
+        with self._lock:
+            if image_hashes is None:
+                items = list(self._history.values())
+            else:
+                items = [
+                    self._history.get(image_hash, {"imageHash": image_hash, "status": "unknown"})
+                    for image_hash in image_hashes
+                ]
+            return {
+                "pending": len(self._pending),
+                "items": [dict(item) for item in items],
+            }
+
+
+sam_prepare_queue = SamImagePrepareQueue()
@@ -1,6 +1,5 @@
 import base64
 import contextlib
-import gc
 import hashlib
 import inspect
 import importlib.metadata
@@ -8,8 +7,6 @@ import importlib.util
 import io
 import os
 import re
-import shutil
-import tempfile
 import time
 from pathlib import Path
 from threading import RLock
@@ -24,9 +21,24 @@ from PIL import Image
 
 from moonshine_server.helper import decode_base64_to_image, numpy_to_bytes
 from moonshine_server.disk_space import DEFAULT_DISK_SPACE_SAFETY_BYTES, ensure_disk_space
-from moonshine_server.model.utils import torch_gc
-from moonshine_server.path_io import open_video_capture, stage_ascii_path, write_image_file
+from moonshine_server.gpu_arbiter import GPU_PRIORITY_BULK, GPU_PRIORITY_INTERACTIVE, gpu_arbiter
+from moonshine_server.gpu_housekeeping import gpu_housekeeper
+from moonshine_server.mask_tracks import MaskTrackStore
+from moonshine_server.path_io import open_video_capture, stage_ascii_path
 from moonshine_server.moonshine.model_registry import build_model_status
+from moonshine_server.moonshine.sam_video_frames import StreamingVideoFrameLoader, count_video_frames
+from moonshine_server.moonshine.sam_mask_encoding import (
+    encode_mask_bitmap,
+    encode_mask_rle,
+    normalize_mask_encoding,
+)
+from moonshine_server.moonshine.sam_embedding_cache import (
+    DEFAULT_SAM_EMBEDDING_CACHE_MB,
+    SamEmbeddingCache,
+    capture_predictor_state,
+    predictor_image_size,
+    restore_predictor_state,
+)
 from moonshine_server.plugins.segment_anything import SamPredictor, sam_model_registry
 from moonshine_server.plugins.segment_anything2.build_sam import (
     build_sam2,
@@ -35,6 +47,11 @@ from moonshine_server.plugins.segment_anything2.build_sam import (
 from moonshine_server.plugins.segment_anything2.modeling.sam import transformer as sam2_transformer
 from moonshine_server.plugins.segment_anything2.sam2_image_predictor import SAM2ImagePredictor
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 
 SAM1_MODEL_TYPES = {
     "sam_vit_b": "vit_b",
@@ -51,8 +68,11 @@ SAM2_MODEL_TYPES = {
 
 POINT_BOX_FAMILIES = {"sam", "sam2"}
 TEXT_FAMILIES = {"sam3"}
+SAM3_TEXT_PROMPT_BATCH = 16
 SAM_VIDEO_MASK_JPEG_QUALITY = 88
 SAM_VIDEO_MASK_BYTES_PER_PIXEL_ESTIMATE = 0.18
+SAM_IMAGE_HASH_CHUNK_BYTES = 4 * 1024 * 1024
+SAM_IMAGE_IDENTITY_MODES = {"fast", "content"}
 
 SAM3_REQUIRED_MODULES = {
     "sam3": "sam3",
@@ -145,8 +165,24 @@ class SamServiceError(RuntimeError):
     pass
 
 
+class SamImageNotCachedError(SamServiceError):
+    """A hash-only request referenced an embedding the server no longer holds."""
+
+
+def _new_image_digest():
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
 class SamService:
-    def __init__(self, model_dir: Path, device: str = "cpu"):
+    def __init__(
+        self,
+        model_dir: Path,
+        device: str = "cpu",
+        embedding_cache_mb: int = DEFAULT_SAM_EMBEDDING_CACHE_MB,
+        embedding_offload: bool = True,
+    ):
         self.model_dir = Path(model_dir).expanduser().resolve()
         self.device = self._resolve_device(device)
         self._predictors = {}
@@ -156,7 +192,12 @@ class SamService:
         self._image_cache = {}
         self._sam3_image_cache = {}
         self._text_image_cache = {}
+        self._embedding_cache = SamEmbeddingCache(
+            max_bytes=int(embedding_cache_mb) * 1024 * 1024,
+            offload=embedding_offload and self.device == "cuda",
+        )
         self._lock = RLock()
+        self._video_lock = RLock()
 
     @staticmethod
     def _resolve_device(device: str) -> str:
@@ -628,6 +669,18 @@ class SamService:
         return Path(resolved_path)
 
     def release(self, model_id: Optional[str] = None) -> dict:
+        """Drop loaded predictors, image state and the matching embeddings."""
+        return self._release(model_id, keep_embeddings=False)
+
+    def offload(self) -> dict:
+        """Free the device before processing but keep prepared embeddings on CPU.
+
+        Predictors are dropped as in ``release``; embeddings only cost a
+        host-to-device copy on the next click instead of another encoder pass.
+        """
+        return self._release(None, keep_embeddings=True)
+
+    def _release(self, model_id: Optional[str], keep_embeddings: bool) -> dict:
         normalized_model_id = str(model_id or "").strip()
         released = {
             "predictors": 0,
@@ -637,6 +690,8 @@ class SamService:
             "imageCache": 0,
             "sam3ImageCache": 0,
             "textImageCache": 0,
+            "embeddingCache": 0,
+            "embeddingOffloaded": 0,
         }
 
         def should_release(cache_key) -> bool:
@@ -646,7 +701,8 @@ class SamService:
                 return str(cache_key[0]) == normalized_model_id
             return str(cache_key) == normalized_model_id
 
-        with self._lock:
+        # Wait for a running propagation so its predictor is not dropped mid-video.
+        with self._video_lock, self._lock:
             for cache_name, counter_name in (
                 ("_predictors", "predictors"),
                 ("_sam3_image_predictors", "sam3ImagePredictors"),
@@ -661,9 +717,12 @@ class SamService:
                     if should_release(cache_key):
                         cache.pop(cache_key, None)
                         released[counter_name] += 1
+            if keep_embeddings:
+                released["embeddingOffloaded"] = self._embedding_cache.offload_all()
+            else:
+                released["embeddingCache"] = self._embedding_cache.discard(should_release)
 
-        gc.collect()
-        torch_gc()
+        gpu_housekeeper.release("sam_release")
         return released
 
     def _get_predictor(self, model_id: str):
@@ -971,20 +1030,59 @@ class SamService:
         )
 
     @staticmethod
-    def _load_image(image: str, image_type: str) -> tuple[np.ndarray, str]:
+    def _resolve_image_path(image: str) -> Path:
+        image_path = Path(image).expanduser().resolve()
+        if not image_path.is_file():
+            raise SamServiceError(f"Image file not found: {image_path}")
+        return image_path
+
+    @classmethod
+    def _image_identity(
+        cls,
+        image: str,
+        image_type: str,
+        image_id: Optional[str] = None,
+        mode: str = "fast",
+    ) -> str:
+        """Return the cache identity of an image without decoding it.
+
+        ``fast`` keys path inputs by path, size and mtime and uses a
+        client-supplied ``image_id`` when there is one; ``content`` always
+        hashes the bytes. Base64 inputs without an id are hashed either way.
+        """
+        digest = _new_image_digest()
+        if mode not in SAM_IMAGE_IDENTITY_MODES:
+            raise SamServiceError(f"Unsupported image identity mode: {mode}")
+        if mode == "fast" and image_id:
+            digest.update(f"id\0{image_id}".encode("utf-8"))
+            return digest.hexdigest()
         if image_type == "path":
-            image_path = Path(image).expanduser().resolve()
-            if not image_path.is_file():
-                raise SamServiceError(f"Image file not found: {image_path}")
-            image_bytes = image_path.read_bytes()
-            with Image.open(io.BytesIO(image_bytes)) as pil_image:
-                rgb_np_img = np.array(pil_image.convert("RGB"))
-            image_hash = hashlib.sha256(image_bytes).hexdigest()
-            return rgb_np_img, image_hash
+            image_path = cls._resolve_image_path(image)
+            if mode == "fast":
+                stat = image_path.stat()
+                digest.update(
+                    f"path\0{image_path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode("utf-8")
+                )
+                return digest.hexdigest()
+            with open(image_path, "rb") as image_file:
+                for chunk in iter(lambda: image_file.read(SAM_IMAGE_HASH_CHUNK_BYTES), b""):
+                    digest.update(chunk)
+            return digest.hexdigest()
+        digest.update(image.encode("utf-8"))
+        return digest.hexdigest()
 
+    @classmethod
+    def _decode_image(cls, image: str, image_type: str) -> np.ndarray:
+        if image_type == "path":
+            with Image.open(cls._resolve_image_path(image)) as pil_image:
+                return np.array(pil_image.convert("RGB"))
         rgb_np_img, _, _ = decode_base64_to_image(image)
-        image_hash = hashlib.sha256(image.encode("utf-8")).hexdigest()
-        return rgb_np_img, image_hash
+        return rgb_np_img
+
+    @classmethod
+    def _load_image(cls, image: str, image_type: str) -> tuple[np.ndarray, str]:
+        image_hash = cls._image_identity(image, image_type)
+        return cls._decode_image(image, image_type), image_hash
 
     @staticmethod
     def _normalize_points(points: list) -> tuple[Optional[np.ndarray], Optional[np.ndarray]]:
@@ -1018,6 +1116,24 @@ class SamService:
         encoded = base64.b64encode(numpy_to_bytes(rgba_mask, "png")).decode("utf-8")
         return f"data:image/png;base64,{encoded}"
 
+    @classmethod
+    def _encode_mask(cls, mask: np.ndarray, mask_encoding: str = "png"):
+        """Encode a bool or 0/255 mask as a PNG data URL or a compact dict."""
+        if mask_encoding == "rle":
+            return encode_mask_rle(mask > 0)
+        if mask_encoding == "bitmap":
+            return encode_mask_bitmap(mask > 0)
+        if mask.dtype == bool:
+            mask = mask.astype(np.uint8) * 255
+        return cls._mask_to_data_url(mask)
+
+    @staticmethod
+    def _resolve_mask_encoding(mask_encoding: Optional[str]) -> str:
+        try:
+            return normalize_mask_encoding(mask_encoding)
+        except ValueError as error:
+            raise SamServiceError(str(error)) from error
+
     @staticmethod
     def _sort_candidates_by_score(candidates: list[dict]) -> list[dict]:
         def sort_key(candidate: dict):
@@ -1034,6 +1150,11 @@ class SamService:
 
         return sorted(candidates, key=sort_key)
 
+    @staticmethod
+    def _normalize_video_response_type(response_type: Optional[str]) -> str:
+        normalized = str(response_type or "").strip()
+        return normalized if normalized in {"path", "track"} else "base64"
+
     @staticmethod
     def _save_video_mask(mask: np.ndarray, output_dir: Path, frame_index: int, object_id: int) -> dict:
         mask_binary = np.where(mask > 128, 255, 0).astype(np.uint8)
@@ -1131,9 +1252,13 @@ class SamService:
         current: int = 0,
         total: int = 0,
         progress: Optional[float] = None,
+        result_bytes: Optional[int] = None,
     ) -> None:
         if not progress_callback:
             return
+        payload = {}
+        if result_bytes is not None:
+            payload["result_bytes"] = result_bytes
         progress_callback(
             status=status,
             phase=phase or status,
@@ -1141,69 +1266,13 @@ class SamService:
             current=current,
             total=total,
             progress=progress,
+            **payload,
         )
 
     @staticmethod
-    def _stage_video_to_jpeg_frames(
-        video_path: Path,
-        output_dir: Path,
-        progress_callback: Optional[Callable[..., None]] = None,
-    ) -> dict:
-        if not video_path.is_file():
-            raise SamServiceError(f"SAM2.1 video file not found: {video_path}")
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        frame_count = 0
-        try:
-            with open_video_capture(video_path) as capture:
-                fps = float(capture.get(cv2.CAP_PROP_FPS) or 0.0)
-                expected_frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
-                width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
-                height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
-                SamService._emit_progress(
-                    progress_callback,
-                    status="frame_loading",
-                    phase="staging_frames",
-                    message="正在抽取视频帧",
-                    current=0,
-                    total=expected_frame_count,
-                    progress=0,
-                )
-                while True:
-                    ok, frame = capture.read()
-                    if not ok:
-                        break
-                    frame_path = output_dir / f"{frame_count:06d}.jpg"
-                    if not write_image_file(
-                        frame_path,
-                        frame,
-                        [int(cv2.IMWRITE_JPEG_QUALITY), 95],
-                    ):
-                        raise SamServiceError(f"Failed to stage SAM2.1 video frame: {frame_path}")
-                    frame_count += 1
-                    if frame_count == 1 or frame_count % 10 == 0:
-                        SamService._emit_progress(
-                            progress_callback,
-                            status="frame_loading",
-                            phase="staging_frames",
-                            message=f"正在抽取视频帧 {frame_count}/{expected_frame_count or '?'}",
-                            current=frame_count,
-                            total=expected_frame_count,
-                        )
-        except OSError as error:
-            raise SamServiceError(
-                f"Failed to open video for SAM2.1 propagation: {video_path}"
-            ) from error
-
-        if frame_count <= 0:
-            raise SamServiceError(f"SAM2.1 video file has no readable frames: {video_path}")
-
-        return {
-            "frameCount": frame_count,
-            "fps": round(fps, 3) if fps > 0 else None,
-            "width": width or None,
-            "height": height or None,
-        }
+    def _frame_masks_bytes(frame_masks: list) -> int:
+        """Rough in-memory size of one frame's mask entries, mostly encoded mask payloads."""
+        return sum(len(str(value)) for entry in frame_masks for value in entry.values())
 
     @staticmethod
     def _read_video_metadata(video_path: Path) -> dict:
@@ -1336,11 +1405,13 @@ class SamService:
         normalized_input_type = (
             "videoPath" if str(input_type or "").strip() == "videoPath" else "jpegFrameDirectory"
         )
-        normalized_response_type = "path" if str(response_type or "").strip() == "path" else "base64"
+        normalized_response_type = self._normalize_video_response_type(response_type)
         mask_output_path = None
-        if normalized_response_type == "path":
+        if normalized_response_type in {"path", "track"}:
             if not mask_output_dir:
-                raise SamServiceError("mask_output_dir is required when SAM3 response_type is path.")
+                raise SamServiceError(
+                    "mask_output_dir is required when SAM3 response_type is path or track."
+                )
             mask_output_path = Path(mask_output_dir).expanduser().resolve()
             mask_output_path.mkdir(parents=True, exist_ok=True)
 
@@ -1422,6 +1493,7 @@ class SamService:
 
         total_started_at = time.perf_counter()
         frames = []
+        frames_bytes = 0
         object_map = {}
         predictor = None
         session_id = None
@@ -1429,6 +1501,10 @@ class SamService:
         early_stop_reason = None
         seen_frame_indices = set()
         resource_path_stack = contextlib.ExitStack()
+        mask_tracks = None
+        if normalized_response_type == "track":
+            mask_tracks = MaskTrackStore(mask_output_path, width, height)
+            resource_path_stack.callback(mask_tracks.close)
         try:
             predictor_resource_path = resource_path_stack.enter_context(
                 stage_ascii_path(resource_path)
@@ -1442,8 +1518,12 @@ class SamService:
             ) from error
 
         try:
-            with self._lock:
-                predictor = self._get_sam3_video_predictor(model_id)
+            with gpu_arbiter.acquire(self.device, GPU_PRIORITY_BULK, "sam_video_load"):
+                with self._lock:
+                    predictor = self._get_sam3_video_predictor(model_id)
+            with self._video_lock, gpu_arbiter.acquire(
+                self.device, GPU_PRIORITY_BULK, "sam3_video_propagate"
+            ) as gpu_lease:
                 def sam3_video_autocast():
                     return (
                         torch.autocast(device_type="cuda", dtype=torch.bfloat16)
@@ -1640,7 +1720,11 @@ class SamService:
                         height,
                         width,
                     )
-                    if normalized_response_type == "path":
+                    if mask_tracks is not None:
+                        prompt_frame_masks.append(
+                            mask_tracks.append(safe_frame_index, int(obj_id), mask_np)
+                        )
+                    elif normalized_response_type == "path":
                         prompt_frame_masks.append(
                             self._save_video_mask(
                                 mask_np,
@@ -1688,6 +1772,7 @@ class SamService:
                     with sam3_video_autocast():
                         response_stream = predictor.handle_stream_request(stream_request)
                         for response in response_stream:
+                            gpu_lease.yield_point()
                             out_frame_index = int(response.get("frame_index", safe_frame_index))
                             if out_frame_index in seen_frame_indices:
                                 self._emit_progress(
@@ -1729,7 +1814,11 @@ class SamService:
                                         "modelText": used_prompt["text"] if used_prompt else None,
                                     },
                                 )
-                                if normalized_response_type == "path":
+                                if mask_tracks is not None:
+                                    frame_masks.append(
+                                        mask_tracks.append(out_frame_index, int(obj_id), mask_np)
+                                    )
+                                elif normalized_response_type == "path":
                                     frame_masks.append(
                                         self._save_video_mask(
                                             mask_np,
@@ -1748,6 +1837,7 @@ class SamService:
                             if frame_masks:
                                 frames.append({"frameIndex": out_frame_index, "masks": frame_masks})
                                 seen_frame_indices.add(out_frame_index)
+                                frames_bytes += self._frame_masks_bytes(frame_masks)
                             self._emit_progress(
                                 progress_callback,
                                 status="propagating",
@@ -1755,6 +1845,7 @@ class SamService:
                                 message=f"正在传播 SAM3 视频蒙版 {len(frames)}/{estimated_output_frame_count}",
                                 current=len(frames),
                                 total=estimated_output_frame_count,
+                                result_bytes=frames_bytes,
                             )
                 except RuntimeError as error:
                     if not frames or not self._is_sam3_video_tracker_exhausted_error(error):
@@ -1997,6 +2088,7 @@ class SamService:
         points: list,
         box,
         multimask_output: bool,
+        mask_encoding: str = "png",
     ) -> dict:
         total_started_at = time.perf_counter()
         load_image_ms = 0.0
@@ -2007,11 +2099,9 @@ class SamService:
         model_cached = model_cache_key in self._sam3_image_predictors
 
         try:
-            with self._lock:
-                predictor_bundle = self._get_sam3_image_predictor(model_id)
-                model = predictor_bundle["model"]
-                processor = predictor_bundle["processor"]
-
+            with gpu_arbiter.acquire(
+                self.device, GPU_PRIORITY_INTERACTIVE, "sam3_image_predict"
+            ) as gpu_lease, self._lock:
                 load_image_started_at = time.perf_counter()
                 rgb_np_img, image_hash = self._load_image(image, image_type)
                 load_image_ms = (time.perf_counter() - load_image_started_at) * 1000
@@ -2028,6 +2118,9 @@ class SamService:
                     if self.device == "cuda"
                     else contextlib.nullcontext()
                 )
+                predictor_bundle = self._get_sam3_image_predictor(model_id)
+                model = predictor_bundle["model"]
+                processor = predictor_bundle["processor"]
                 with autocast_context:
                     if image_cache_hit:
                         state = cached_image["state"]
@@ -2066,7 +2159,7 @@ class SamService:
                 {
                     "id": f"{model_id}-{image_hash[:12]}-image-{index}",
                     "index": index,
-                    "mask": self._mask_to_data_url(binary_mask),
+                    "mask": self._encode_mask(binary_mask, mask_encoding),
                     "score": self._score_to_float(scores, index),
                     "promptType": "box" if box is not None else "point",
                 }
@@ -2081,6 +2174,7 @@ class SamService:
             "width": int(rgb_np_img.shape[1]),
             "height": int(rgb_np_img.shape[0]),
             "candidates": candidates,
+            "maskEncoding": mask_encoding,
             "logitsShape": list(logits.shape) if hasattr(logits, "shape") else None,
             "performance": {
                 "device": self.device,
@@ -2095,11 +2189,100 @@ class SamService:
                 "setImageMs": round(set_image_ms, 2),
                 "predictMs": round(predict_ms, 2),
                 "encodeMs": round(encode_ms, 2),
+                "gpuQueueWaitMs": round(gpu_lease.wait_ms, 3),
                 "totalMs": round(total_ms, 2),
             },
         }
 
     @torch.inference_mode()
+    def _set_predictor_image(
+        self, predictor, model_id: str, image_hash: str, image: str, image_type: str
+    ) -> dict:
+        """Make ``predictor`` hold the embedding of ``image_hash``.
+
+        Uses the embedding already set, then the embedding cache, and only
+        decodes and encodes the image when neither has it. Call with the lock.
+        """
+        model_cache_key = (model_id, self.device)
+        cached_image_hash = self._image_cache.get(model_cache_key)
+        state = {
+            "imageCacheHit": cached_image_hash == image_hash,
+            "embeddingCacheHit": False,
+            "decodeMs": 0.0,
+            "setImageMs": 0.0,
+        }
+        if state["imageCacheHit"]:
+            return state
+        # Flipping back to an earlier image restores its embedding instead of
+        # re-running the image encoder.
+        embedding_key = (model_id, self.device, image_hash)
+        set_image_started_at = time.perf_counter()
+        embedding = self._embedding_cache.get(embedding_key)
+        if embedding is not None:
+            restore_predictor_state(predictor, embedding, self.device)
+            state["embeddingCacheHit"] = True
+        elif not image:
+            raise SamImageNotCachedError(
+                f"Image {image_hash} is no longer prepared for {model_id}; resend the image."
+            )
+        else:
+            decode_started_at = time.perf_counter()
+            rgb_np_img = self._decode_image(image, image_type)
+            state["decodeMs"] = (time.perf_counter() - decode_started_at) * 1000
+            set_image_started_at = time.perf_counter()
+            predictor.set_image(rgb_np_img)
+            self._embedding_cache.put(embedding_key, capture_predictor_state(predictor))
+        state["setImageMs"] = (time.perf_counter() - set_image_started_at) * 1000
+        self._image_cache[model_cache_key] = image_hash
+        return state
+
+    def image_identity(
+        self,
+        image: str,
+        image_type: str,
+        image_id: Optional[str] = None,
+        mode: str = "fast",
+    ) -> str:
+        return self._image_identity(image, image_type, image_id=image_id, mode=mode)
+
+    def prepare_image(
+        self,
+        *,
+        image: str,
+        image_type: str,
+        model_id: str,
+        image_id: Optional[str] = None,
+        image_identity: str = "fast",
+    ) -> dict:
+        """Encode an image ahead of the first click so it only pays ``predict``."""
+        model_status = self._get_model_status(model_id)
+        if model_status.get("family") not in POINT_BOX_FAMILIES:
+            raise SamServiceError(
+                f"Image embeddings can only be prepared for SAM1/SAM2.1 models: {model_id}"
+            )
+        started_at = time.perf_counter()
+        image_hash = self._image_identity(image, image_type, image_id=image_id, mode=image_identity)
+        if self._embedding_cache.contains((model_id, self.device, image_hash)):
+            return {"modelId": model_id, "imageHash": image_hash, "cached": True, "setImageMs": 0.0}
+        try:
+            with gpu_arbiter.acquire(self.device, GPU_PRIORITY_BULK, "sam_prepare_image"), self._lock:
+                predictor = self._get_predictor(model_id)
+                image_state = self._set_predictor_image(
+                    predictor, model_id, image_hash, image, image_type
+                )
+        except SamServiceError:
+            raise
+        except RuntimeError as error:
+            raise SamServiceError(self._format_runtime_error(error, model_id=model_id)) from error
+        return {
+            "modelId": model_id,
+            "imageHash": image_hash,
+            "cached": image_state["imageCacheHit"] or image_state["embeddingCacheHit"],
+            "decodeMs": round(image_state["decodeMs"], 2),
+            "setImageMs": round(image_state["setImageMs"], 2),
+            "totalMs": round((time.perf_counter() - started_at) * 1000, 2),
+        }
+
     def predict(
         self,
         *,
@@ -2109,9 +2292,16 @@ class SamService:
         points: list,
         box,
         multimask_output: bool,
+        image_hash: Optional[str] = None,
+        image_id: Optional[str] = None,
+        image_identity: str = "fast",
+        mask_encoding: str = "png",
     ) -> dict:
+        mask_encoding = self._resolve_mask_encoding(mask_encoding)
         if not points and box is None:
             raise SamServiceError("At least one point or box prompt is required.")
+        if not image and not image_hash:
+            raise SamServiceError("An image or the imageHash of a prepared image is required.")
         model_status = self._get_model_status(model_id)
         if model_status.get("family") == "sam3":
             return self._predict_sam3_image(
@@ -2121,6 +2311,7 @@ class SamService:
                 points=points,
                 box=box,
                 multimask_output=multimask_output,
+                mask_encoding=mask_encoding,
             )
 
         total_started_at = time.perf_counter()
@@ -2128,24 +2319,29 @@ class SamService:
         set_image_ms = 0.0
         predict_ms = 0.0
         image_cache_hit = False
+        embedding_cache_hit = False
         model_cache_key = (model_id, self.device)
         model_cached = model_cache_key in self._predictors
 
         try:
-            with self._lock:
-                predictor = self._get_predictor(model_id)
-
+            with gpu_arbiter.acquire(
+                self.device, GPU_PRIORITY_INTERACTIVE, "sam_predict"
+            ) as gpu_lease, self._lock:
                 load_image_started_at = time.perf_counter()
-                rgb_np_img, image_hash = self._load_image(image, image_type)
+                if image:
+                    image_hash = self._image_identity(
+                        image, image_type, image_id=image_id, mode=image_identity
+                    )
                 load_image_ms = (time.perf_counter() - load_image_started_at) * 1000
 
-                cached_image_hash = self._image_cache.get(model_cache_key)
-                image_cache_hit = cached_image_hash == image_hash
-                if not image_cache_hit:
-                    set_image_started_at = time.perf_counter()
-                    predictor.set_image(rgb_np_img)
-                    set_image_ms = (time.perf_counter() - set_image_started_at) * 1000
-                    self._image_cache[model_cache_key] = image_hash
+                predictor = self._get_predictor(model_id)
+                image_state = self._set_predictor_image(
+                    predictor, model_id, image_hash, image, image_type
+                )
+                image_cache_hit = image_state["imageCacheHit"]
+                embedding_cache_hit = image_state["embeddingCacheHit"]
+                load_image_ms += image_state["decodeMs"]
+                set_image_ms = image_state["setImageMs"]
 
                 point_coords, point_labels = self._normalize_points(points)
                 box_array = self._normalize_box(box)
@@ -2157,18 +2353,20 @@ class SamService:
                     multimask_output=multimask_output,
                 )
                 predict_ms = (time.perf_counter() - predict_started_at) * 1000
+                image_height, image_width = predictor_image_size(predictor)
+        except SamImageNotCachedError:
+            raise
         except RuntimeError as error:
             raise SamServiceError(self._format_runtime_error(error, model_id=model_id)) from error
 
         encode_started_at = time.perf_counter()
         candidates = []
         for index, mask in enumerate(masks):
-            binary_mask = (mask.astype(np.uint8) * 255)
             candidates.append(
                 {
                     "id": f"{model_id}-{image_hash[:12]}-{index}",
                     "index": index,
-                    "mask": self._mask_to_data_url(binary_mask),
+                    "mask": self._encode_mask(mask, mask_encoding),
                     "score": float(scores[index]) if index < len(scores) else None,
                 }
             )
@@ -2179,22 +2377,26 @@ class SamService:
         return {
             "modelId": model_id,
             "imageHash": image_hash,
-            "width": int(rgb_np_img.shape[1]),
-            "height": int(rgb_np_img.shape[0]),
+            "width": image_width,
+            "height": image_height,
             "candidates": candidates,
+            "maskEncoding": mask_encoding,
             "logitsShape": list(logits.shape) if hasattr(logits, "shape") else None,
             "performance": {
                 "device": self.device,
                 "modelCached": model_cached,
                 "imageCacheHit": image_cache_hit,
+                "embeddingCacheHit": embedding_cache_hit,
+                "embeddingCache": self._embedding_cache.stats(),
                 "imageMegapixels": round(
-                    float(rgb_np_img.shape[0] * rgb_np_img.shape[1]) / 1_000_000,
+                    float(image_height * image_width) / 1_000_000,
                     3,
                 ),
                 "loadImageMs": round(load_image_ms, 2),
                 "setImageMs": round(set_image_ms, 2),
                 "predictMs": round(predict_ms, 2),
                 "encodeMs": round(encode_ms, 2),
+                "gpuQueueWaitMs": round(gpu_lease.wait_ms, 3),
                 "totalMs": round(total_ms, 2),
             },
         }
@@ -2269,15 +2471,18 @@ class SamService:
         normalized_input_type = (
             "videoPath" if str(input_type or "").strip() == "videoPath" else "jpegFrameDirectory"
         )
-        staging_root = None
         source_video_path = None
         source_video_hash = None
-        staged_video_info = None
-        normalized_response_type = "path" if str(response_type or "").strip() == "path" else "base64"
+        source_video_info = None
+        frame_source = None
+        normalized_response_type = self._normalize_video_response_type(response_type)
         mask_output_path = None
-        if normalized_response_type == "path":
+        mask_tracks = None
+        if normalized_response_type in {"path", "track"}:
             if not mask_output_dir:
-                raise SamServiceError("mask_output_dir is required when SAM2.1 response_type is path.")
+                raise SamServiceError(
+                    "mask_output_dir is required when SAM2.1 response_type is path or track."
+                )
             mask_output_path = Path(mask_output_dir).expanduser().resolve()
             mask_output_path.mkdir(parents=True, exist_ok=True)
 
@@ -2288,56 +2493,66 @@ class SamService:
             if not source_video_path.is_file():
                 raise SamServiceError(f"SAM2.1 video file not found: {source_video_path}")
             source_video_hash = self._file_hash(source_video_path)
-            staging_root = Path(tempfile.mkdtemp(prefix="moonshine_sam2_video_"))
-            frame_path = staging_root / "frames"
+            source_video_info = self._read_video_metadata(source_video_path)
+            self._emit_progress(
+                progress_callback,
+                status="frame_loading",
+                phase="counting_frames",
+                message="正在统计视频帧数",
+                current=0,
+                total=source_video_info["frameCount"],
+                progress=0,
+            )
             try:
-                staged_video_info = self._stage_video_to_jpeg_frames(
-                    source_video_path,
-                    frame_path,
-                    progress_callback=progress_callback,
-                )
-            except Exception:
-                shutil.rmtree(staging_root, ignore_errors=True)
-                staging_root = None
-                raise
+                frame_total = count_video_frames(source_video_path)
+            except OSError as error:
+                raise SamServiceError(
+                    f"Failed to open video for SAM2.1 propagation: {source_video_path}"
+                ) from error
+            if frame_total <= 0:
+                raise SamServiceError(f"SAM2.1 video file has no readable frames: {source_video_path}")
+            frame_path = None
+            frame_dir_hash = source_video_hash
         else:
             if not frame_dir:
                 raise SamServiceError("frame_dir is required for SAM2.1 JPEG frame directory input.")
             frame_path = Path(frame_dir).expanduser().resolve()
             if not frame_path.is_dir():
                 raise SamServiceError(f"SAM2.1 video input must be a JPEG frame directory: {frame_path}")
-
-        frame_names = sorted(
-            item.name
-            for item in frame_path.iterdir()
-            if item.suffix.lower() in {".jpg", ".jpeg"}
-        )
-        if not frame_names:
-            raise SamServiceError(f"SAM2.1 video frame directory has no JPEG frames: {frame_path}")
-        frame_dir_hash = (
-            source_video_hash
-            if normalized_input_type == "videoPath" and source_video_hash
-            else self._frame_dir_hash(frame_path)
-        )
+            frame_total = sum(
+                1 for item in frame_path.iterdir() if item.suffix.lower() in {".jpg", ".jpeg"}
+            )
+            if not frame_total:
+                raise SamServiceError(f"SAM2.1 video frame directory has no JPEG frames: {frame_path}")
+            frame_dir_hash = self._frame_dir_hash(frame_path)
         estimated_output_frame_count = max(
             1,
             min(
-                len(frame_names),
-                int(max_frames) if max_frames is not None else len(frame_names),
+                frame_total,
+                int(max_frames) if max_frames is not None else frame_total,
             ),
         )
 
         total_started_at = time.perf_counter()
         try:
-            with self._lock:
-                predictor = self._get_video_predictor(model_id)
+            with gpu_arbiter.acquire(self.device, GPU_PRIORITY_BULK, "sam_video_load"):
+                with self._lock:
+                    predictor = self._get_video_predictor(model_id)
+            # Propagation runs outside ``_lock`` so clicks can take the device at
+            # the yield point between frames; ``_video_lock`` keeps one
+            # propagation at a time. It is taken before the lease, because a
+            # propagation that yields must not wait for the lock after getting
+            # the device back.
+            with self._video_lock, gpu_arbiter.acquire(
+                self.device, GPU_PRIORITY_BULK, "sam_video_propagate"
+            ) as gpu_lease:
                 self._emit_progress(
                     progress_callback,
                     status="frame_loading",
                     phase="frame_loading",
-                    message=f"正在加载 SAM2.1 视频帧 0/{len(frame_names)}",
+                    message=f"正在加载 SAM2.1 视频帧 0/{frame_total}",
                     current=0,
-                    total=len(frame_names),
+                    total=frame_total,
                     progress=0,
                 )
 
@@ -2351,19 +2566,41 @@ class SamService:
                         total=total,
                     )
 
-                state = predictor.init_state(
-                    str(frame_path),
-                    offload_video_to_cpu=offload_video_to_cpu,
-                    offload_state_to_cpu=offload_state_to_cpu,
-                    progress_callback=emit_frame_loading_progress,
-                )
+                if frame_path is None:
+                    # Decode the video once and stream frames into SAM2 instead
+                    # of staging every frame as a JPEG and decoding it again.
+                    frame_source = StreamingVideoFrameLoader(
+                        source_video_path,
+                        image_size=predictor.image_size,
+                        offload_video_to_cpu=offload_video_to_cpu,
+                        compute_device=predictor.device,
+                        frame_count=frame_total,
+                    )
+                    state = predictor.init_state(
+                        frame_source,
+                        offload_video_to_cpu=offload_video_to_cpu,
+                        offload_state_to_cpu=offload_state_to_cpu,
+                    )
+                else:
+                    state = predictor.init_state(
+                        str(frame_path),
+                        offload_video_to_cpu=offload_video_to_cpu,
+                        offload_state_to_cpu=offload_state_to_cpu,
+                        progress_callback=emit_frame_loading_progress,
+                    )
+                if normalized_response_type == "track":
+                    mask_tracks = MaskTrackStore(
+                        mask_output_path,
+                        int(state["video_width"]),
+                        int(state["video_height"]),
+                    )
                 self._emit_progress(
                     progress_callback,
                     status="frame_loading",
                     phase="frame_loading",
-                    message=f"SAM2.1 视频帧加载完成 {len(frame_names)}/{len(frame_names)}",
-                    current=len(frame_names),
-                    total=len(frame_names),
+                    message=f"SAM2.1 视频帧加载完成 {frame_total}/{frame_total}",
+                    current=frame_total,
+                    total=frame_total,
                     progress=1,
                 )
                 self._emit_progress(
@@ -2396,6 +2633,7 @@ class SamService:
                     )
 
                 frames = []
+                frames_bytes = 0
                 if normalized_response_type == "path":
                     self._ensure_video_mask_disk_space(
                         output_dir=mask_output_path,
@@ -2419,6 +2657,7 @@ class SamService:
                     max_frame_num_to_track=max_frames,
                     reverse=reverse,
                 ):
+                    gpu_lease.yield_point()
                     frame_masks = []
                     if normalized_response_type == "path":
                         self._ensure_video_mask_disk_space(
@@ -2434,7 +2673,11 @@ class SamService:
                             state["video_height"],
                             state["video_width"],
                         )
-                        if normalized_response_type == "path":
+                        if mask_tracks is not None:
+                            frame_masks.append(
+                                mask_tracks.append(int(out_frame_index), int(obj_id), mask_np)
+                            )
+                        elif normalized_response_type == "path":
                             frame_masks.append(
                                 self._save_video_mask(
                                     mask_np,
@@ -2456,6 +2699,7 @@ class SamService:
                             "masks": frame_masks,
                         }
                     )
+                    frames_bytes += self._frame_masks_bytes(frame_masks)
                     self._emit_progress(
                         progress_callback,
                         status="propagating",
@@ -2463,6 +2707,7 @@ class SamService:
                         message=f"正在传播 SAM2.1 视频蒙版 {len(frames)}/{estimated_output_frame_count}",
                         current=len(frames),
                         total=estimated_output_frame_count,
+                        result_bytes=frames_bytes,
                     )
                 self._emit_progress(
                     progress_callback,
@@ -2476,14 +2721,16 @@ class SamService:
         except RuntimeError as error:
             raise SamServiceError(self._format_runtime_error(error, model_id=model_id)) from error
         finally:
-            if staging_root is not None:
-                shutil.rmtree(staging_root, ignore_errors=True)
+            if frame_source is not None:
+                frame_source.close()
+            if mask_tracks is not None:
+                mask_tracks.close()
 
         total_ms = (time.perf_counter() - total_started_at) * 1000
         return {
             "modelId": model_id,
             "frameDirHash": frame_dir_hash,
-            "frameCount": len(frame_names),
+            "frameCount": frame_total,
             "width": int(state["video_width"]),
             "height": int(state["video_height"]),
             "objectCount": len(normalized_objects),
@@ -2501,11 +2748,10 @@ class SamService:
                 "frameDir": str(frame_path) if normalized_input_type == "jpegFrameDirectory" else None,
                 "videoPath": str(source_video_path) if source_video_path is not None else None,
                 "videoHash": source_video_hash,
-                "staged": normalized_input_type == "videoPath",
-                "stagedFrameCount": staged_video_info.get("frameCount")
-                if staged_video_info
-                else None,
-                "fps": staged_video_info.get("fps") if staged_video_info else None,
+                "staged": False,
+                "stagedFrameCount": None,
+                "streamed": frame_source is not None,
+                "fps": source_video_info.get("fps") if source_video_info else None,
                 "responseType": normalized_response_type,
                 "maskOutputDir": str(mask_output_path) if mask_output_path is not None else None,
             },
@@ -2514,9 +2760,119 @@ class SamService:
                 "totalMs": round(total_ms, 2),
                 "offloadVideoToCpu": offload_video_to_cpu,
                 "offloadStateToCpu": offload_state_to_cpu,
+                "frameLoader": frame_source.stats() if frame_source is not None else None,
             },
         }
 
+    def _text_prompt_candidates(self, prompt: str, language: str, prompt_source: str) -> list[dict]:
+        if prompt_source.startswith("lexicon"):
+            return [
+                {
+                    "text": prompt,
+                    "source": prompt_source,
+                    "language": "en",
+                    "originalLanguage": language,
+                }
+            ]
+        return self._normalize_text_prompts(prompt, language)
+
+    @torch.inference_mode()
+    def _ground_text_prompts_batched(self, predictor, state: dict, texts: list[str]) -> list[dict]:
+        """Encode ``texts`` together and run SAM3 grounding once for all of them.
+
+        Mirrors ``Sam3Processor.set_text_prompt`` but gives every text its own
+        query on the same image (``img_ids`` all zero, ``text_ids`` 0..n-1).
+        """
+        from sam3.model import box_ops
+        from sam3.model.data_misc import FindStage, interpolate
+
+        model = predictor.model
+        device = predictor.device
+        count = len(texts)
+        predictor.reset_all_prompts(state)
+        backbone_out = {
+            **state["backbone_out"],
+            **model.backbone.forward_text(texts, device=device),
+        }
+        find_stage = FindStage(
+            img_ids=torch.zeros(count, device=device, dtype=torch.long),
+            text_ids=torch.arange(count, device=device, dtype=torch.long),
+            input_boxes=None,
+            input_boxes_mask=None,
+            input_boxes_label=None,
+            input_points=None,
+            input_points_mask=None,
+        )
+        outputs = model.forward_grounding(
+            backbone_out=backbone_out,
+            find_input=find_stage,
+            geometric_prompt=model._get_dummy_prompt(num_prompts=count),
+            find_target=None,
+        )
+        presence = outputs["presence_logit_dec"].sigmoid().unsqueeze(1)
+        probs = (outputs["pred_logits"].sigmoid() * presence).squeeze(-1)
+        height = state["original_height"]
+        width = state["original_width"]
+        scale = torch.tensor([width, height, width, height], device=probs.device)
+        results = []
+        for index in range(count):
+            keep = probs[index] > predictor.confidence_threshold
+            boxes = box_ops.box_cxcywh_to_xyxy(outputs["pred_boxes"][index][keep])
+            masks = interpolate(
+                outputs["pred_masks"][index][keep].unsqueeze(1),
+                (height, width),
+                mode="bilinear",
+                align_corners=False,
+            ).sigmoid()
+            results.append(
+                {
+                    "masks": masks > 0.5,
+                    "boxes": boxes * scale[None, :],
+                    "scores": probs[index][keep],
+                }
+            )
+        return results
+
+    def _ground_text_prompts(
+        self, predictor, state: dict, query_texts: list[list[str]]
+    ) -> tuple[dict, bool]:
+        """Return SAM3 outputs keyed by text and whether they shared a forward.
+
+        The batched path grounds every candidate text. The one-at-a-time
+        fallback stops each query at its first candidate that returns masks,
+        so texts after it have no output.
+        """
+        texts = list(dict.fromkeys(text for candidates in query_texts for text in candidates))
+        outputs = []
+        batched = len(texts) > 1
+        if batched:
+            try:
+                for offset in range(0, len(texts), SAM3_TEXT_PROMPT_BATCH):
+                    outputs.extend(
+                        self._ground_text_prompts_batched(
+                            predictor, state, texts[offset:offset + SAM3_TEXT_PROMPT_BATCH]
+                        )
+                    )
+                return dict(zip(texts, outputs)), True
+            except (ImportError, AttributeError, KeyError, TypeError) as error:
+                # Older SAM3 builds lack the batched grounding inputs; fall back
+                # to one text prompt at a time.
+                logger.warning(f"SAM3 batched text prompts unavailable, running sequentially: {error}")
+        outputs_by_text = {}
+        for candidates in query_texts:
+            for text in candidates:
+                output = outputs_by_text.get(text)
+                if output is None:
+                    predictor.reset_all_prompts(state)
+                    output = predictor.set_text_prompt(prompt=text, state=state)
+                    output = outputs_by_text[text] = {
+                        key: output.get(key) for key in ("masks", "boxes", "scores")
+                    }
+                masks = output.get("masks")
+                if masks is not None and int(masks.shape[0]) > 0:
+                    break
+        return outputs_by_text, False
+
     def predict_text(
         self,
         *,
@@ -2528,37 +2884,73 @@ class SamService:
         prompt_source: str = "manual",
         prompt_color: Optional[dict] = None,
         prompt_noun: Optional[dict] = None,
+        mask_encoding: str = "png",
     ) -> dict:
-        prompt = str(text or "").strip()
-        if not prompt:
-            raise SamServiceError("Text prompt is required for SAM3 smart selection.")
-        normalized_prompt_source = str(prompt_source or "manual").strip() or "manual"
-        is_lexicon_prompt = normalized_prompt_source.startswith("lexicon")
-        if is_lexicon_prompt:
-            prompt_candidates = [
+        return self.predict_text_batch(
+            image=image,
+            image_type=image_type,
+            model_id=model_id,
+            queries=[
+                {
+                    "text": text,
+                    "language": language,
+                    "prompt_source": prompt_source,
+                    "prompt_color": prompt_color,
+                    "prompt_noun": prompt_noun,
+                }
+            ],
+            mask_encoding=mask_encoding,
+        )["results"][0]
+
+    def predict_text_batch(
+        self,
+        *,
+        image: str,
+        image_type: str,
+        model_id: str,
+        queries: list[dict],
+        mask_encoding: str = "png",
+    ) -> dict:
+        """Run several independent SAM3 text queries against one image.
+
+        Every query's prompt candidates (original text plus lexicon
+        normalizations) are grounded in a single batched forward; each query
+        then keeps its first candidate that found a target.
+        """
+        mask_encoding = self._resolve_mask_encoding(mask_encoding)
+        if not queries:
+            raise SamServiceError("At least one text prompt is required for SAM3 smart selection.")
+        prepared_queries = []
+        for query in queries:
+            prompt = str(query.get("text") or "").strip()
+            if not prompt:
+                raise SamServiceError("Text prompt is required for SAM3 smart selection.")
+            language = query.get("language") or "auto"
+            prompt_source = str(query.get("prompt_source") or "manual").strip() or "manual"
+            prepared_queries.append(
                 {
                     "text": prompt,
-                    "source": normalized_prompt_source,
-                    "language": "en",
-                    "originalLanguage": language,
+                    "language": language,
+                    "source": prompt_source,
+                    "color": query.get("prompt_color"),
+                    "noun": query.get("prompt_noun"),
+                    "candidates": self._text_prompt_candidates(prompt, language, prompt_source),
                 }
-            ]
-        else:
-            prompt_candidates = self._normalize_text_prompts(prompt, language)
-        used_prompt = prompt_candidates[0]
+            )
 
         total_started_at = time.perf_counter()
         load_image_ms = 0.0
         set_image_ms = 0.0
         predict_ms = 0.0
         image_cache_hit = False
+        batched = False
         model_cache_key = (model_id, self.device)
         model_cached = model_cache_key in self._text_predictors
 
         try:
-            with self._lock:
-                predictor = self._get_text_predictor(model_id)
-
+            with gpu_arbiter.acquire(
+                self.device, GPU_PRIORITY_INTERACTIVE, "sam_text_predict"
+            ) as gpu_lease, self._lock:
                 load_image_started_at = time.perf_counter()
                 rgb_np_img, image_hash = self._load_image(image, image_type)
                 load_image_ms = (time.perf_counter() - load_image_started_at) * 1000
@@ -2576,6 +2968,7 @@ class SamService:
                     if self.device == "cuda"
                     else contextlib.nullcontext()
                 )
+                predictor = self._get_text_predictor(model_id)
                 with autocast_context:
                     if image_cache_hit:
                         state = cached_image["state"]
@@ -2590,27 +2983,108 @@ class SamService:
                             "state": state,
                         }
 
-                    output = None
-                    for candidate in prompt_candidates:
-                        predictor.reset_all_prompts(state)
-                        predict_started_at = time.perf_counter()
-                        candidate_output = predictor.set_text_prompt(
-                            prompt=candidate["text"],
-                            state=state,
+                    texts = list(
+                        dict.fromkeys(
+                            candidate["text"]
+                            for query in prepared_queries
+                            for candidate in query["candidates"]
                         )
-                        predict_ms += (time.perf_counter() - predict_started_at) * 1000
-                        candidate_masks = candidate_output.get("masks")
-                        if candidate_masks is not None and int(candidate_masks.shape[0]) > 0:
-                            output = candidate_output
-                            used_prompt = candidate
-                            break
-                        if output is None:
-                            output = candidate_output
+                    )
+                    predict_started_at = time.perf_counter()
+                    outputs_by_text, batched = self._ground_text_prompts(
+                        predictor,
+                        state,
+                        [
+                            [candidate["text"] for candidate in query["candidates"]]
+                            for query in prepared_queries
+                        ],
+                    )
+                    predict_ms = (time.perf_counter() - predict_started_at) * 1000
         except RuntimeError as error:
             raise SamServiceError(self._format_runtime_error(error, model_id=model_id)) from error
         except ValueError as error:
             raise SamServiceError(str(error)) from error
 
+        results = []
+        for query_index, query in enumerate(prepared_queries):
+            output = None
+            used_prompt = query["candidates"][0]
+            for candidate in query["candidates"]:
+                candidate_output = outputs_by_text[candidate["text"]]
+                candidate_masks = candidate_output.get("masks")
+                if candidate_masks is not None and int(candidate_masks.shape[0]) > 0:
+                    output = candidate_output
+                    used_prompt = candidate
+                    break
+                if output is None:
+                    output = candidate_output
+            results.append(
+                self._build_text_result(
+                    model_id=model_id,
+                    image_hash=image_hash,
+                    rgb_np_img=rgb_np_img,
+                    query=query,
+                    query_index=query_index if len(prepared_queries) > 1 else None,
+                    output=output,
+                    used_prompt=used_prompt,
+                    mask_encoding=mask_encoding,
+                )
+            )
+
+        total_ms = (time.perf_counter() - total_started_at) * 1000
+        performance = {
+            "device": self.device,
+            "modelCached": model_cached,
+            "imageCacheHit": image_cache_hit,
+            "autocast": "cuda.bfloat16" if self.device == "cuda" else None,
+            "imageMegapixels": round(
+                float(rgb_np_img.shape[0] * rgb_np_img.shape[1]) / 1_000_000,
+                3,
+            ),
+            "loadImageMs": round(load_image_ms, 2),
+            "setImageMs": round(set_image_ms, 2),
+            "predictMs": round(predict_ms, 2),
+            "batchedPrompts": len(texts) if batched else 1,
+            "gpuQueueWaitMs": round(gpu_lease.wait_ms, 3),
+        }
+        for result in results:
+            result["performance"] = {
+                **performance,
+                "encodeMs": result["performance"]["encodeMs"],
+                "totalMs": round(total_ms, 2),
+            }
+        return {
+            "modelId": model_id,
+            "imageHash": image_hash,
+            "width": int(rgb_np_img.shape[1]),
+            "height": int(rgb_np_img.shape[0]),
+            "results": results,
+            "performance": {
+                **performance,
+                "queryCount": len(results),
+                "promptCount": len(texts),
+                "totalMs": round(total_ms, 2),
+            },
+        }
+
+    def _build_text_result(
+        self,
+        *,
+        model_id: str,
+        image_hash: str,
+        rgb_np_img: np.ndarray,
+        query: dict,
+        query_index: Optional[int],
+        output: dict,
+        used_prompt: dict,
+        mask_encoding: str,
+    ) -> dict:
+        prompt = query["text"]
+        language = query["language"]
+        normalized_prompt_source = query["source"]
+        prompt_color = query["color"]
+        prompt_noun = query["noun"]
+        prompt_candidates = query["candidates"]
         masks = output.get("masks")
         if masks is None:
             raise SamServiceError("SAM3 text prediction did not return masks.")
@@ -2641,6 +3115,9 @@ class SamService:
             )
 
         encode_started_at = time.perf_counter()
+        id_prefix = f"{model_id}-{image_hash[:12]}-text"
+        if query_index is not None:
+            id_prefix = f"{id_prefix}-{query_index}"
         candidates = []
         for index in range(candidate_count):
             binary_mask = self._sam3_mask_to_numpy(masks[index])
@@ -2652,9 +3129,9 @@ class SamService:
                 box = self._sam3_box_to_dict(boxes[index])
             candidates.append(
                 {
-                    "id": f"{model_id}-{image_hash[:12]}-text-{index}",
+                    "id": f"{id_prefix}-{index}",
                     "index": index,
-                    "mask": self._mask_to_data_url(binary_mask),
+                    "mask": self._encode_mask(binary_mask, mask_encoding),
                     "score": score,
                     "box": box,
                     "promptType": "text",
@@ -2673,7 +3150,6 @@ class SamService:
             )
         candidates = self._sort_candidates_by_score(candidates)
         encode_ms = (time.perf_counter() - encode_started_at) * 1000
-        total_ms = (time.perf_counter() - total_started_at) * 1000
 
         return {
             "modelId": model_id,
@@ -2700,6 +3176,7 @@ class SamService:
                 ],
             },
             "candidates": candidates,
+            "maskEncoding": mask_encoding,
             "diagnostics": {
                 "candidateCount": len(candidates),
                 "promptAttempts": [
@@ -2733,18 +3210,6 @@ class SamService:
                 "scores": list(scores.shape) if hasattr(scores, "shape") else None,
             },
             "performance": {
-                "device": self.device,
-                "modelCached": model_cached,
-                "imageCacheHit": image_cache_hit,
-                "autocast": "cuda.bfloat16" if self.device == "cuda" else None,
-                "imageMegapixels": round(
-                    float(rgb_np_img.shape[0] * rgb_np_img.shape[1]) / 1_000_000,
-                    3,
-                ),
-                "loadImageMs": round(load_image_ms, 2),
-                "setImageMs": round(set_image_ms, 2),
-                "predictMs": round(predict_ms, 2),
                 "encodeMs": round(encode_ms, 2),
-                "totalMs": round(total_ms, 2),
             },
         }
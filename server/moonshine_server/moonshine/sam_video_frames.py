@@ -0,0 +1,230 @@
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+
+from moonshine_server.path_io import open_video_capture
+
+SAM2_IMG_MEAN = (0.485, 0.456, 0.406)
+SAM2_IMG_STD = (0.229, 0.224, 0.225)
+DEFAULT_FRAME_LOOKAHEAD = 8
+DEFAULT_FRAME_BUFFER_MB = 256
+
+
+def count_video_frames(video_path: Path) -> int:
+    """Count frames by demuxing the stream; container frame counts can be off.
+
+    Raw stream mode reads packets without decoding them where the backend
+    supports it, so counting does not decode the whole video a second time.
+    """
+    frame_count = 0
+    with open_video_capture(video_path) as capture:
+        capture.set(cv2.CAP_PROP_FORMAT, -1)
+        while capture.grab():
+            frame_count += 1
+    return frame_count
+
+
+class StreamingVideoFrameLoader:
+    """Feed SAM2 resized, normalized frames decoded straight from a video.
+
+    Stands in for the ``images`` list of a SAM2 inference state. The video is
+    decoded once, front to back; a daemon thread keeps up to ``lookahead``
+    frames decoded past the last index SAM2 asked for, and only about twice
+    that many normalized tensors are retained. Every decoded frame is also
+    kept resized as uint8 in a CPU buffer bounded by ``buffer_mb``, so walking
+    back from a prompt frame (reverse propagation) is served from memory.
+    Frames older than the buffer are decoded again in one buffer-sized chunk
+    after a seek; a seek that does not land on the requested frame falls back
+    to reopening the video and skipping forward.
+    """
+
+    def __init__(
+        self,
+        video_path: Path,
+        image_size: int,
+        offload_video_to_cpu: bool,
+        compute_device,
+        frame_count: Optional[int] = None,
+        lookahead: int = DEFAULT_FRAME_LOOKAHEAD,
+        buffer_mb: int = DEFAULT_FRAME_BUFFER_MB,
+        img_mean=SAM2_IMG_MEAN,
+        img_std=SAM2_IMG_STD,
+    ):
+        self.video_path = Path(video_path)
+        self.image_size = int(image_size)
+        self.lookahead = max(1, int(lookahead))
+        self.capacity = 2 * self.lookahead + 2
+        frame_bytes = 3 * self.image_size * self.image_size
+        self.buffer_frames = max(self.capacity, int(buffer_mb) * 1024 * 1024 // frame_bytes)
+        self.frame_count = (
+            int(frame_count) if frame_count is not None else count_video_frames(self.video_path)
+        )
+        if self.frame_count <= 0:
+            raise RuntimeError(f"Video has no readable frames: {self.video_path}")
+        self.device = torch.device("cpu") if offload_video_to_cpu else torch.device(compute_device)
+        self.img_mean = torch.tensor(img_mean, dtype=torch.float32)[:, None, None]
+        self.img_std = torch.tensor(img_std, dtype=torch.float32)[:, None, None]
+        self.video_height = None
+        self.video_width = None
+        self.exception: Optional[BaseException] = None
+        self.decoded_frames = 0
+        self.seeks = 0
+        self.rewinds = 0
+
+        self._frames: "OrderedDict[int, torch.Tensor]" = OrderedDict()
+        self._buffer: "OrderedDict[int, torch.Tensor]" = OrderedDict()
+        self._cursor = 0
+        self._forward = True
+        self._closed = False
+        self._state = threading.Condition()
+        self._capture_lock = threading.Lock()
+        self._exit_stack = ExitStack()
+        self._capture = self._exit_stack.enter_context(open_video_capture(self.video_path))
+        self._next_decode = 0
+
+        # Frame 0 fills in the video size and is where prompts usually land.
+        try:
+            self[0]
+        except Exception:
+            self._exit_stack.close()
+            raise
+        self._thread = threading.Thread(target=self._prefetch, daemon=True, name="sam2-frame-loader")
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        if self.exception is not None:
+            raise RuntimeError("Failure in frame loading thread") from self.exception
+        if index < 0:
+            index += self.frame_count
+        if not 0 <= index < self.frame_count:
+            raise IndexError(index)
+        with self._state:
+            self._forward = index >= self._cursor
+            self._cursor = index
+            frame = self._frames.get(index)
+            if frame is not None:
+                self._frames.move_to_end(index)
+            self._state.notify_all()
+        if frame is not None:
+            return frame
+
+        with self._capture_lock:
+            with self._state:
+                frame = self._frames.get(index)
+            if frame is not None:
+                return frame
+            buffered = self._buffer.get(index)
+            if buffered is not None:
+                return self._store_locked(index, buffered)
+            if index < self._next_decode:
+                # Re-decode the buffer-sized chunk ending at ``index`` so the
+                # rest of a backwards walk is served from the buffer.
+                self._seek_locked(max(0, index - self.buffer_frames + 1))
+            elif index > self._next_decode + self.buffer_frames:
+                self._seek_locked(index)
+            while self._next_decode <= index:
+                frame = self._decode_next_locked()
+        return frame
+
+    def _seek_locked(self, index: int):
+        self.seeks += 1
+        if (
+            not self._capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+            or int(self._capture.get(cv2.CAP_PROP_POS_FRAMES)) != index
+        ):
+            # Inter-coded streams can land on a nearby keyframe instead;
+            # reopening and skipping forward is slower but frame-accurate.
+            self._rewind_locked(index)
+        self._next_decode = index
+
+    def _rewind_locked(self, index: int):
+        self.rewinds += 1
+        self._exit_stack.close()
+        self._exit_stack = ExitStack()
+        self._capture = self._exit_stack.enter_context(open_video_capture(self.video_path))
+        for _ in range(index):
+            if not self._capture.grab():
+                raise RuntimeError(f"Failed to skip to frame {index} of {self.video_path}")
+
+    def _decode_next_locked(self) -> torch.Tensor:
+        index = self._next_decode
+        ok, frame_bgr = self._capture.read()
+        if not ok:
+            raise RuntimeError(f"Failed to decode frame {index} of {self.video_path}")
+        self._next_decode += 1
+        self.decoded_frames += 1
+        self.video_height, self.video_width = frame_bgr.shape[:2]
+        # Same resize SAM2 applies to JPEG frames, minus the JPEG round trip.
+        rgb = Image.fromarray(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB))
+        resized = torch.from_numpy(
+            np.array(rgb.resize((self.image_size, self.image_size)), dtype=np.uint8)
+        ).permute(2, 0, 1)
+        with self._state:
+            self._buffer[index] = resized
+            self._buffer.move_to_end(index)
+            while len(self._buffer) > self.buffer_frames:
+                self._buffer.popitem(last=False)
+        return self._store_locked(index, resized)
+
+    def _store_locked(self, index: int, resized: torch.Tensor) -> torch.Tensor:
+        tensor = resized.to(torch.float32) / 255.0
+        tensor = ((tensor - self.img_mean) / self.img_std).to(self.device, non_blocking=True)
+        with self._state:
+            self._frames[index] = tensor
+            self._frames.move_to_end(index)
+            while len(self._frames) > self.capacity:
+                self._frames.popitem(last=False)
+        return tensor
+
+    def _wants_prefetch_locked(self) -> bool:
+        return (
+            self._forward
+            and self._next_decode < self.frame_count
+            and self._next_decode <= self._cursor + self.lookahead
+        )
+
+    def _prefetch(self):
+        try:
+            while True:
+                with self._state:
+                    while not self._closed and not self._wants_prefetch_locked():
+                        self._state.wait()
+                    if self._closed:
+                        return
+                with self._capture_lock:
+                    with self._state:
+                        wanted = not self._closed and self._wants_prefetch_locked()
+                    if wanted:
+                        self._decode_next_locked()
+        except Exception as error:
+            self.exception = error
+
+    def stats(self) -> dict:
+        return {
+            "frameCount": self.frame_count,
+            "decodedFrames": self.decoded_frames,
+            "seeks": self.seeks,
+            "rewinds": self.rewinds,
+            "bufferedFrames": len(self._buffer),
+            "lookahead": self.lookahead,
+        }
+
+    def close(self):
+        with self._state:
+            self._closed = True
+            self._state.notify_all()
+        self._thread.join(timeout=5)
+        with self._capture_lock:
+            self._frames.clear()
+            self._buffer.clear()
+            self._exit_stack.close()
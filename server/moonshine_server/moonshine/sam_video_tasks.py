@@ -1,9 +1,18 @@
+import json
+import os
+import tempfile
 import threading
 import time
 import uuid
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any, Callable, Optional
 
+from fastapi.encoders import jsonable_encoder
+from loguru import logger
+
+from moonshine_server.mask_tracks import close_mask_tracks
+from moonshine_server.progress_events import sam_video_room
 
 SAM_VIDEO_TASK_STATUSES = {
     "queued",
@@ -15,6 +24,12 @@ SAM_VIDEO_TASK_STATUSES = {
     "failed",
     "canceled",
 }
+SAM_VIDEO_TASK_FINISHED_STATUSES = {"completed", "failed", "canceled"}
+SAM_VIDEO_TASK_RETENTION_SECONDS = 30 * 60
+SAM_VIDEO_TASK_MAX_FINISHED = 16
+# Results at least this large (as JSON) are written to disk instead of kept in memory.
+SAM_VIDEO_RESULT_SPILL_BYTES = 8 * 1024 * 1024
+SAM_VIDEO_RESULT_SPILL_ROOT = Path(tempfile.gettempdir()) / "moonshine_sam_video_results"
 
 
 @dataclass
@@ -29,6 +44,11 @@ class SamVideoTask:
     progress: float = 0.0
     error: str = ""
     result: Optional[dict] = None
+    result_path: Optional[str] = None
+    result_bytes: int = 0
+    # Estimated size of the frames a running propagation has built so far.
+    pending_result_bytes: int = 0
+    mask_track_dir: Optional[str] = None
     canceled: bool = False
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
@@ -48,6 +68,10 @@ class SamVideoTask:
             "createdAt": self.created_at,
             "updatedAt": self.updated_at,
             "completedAt": self.completed_at,
+            "progressRoom": sam_video_room(self.task_id),
+            "resultBytes": self.result_bytes,
+            "pendingResultBytes": self.pending_result_bytes,
+            "resultSpilled": self.result_path is not None,
         }
         if include_result:
             payload["result"] = self.result
@@ -55,14 +79,148 @@ class SamVideoTask:
 
 
 class SamVideoTaskManager:
-    def __init__(self):
+    """Background SAM video propagation tasks.
+
+    Finished tasks are kept for ``retention_seconds`` and at most
+    ``max_finished`` of them; large results are spilled to JSON files so only
+    their size stays in memory. Each manager spills into its own subdirectory
+    of ``spill_dir``, so server processes sharing the temp directory never
+    touch each other's results.
+    """
+
+    def __init__(
+        self,
+        retention_seconds: float = SAM_VIDEO_TASK_RETENTION_SECONDS,
+        max_finished: int = SAM_VIDEO_TASK_MAX_FINISHED,
+        spill_bytes: int = SAM_VIDEO_RESULT_SPILL_BYTES,
+        spill_dir: Optional[str] = None,
+    ):
         self._tasks: dict[str, SamVideoTask] = {}
         self._lock = threading.RLock()
+        self._listeners: list[Callable[[dict], None]] = []
+        self.retention_seconds = retention_seconds
+        self.max_finished = max(0, int(max_finished))
+        self.spill_bytes = max(0, int(spill_bytes))
+        self.spill_root = Path(spill_dir or SAM_VIDEO_RESULT_SPILL_ROOT)
+        self.spill_dir = self.spill_root / f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.evicted = 0
+
+    def clear_stale_spills(self) -> int:
+        """Remove spilled results older than the retention period; returns the count.
+
+        Tasks live in memory only, so results spilled by an earlier process can
+        never be fetched again. Files younger than the retention period may
+        still belong to a live process and are left alone.
+        """
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        try:
+            spill_paths = list(self.spill_root.glob("*.json")) + list(self.spill_root.glob("*/*.json"))
+        except OSError:
+            return 0
+        for spill_path in spill_paths:
+            if spill_path.parent == self.spill_dir:
+                continue
+            try:
+                if spill_path.stat().st_mtime < cutoff:
+                    spill_path.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        for process_dir in {spill_path.parent for spill_path in spill_paths}:
+            if process_dir != self.spill_root and process_dir != self.spill_dir:
+                try:
+                    process_dir.rmdir()
+                except OSError:
+                    pass
+        return removed
+
+    def _prune_locked(self):
+        now = time.time()
+        finished = sorted(
+            (task for task in self._tasks.values() if task.completed_at is not None),
+            key=lambda task: task.completed_at,
+        )
+        overflow = len(finished) - self.max_finished
+        for index, task in enumerate(finished):
+            if index >= overflow and now - task.completed_at <= self.retention_seconds:
+                continue
+            self._tasks.pop(task.task_id, None)
+            self._discard_result(task)
+            self.evicted += 1
+
+    @staticmethod
+    def _discard_result(task: SamVideoTask):
+        task.result = None
+        if task.mask_track_dir:
+            close_mask_tracks(task.mask_track_dir)
+        if task.result_path:
+            try:
+                os.remove(task.result_path)
+            except OSError:
+                pass
+
+    def _store_result(self, task_id: str, result: dict) -> tuple[Optional[dict], Optional[str], int]:
+        payload = json.dumps(jsonable_encoder(result), ensure_ascii=False).encode("utf-8")
+        if len(payload) < self.spill_bytes:
+            return result, None, len(payload)
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            result_path = self.spill_dir / f"{task_id}.json"
+            result_path.write_bytes(payload)
+        except OSError:
+            logger.exception(f"SAM video result spill failed, keeping it in memory: {task_id}")
+            return result, None, len(payload)
+        return None, str(result_path), len(payload)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._prune_locked()
+            tasks = list(self._tasks.values())
+            evicted = self.evicted
+        in_memory = [task for task in tasks if task.result is not None]
+        spilled = [task for task in tasks if task.result_path is not None]
+        active = [task for task in tasks if task.status not in SAM_VIDEO_TASK_FINISHED_STATUSES]
+        return {
+            "taskCount": len(tasks),
+            "activeTaskCount": len(active),
+            "inFlightResultBytes": sum(task.pending_result_bytes for task in active),
+            "finishedTaskCount": sum(1 for task in tasks if task.completed_at is not None),
+            "inMemoryResultCount": len(in_memory),
+            "inMemoryResultBytes": sum(task.result_bytes for task in in_memory),
+            "spilledResultCount": len(spilled),
+            "spilledResultBytes": sum(task.result_bytes for task in spilled),
+            "evictedTaskCount": evicted,
+            "retentionSeconds": self.retention_seconds,
+            "maxFinishedTasks": self.max_finished,
+            "spillThresholdBytes": self.spill_bytes,
+            "spillDir": str(self.spill_dir),
+        }
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """Call ``listener`` with the task snapshot after every state change."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def _notify(self, snapshot: Optional[dict]) -> None:
+        if snapshot is None:
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception:
+                logger.exception("SAM video task listener failed")
 
     def create_task(self, request: Any) -> SamVideoTask:
         task = SamVideoTask(task_id=uuid.uuid4().hex, request=request)
         with self._lock:
+            self._prune_locked()
             self._tasks[task.task_id] = task
+            snapshot = task.to_dict()
+        self._notify(snapshot)
         return task
 
     def get_task(self, task_id: str) -> Optional[SamVideoTask]:
@@ -72,7 +230,7 @@ class SamVideoTaskManager:
     def has_active_tasks(self) -> bool:
         with self._lock:
             return any(
-                task.status not in {"completed", "failed", "canceled"}
+                task.status not in SAM_VIDEO_TASK_FINISHED_STATUSES
                 for task in self._tasks.values()
             )
 
@@ -88,7 +246,9 @@ class SamVideoTaskManager:
                 task.phase = "canceled"
                 task.message = "SAM 视频传播任务已取消"
                 task.completed_at = task.updated_at
-            return task
+            snapshot = task.to_dict()
+        self._notify(snapshot)
+        return task
 
     def update_progress(
         self,
@@ -100,10 +260,11 @@ class SamVideoTaskManager:
         current: int = 0,
         total: int = 0,
         progress: Optional[float] = None,
+        result_bytes: Optional[int] = None,
     ) -> None:
         with self._lock:
             task = self._tasks.get(task_id)
-            if not task or task.status in {"completed", "failed", "canceled"}:
+            if not task or task.status in SAM_VIDEO_TASK_FINISHED_STATUSES:
                 return
             safe_total = max(0, int(total or 0))
             safe_current = max(0, int(current or 0))
@@ -120,26 +281,47 @@ class SamVideoTaskManager:
                 )
             else:
                 task.progress = max(0.0, min(1.0, float(progress)))
+            if result_bytes is not None:
+                task.pending_result_bytes = max(0, int(result_bytes))
             task.updated_at = time.time()
+            snapshot = task.to_dict()
+        self._notify(snapshot)
 
     def finish_task(self, task_id: str, result: dict) -> None:
+        # Serialize outside the lock; mask data URL results can be large.
+        stored_result, result_path, result_bytes = self._store_result(task_id, result)
         with self._lock:
             task = self._tasks.get(task_id)
             if not task:
+                if result_path:
+                    try:
+                        os.remove(result_path)
+                    except OSError:
+                        pass
                 return
-            task.result = result
+            task.result = stored_result
+            task.result_path = result_path
+            task.result_bytes = result_bytes
+            task.pending_result_bytes = 0
+            result_input = result.get("input") or {}
+            if result_input.get("responseType") == "track":
+                task.mask_track_dir = result_input.get("maskOutputDir")
             task.status = "completed"
             task.phase = "completed"
             task.message = "SAM 视频传播任务已完成"
             task.progress = 1.0
             task.updated_at = time.time()
             task.completed_at = task.updated_at
+            snapshot = task.to_dict()
+            self._prune_locked()
+        self._notify(snapshot)
 
     def fail_task(self, task_id: str, error: str) -> None:
         with self._lock:
             task = self._tasks.get(task_id)
             if not task:
                 return
+            task.pending_result_bytes = 0
             if task.canceled:
                 task.status = "canceled"
                 task.phase = "canceled"
@@ -151,6 +333,9 @@ class SamVideoTaskManager:
                 task.error = error or task.message
             task.updated_at = time.time()
             task.completed_at = task.updated_at
+            snapshot = task.to_dict()
+            self._prune_locked()
+        self._notify(snapshot)
 
     def make_progress_callback(self, task_id: str) -> Callable[..., None]:
         def callback(**payload: Any) -> None:
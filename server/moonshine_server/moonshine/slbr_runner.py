@@ -4,7 +4,7 @@ import math
 import os
 import sys
 import threading
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from types import SimpleNamespace
 from typing import Iterable, Optional
@@ -17,19 +17,33 @@ from PIL import Image
 
 from moonshine_server.helper import concat_alpha_channel
 from moonshine_server.disk_space import DEFAULT_DISK_SPACE_SAFETY_BYTES, ensure_disk_space
+from moonshine_server.gpu_arbiter import GPU_PRIORITY_BULK, gpu_arbiter
 from moonshine_server.image_output import (
     encode_pil_image,
     image_format_from_path,
     resolve_image_output_spec,
 )
+from moonshine_server.folder_manifest import FolderManifest, options_signature
 from moonshine_server.mask_image import read_binary_mask_path, resize_binary_mask
+from moonshine_server.moonshine.slbr_tuning import (
+    AUTO_TILE_SIZE,
+    SLBR_TUNING_FILENAME,
+    SLBR_TUNING_VERSION,
+    SlbrTuningStore,
+    calibrate_slbr_tiles,
+    device_profile_key,
+    is_out_of_memory_error,
+)
 from moonshine_server.path_io import load_torch_checkpoint, read_image_file, write_image_file
 
 VALID_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
 DEFAULT_TILE_SIZE = 384
 DEFAULT_TILE_BATCH = 4
+DEFAULT_IMAGE_BATCH = 4
+MAX_IMAGE_BATCH = 16
 MAX_TILE_BATCH = 32
 LOCAL_INFERENCE_STRATEGIES = {"auto", "full", "smart_tiles"}
+SLBR_PRECISIONS = {"fp32": None, "fp16": torch.float16, "bf16": torch.bfloat16}
 DEFAULT_LOCAL_BBOX_EMPTY_RATIO_THRESHOLD = 50
 DEFAULT_LOCAL_EDGE_FEATHER_PX = 2
 MIN_SMART_TILE_SAVING_RATIO = 0.15
@@ -86,6 +100,25 @@ def clamp_tile_size(value) -> int:
     return normalized if normalized in {256, 384, 512} else DEFAULT_TILE_SIZE
 
 
+def normalize_tile_size_option(value):
+    """Keep ``"auto"`` for calibrated sizing, clamp anything else."""
+    if isinstance(value, str) and value.strip().lower() == AUTO_TILE_SIZE:
+        return AUTO_TILE_SIZE
+    return clamp_tile_size(value)
+
+
+def normalize_slbr_precision(value) -> str:
+    normalized = str(value or "fp32").strip().lower()
+    return normalized if normalized in SLBR_PRECISIONS else "fp32"
+
+
+def _cpu_supports_bf16() -> bool:
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
 def clamp_tile_batch(value) -> int:
     try:
         normalized = int(value)
@@ -94,6 +127,14 @@ def clamp_tile_batch(value) -> int:
     return max(1, min(MAX_TILE_BATCH, normalized))
 
 
+def clamp_image_batch(value) -> int:
+    try:
+        normalized = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_IMAGE_BATCH
+    return max(1, min(MAX_IMAGE_BATCH, normalized))
+
+
 def get_overlap_for_tile_size(tile_size: int) -> int:
     return max(1, int(tile_size) // 4)
 
@@ -127,21 +168,64 @@ def recommend_slbr_params(cuda_info: Optional[dict] = None) -> dict:
     }
 
 
-def _image_to_tensor(image_bgr: np.ndarray) -> torch.Tensor:
-    image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
-    return torch.from_numpy(image_rgb.transpose(2, 0, 1))
+def _image_to_tensor(image_bgr: np.ndarray, device: torch.device | None = None) -> torch.Tensor:
+    """Upload the uint8 image once and normalize it on ``device``."""
+    image_rgb = torch.from_numpy(cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB))
+    if device is not None:
+        image_rgb = image_rgb.to(device)
+    return image_rgb.permute(2, 0, 1).float().div_(255.0)
 
 
-def _tensor_to_bgr(image: torch.Tensor) -> np.ndarray:
-    image = image.detach().cpu().clamp(0, 1).numpy()
-    image = (image.transpose(1, 2, 0) * 255.0).round().astype(np.uint8)
-    return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+class _TileAccumulator:
+    """Weighted overlap-add of tile batches kept on the inference device.
 
+    The blended channels and the blend weight share one ``(C + 1, H * W)``
+    buffer, so each batch is scattered with a single ``index_add_`` and only
+    the cropped uint8 result is copied back to the host.
+    """
 
-def _mask_to_bgr(mask: torch.Tensor) -> np.ndarray:
-    mask = mask.detach().cpu().clamp(0, 1).numpy()
-    mask = (mask.squeeze(0) * 255.0).round().astype(np.uint8)
-    return cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
+    def __init__(
+        self,
+        canvas_height: int,
+        canvas_width: int,
+        tile_size: int,
+        weight: torch.Tensor,
+        channels: int,
+        device: torch.device,
+    ):
+        self.canvas_height = canvas_height
+        self.canvas_width = canvas_width
+        self.channels = channels
+        self.sums = torch.zeros(
+            channels + 1, canvas_height * canvas_width, dtype=torch.float32, device=device
+        )
+        rows = torch.arange(tile_size, device=device).view(-1, 1) * canvas_width
+        cols = torch.arange(tile_size, device=device).view(1, -1)
+        self.tile_offsets = (rows + cols).reshape(-1)
+        self.weight = weight.to(device=device, dtype=torch.float32).reshape(1, 1, -1)
+
+    def add(self, tiles: torch.Tensor, coords: list[tuple[int, int]]):
+        batch = tiles.shape[0]
+        starts = torch.tensor(
+            [y * self.canvas_width + x for y, x in coords],
+            dtype=self.tile_offsets.dtype,
+            device=self.tile_offsets.device,
+        )
+        index = (starts.view(-1, 1) + self.tile_offsets.view(1, -1)).reshape(-1)
+        weighted = tiles.reshape(batch, self.channels, -1).float() * self.weight
+        values = torch.cat([weighted, self.weight.expand(batch, 1, -1)], dim=1)
+        self.sums.index_add_(
+            1, index, values.permute(1, 0, 2).reshape(self.channels + 1, -1)
+        )
+
+    def result(self, crop: tuple[int, int, int, int]) -> np.ndarray:
+        """Return the blended crop as an ``(H, W, C)`` uint8 array."""
+        top, left, height, width = crop
+        sums = self.sums.view(self.channels + 1, self.canvas_height, self.canvas_width)
+        sums = sums[:, top:top + height, left:left + width]
+        blended = sums[:-1] / sums[-1:].clamp_min(1e-6)
+        blended = (blended.clamp_(0, 1) * 255.0).round_().to(torch.uint8)
+        return blended.permute(1, 2, 0).contiguous().cpu().numpy()
 
 
 def _ceil_to_multiple(value: int, multiple: int) -> int:
@@ -767,6 +851,11 @@ class SlbrRunner:
         self.device = torch.device(device)
         self._model = None
         self._lock = threading.Lock()
+        self._tuning_store = SlbrTuningStore(self.model_dir / SLBR_TUNING_FILENAME)
+        self._tuning_lock = threading.Lock()
+        self._tuning_profiles: dict[str, dict] = {}
+        self._batch_caps: dict[str, dict[int, int]] = {}
+        self._channels_last = False
 
     @property
     def checkpoint_path(self) -> Path:
@@ -807,71 +896,240 @@ class SlbrRunner:
             logger.info("SLBR model loaded")
             return self._model
 
-    def _forward(self, batch: torch.Tensor):
+    def resolve_precision(self, precision) -> str:
+        """Return the precision that will actually run on this device."""
+        precision = normalize_slbr_precision(precision)
+        if precision == "fp16" and self.device.type != "cuda":
+            return "fp32"
+        if precision == "bf16":
+            if self.device.type == "cuda" and not torch.cuda.is_bf16_supported():
+                return "fp32"
+            if self.device.type == "cpu" and not _cpu_supports_bf16():
+                return "fp32"
+        return precision
+
+    def _use_channels_last(self, model):
+        """Convert ``model`` to channels_last once; the layout does not change fp32 results."""
+        if not self._channels_last:
+            with self._lock:
+                if not self._channels_last:
+                    model.to(memory_format=torch.channels_last)
+                    self._channels_last = True
+        return model
+
+    def _forward(self, batch: torch.Tensor, precision: str = "fp32"):
         model = self._load_model()
         batch = batch.to(self.device).float()
-        with torch.inference_mode():
+        autocast_dtype = SLBR_PRECISIONS[precision]
+        autocast_context = nullcontext()
+        if autocast_dtype is not None:
+            model = self._use_channels_last(model)
+            batch = batch.contiguous(memory_format=torch.channels_last)
+            autocast_context = torch.autocast(device_type=self.device.type, dtype=autocast_dtype)
+        with torch.inference_mode(), autocast_context:
             pred_images, pred_masks, _ = model(batch)
             pred_image = pred_images[0] if isinstance(pred_images, list) else pred_images
             pred_mask = pred_masks[0]
             final = pred_image * pred_mask + batch * (1 - pred_mask)
-        return final.clamp(0, 1), pred_mask.clamp(0, 1)
+        return final.float().clamp(0, 1), pred_mask.float().clamp(0, 1)
+
+    def _profile_key(self, precision: str) -> str:
+        device_key = device_profile_key(self.device)
+        return device_key if precision == "fp32" else f"{device_key}:{precision}"
+
+    def tuning_profile(self, calibrate: bool = True, precision: str = "fp32") -> Optional[dict]:
+        """Return this device's tile profile, probing CUDA devices once when missing.
+
+        The probe result is stored in ``slbr_tuning.json`` next to the models,
+        one profile per resolved precision since fp16/bf16 tiles need less memory.
+        CPU devices fall back to the static recommendation instead of probing.
+        """
+        profile = self._tuning_profiles.get(precision)
+        if profile is not None or not calibrate:
+            return profile or self._tuning_store.load(self._profile_key(precision))
+        with self._tuning_lock:
+            profile = self._tuning_profiles.get(precision)
+            if profile is not None:
+                return profile
+            profile_key = self._profile_key(precision)
+            profile = self._tuning_store.load(profile_key)
+            if profile is None and self.device.type == "cuda":
+                logger.info(f"Calibrating SLBR tile size on {profile_key}")
+                profile = calibrate_slbr_tiles(
+                    lambda batch: self._forward(batch, precision),
+                    self.device,
+                    get_overlap_for_tile_size,
+                    max_batch=MAX_TILE_BATCH,
+                )
+                self._tuning_store.save(profile_key, profile)
+                logger.info(
+                    f"SLBR calibration picked tile_size={profile['tile_size']}, "
+                    f"tile_batch={profile['tile_batch']}"
+                )
+            elif profile is None:
+                recommended = recommend_slbr_params()
+                profile = {
+                    "version": SLBR_TUNING_VERSION,
+                    "tile_size": recommended["tile_size"],
+                    "tile_batch": recommended["tile_batch"],
+                    "tile_sizes": {},
+                    "calibrated_at": None,
+                }
+            caps = self._batch_caps.setdefault(precision, {})
+            for size, cap in (profile.get("oom_batch_caps") or {}).items():
+                caps[int(size)] = int(cap)
+            self._tuning_profiles[precision] = profile
+            return profile
+
+    def resolve_tile_params(
+        self, tile_size, tile_batch, precision: str = "fp32"
+    ) -> tuple[int, int]:
+        """Turn request options into a concrete tile size and a batch that fits.
+
+        ``precision`` is the resolved precision; OOM caps are kept per precision.
+        """
+        if normalize_tile_size_option(tile_size) == AUTO_TILE_SIZE:
+            profile = self.tuning_profile(precision=precision)
+            tile_size, tile_batch = profile["tile_size"], profile["tile_batch"]
+        tile_size = clamp_tile_size(tile_size)
+        tile_batch = clamp_tile_batch(tile_batch)
+        cap = self._batch_caps.get(precision, {}).get(tile_size)
+        return tile_size, min(tile_batch, cap) if cap else tile_batch
+
+    def _record_batch_cap(self, tile_size: int, tile_batch: int, precision: str = "fp32"):
+        self._batch_caps.setdefault(precision, {})[tile_size] = tile_batch
+        profile = self._tuning_profiles.get(precision)
+        if profile is not None and profile.get("calibrated_at") is not None:
+            profile.setdefault("oom_batch_caps", {})[str(tile_size)] = tile_batch
+            self._tuning_store.save(self._profile_key(precision), profile)
+
+    def _forward_tiles(self, batch: torch.Tensor, tile_size: int, precision: str = "fp32"):
+        """Forward a tile batch, halving it on CUDA OOM instead of failing."""
+        chunk = len(batch)
+        outputs = []
+        start = 0
+        while start < len(batch):
+            try:
+                outputs.append(self._forward(batch[start:start + chunk], precision))
+            except Exception as error:
+                if chunk <= 1 or not is_out_of_memory_error(error):
+                    raise
+                chunk = max(1, chunk // 2)
+                logger.warning(
+                    f"SLBR tile batch out of memory, retry with tile_batch={chunk} "
+                    f"for tile_size={tile_size}"
+                )
+                self._record_batch_cap(tile_size, chunk, precision)
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+                continue
+            start += chunk
+        if len(outputs) == 1:
+            return outputs[0]
+        return (
+            torch.cat([clean for clean, _ in outputs], dim=0),
+            torch.cat([mask for _, mask in outputs], dim=0),
+        )
 
-    def infer_bgr(
+    def _tile_job(
         self,
         image_bgr: np.ndarray,
-        tile_size: int = DEFAULT_TILE_SIZE,
-        tile_batch: int = DEFAULT_TILE_BATCH,
-        pad_multiple: int = 16,
-    ):
-        tile_size = clamp_tile_size(tile_size)
-        tile_batch = clamp_tile_batch(tile_batch)
+        tile_size: int,
+        pad_multiple: int,
+        tile_positions: Iterable[tuple[int, int]] | None = None,
+        with_mask: bool = False,
+    ) -> dict:
+        """Pad one image onto the canonical grid and allocate its accumulator."""
         overlap = get_overlap_for_tile_size(tile_size)
         stride = tile_size - overlap
-
         canvas_bgr, crop = _pad_center_black(image_bgr, tile_size, overlap, pad_multiple)
-        canvas = _image_to_tensor(canvas_bgr)
+        canvas = _image_to_tensor(canvas_bgr, self.device)
         _, canvas_height, canvas_width = canvas.shape
+        if tile_positions is None:
+            positions = [
+                (y, x)
+                for y in _tile_positions(canvas_height, tile_size, stride)
+                for x in _tile_positions(canvas_width, tile_size, stride)
+            ]
+        else:
+            positions = list(tile_positions)
+            for y, x in positions:
+                if y < 0 or x < 0 or y + tile_size > canvas_height or x + tile_size > canvas_width:
+                    raise ValueError("SLBR local tile plan contains an invalid tile position")
+        return {
+            "canvas": canvas,
+            "crop": crop,
+            "tile_size": tile_size,
+            "positions": positions,
+            "with_mask": with_mask,
+            "accumulator": _TileAccumulator(
+                canvas_height,
+                canvas_width,
+                tile_size,
+                _blend_weight(tile_size, overlap),
+                channels=4 if with_mask else 3,
+                device=canvas.device,
+            ),
+        }
 
-        ys = _tile_positions(canvas_height, tile_size, stride)
-        xs = _tile_positions(canvas_width, tile_size, stride)
-        weight = _blend_weight(tile_size, overlap)
-
-        clean_sum = torch.zeros(3, canvas_height, canvas_width, dtype=torch.float32)
-        mask_sum = torch.zeros(1, canvas_height, canvas_width, dtype=torch.float32)
-        weight_sum = torch.zeros(1, canvas_height, canvas_width, dtype=torch.float32)
+    def _run_tile_jobs(self, jobs: list[dict], tile_batch: int, precision: str = "fp32"):
+        """Fill ``tile_batch`` forwards with tiles from every queued image.
 
-        pending_tiles = []
-        pending_coords = []
+        Tiles keep their image's canonical grid position; each forward's output
+        is split back into consecutive per-image runs and scattered into that
+        image's accumulator.
+        """
+        pending: list[tuple[dict, int, int]] = []
 
         def flush():
-            if not pending_tiles:
+            if not pending:
                 return
-            batch = torch.stack(pending_tiles, dim=0)
-            clean_batch, mask_batch = self._forward(batch)
-            for clean_tile, mask_tile, (y, x) in zip(
-                clean_batch.cpu(), mask_batch.cpu(), pending_coords
-            ):
-                clean_sum[:, y:y + tile_size, x:x + tile_size] += clean_tile * weight
-                mask_sum[:, y:y + tile_size, x:x + tile_size] += mask_tile * weight
-                weight_sum[:, y:y + tile_size, x:x + tile_size] += weight
-            pending_tiles.clear()
-            pending_coords.clear()
-
-        for y in ys:
-            for x in xs:
-                pending_tiles.append(canvas[:, y:y + tile_size, x:x + tile_size])
-                pending_coords.append((y, x))
-                if len(pending_tiles) >= tile_batch:
-                    flush()
-        flush()
+            tile_size = pending[0][0]["tile_size"]
+            batch = torch.stack(
+                [job["canvas"][:, y:y + tile_size, x:x + tile_size] for job, y, x in pending],
+                dim=0,
+            )
+            clean_batch, mask_batch = self._forward_tiles(batch, tile_size, precision)
+            start = 0
+            while start < len(pending):
+                job = pending[start][0]
+                end = start
+                while end < len(pending) and pending[end][0] is job:
+                    end += 1
+                tiles = clean_batch[start:end]
+                if job["with_mask"]:
+                    tiles = torch.cat([tiles, mask_batch[start:end]], dim=1)
+                job["accumulator"].add(tiles, [(y, x) for _, y, x in pending[start:end]])
+                start = end
+            pending.clear()
+
+        for tile_size in dict.fromkeys(job["tile_size"] for job in jobs):
+            for job in jobs:
+                if job["tile_size"] != tile_size:
+                    continue
+                for y, x in job["positions"]:
+                    pending.append((job, y, x))
+                    if len(pending) >= tile_batch:
+                        flush()
+            flush()
 
-        clean = clean_sum / weight_sum.clamp_min(1e-6)
-        mask = mask_sum / weight_sum.clamp_min(1e-6)
-        top, left, height, width = crop
-        clean = clean[:, top:top + height, left:left + width]
-        mask = mask[:, top:top + height, left:left + width]
-        return _tensor_to_bgr(clean), _mask_to_bgr(mask)
+    def infer_bgr(
+        self,
+        image_bgr: np.ndarray,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        tile_batch: int = DEFAULT_TILE_BATCH,
+        pad_multiple: int = 16,
+        precision: str = "fp32",
+    ):
+        precision = self.resolve_precision(precision)
+        tile_size, tile_batch = self.resolve_tile_params(tile_size, tile_batch, precision)
+        job = self._tile_job(image_bgr, tile_size, pad_multiple, with_mask=True)
+        self._run_tile_jobs([job], tile_batch, precision)
+
+        result = job["accumulator"].result(job["crop"])
+        clean_bgr = cv2.cvtColor(np.ascontiguousarray(result[:, :, :3]), cv2.COLOR_RGB2BGR)
+        mask_bgr = cv2.cvtColor(np.ascontiguousarray(result[:, :, 3]), cv2.COLOR_GRAY2BGR)
+        return clean_bgr, mask_bgr
 
     def infer_bgr_selected_tiles(
         self,
@@ -880,50 +1138,87 @@ class SlbrRunner:
         tile_size: int = DEFAULT_TILE_SIZE,
         tile_batch: int = DEFAULT_TILE_BATCH,
         pad_multiple: int = 16,
+        precision: str = "fp32",
     ) -> np.ndarray:
         """Infer a subset of the canonical full-image tile grid."""
-        tile_size = clamp_tile_size(tile_size)
-        tile_batch = clamp_tile_batch(tile_batch)
-        overlap = get_overlap_for_tile_size(tile_size)
+        precision = self.resolve_precision(precision)
+        tile_size, tile_batch = self.resolve_tile_params(tile_size, tile_batch, precision)
         selected_positions = list(tile_positions)
         if not selected_positions:
             raise ValueError("SLBR local inference requires at least one tile")
 
-        canvas_bgr, crop = _pad_center_black(image_bgr, tile_size, overlap, pad_multiple)
-        canvas = _image_to_tensor(canvas_bgr)
-        _, canvas_height, canvas_width = canvas.shape
-        for y, x in selected_positions:
-            if y < 0 or x < 0 or y + tile_size > canvas_height or x + tile_size > canvas_width:
-                raise ValueError("SLBR local tile plan contains an invalid tile position")
+        job = self._tile_job(image_bgr, tile_size, pad_multiple, tile_positions=selected_positions)
+        self._run_tile_jobs([job], tile_batch, precision)
+        return cv2.cvtColor(job["accumulator"].result(job["crop"]), cv2.COLOR_RGB2BGR)
 
-        weight = _blend_weight(tile_size, overlap)
-        clean_sum = torch.zeros(3, canvas_height, canvas_width, dtype=torch.float32)
-        weight_sum = torch.zeros(1, canvas_height, canvas_width, dtype=torch.float32)
-        pending_tiles = []
-        pending_coords = []
+    def infer_bgr_many(
+        self,
+        items: Iterable[tuple[np.ndarray, Optional[np.ndarray]]],
+        tile_size: int = DEFAULT_TILE_SIZE,
+        tile_batch: int = DEFAULT_TILE_BATCH,
+        strategy: str = "auto",
+        bbox_empty_ratio_threshold: int = DEFAULT_LOCAL_BBOX_EMPTY_RATIO_THRESHOLD,
+        edge_feather_px: int = DEFAULT_LOCAL_EDGE_FEATHER_PX,
+        pad_multiple: int = 16,
+        precision: str = "fp32",
+    ) -> list[tuple[np.ndarray, Optional[dict]]]:
+        """Infer several images with their tiles sharing ``tile_batch`` forwards.
+
+        Each item is ``(image_bgr, mask)``. Items without a mask run on the full
+        grid like ``infer_bgr``; items with a mask follow ``infer_bgr_local`` and
+        return its diagnostics, otherwise the diagnostics are ``None``.
+        """
+        precision = self.resolve_precision(precision)
+        tile_size, tile_batch = self.resolve_tile_params(tile_size, tile_batch, precision)
+        entries = []
+        for image_bgr, mask in items:
+            if mask is None:
+                job = self._tile_job(image_bgr, tile_size, pad_multiple)
+                entries.append((image_bgr, None, None, job))
+                continue
+            effective_mask = _effective_local_mask(mask, image_bgr.shape)
+            plan = plan_local_tile_inference(
+                image_bgr.shape,
+                effective_mask,
+                tile_size=tile_size,
+                strategy=strategy,
+                bbox_empty_ratio_threshold=bbox_empty_ratio_threshold,
+                pad_multiple=pad_multiple,
+            )
+            job = self._tile_job(
+                image_bgr,
+                plan["tile_size"],
+                pad_multiple,
+                tile_positions=(
+                    plan["tile_positions"]
+                    if plan["inference_strategy"] == "smart_tiles"
+                    else None
+                ),
+            )
+            entries.append((image_bgr, effective_mask, plan, job))
 
-        def flush():
-            if not pending_tiles:
-                return
-            batch = torch.stack(pending_tiles, dim=0)
-            clean_batch, _ = self._forward(batch)
-            for clean_tile, (y, x) in zip(clean_batch.cpu(), pending_coords):
-                clean_sum[:, y:y + tile_size, x:x + tile_size] += clean_tile * weight
-                weight_sum[:, y:y + tile_size, x:x + tile_size] += weight
-            pending_tiles.clear()
-            pending_coords.clear()
-
-        for y, x in selected_positions:
-            pending_tiles.append(canvas[:, y:y + tile_size, x:x + tile_size])
-            pending_coords.append((y, x))
-            if len(pending_tiles) >= tile_batch:
-                flush()
-        flush()
+        self._run_tile_jobs([job for *_, job in entries], tile_batch, precision)
 
-        clean = clean_sum / weight_sum.clamp_min(1e-6)
-        top, left, height, width = crop
-        clean = clean[:, top:top + height, left:left + width]
-        return _tensor_to_bgr(clean)
+        results = []
+        for image_bgr, effective_mask, plan, job in entries:
+            clean_bgr = cv2.cvtColor(job["accumulator"].result(job["crop"]), cv2.COLOR_RGB2BGR)
+            job["accumulator"] = None
+            if plan is None:
+                results.append((clean_bgr, None))
+                continue
+            result_bgr = compose_local_result(
+                image_bgr,
+                clean_bgr,
+                effective_mask,
+                edge_feather_px=edge_feather_px,
+            )
+            diagnostics = {
+                key: value for key, value in plan.items() if key != "tile_positions"
+            }
+            diagnostics["edge_feather_px"] = clamp_local_edge_feather_px(edge_feather_px)
+            diagnostics["precision"] = precision
+            results.append((result_bgr, diagnostics))
+        return results
 
     def infer_bgr_local(
         self,
@@ -935,43 +1230,83 @@ class SlbrRunner:
         bbox_empty_ratio_threshold: int = DEFAULT_LOCAL_BBOX_EMPTY_RATIO_THRESHOLD,
         edge_feather_px: int = DEFAULT_LOCAL_EDGE_FEATHER_PX,
         pad_multiple: int = 16,
+        precision: str = "fp32",
     ) -> tuple[np.ndarray, dict]:
-        effective_mask = _effective_local_mask(mask, image_bgr.shape)
-        plan = plan_local_tile_inference(
-            image_bgr.shape,
-            effective_mask,
+        return self.infer_bgr_many(
+            [(image_bgr, mask)],
             tile_size=tile_size,
+            tile_batch=tile_batch,
             strategy=strategy,
             bbox_empty_ratio_threshold=bbox_empty_ratio_threshold,
+            edge_feather_px=edge_feather_px,
             pad_multiple=pad_multiple,
-        )
-        if plan["inference_strategy"] == "smart_tiles":
-            clean_bgr = self.infer_bgr_selected_tiles(
-                image_bgr,
-                plan["tile_positions"],
-                tile_size=plan["tile_size"],
-                tile_batch=tile_batch,
-                pad_multiple=pad_multiple,
-            )
-        else:
-            clean_bgr, _ = self.infer_bgr(
-                image_bgr,
-                tile_size=plan["tile_size"],
-                tile_batch=tile_batch,
-                pad_multiple=pad_multiple,
+            precision=precision,
+        )[0]
+
+    def infer_bgr_window(self, items: list, **kwargs) -> list:
+        """Run ``infer_bgr_many`` but keep failures per item.
+
+        When the shared forward raises, every item is retried on its own so a
+        single bad image only fails itself; failed entries hold the exception.
+        Each window takes the device on its own unless the caller already holds
+        it, so folder runs let interactive requests in between windows.
+        """
+        with gpu_arbiter.acquire(self.device, GPU_PRIORITY_BULK, "slbr"):
+            try:
+                return self.infer_bgr_many(items, **kwargs)
+            except Exception as error:
+                if len(items) <= 1:
+                    return [error]
+                logger.warning(f"SLBR image batch failed, retrying items one by one: {error}")
+            outcomes = []
+            for item in items:
+                try:
+                    outcomes.append(self.infer_bgr_many([item], **kwargs)[0])
+                except Exception as error:
+                    outcomes.append(error)
+            return outcomes
+
+    def check_precision_parity(
+        self,
+        images: Iterable[np.ndarray],
+        precision: str,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        tile_batch: int = DEFAULT_TILE_BATCH,
+        max_abs_tolerance: int = 8,
+        min_psnr: float = 40.0,
+    ) -> dict:
+        """Compare ``precision`` with fp32 on reference images.
+
+        Passes when every image stays within ``max_abs_tolerance`` levels per
+        pixel and above ``min_psnr`` dB.
+        """
+        effective = self.resolve_precision(precision)
+        per_image = []
+        for image_bgr in images:
+            reference, _ = self.infer_bgr(image_bgr, tile_size, tile_batch, precision="fp32")
+            candidate, _ = self.infer_bgr(image_bgr, tile_size, tile_batch, precision=effective)
+            diff = np.abs(reference.astype(np.int16) - candidate.astype(np.int16))
+            mse = float(np.mean(diff.astype(np.float64) ** 2))
+            per_image.append(
+                {
+                    "max_abs_diff": int(diff.max()),
+                    "mean_abs_diff": float(diff.mean()),
+                    "psnr": float("inf") if mse == 0 else 10.0 * math.log10(255.0 ** 2 / mse),
+                }
             )
-
-        result_bgr = compose_local_result(
-            image_bgr,
-            clean_bgr,
-            effective_mask,
-            edge_feather_px=edge_feather_px,
-        )
-        diagnostics = {
-            key: value for key, value in plan.items() if key != "tile_positions"
+        if not per_image:
+            raise ValueError("SLBR precision parity check requires at least one image")
+        max_abs_diff = max(item["max_abs_diff"] for item in per_image)
+        min_image_psnr = min(item["psnr"] for item in per_image)
+        return {
+            "requested_precision": normalize_slbr_precision(precision),
+            "precision": effective,
+            "max_abs_diff": max_abs_diff,
+            "mean_abs_diff": float(np.mean([item["mean_abs_diff"] for item in per_image])),
+            "min_psnr": min_image_psnr,
+            "passed": max_abs_diff <= max_abs_tolerance and min_image_psnr >= min_psnr,
+            "images": per_image,
         }
-        diagnostics["edge_feather_px"] = clamp_local_edge_feather_px(edge_feather_px)
-        return result_bgr, diagnostics
 
     def infer_base64(
         self,
@@ -1005,6 +1340,9 @@ class SlbrRunner:
         local_inference_strategy: str,
         local_bbox_empty_ratio_threshold: int,
         local_edge_feather_px: int,
+        manifest: FolderManifest,
+        image_batch: int = DEFAULT_IMAGE_BATCH,
+        precision: str = "fp32",
     ) -> list[dict]:
         image_folder = Path(image_folder).resolve()
         output_folder = Path(output_folder).resolve()
@@ -1017,6 +1355,114 @@ class SlbrRunner:
             missing_mask_behavior=missing_mask_behavior,
             include_mask=True,
         )
+        infer_kwargs = {
+            "tile_size": tile_size,
+            "tile_batch": tile_batch,
+            "strategy": local_inference_strategy,
+            "bbox_empty_ratio_threshold": local_bbox_empty_ratio_threshold,
+            "edge_feather_px": local_edge_feather_px,
+            "precision": precision,
+        }
+        window: list[dict] = []
+
+        def failed_result(plan: dict, error: Exception) -> dict:
+            logger.opt(exception=error).error(
+                f"SLBR local folder item failed: {plan['image_path']}"
+            )
+            return {
+                "id": str(plan["index"]),
+                "index": plan["index"],
+                "image_path": plan["image_path"],
+                "relative_path": plan.get("relative_path"),
+                "success": False,
+                "error": str(error),
+            }
+
+        def finish(entry: dict, outcome) -> dict:
+            plan = entry["plan"]
+            if isinstance(outcome, Exception):
+                return failed_result(plan, outcome)
+            clean_bgr, local_diagnostics = outcome
+            try:
+                if local_diagnostics is None:
+                    output_spec = resolve_image_output_spec(
+                        requested_format=output_format,
+                        source_format=entry["source_format"],
+                        has_alpha=entry["alpha_channel"] is not None,
+                        quality=output_quality,
+                    )
+                    effective_scope = "full"
+                    fallback_reason = f"{plan['missing_reason']}_full_image"
+                else:
+                    output_spec = resolve_image_output_spec(
+                        requested_format="png",
+                        source_format=entry["source_format"],
+                        has_alpha=entry["alpha_channel"] is not None,
+                        quality=output_quality,
+                    )
+                    effective_scope = "mask"
+                    fallback_reason = local_diagnostics["fallback_reason"] or None
+
+                clean_path = output_path_for(
+                    image_folder,
+                    Path(plan["image_path"]),
+                    output_folder,
+                    output_spec["extension"],
+                    output_stem=plan["output_stem"],
+                )
+                write_output_image(
+                    clean_path, clean_bgr, entry["alpha_channel"], output_spec, entry["infos"]
+                )
+            except Exception as error:
+                return failed_result(plan, error)
+            result = {
+                key: value
+                for key, value in plan.items()
+                if key not in {"effective_mask", "output_collision", "output_stem"}
+            }
+            result.update({
+                "output_path": str(clean_path),
+                "success": True,
+                "format": output_spec["format"],
+                "mime_type": output_spec["mime_type"],
+                "extension": output_spec["extension"],
+                "apply_scope": effective_scope,
+                "inference_strategy": (
+                    local_diagnostics["inference_strategy"]
+                    if local_diagnostics
+                    else "full"
+                ),
+                "fallback_reason": fallback_reason,
+                "precision": precision,
+            })
+            if local_diagnostics:
+                result.update(
+                    {
+                        "bboxEmptyRatio": local_diagnostics["bbox_empty_ratio"],
+                        "effectiveMaskCoverage": local_diagnostics[
+                            "effective_mask_coverage"
+                        ],
+                        "fullTileCount": local_diagnostics["full_tile_count"],
+                        "localTileCount": local_diagnostics["local_tile_count"],
+                        "tileSavingRatio": local_diagnostics["tile_saving_ratio"],
+                    }
+                )
+            return result
+
+        def flush():
+            if not window:
+                return
+            outcomes = self.infer_bgr_window(
+                [(entry["image_bgr"], entry["mask"]) for entry in window],
+                **infer_kwargs,
+            )
+            for entry, outcome in zip(window, outcomes):
+                plan = entry["plan"]
+                result = finish(entry, outcome)
+                manifest.record(plan["image_path"], plan.get("mask_path"), result)
+                results[entry["slot"]] = result
+            window.clear()
+
         for plan in plans:
             image_path = Path(plan["image_path"])
             index = plan["index"]
@@ -1044,96 +1490,34 @@ class SlbrRunner:
                     }
                 )
                 continue
+            resumed = manifest.completed(image_path, plan.get("mask_path"))
+            if resumed:
+                results.append({**resumed, "id": plan["id"], "index": index})
+                continue
 
             try:
                 image_bgr = read_image_bgr(image_path)
                 alpha_channel, source_format, infos = read_image_alpha(image_path)
-                local_diagnostics = None
-                if plan["apply_scope"] == "full":
-                    clean_bgr, _ = self.infer_bgr(
-                        image_bgr,
-                        tile_size=tile_size,
-                        tile_batch=tile_batch,
-                    )
-                    output_spec = resolve_image_output_spec(
-                        requested_format=output_format,
-                        source_format=source_format,
-                        has_alpha=alpha_channel is not None,
-                        quality=output_quality,
-                    )
-                    effective_scope = "full"
-                    fallback_reason = f"{plan['missing_reason']}_full_image"
-                else:
-                    clean_bgr, local_diagnostics = self.infer_bgr_local(
-                        image_bgr,
-                        plan["effective_mask"],
-                        tile_size=tile_size,
-                        tile_batch=tile_batch,
-                        strategy=local_inference_strategy,
-                        bbox_empty_ratio_threshold=local_bbox_empty_ratio_threshold,
-                        edge_feather_px=local_edge_feather_px,
-                    )
-                    output_spec = resolve_image_output_spec(
-                        requested_format="png",
-                        source_format=source_format,
-                        has_alpha=alpha_channel is not None,
-                        quality=output_quality,
-                    )
-                    effective_scope = "mask"
-                    fallback_reason = local_diagnostics["fallback_reason"] or None
-
-                clean_path = output_path_for(
-                    image_folder,
-                    image_path,
-                    output_folder,
-                    output_spec["extension"],
-                    output_stem=plan["output_stem"],
-                )
-                write_output_image(clean_path, clean_bgr, alpha_channel, output_spec, infos)
-                result = {
-                    key: value
-                    for key, value in plan.items()
-                    if key not in {"effective_mask", "output_collision", "output_stem"}
-                }
-                result.update({
-                    "output_path": str(clean_path),
-                    "success": True,
-                    "format": output_spec["format"],
-                    "mime_type": output_spec["mime_type"],
-                    "extension": output_spec["extension"],
-                    "apply_scope": effective_scope,
-                    "inference_strategy": (
-                        local_diagnostics["inference_strategy"]
-                        if local_diagnostics
-                        else "full"
-                    ),
-                    "fallback_reason": fallback_reason,
-                })
-                if local_diagnostics:
-                    result.update(
-                        {
-                            "bboxEmptyRatio": local_diagnostics["bbox_empty_ratio"],
-                            "effectiveMaskCoverage": local_diagnostics[
-                                "effective_mask_coverage"
-                            ],
-                            "fullTileCount": local_diagnostics["full_tile_count"],
-                            "localTileCount": local_diagnostics["local_tile_count"],
-                            "tileSavingRatio": local_diagnostics["tile_saving_ratio"],
-                        }
-                    )
-                results.append(result)
             except Exception as error:
-                logger.exception(f"SLBR local folder item failed: {image_path}")
-                results.append(
-                    {
-                        "id": str(index),
-                        "index": index,
-                        "image_path": str(image_path),
-                        "relative_path": plan.get("relative_path"),
-                        "success": False,
-                        "error": str(error),
-                    }
-                )
+                result = failed_result(plan, error)
+                manifest.record(image_path, plan.get("mask_path"), result)
+                results.append(result)
+                continue
+            window.append(
+                {
+                    "slot": len(results),
+                    "plan": plan,
+                    "image_bgr": image_bgr,
+                    "mask": plan["effective_mask"] if plan["apply_scope"] == "mask" else None,
+                    "alpha_channel": alpha_channel,
+                    "source_format": source_format,
+                    "infos": infos,
+                }
+            )
+            results.append(None)
+            if len(window) >= image_batch:
+                flush()
+        flush()
         return results
 
     def process_folder(
@@ -1151,10 +1535,35 @@ class SlbrRunner:
         local_inference_strategy: str = "auto",
         local_bbox_empty_ratio_threshold: int = DEFAULT_LOCAL_BBOX_EMPTY_RATIO_THRESHOLD,
         local_edge_feather_px: int = DEFAULT_LOCAL_EDGE_FEATHER_PX,
+        force: bool = False,
+        image_batch: int = DEFAULT_IMAGE_BATCH,
+        precision: str = "fp32",
     ) -> list[dict]:
         image_folder = Path(image_folder).resolve()
         output_folder = Path(output_folder).resolve()
-        if str(apply_scope or "full").strip().lower() == "mask":
+        normalized_scope = str(apply_scope or "full").strip().lower()
+        image_batch = clamp_image_batch(image_batch)
+        precision = self.resolve_precision(precision)
+        manifest = FolderManifest(
+            output_folder,
+            options_signature(
+                f"slbr:{self.checkpoint_path.name}",
+                {
+                    "tile_size": tile_size,
+                    "tile_batch": tile_batch,
+                    "output_format": output_format,
+                    "output_quality": output_quality,
+                    "apply_scope": normalized_scope,
+                    "missing_mask_behavior": missing_mask_behavior,
+                    "local_inference_strategy": local_inference_strategy,
+                    "local_bbox_empty_ratio_threshold": local_bbox_empty_ratio_threshold,
+                    "local_edge_feather_px": local_edge_feather_px,
+                    "precision": precision,
+                },
+            ),
+            force=force,
+        )
+        if normalized_scope == "mask":
             return self._process_folder_local(
                 image_folder,
                 output_folder,
@@ -1168,6 +1577,9 @@ class SlbrRunner:
                 local_inference_strategy=local_inference_strategy,
                 local_bbox_empty_ratio_threshold=local_bbox_empty_ratio_threshold,
                 local_edge_feather_px=local_edge_feather_px,
+                manifest=manifest,
+                image_batch=image_batch,
+                precision=precision,
             )
         images = gather_images(image_folder, output_folder)
         normalized_output_format = str(output_format or "auto").strip().lower()
@@ -1176,19 +1588,29 @@ class SlbrRunner:
             {} if preserve_source_names else build_output_stem_plan(image_folder, images)
         )
         results = []
-        for index, image_path in enumerate(images):
+        window: list[dict] = []
+
+        def failed_result(index: int, image_path: Path, error: Exception) -> dict:
+            logger.opt(exception=error).error(f"SLBR folder item failed: {image_path}")
+            return {
+                "id": str(index),
+                "index": index,
+                "image_path": str(image_path),
+                "success": False,
+                "error": str(error),
+            }
+
+        def finish(entry: dict, outcome) -> dict:
+            index = entry["index"]
+            image_path = entry["image_path"]
+            if isinstance(outcome, Exception):
+                return failed_result(index, image_path, outcome)
+            clean_bgr, _ = outcome
             try:
-                image_bgr = read_image_bgr(image_path)
-                alpha_channel, source_format, infos = read_image_alpha(image_path)
-                clean_bgr, _ = self.infer_bgr(
-                    image_bgr,
-                    tile_size=tile_size,
-                    tile_batch=tile_batch,
-                )
                 output_spec = resolve_image_output_spec(
                     requested_format=output_format,
-                    source_format=source_format,
-                    has_alpha=alpha_channel is not None,
+                    source_format=entry["source_format"],
+                    has_alpha=entry["alpha_channel"] is not None,
                     quality=output_quality,
                 )
                 clean_path = output_path_for(
@@ -1198,30 +1620,66 @@ class SlbrRunner:
                     output_spec["extension"],
                     output_stem=output_stems.get(image_path.resolve()),
                 )
-                write_output_image(clean_path, clean_bgr, alpha_channel, output_spec, infos)
-                results.append(
-                    {
-                        "id": str(index),
-                        "index": index,
-                        "image_path": str(image_path),
-                        "output_path": str(clean_path),
-                        "success": True,
-                        "format": output_spec["format"],
-                        "mime_type": output_spec["mime_type"],
-                        "extension": output_spec["extension"],
-                    }
+                write_output_image(
+                    clean_path, clean_bgr, entry["alpha_channel"], output_spec, entry["infos"]
                 )
             except Exception as error:
-                logger.exception(f"SLBR folder item failed: {image_path}")
-                results.append(
-                    {
-                        "id": str(index),
-                        "index": index,
-                        "image_path": str(image_path),
-                        "success": False,
-                        "error": str(error),
-                    }
-                )
+                return failed_result(index, image_path, error)
+            return {
+                "id": str(index),
+                "index": index,
+                "image_path": str(image_path),
+                "output_path": str(clean_path),
+                "success": True,
+                "format": output_spec["format"],
+                "mime_type": output_spec["mime_type"],
+                "extension": output_spec["extension"],
+                "precision": precision,
+            }
+
+        def flush():
+            if not window:
+                return
+            outcomes = self.infer_bgr_window(
+                [(entry["image_bgr"], None) for entry in window],
+                tile_size=tile_size,
+                tile_batch=tile_batch,
+                precision=precision,
+            )
+            for entry, outcome in zip(window, outcomes):
+                result = finish(entry, outcome)
+                manifest.record(entry["image_path"], None, result)
+                results[entry["slot"]] = result
+            window.clear()
+
+        for index, image_path in enumerate(images):
+            resumed = manifest.completed(image_path)
+            if resumed:
+                results.append({**resumed, "id": str(index), "index": index})
+                continue
+            try:
+                image_bgr = read_image_bgr(image_path)
+                alpha_channel, source_format, infos = read_image_alpha(image_path)
+            except Exception as error:
+                result = failed_result(index, image_path, error)
+                manifest.record(image_path, None, result)
+                results.append(result)
+                continue
+            window.append(
+                {
+                    "slot": len(results),
+                    "index": index,
+                    "image_path": image_path,
+                    "image_bgr": image_bgr,
+                    "alpha_channel": alpha_channel,
+                    "source_format": source_format,
+                    "infos": infos,
+                }
+            )
+            results.append(None)
+            if len(window) >= image_batch:
+                flush()
+        flush()
         return results
 
 
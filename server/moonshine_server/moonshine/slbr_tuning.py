@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import torch
+from loguru import logger
+
+AUTO_TILE_SIZE = "auto"
+SLBR_TUNING_FILENAME = "slbr_tuning.json"
+SLBR_TUNING_VERSION = 1
+CALIBRATION_TILE_SIZES = (256, 384, 512)
+CALIBRATION_MEMORY_RATIO = 0.85
+CALIBRATION_REPEATS = 2
+# A bigger batch has to beat the previous one by this much to be worth its memory.
+CALIBRATION_MIN_GAIN = 1.05
+
+
+def is_out_of_memory_error(error: BaseException) -> bool:
+    return "out of memory" in str(error).lower()
+
+
+def device_profile_key(device: torch.device) -> str:
+    """Identify a device by what it is, not by its ordinal."""
+    device = torch.device(device)
+    if device.type != "cuda" or not torch.cuda.is_available():
+        return device.type
+    properties = torch.cuda.get_device_properties(device)
+    return f"cuda:{properties.name}:{int(properties.total_memory) // (1024 * 1024)}mb"
+
+
+def _synchronize(device: torch.device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def _probe(
+    forward: Callable[[torch.Tensor], object],
+    device: torch.device,
+    tile_size: int,
+    tile_batch: int,
+    repeats: int,
+) -> dict:
+    batch = torch.rand(tile_batch, 3, tile_size, tile_size, device=device)
+    if device.type == "cuda":
+        torch.cuda.reset_peak_memory_stats(device)
+    forward(batch)
+    _synchronize(device)
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        forward(batch)
+    _synchronize(device)
+    elapsed = max(time.perf_counter() - started_at, 1e-6)
+    peak_memory_mb = None
+    if device.type == "cuda":
+        peak_memory_mb = round(torch.cuda.max_memory_allocated(device) / (1024 * 1024), 1)
+    return {
+        "tile_batch": tile_batch,
+        "tiles_per_second": round(tile_batch * repeats / elapsed, 3),
+        "peak_memory_mb": peak_memory_mb,
+    }
+
+
+def calibrate_slbr_tiles(
+    forward: Callable[[torch.Tensor], object],
+    device: torch.device,
+    overlap_for: Callable[[int], int],
+    tile_sizes: Iterable[int] = CALIBRATION_TILE_SIZES,
+    max_batch: int = 32,
+    memory_ratio: float = CALIBRATION_MEMORY_RATIO,
+    repeats: int = CALIBRATION_REPEATS,
+) -> dict:
+    """Measure tiles/sec and peak memory per tile size with doubling batches.
+
+    Each size stops growing at the first OOM, at ``memory_ratio`` of device
+    memory or once throughput stops improving. The chosen size maximizes
+    useful pixels per second, i.e. tiles/sec times the non-overlapping area.
+    """
+    device = torch.device(device)
+    total_memory_mb = None
+    if device.type == "cuda":
+        total_memory_mb = torch.cuda.get_device_properties(device).total_memory / (1024 * 1024)
+
+    measured = {}
+    for tile_size in tile_sizes:
+        best = None
+        tile_batch = 1
+        while tile_batch <= max_batch:
+            try:
+                sample = _probe(forward, device, tile_size, tile_batch, repeats)
+            except Exception as error:
+                if not is_out_of_memory_error(error):
+                    raise
+                if device.type == "cuda":
+                    torch.cuda.empty_cache()
+                break
+            if (
+                total_memory_mb
+                and sample["peak_memory_mb"] is not None
+                and sample["peak_memory_mb"] > total_memory_mb * memory_ratio
+            ):
+                break
+            if best is not None and sample["tiles_per_second"] < best["tiles_per_second"] * CALIBRATION_MIN_GAIN:
+                break
+            best = sample
+            tile_batch *= 2
+        if best is not None:
+            stride = tile_size - overlap_for(tile_size)
+            best["pixels_per_second"] = round(best["tiles_per_second"] * stride * stride, 1)
+            measured[str(tile_size)] = best
+
+    if not measured:
+        raise RuntimeError("SLBR calibration could not run any tile size on this device")
+    chosen_size = max(measured, key=lambda size: measured[size]["pixels_per_second"])
+    return {
+        "version": SLBR_TUNING_VERSION,
+        "tile_size": int(chosen_size),
+        "tile_batch": measured[chosen_size]["tile_batch"],
+        "tile_sizes": measured,
+        "calibrated_at": time.time(),
+    }
+
+
+class SlbrTuningStore:
+    """Calibration profiles persisted next to the models, one per device."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        if not self.path.is_file():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as error:
+            logger.warning(f"Ignore unreadable SLBR tuning profile {self.path}: {error}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def load(self, device_key: str) -> Optional[dict]:
+        with self._lock:
+            profile = self._read().get(device_key)
+        if not isinstance(profile, dict) or profile.get("version") != SLBR_TUNING_VERSION:
+            return None
+        return profile
+
+    def save(self, device_key: str, profile: dict):
+        with self._lock:
+            data = self._read()
+            data[device_key] = profile
+            temp_path = self.path.with_name(f"{self.path.name}.tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+                os.replace(temp_path, self.path)
+            except OSError as error:
+                logger.warning(f"Failed to save SLBR tuning profile {self.path}: {error}")
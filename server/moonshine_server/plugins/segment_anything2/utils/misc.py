@@ -193,6 +193,10 @@ def load_video_frames(
     Load the video frames from video_path. The frames are resized to image_size as in
     the model and are loaded to GPU if offload_video_to_cpu=False. This is used by the demo.
     """
+    if hasattr(video_path, "__getitem__") and hasattr(video_path, "video_height"):
+        # An already decoded frame source (e.g. Moonshine's streaming video
+        # loader) that yields normalized image_size x image_size tensors.
+        return video_path, video_path.video_height, video_path.video_width
     is_bytes = isinstance(video_path, bytes)
     is_str = isinstance(video_path, str)
     is_mp4_path = is_str and os.path.splitext(video_path)[-1] in [".mp4", ".MP4"]
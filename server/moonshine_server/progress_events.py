@@ -0,0 +1,147 @@
+import asyncio
+import inspect
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from loguru import logger
+
+PROGRESS_EMIT_INTERVAL_S = 0.2
+PROGRESS_SNAPSHOT_LIMIT = 256
+
+
+def sam_video_room(task_id: str) -> str:
+    return f"sam_video:{task_id}"
+
+
+def video_batch_room(batch_id: str) -> str:
+    return f"video_batch:{batch_id}"
+
+
+class ProgressPublisher:
+    """Throttled Socket.IO progress push to per-job rooms.
+
+    Worker threads call ``publish`` as often as they like. Updates for a room
+    are coalesced on the event loop so at most one event per
+    ``PROGRESS_EMIT_INTERVAL_S`` goes out, always carrying the newest payload;
+    ``final`` updates skip the wait. Clients ``subscribe`` to a room and get
+    its latest payload straight away.
+    """
+
+    def __init__(self, interval_s: float = PROGRESS_EMIT_INTERVAL_S):
+        self.interval_s = float(interval_s)
+        self._sio = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Only touched on the event loop thread.
+        self._pending: dict[str, tuple[str, dict]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._last_emit_at: dict[str, float] = {}
+        self._snapshots: "OrderedDict[str, tuple[str, dict]]" = OrderedDict()
+        self.emitted = 0
+        self.coalesced = 0
+
+    def attach(self, sio) -> None:
+        self._sio = sio
+        sio.on("connect", handler=self._on_connect)
+        sio.on("subscribe", handler=self._on_subscribe)
+        sio.on("unsubscribe", handler=self._on_unsubscribe)
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    async def _on_connect(self, sid, environ, auth=None):
+        self.bind_loop(asyncio.get_running_loop())
+
+    async def _on_subscribe(self, sid, data):
+        room = self._room_from(data)
+        if not room:
+            return {"ok": False, "error": "room is required"}
+        self.bind_loop(asyncio.get_running_loop())
+        await self._maybe_await(self._sio.enter_room(sid, room))
+        snapshot = self._snapshots.get(room)
+        if snapshot is not None:
+            event, payload = snapshot
+            await self._sio.emit(event, payload, to=sid)
+        return {"ok": True, "room": room}
+
+    async def _on_unsubscribe(self, sid, data):
+        room = self._room_from(data)
+        if room:
+            await self._maybe_await(self._sio.leave_room(sid, room))
+        return {"ok": True, "room": room}
+
+    @staticmethod
+    def _room_from(data) -> str:
+        if isinstance(data, str):
+            return data.strip()
+        if isinstance(data, dict):
+            if data.get("room"):
+                return str(data["room"]).strip()
+            if data.get("taskId"):
+                return sam_video_room(str(data["taskId"]).strip())
+            if data.get("batchId"):
+                return video_batch_room(str(data["batchId"]).strip())
+        return ""
+
+    @staticmethod
+    async def _maybe_await(result):
+        # enter_room/leave_room became coroutines in newer python-socketio.
+        if inspect.isawaitable(result):
+            await result
+
+    def publish(self, room: str, event: str, payload: dict, *, final: bool = False) -> None:
+        """Queue ``payload`` for ``room``; safe to call from any thread."""
+        loop = self._loop
+        if self._sio is None or loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._schedule, room, event, dict(payload), final)
+        except RuntimeError:
+            # The loop shut down between the check and the call.
+            pass
+
+    def _schedule(self, room: str, event: str, payload: dict, final: bool) -> None:
+        if room in self._pending:
+            self.coalesced += 1
+        self._pending[room] = (event, payload)
+        self._snapshots[room] = (event, payload)
+        self._snapshots.move_to_end(room)
+        while len(self._snapshots) > PROGRESS_SNAPSHOT_LIMIT:
+            stale_room, _ = self._snapshots.popitem(last=False)
+            if stale_room not in self._pending:
+                # Rooms that never sent a final update would otherwise keep this.
+                self._last_emit_at.pop(stale_room, None)
+
+        timer = self._timers.get(room)
+        if final:
+            if timer is not None:
+                timer.cancel()
+            self._flush(room)
+            self._last_emit_at.pop(room, None)
+            return
+        if timer is not None:
+            return
+        delay = self._last_emit_at.get(room, 0.0) + self.interval_s - time.monotonic()
+        if delay <= 0:
+            self._flush(room)
+        else:
+            self._timers[room] = self._loop.call_later(delay, self._flush, room)
+
+    def _flush(self, room: str) -> None:
+        self._timers.pop(room, None)
+        pending = self._pending.pop(room, None)
+        if pending is None:
+            return
+        event, payload = pending
+        self._last_emit_at[room] = time.monotonic()
+        self.emitted += 1
+        task = self._loop.create_task(self._sio.emit(event, payload, room=room))
+        task.add_done_callback(self._log_emit_error)
+
+    @staticmethod
+    def _log_emit_error(task: "asyncio.Task") -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"progress event emit failed: {task.exception()}")
+
+
+progress_publisher = ProgressPublisher()
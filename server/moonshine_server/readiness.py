@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+READINESS_PENDING = "pending"
+READINESS_LOADING = "loading"
+READINESS_READY = "ready"
+READINESS_FAILED = "failed"
+READINESS_SKIPPED = "skipped"
+READINESS_SETTLED_STATES = {READINESS_READY, READINESS_FAILED, READINESS_SKIPPED}
+
+
+class ReadinessTracker:
+    """Startup state of the components warmed up after the server binds.
+
+    The warm-up thread runs each component through ``run`` or marks it with
+    ``skip``; ``/api/v1/ready`` reports ``snapshot`` and handlers that need a
+    component can ``wait`` for it instead of failing while it loads.
+    """
+
+    def __init__(self, components: Iterable[str]):
+        self._condition = threading.Condition()
+        self._started_at = time.time()
+        self._components: Dict[str, Dict[str, Any]] = {
+            name: {"state": READINESS_PENDING} for name in components
+        }
+
+    def run(self, name: str, fn: Callable[[], Optional[dict]]) -> bool:
+        """Run one warm-up step, recording its state and timing; returns success."""
+        started_at = time.time()
+        with self._condition:
+            self._components[name] = {"state": READINESS_LOADING, "startedAt": started_at}
+        try:
+            detail = fn() or {}
+        except Exception as error:
+            logger.opt(exception=error).error(f"Warm-up step {name} failed")
+            self._settle(name, READINESS_FAILED, started_at, error=str(error))
+            return False
+        self._settle(name, READINESS_READY, started_at, **detail)
+        return True
+
+    def skip(self, name: str, reason: str):
+        self._settle(name, READINESS_SKIPPED, None, reason=reason)
+
+    def _settle(self, name: str, state: str, started_at: Optional[float], **detail):
+        finished_at = time.time()
+        component = {"state": state, "finishedAt": finished_at}
+        if started_at is not None:
+            component["startedAt"] = started_at
+            component["elapsedMs"] = round((finished_at - started_at) * 1000, 3)
+        component.update(detail)
+        with self._condition:
+            self._components[name] = component
+            self._condition.notify_all()
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until ``name`` is ready, failed or skipped; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._components.get(name, {}).get("state") in READINESS_SETTLED_STATES,
+                timeout=timeout,
+            )
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            components = {name: dict(component) for name, component in self._components.items()}
+        states = {component["state"] for component in components.values()}
+        if not states <= READINESS_SETTLED_STATES:
+            status = "starting"
+        elif READINESS_FAILED in states:
+            status = "degraded"
+        else:
+            status = "ready"
+        return {
+            "ready": status == "ready",
+            "status": status,
+            "startedAt": self._started_at,
+            "uptimeMs": round((time.time() - self._started_at) * 1000, 3),
+            "components": components,
+        }
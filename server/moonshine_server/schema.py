@@ -1,7 +1,7 @@
 import random
 from enum import Enum
 from pathlib import Path
-from typing import Any, List, Literal, Optional
+from typing import Annotated, Any, List, Literal, Optional, Union
 
 from loguru import logger
 from pydantic import BaseModel, Field, computed_field, field_validator, model_validator
@@ -79,6 +79,8 @@ class HDStrategy(str, Enum):
     ORIGINAL = "Original"
     RESIZE = "Resize"
     CROP = "Crop"
+    # Crop merged mask boxes regardless of frame size.
+    ROI = "ROI"
 
 
 class LDMSampler(str, Enum):
@@ -98,6 +100,11 @@ class ApiConfig(BaseModel):
     local_files_only: bool
     cpu_textencoder: bool
     sam_release_before_processing: bool = True
+    inference_batch_size: int = 4
+    inference_batch_wait_ms: float = 5.0
+    gpu_release_ratio: float = 0.85
+    sam_embedding_cache_mb: int = 1024
+    sam_embedding_offload: bool = True
     device: Device
     input: Optional[Path]
     mask_dir: Optional[Path]
@@ -279,6 +286,10 @@ class BatchInpaintByFolderRequest(BaseModel):
     output_format: ImageOutputFormat = Field("auto")
     output_quality: int = Field(95, ge=1, le=100)
     color_stabilization: Literal["off", "auto", "enhanced"] = Field("auto")
+    workers: int = Field(0, ge=0, le=32)
+    prefetch: int = Field(4, ge=0, le=64)
+    model_processes: int = Field(1, ge=1, le=64)
+    force: bool = Field(False, description="Ignore the output folder manifest and reprocess every image.")
 
     _normalize_output_format_value = field_validator(
         "output_format", mode="before"
@@ -292,8 +303,21 @@ class BatchInpaintByFolderRequest(BaseModel):
 
 
 class MoonshineImageModelOptions(BaseModel):
-    tile_size: int = Field(384, ge=1)
+    tile_size: Union[Annotated[int, Field(ge=1)], Literal["auto"]] = Field(
+        384,
+        description='Tile size in pixels, or "auto" to use the calibrated profile for the device',
+    )
     tile_batch: int = Field(4, ge=1, le=32)
+    image_batch: int = Field(
+        4,
+        ge=1,
+        le=16,
+        description="Images whose tiles may share one SLBR forward in folder and video batches",
+    )
+    precision: Literal["fp32", "fp16", "bf16"] = Field(
+        "fp32",
+        description="SLBR autocast precision; unsupported devices fall back to fp32",
+    )
     local_inference_strategy: Literal["auto", "full", "smart_tiles"] = Field("auto")
     local_bbox_empty_ratio_threshold: int = Field(50, ge=1, le=99)
     local_edge_feather_px: int = Field(2, ge=0, le=16)
@@ -350,6 +374,7 @@ class MoonshineImageFolderProcessRequest(BaseModel):
     output_format: ImageOutputFormat = Field("auto")
     output_quality: int = Field(95, ge=1, le=100)
     options: MoonshineImageModelOptions = Field(default_factory=MoonshineImageModelOptions)
+    force: bool = Field(False, description="Ignore the output folder manifest and reprocess every image.")
 
     _normalize_output_format_value = field_validator(
         "output_format", mode="before"
@@ -390,20 +415,41 @@ class MoonshineModelRegistryRequest(BaseModel):
 
 
 class MoonshineSamPredictRequest(BaseModel):
-    image: str = Field(..., description="Base64 image data or local image path")
+    image: str = Field("", description="Base64 image data or local image path")
     image_type: Literal["base64", "path"] = Field("base64")
+    image_hash: Optional[str] = Field(
+        None, description="imageHash of an image the server already prepared; replaces image"
+    )
+    image_id: Optional[str] = Field(
+        None, description="Client-supplied content id used as the image identity"
+    )
+    image_identity: Literal["fast", "content"] = Field("fast")
     model_id: str = Field("sam_vit_b", description="SAM1/SAM2.1 model id")
     points: List[SamPromptPoint] = Field(default_factory=list)
     box: Optional[SamPromptBox] = None
     multimask_output: bool = Field(True)
+    mask_encoding: Literal["png", "rle", "bitmap"] = Field(
+        "png", description="png overlay data URL, or rle/bitmap for client-side rendering"
+    )
 
     @model_validator(mode="after")
     def validate_prompt(cls, values: "MoonshineSamPredictRequest"):
         if not values.points and values.box is None:
             raise ValueError("At least one point or box prompt is required")
+        if not values.image and not values.image_hash:
+            raise ValueError("Either image or image_hash is required")
         return values
 
 
+class MoonshineSamPrepareImageRequest(BaseModel):
+    images: List[str] = Field(
+        ..., min_length=1, description="Images to encode, most likely next first"
+    )
+    image_type: Literal["base64", "path"] = Field("path")
+    model_id: str = Field("sam_vit_b", description="SAM1/SAM2.1 model id")
+    replace: bool = Field(True, description="Drop images still queued by earlier requests")
+
+
 class SamVideoObjectPrompt(BaseModel):
     object_id: int = Field(1, ge=1)
     points: List[SamPromptPoint] = Field(default_factory=list)
@@ -438,13 +484,16 @@ class MoonshineSamVideoPropagateRequest(BaseModel):
     reverse: bool = Field(False)
     offload_video_to_cpu: bool = Field(True)
     offload_state_to_cpu: bool = Field(True)
-    response_type: Literal["base64", "path"] = Field(
+    response_type: Literal["base64", "path", "track"] = Field(
         "base64",
-        description="Return SAM video masks as base64 data URLs or local file paths",
+        description=(
+            "Return SAM video masks as base64 data URLs, local JPEG paths, or "
+            "per-object mask track references (<track>.mtrk#<frame>)"
+        ),
     )
     mask_output_dir: Optional[str] = Field(
         None,
-        description="Directory used when response_type is path",
+        description="Directory used when response_type is path or track",
     )
 
     @model_validator(mode="after")
@@ -453,8 +502,8 @@ class MoonshineSamVideoPropagateRequest(BaseModel):
             raise ValueError("frame_dir is required when input_type is jpegFrameDirectory")
         if values.input_type == "videoPath" and not values.video_path:
             raise ValueError("video_path is required when input_type is videoPath")
-        if values.response_type == "path" and not values.mask_output_dir:
-            raise ValueError("mask_output_dir is required when response_type is path")
+        if values.response_type in {"path", "track"} and not values.mask_output_dir:
+            raise ValueError("mask_output_dir is required when response_type is path or track")
         if (
             not values.objects
             and not values.points
@@ -474,6 +523,31 @@ class MoonshineSamTextPredictRequest(BaseModel):
     prompt_source: str = Field("manual")
     prompt_color: Optional[dict] = None
     prompt_noun: Optional[dict] = None
+    mask_encoding: Literal["png", "rle", "bitmap"] = Field(
+        "png", description="png overlay data URL, or rle/bitmap for client-side rendering"
+    )
+
+
+class MoonshineSamTextQuery(BaseModel):
+    text: str = Field(..., min_length=1)
+    language: Literal["auto", "zh", "en"] = Field("auto")
+    prompt_source: str = Field("manual")
+    prompt_color: Optional[dict] = None
+    prompt_noun: Optional[dict] = None
+
+
+class MoonshineSamTextBatchPredictRequest(BaseModel):
+    image: str = Field(..., description="Base64 image data or local image path")
+    image_type: Literal["base64", "path"] = Field("base64")
+    model_id: str = Field("sam3", description="SAM3/SAM3.1 model id")
+    queries: List[MoonshineSamTextQuery] = Field(
+        ...,
+        min_length=1,
+        description="Independent text prompts grounded together on the same image",
+    )
+    mask_encoding: Literal["png", "rle", "bitmap"] = Field(
+        "png", description="png overlay data URL, or rle/bitmap for client-side rendering"
+    )
 
 
 class VideoTemporalObjectRef(BaseModel):
@@ -530,6 +604,12 @@ class VideoBatchInpaintOptions(BaseModel):
     failure_root: Optional[str] = Field(None)
     failure_retention: int = Field(3, ge=1, le=50)
     temporal_enhancement: Optional[VideoTemporalEnhancementOptions] = Field(None)
+    prefetch_frames: int = Field(
+        4, ge=0, le=32, description="Frames decoded ahead of inference. 0 disables prefetch."
+    )
+    writer_workers: int = Field(
+        2, ge=0, le=8, description="Threads encoding and writing output frames. 0 writes inline."
+    )
 
 
 class VideoBatchInpaintRequest(BaseModel):
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Tuple
+
+DEFAULT_VIDEO_PREFETCH_FRAMES = 4
+DEFAULT_VIDEO_WRITER_WORKERS = 2
+
+
+class VideoFramePipeline:
+    """Bounded prefetch / write stages around the serial per-frame loop.
+
+    Decoding of the next ``prefetch_frames`` frames runs on a small thread pool
+    and encoded writes are handed to ``writer_workers`` threads, so the request
+    thread mostly waits on inference. With both set to 0 every stage runs inline.
+    """
+
+    def __init__(
+        self,
+        prefetch_frames: int = DEFAULT_VIDEO_PREFETCH_FRAMES,
+        writer_workers: int = DEFAULT_VIDEO_WRITER_WORKERS,
+    ):
+        self.prefetch_frames = max(0, int(prefetch_frames))
+        self.writer_workers = max(0, int(writer_workers))
+        self.max_pending_writes = max(1, self.writer_workers * 2)
+        self._prefetch_executor = (
+            ThreadPoolExecutor(
+                max_workers=min(self.prefetch_frames, 4),
+                thread_name_prefix="moonshine-video-prefetch",
+            )
+            if self.prefetch_frames > 0
+            else None
+        )
+        self._writer_executor = (
+            ThreadPoolExecutor(
+                max_workers=self.writer_workers,
+                thread_name_prefix="moonshine-video-writer",
+            )
+            if self.writer_workers > 0
+            else None
+        )
+        self._prefetched: Dict[int, Future] = {}
+        self._pending_writes: Deque[Tuple[Future, Callable[[BaseException], None]]] = deque()
+        self._lock = threading.Lock()
+        self._stage_ms: Dict[str, float] = {}
+        self._stage_counts: Dict[str, int] = {}
+        self._max_prefetch_depth = 0
+        self._max_write_queue_depth = 0
+
+    def _record(self, stage: str, elapsed_seconds: float):
+        with self._lock:
+            self._stage_ms[stage] = self._stage_ms.get(stage, 0.0) + elapsed_seconds * 1000
+            self._stage_counts[stage] = self._stage_counts.get(stage, 0) + 1
+
+    @contextmanager
+    def stage(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - started_at)
+
+    def _timed(self, stage: str, fn: Callable, *args):
+        with self.stage(stage):
+            return fn(*args)
+
+    def prefetch(self, index: int, fn: Callable, *args):
+        """Start ``fn(*args)`` for frame ``index`` unless it is already queued."""
+        if self._prefetch_executor is None or index in self._prefetched:
+            return
+        self._prefetched[index] = self._prefetch_executor.submit(self._timed, "decode", fn, *args)
+        self._max_prefetch_depth = max(self._max_prefetch_depth, len(self._prefetched))
+
+    def take(self, index: int, fn: Callable, *args):
+        """Return the prefetched result for ``index``, running ``fn`` inline when none exists."""
+        future = self._prefetched.pop(index, None)
+        if future is None:
+            return self._timed("decode", fn, *args)
+        with self.stage("decode_wait"):
+            return future.result()
+
+    def write(self, fn: Callable, *args, on_error: Callable[[BaseException], None]):
+        """Run a write in the writer pool; ``on_error`` is called on the request thread."""
+        if self._writer_executor is None:
+            try:
+                self._timed("encode_write", fn, *args)
+            except Exception as error:
+                on_error(error)
+            return
+
+        self._pending_writes.append(
+            (self._writer_executor.submit(self._timed, "encode_write", fn, *args), on_error)
+        )
+        self._max_write_queue_depth = max(self._max_write_queue_depth, len(self._pending_writes))
+        with self.stage("write_wait"):
+            while len(self._pending_writes) > self.max_pending_writes:
+                self._resolve_oldest_write()
+
+    def _resolve_oldest_write(self):
+        future, on_error = self._pending_writes.popleft()
+        try:
+            future.result()
+        except Exception as error:
+            on_error(error)
+
+    def drain(self):
+        with self.stage("write_wait"):
+            while self._pending_writes:
+                self._resolve_oldest_write()
+
+    def close(self):
+        for future in self._prefetched.values():
+            future.cancel()
+        self._prefetched.clear()
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=True)
+        if self._writer_executor is not None:
+            self._writer_executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stage_ms = {key: round(value, 3) for key, value in self._stage_ms.items()}
+            stage_avg_ms = {
+                key: round(value / max(1, self._stage_counts.get(key, 0)), 3)
+                for key, value in self._stage_ms.items()
+            }
+        return {
+            "prefetch_frames": self.prefetch_frames,
+            "writer_workers": self.writer_workers,
+            "max_prefetch_depth": self._max_prefetch_depth,
+            "max_write_queue_depth": self._max_write_queue_depth,
+            "stage_ms": stage_ms,
+            "stage_avg_ms": stage_avg_ms,
+        }
+
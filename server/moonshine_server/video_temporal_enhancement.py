@@ -6,6 +6,7 @@ from typing import Any, Dict, Optional, Tuple
 import cv2
 import numpy as np
 
+from moonshine_server.mask_tracks import read_mask_track_ref
 from moonshine_server.path_io import read_image_file, to_path, write_image_file
 
 
@@ -287,7 +288,12 @@ def _json_center(center: Any) -> Optional[list]:
 def _read_binary_mask_from_path(mask_path: str, expected_shape: Tuple[int, int]) -> Optional[np.ndarray]:
     if not mask_path:
         return None
-    mask = read_image_file(to_path(mask_path), cv2.IMREAD_GRAYSCALE)
+    try:
+        mask = read_mask_track_ref(mask_path)
+    except FileNotFoundError:
+        return None
+    if mask is None:
+        mask = read_image_file(to_path(mask_path), cv2.IMREAD_GRAYSCALE)
     if mask is None:
         return None
     expected_height, expected_width = expected_shape
@@ -312,18 +318,24 @@ def _blend_in_mask(
     reference_bgr: np.ndarray,
     mask: np.ndarray,
     strength: float,
+    mask_weight: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     if reference_bgr is None or reference_bgr.shape != current_bgr.shape:
         return current_bgr
 
-    original_mask = mask > 127
-    if not np.any(original_mask):
-        return current_bgr
-
-    mask_float = np.where(mask > 127, 1.0, 0.0).astype(np.float32)
-    mask_float = cv2.GaussianBlur(mask_float, (0, 0), sigmaX=1.2)
-    mask_float *= original_mask.astype(np.float32)
-    mask_float = np.clip(mask_float, 0.0, 1.0)
+    if mask_weight is not None:
+        mask_float = mask_weight
+        if not np.any(mask_float > 0):
+            return current_bgr
+    else:
+        original_mask = mask > 127
+        if not np.any(original_mask):
+            return current_bgr
+
+        mask_float = np.where(mask > 127, 1.0, 0.0).astype(np.float32)
+        mask_float = cv2.GaussianBlur(mask_float, (0, 0), sigmaX=1.2)
+        mask_float *= original_mask.astype(np.float32)
+        mask_float = np.clip(mask_float, 0.0, 1.0)
     weight = (mask_float * max(0.0, min(1.0, strength)))[:, :, None]
     blended = current_bgr.astype(np.float32) * (1.0 - weight)
     blended += reference_bgr.astype(np.float32) * weight
@@ -354,6 +366,7 @@ class VideoTemporalEnhancer:
         independent_bgr: np.ndarray,
         output_path: str = "",
         temporal_objects: Optional[Any] = None,
+        mask_plan=None,
     ) -> Tuple[np.ndarray, Dict[str, Any]]:
         decision = {
             "enabled": self.enabled,
@@ -368,7 +381,9 @@ class VideoTemporalEnhancer:
         object_refs = self._normalize_temporal_object_refs(temporal_objects)
         object_key = self._resolve_object_key(object_refs)
         current_thumb = _scene_thumbnail(image_rgb)
-        stats = _mask_stats(mask)
+        if mask_plan is not None and mask_plan.shape != mask.shape[:2]:
+            mask_plan = None
+        stats = mask_plan.temporal_stats() if mask_plan is not None else _mask_stats(mask)
         decision.update(
             {
                 "skip_reason": "",
@@ -420,7 +435,11 @@ class VideoTemporalEnhancer:
 
         blend_mask = mask
         if self.options["stabilize_mask"]:
-            blend_mask = _stabilize_binary_mask(mask)
+            blend_mask = (
+                mask_plan.stabilized_mask()
+                if mask_plan is not None
+                else _stabilize_binary_mask(mask)
+            )
             decision["mask_stabilized"] = True
 
         reference_bgr = (
@@ -460,6 +479,11 @@ class VideoTemporalEnhancer:
                 reference_bgr,
                 blend_mask,
                 self.options["blend_strength"],
+                mask_weight=(
+                    mask_plan.blend_weight(stabilized=bool(self.options["stabilize_mask"]))
+                    if mask_plan is not None
+                    else None
+                ),
             )
             decision["applied"] = not np.array_equal(enhanced_bgr, independent_bgr)
             decision["fallback"] = not decision["applied"]
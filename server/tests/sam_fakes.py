@@ -0,0 +1,51 @@
+"""Fake SAM predictor and service wiring shared by the SAM service tests."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.sam_service import SamService
+
+
+class FakeSamPredictor:
+    """Counts encoder runs and answers clicks with ``mask_region`` set, or a full mask."""
+
+    def __init__(self, mask_region=None):
+        self.mask_region = mask_region
+        self.features = None
+        self.original_size = None
+        self.input_size = None
+        self.is_image_set = False
+        self.encoded = 0
+
+    def set_image(self, image: np.ndarray):
+        self.encoded += 1
+        self.features = torch.full((1, 4, 4, 4), float(image.mean()))
+        self.original_size = image.shape[:2]
+        self.input_size = image.shape[:2]
+        self.is_image_set = True
+
+    def predict(self, point_coords, point_labels, box, multimask_output):
+        height, width = self.original_size
+        if self.mask_region is None:
+            mask = np.ones((1, height, width), dtype=bool)
+        else:
+            mask = np.zeros((1, height, width), dtype=bool)
+            mask[(0, *self.mask_region)] = True
+        return mask, np.array([0.9]), np.zeros((1, 4, 4))
+
+
+def make_fake_sam_service(root: Path, predictor: FakeSamPredictor) -> SamService:
+    """Return a CPU ``SamService`` whose SAM1 models all resolve to ``predictor``."""
+    service = SamService(Path(root), "cpu")
+    service._get_model_status = lambda model_id: {"family": "sam"}
+    service._get_predictor = lambda model_id: predictor
+    return service
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+import unittest
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.batch_jobs import BatchJobManager, iter_batch_events
+from moonshine_server.disk_space import DiskSpaceError
+from moonshine_server.moonshine.slbr_runner import summarize_processing_results
+
+
+def item_results(count: int, fail_at: int = -1):
+    for index in range(count):
+        if index == fail_at:
+            yield {"id": f"item_{index}", "index": index, "error": "bad", "success": False}
+        else:
+            yield {"id": f"item_{index}", "index": index, "result": "data", "success": True}
+
+
+class BatchStreamTests(unittest.TestCase):
+    def test_ndjson_stream_yields_each_result_then_summary(self):
+        lines = list(iter_batch_events(item_results(3, fail_at=1), summarize_processing_results))
+        events = [json.loads(line) for line in lines]
+
+        self.assertEqual([event["event"] for event in events], ["result"] * 3 + ["summary"])
+        self.assertEqual(events[1]["success"], False)
+        self.assertEqual(events[-1]["processed_count"], 3)
+        self.assertEqual(events[-1]["status"], "partial")
+
+    def test_sse_stream_reports_disk_errors_as_terminal_event(self):
+        def results():
+            yield from item_results(1)
+            raise DiskSpaceError("disk full")
+
+        frames = list(iter_batch_events(results(), summarize_processing_results, "sse"))
+
+        self.assertTrue(frames[0].startswith("event: result\ndata: "))
+        self.assertTrue(frames[-1].startswith("event: error\n"))
+        payload = json.loads(frames[-1].split("data: ", 1)[1])
+        self.assertEqual(payload["status_code"], 507)
+        self.assertEqual(payload["processed_count"], 1)
+
+
+class BatchJobManagerTests(unittest.TestCase):
+    def test_results_are_released_once_the_cursor_passes_them(self):
+        manager = BatchJobManager()
+        task = manager.create_task("batch_inpaint", 4)
+        manager.run(task.task_id, item_results(4), summarize_processing_results)
+
+        first = manager.take_results(task.task_id, cursor=0, limit=2)
+        second = manager.take_results(task.task_id, cursor=first["nextCursor"])
+
+        self.assertEqual([result["index"] for result in first["results"]], [0, 1])
+        self.assertEqual([result["index"] for result in second["results"]], [2, 3])
+        self.assertEqual(second["pendingResults"], 2)
+        self.assertEqual(manager.get_task(task.task_id).status, "completed")
+        self.assertEqual(manager.get_task(task.task_id).summary["success_count"], 4)
+
+    def test_canceled_job_stops_consuming_items(self):
+        manager = BatchJobManager()
+        task = manager.create_task("batch_inpaint", 10)
+        consumed = []
+
+        def results():
+            for result in item_results(10):
+                consumed.append(result["index"])
+                if result["index"] == 2:
+                    manager.cancel_task(task.task_id)
+                yield result
+
+        manager.run(task.task_id, results(), summarize_processing_results)
+
+        self.assertEqual(consumed, [0, 1, 2])
+        self.assertEqual(manager.get_task(task.task_id).status, "canceled")
+
+    def test_worker_pauses_while_the_result_buffer_is_full(self):
+        manager = BatchJobManager(max_pending_results=2)
+        task = manager.create_task("batch_inpaint", 6)
+        consumed = []
+
+        def results():
+            for result in item_results(6):
+                consumed.append(result["index"])
+                yield result
+
+        worker = manager.start(task.task_id, results(), summarize_processing_results)
+        deadline = time.monotonic() + 5
+        while len(task.results) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(consumed, [0, 1])
+        self.assertEqual(task.status, "running")
+
+        cursor = 0
+        received = []
+        while worker.is_alive() or manager.get_task(task.task_id).results:
+            payload = manager.take_results(task.task_id, cursor)
+            received += [result["index"] for result in payload["results"]]
+            self.assertLessEqual(len(payload["results"]), 2)
+            cursor = payload["nextCursor"]
+            time.sleep(0.01)
+            if time.monotonic() > deadline:
+                self.fail("job did not finish")
+        manager.take_results(task.task_id, cursor)
+
+        self.assertEqual(received, list(range(6)))
+        self.assertEqual(manager.get_task(task.task_id).status, "completed")
+
+    def test_unread_job_is_stopped_after_the_retention_period(self):
+        manager = BatchJobManager(retention_seconds=0.05, max_pending_results=1)
+        task = manager.create_task("batch_inpaint", 3)
+        manager.run(task.task_id, item_results(3), summarize_processing_results)
+
+        self.assertEqual(task.status, "canceled")
+        self.assertEqual(task.current, 1)
+        self.assertTrue(task.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
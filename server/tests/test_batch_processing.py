@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.batch_processing import batch_inpaint
+
+
+class FolderBatchInpaintTests(unittest.TestCase):
+    def test_worker_pool_matches_inline_results(self):
+        rng = np.random.default_rng(3)
+        with tempfile.TemporaryDirectory(prefix="moonshine-folder-batch-") as root:
+            root_path = Path(root)
+            image_dir = root_path / "images"
+            mask_dir = root_path / "masks"
+            image_dir.mkdir()
+            mask_dir.mkdir()
+            mask = np.zeros((48, 64), dtype=np.uint8)
+            mask[8:24, 8:40] = 255
+            for index in range(4):
+                image = rng.integers(0, 255, size=(48, 64, 3), dtype=np.uint8)
+                cv2.imwrite(str(image_dir / f"frame_{index}.png"), image)
+                if index != 2:
+                    cv2.imwrite(str(mask_dir / f"frame_{index}.png"), mask)
+
+            outputs = {}
+            for name, options in (("inline", {}), ("pool", {"workers": 1, "prefetch": 2})):
+                results = batch_inpaint(
+                    "cv2",
+                    torch.device("cpu"),
+                    image_dir,
+                    mask_dir,
+                    root_path / name,
+                    return_results=True,
+                    **options,
+                )
+                outputs[name] = results
+                self.assertEqual(
+                    sorted(Path(result["image_path"]).name for result in results if not result["success"]),
+                    ["frame_2.png"],
+                )
+
+            for inline, pooled in zip(outputs["inline"], outputs["pool"]):
+                self.assertEqual(inline["image_path"], pooled["image_path"])
+                if inline["success"]:
+                    np.testing.assert_array_equal(
+                        cv2.imread(inline["output_path"]), cv2.imread(pooled["output_path"])
+                    )
+
+    def test_rerun_skips_finished_items_unless_forced(self):
+        rng = np.random.default_rng(5)
+        with tempfile.TemporaryDirectory(prefix="moonshine-folder-resume-") as root:
+            root_path = Path(root)
+            image_dir = root_path / "images"
+            mask_dir = root_path / "masks"
+            image_dir.mkdir()
+            mask_dir.mkdir()
+            mask = np.zeros((32, 32), dtype=np.uint8)
+            mask[4:12, 4:20] = 255
+            for index in range(3):
+                cv2.imwrite(
+                    str(image_dir / f"frame_{index}.png"),
+                    rng.integers(0, 255, size=(32, 32, 3), dtype=np.uint8),
+                )
+                cv2.imwrite(str(mask_dir / f"frame_{index}.png"), mask)
+
+            def run(**options):
+                return batch_inpaint(
+                    "cv2",
+                    torch.device("cpu"),
+                    image_dir,
+                    mask_dir,
+                    root_path / "out",
+                    return_results=True,
+                    **options,
+                )
+
+            first = run()
+            cv2.imwrite(str(mask_dir / "frame_1.png"), 255 - mask)
+            second = run()
+            forced = run(force=True)
+
+        self.assertFalse(any(result.get("resumed") for result in first))
+        resumed = {Path(result["image_path"]).name for result in second if result.get("resumed")}
+        self.assertEqual(resumed, {"frame_0.png", "frame_2.png"})
+        self.assertTrue(all(result["success"] for result in second))
+        self.assertFalse(any(result.get("resumed") for result in forced))
+
+
+if __name__ == "__main__":
+    unittest.main()
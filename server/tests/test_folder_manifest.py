@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.folder_manifest import MANIFEST_FILENAME, FolderManifest, options_signature
+
+
+class FolderManifestTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="moonshine-manifest-")
+        self.root = Path(self._temp_dir.name)
+        self.image_path = self.root / "image.png"
+        self.mask_path = self.root / "mask.png"
+        self.output_path = self.root / "out" / "image.png"
+        self.output_path.parent.mkdir()
+        self.image_path.write_bytes(b"image")
+        self.mask_path.write_bytes(b"mask")
+        self.output_path.write_bytes(b"output")
+        self.signature = options_signature("lama", {"output_format": "auto"})
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def record_success(self, manifest: FolderManifest):
+        manifest.record(
+            self.image_path,
+            self.mask_path,
+            {"success": True, "output_path": str(self.output_path)},
+        )
+
+    def test_completed_items_survive_a_restart_until_inputs_change(self):
+        self.record_success(FolderManifest(self.output_path.parent, self.signature))
+
+        reloaded = FolderManifest(self.output_path.parent, self.signature)
+        resumed = reloaded.completed(self.image_path, self.mask_path)
+        self.assertEqual(resumed["output_path"], str(self.output_path))
+        self.assertTrue(resumed["resumed"])
+
+        other_options = FolderManifest(
+            self.output_path.parent, options_signature("lama", {"output_format": "png"})
+        )
+        self.assertIsNone(other_options.completed(self.image_path, self.mask_path))
+
+        stat = self.mask_path.stat()
+        os.utime(self.mask_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertIsNone(reloaded.completed(self.image_path, self.mask_path))
+
+    def test_failures_retry_and_force_resets_the_manifest(self):
+        manifest = FolderManifest(self.output_path.parent, self.signature)
+        manifest.record(self.image_path, None, {"success": False, "error": "boom"})
+        self.assertIsNone(manifest.completed(self.image_path))
+
+        self.record_success(manifest)
+        with open(self.output_path.parent / MANIFEST_FILENAME, "a", encoding="utf-8") as handle:
+            handle.write('{"version": 1, "image_pa')
+        self.assertIsNotNone(
+            FolderManifest(self.output_path.parent, self.signature).completed(
+                self.image_path, self.mask_path
+            )
+        )
+
+        forced = FolderManifest(self.output_path.parent, self.signature, force=True)
+        self.assertIsNone(forced.completed(self.image_path, self.mask_path))
+        self.assertEqual((self.output_path.parent / MANIFEST_FILENAME).read_text(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import base64
+import io
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.api import Api
+from moonshine_server.gpu_arbiter import (
+    GPU_PRIORITY_BULK,
+    GPU_PRIORITY_INTERACTIVE,
+    GpuArbiter,
+    gpu_arbiter,
+    normalize_gpu_device,
+)
+from moonshine_server.inference_scheduler import InferenceScheduler
+from moonshine_server.readiness import ReadinessTracker
+from moonshine_server.schema import RunPluginRequest
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def waiting_count(arbiter: GpuArbiter, device: str, priority: str) -> int:
+    devices = arbiter.stats()["devices"]
+    return devices[device]["waiting"][priority] if device in devices else 0
+
+
+class GpuArbiterTests(unittest.TestCase):
+    def test_queued_interactive_work_runs_before_earlier_bulk_work(self):
+        arbiter = GpuArbiter()
+        order = []
+
+        def run(priority, label):
+            with arbiter.acquire("cuda", priority, label):
+                order.append(label)
+
+        with arbiter.acquire("cuda:0", GPU_PRIORITY_BULK, "holder"):
+            bulk = threading.Thread(target=run, args=(GPU_PRIORITY_BULK, "bulk"))
+            bulk.start()
+            wait_until(lambda: waiting_count(arbiter, "cuda:0", "bulk") == 1)
+            interactive = threading.Thread(
+                target=run, args=(GPU_PRIORITY_INTERACTIVE, "interactive")
+            )
+            interactive.start()
+            wait_until(lambda: waiting_count(arbiter, "cuda:0", "interactive") == 1)
+        bulk.join(timeout=5)
+        interactive.join(timeout=5)
+
+        self.assertEqual(order, ["interactive", "bulk"])
+        priorities = arbiter.stats()["devices"]["cuda:0"]["priorities"]
+        self.assertEqual(priorities["interactive"]["acquired"], 1)
+        self.assertGreater(priorities["interactive"]["maxWaitMs"], 0)
+
+    def test_bulk_yield_point_lets_interactive_work_in_between_frames(self):
+        arbiter = GpuArbiter()
+        events = []
+
+        def interactive():
+            with arbiter.acquire("cpu", GPU_PRIORITY_INTERACTIVE, "click") as lease:
+                events.append(("click", lease.wait_ms))
+
+        with arbiter.acquire("cpu", GPU_PRIORITY_BULK, "video") as bulk_lease:
+            self.assertEqual(bulk_lease.yield_point(), 0.0)
+            events.append("frame 1")
+            worker = threading.Thread(target=interactive)
+            worker.start()
+            wait_until(lambda: waiting_count(arbiter, "cpu", "interactive") == 1)
+            events.append("frame 2")
+            bulk_lease.yield_point()
+            events.append("frame 3")
+        worker.join(timeout=5)
+
+        self.assertEqual(events[:2], ["frame 1", "frame 2"])
+        self.assertEqual(events[2][0], "click")
+        self.assertEqual(events[3], "frame 3")
+        self.assertEqual(bulk_lease.yields, 1)
+        self.assertEqual(arbiter.stats()["devices"]["cpu"]["yields"], 1)
+
+    def test_yield_point_drains_lent_work_and_holds_new_work(self):
+        arbiter = GpuArbiter()
+        executor = ThreadPoolExecutor(max_workers=2)
+        events = []
+        release = threading.Event()
+
+        def lent(label, gate=None):
+            if gate is not None:
+                gate.wait(timeout=5)
+            events.append(label)
+
+        def interactive():
+            with arbiter.acquire("cpu", GPU_PRIORITY_INTERACTIVE, "click"):
+                events.append("click")
+
+        with arbiter.acquire("cpu", GPU_PRIORITY_BULK, "video") as bulk_lease:
+            in_flight = bulk_lease.lend(lambda: executor.submit(lent, "frame 1", release))
+            submitted = []
+
+            def submit_while_yielding():
+                wait_until(lambda: bulk_lease._yielding)
+                submitter = threading.Thread(
+                    target=lambda: submitted.append(
+                        bulk_lease.lend(lambda: executor.submit(lent, "frame 2"))
+                    )
+                )
+                submitter.start()
+                release.set()
+                submitter.join(timeout=5)
+
+            worker = threading.Thread(target=interactive)
+            worker.start()
+            wait_until(lambda: waiting_count(arbiter, "cpu", "interactive") == 1)
+            helper = threading.Thread(target=submit_while_yielding)
+            helper.start()
+            bulk_lease.yield_point()
+            helper.join(timeout=5)
+            self.assertTrue(in_flight.done())
+            submitted[0].result(timeout=5)
+        worker.join(timeout=5)
+        executor.shutdown()
+
+        self.assertEqual(events, ["frame 1", "click", "frame 2"])
+        self.assertEqual(bulk_lease.yields, 1)
+
+    def test_nested_acquire_reuses_the_outer_lease(self):
+        arbiter = GpuArbiter()
+        self.assertIsNone(arbiter.current_priority())
+        with arbiter.acquire("cuda", GPU_PRIORITY_INTERACTIVE, "inpaint") as outer:
+            with arbiter.acquire("cuda:0", GPU_PRIORITY_BULK, "slbr") as inner:
+                self.assertIs(inner, outer)
+                self.assertEqual(arbiter.current_priority(), GPU_PRIORITY_INTERACTIVE)
+        self.assertIsNone(arbiter.current_priority())
+        self.assertFalse(arbiter.stats()["devices"]["cuda:0"]["busy"])
+
+    def test_device_names_share_one_queue(self):
+        self.assertEqual(normalize_gpu_device("cuda"), "cuda:0")
+        self.assertEqual(normalize_gpu_device("Device.cuda"), "cuda:0")
+        self.assertEqual(normalize_gpu_device("CPU"), "cpu")
+
+
+class BlockingModel:
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches = []
+
+    def forward_batch(self, images, masks, configs):
+        self.batches.append([int(image[0, 0, 0]) for image in images])
+        if len(self.batches) == 1:
+            self.release.wait(timeout=5)
+        return [image for image in images]
+
+
+class SchedulerPriorityTests(unittest.TestCase):
+    def test_interactive_crops_are_batched_before_queued_bulk_crops(self):
+        scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=0)
+        model = BlockingModel()
+        mask = np.zeros((8, 8, 1), dtype=np.uint8)
+
+        def crop(value):
+            return np.full((8, 8, 3), value, dtype=np.uint8)
+
+        futures = [scheduler.submit(model, crop(0), mask, None)]
+        wait_until(lambda: len(model.batches) == 1)
+        futures += [scheduler.submit(model, crop(value), mask, None) for value in (1, 2)]
+        with gpu_arbiter.acquire("test:scheduler", GPU_PRIORITY_INTERACTIVE, "test"):
+            futures.append(scheduler.submit(model, crop(9), mask, None))
+        model.release.set()
+        for future in futures:
+            future.result(timeout=5)
+
+        self.assertEqual(model.batches, [[0], [9], [1, 2]])
+        scheduler.shutdown()
+
+
+class MaskPlugin:
+    support_gen_mask = True
+
+    def __init__(self):
+        self.priorities = []
+
+    def gen_mask(self, rgb_np_img, req):
+        self.priorities.append(gpu_arbiter.current_priority())
+        return np.zeros(rgb_np_img.shape[:2], dtype=np.uint8)
+
+
+class ApiLeaseTests(unittest.TestCase):
+    def test_plugin_forwards_run_under_an_interactive_lease(self):
+        api = Api.__new__(Api)
+        api.config = SimpleNamespace(device="test:plugins")
+        api.readiness = ReadinessTracker(("plugins",))
+        api.readiness.skip("plugins", "test")
+        plugin = MaskPlugin()
+        api.plugins = {"RemoveBG": plugin}
+        buffer = io.BytesIO()
+        Image.fromarray(np.zeros((8, 8, 3), dtype=np.uint8)).save(buffer, format="PNG")
+        image = base64.b64encode(buffer.getvalue()).decode("ascii")
+
+        response = api.api_run_plugin_gen_mask(RunPluginRequest(name="RemoveBG", image=image))
+
+        self.assertEqual(plugin.priorities, [GPU_PRIORITY_INTERACTIVE])
+        self.assertIn("X-Gpu-Queue-Wait-Ms", response.headers)
+        self.assertEqual(
+            gpu_arbiter.stats()["devices"]["test:plugins"]["priorities"]["interactive"]["acquired"], 1
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
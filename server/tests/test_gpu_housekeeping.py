@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server import gpu_housekeeping
+from moonshine_server.gpu_housekeeping import GpuHousekeeper
+
+
+def snapshot(reserved: int, total: int = 1000) -> dict:
+    return {"allocated": reserved // 2, "reserved": reserved, "max_reserved": reserved, "total": total}
+
+
+class GpuHousekeeperTests(unittest.TestCase):
+    def test_identical_items_keep_the_allocator_cache(self):
+        housekeeper = GpuHousekeeper(release_ratio=0.8, gc_interval=100)
+        with mock.patch.object(gpu_housekeeping, "torch_gc") as torch_gc, mock.patch.object(
+            gpu_housekeeping, "_cuda_memory_snapshot", return_value=snapshot(300)
+        ):
+            for _ in range(5):
+                self.assertFalse(housekeeper.after_item(("lama", (512, 512, 3))))
+
+        torch_gc.assert_not_called()
+        self.assertEqual(housekeeper.stats()["skipped"], 5)
+
+    def test_releases_on_pressure_shape_change_and_errors(self):
+        housekeeper = GpuHousekeeper(release_ratio=0.8, gc_interval=100)
+        with mock.patch.object(gpu_housekeeping, "torch_gc") as torch_gc, mock.patch.object(
+            gpu_housekeeping, "_cuda_memory_snapshot", return_value=snapshot(300)
+        ) as memory:
+            housekeeper.after_item(("lama", (512, 512, 3)))
+            self.assertTrue(housekeeper.after_item(("lama", (720, 1280, 3))))
+            self.assertTrue(housekeeper.after_item(("lama", (720, 1280, 3)), failed=True))
+            memory.return_value = snapshot(900)
+            self.assertTrue(housekeeper.after_item(("lama", (720, 1280, 3))))
+
+        self.assertEqual(torch_gc.call_count, 3)
+        self.assertEqual(
+            housekeeper.stats()["release_reasons"],
+            {"key_changed": 1, "error": 1, "memory_pressure": 1},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import base64
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.helper import decode_base64_to_image, decode_image_file
+
+
+class DecodeImageFileTests(unittest.TestCase):
+    def test_path_and_stream_decode_match_base64_decode(self):
+        rng = np.random.default_rng(7)
+        rgba = rng.integers(0, 255, size=(48, 64, 4), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(rgba, "RGBA").save(buffer, format="PNG")
+        encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+
+        expected, expected_alpha, _ = decode_base64_to_image(encoded)
+        with tempfile.TemporaryDirectory(prefix="moonshine-decode-") as root:
+            image_path = Path(root) / "image.png"
+            image_path.write_bytes(buffer.getvalue())
+            from_path, path_alpha, _, path_format = decode_image_file(str(image_path))
+        from_stream, _, _, stream_format = decode_image_file(io.BytesIO(buffer.getvalue()))
+
+        np.testing.assert_array_equal(from_path, expected)
+        np.testing.assert_array_equal(from_stream, expected)
+        np.testing.assert_array_equal(path_alpha, expected_alpha)
+        self.assertEqual((path_format, stream_format), ("PNG", "PNG"))
+
+
+if __name__ == "__main__":
+    unittest.main()
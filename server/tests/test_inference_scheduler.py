@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import torch
+
+from moonshine_server.inference_scheduler import InferenceScheduler
+from moonshine_server.model_manager import ModelManager
+
+
+class RecordingModel:
+    def __init__(self, fail_batches_over: int = 0):
+        self.batch_sizes = []
+        self.fail_batches_over = fail_batches_over
+
+    def forward_batch(self, images, masks, configs):
+        self.batch_sizes.append(len(images))
+        if self.fail_batches_over and len(images) > self.fail_batches_over:
+            raise RuntimeError("CUDA out of memory")
+        return [image[:, :, ::-1] + 1 for image in images]
+
+
+class InferenceSchedulerTests(unittest.TestCase):
+    def test_same_shape_crops_share_one_batch_and_keep_order(self):
+        scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=200)
+        model = RecordingModel()
+        images = [np.full((8, 8, 3), index, dtype=np.uint8) for index in range(4)]
+        mask = np.zeros((8, 8, 1), dtype=np.uint8)
+
+        futures = [scheduler.submit(model, image, mask, None) for image in images]
+        results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(model.batch_sizes, [4])
+        self.assertEqual([int(result[0, 0, 0]) for result in results], [1, 2, 3, 4])
+        self.assertEqual(scheduler.stats()["largestBatch"], 4)
+        scheduler.shutdown()
+
+    def test_different_shapes_are_never_stacked(self):
+        scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=20)
+        model = RecordingModel()
+        small = np.zeros((8, 8, 3), dtype=np.uint8)
+        large = np.zeros((16, 16, 3), dtype=np.uint8)
+
+        futures = [
+            scheduler.submit(model, small, small[:, :, :1], None),
+            scheduler.submit(model, large, large[:, :, :1], None),
+        ]
+        shapes = [future.result(timeout=5).shape for future in futures]
+
+        self.assertEqual(shapes, [(8, 8, 3), (16, 16, 3)])
+        self.assertEqual(model.batch_sizes, [1, 1])
+        scheduler.shutdown()
+
+    def test_out_of_memory_batch_falls_back_to_single_crops(self):
+        scheduler = InferenceScheduler(max_batch_size=3, max_wait_ms=200)
+        model = RecordingModel(fail_batches_over=1)
+        image = np.zeros((8, 8, 3), dtype=np.uint8)
+
+        futures = [scheduler.submit(model, image, image[:, :, :1], None) for _ in range(3)]
+        for future in futures:
+            future.result(timeout=5)
+
+        self.assertEqual(model.batch_sizes, [3, 1, 1, 1])
+        self.assertEqual(scheduler.stats()["fallbackBatches"], 1)
+        scheduler.shutdown()
+
+
+class EarlySubmitTests(unittest.TestCase):
+    def test_only_batching_models_are_submitted_concurrently(self):
+        cases = [
+            ("lama", 4, True),
+            ("mat", 4, True),
+            ("migan", 4, False),
+            ("fcf", 4, False),
+            ("lama", 1, False),
+        ]
+        for name, batch_size, expected in cases:
+            with self.subTest(model=name, batch_size=batch_size):
+                manager = ModelManager(
+                    name=name,
+                    device=torch.device("cpu"),
+                    inference_batch_size=batch_size,
+                    load_on_init=False,
+                )
+                self.assertEqual(manager.batches_forwards, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.helper import plan_roi_crop_boxes
+from moonshine_server.model.base import InpaintModel
+from moonshine_server.schema import HDStrategy, InpaintRequest
+
+
+class FillModel(InpaintModel):
+    name = "fill"
+    pad_mod = 8
+
+    def init_model(self, device, **kwargs):
+        self.forward_shapes = []
+
+    def forward(self, image, mask, config):
+        self.forward_shapes.append(image.shape[:2])
+        return np.full(image.shape, 200, dtype=np.uint8)
+
+
+class RoiStrategyTests(unittest.TestCase):
+    def test_plan_merges_overlapping_windows_and_reports_savings(self):
+        mask = np.zeros((720, 1280), dtype=np.uint8)
+        mask[20:40, 20:60] = 255
+        mask[30:50, 70:110] = 255
+        mask[600:620, 1200:1240] = 255
+
+        boxes, diagnostics = plan_roi_crop_boxes(mask, margin=16)
+
+        self.assertEqual(diagnostics["strategy"], "roi")
+        self.assertEqual(diagnostics["mask_box_count"], 3)
+        self.assertEqual(diagnostics["roi_box_count"], 2)
+        self.assertEqual(len(boxes), 2)
+        self.assertGreater(diagnostics["pixel_saving_ratio"], 0.9)
+
+    def test_plan_falls_back_to_full_frame_when_crop_is_not_smaller(self):
+        mask = np.full((64, 64), 255, dtype=np.uint8)
+
+        boxes, diagnostics = plan_roi_crop_boxes(mask, margin=16)
+
+        self.assertEqual(boxes, [])
+        self.assertEqual(diagnostics["strategy"], "full")
+        self.assertEqual(diagnostics["pixel_saving_ratio"], 0.0)
+
+    def test_roi_strategy_only_forwards_crops_below_the_crop_trigger_size(self):
+        model = FillModel("cpu")
+        image = np.zeros((360, 640, 3), dtype=np.uint8)
+        mask = np.zeros((360, 640), dtype=np.uint8)
+        mask[100:120, 300:340] = 255
+        config = InpaintRequest(hd_strategy=HDStrategy.ROI, hd_strategy_crop_margin=8)
+
+        result = model(image, mask, config)
+
+        self.assertEqual(model.forward_shapes, [(40, 56)])
+        self.assertEqual(int(result[110, 320, 0]), 200)
+        self.assertEqual(int(result[0, 0, 0]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import cv2
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.inpaint_color_stabilization import (
+    apply_inpaint_color_stabilization,
+    try_flat_background_fill,
+)
+from moonshine_server import mask_plan as mask_plan_module
+from moonshine_server.mask_plan import (
+    MaskPlan,
+    clear_mask_plan_cache,
+    get_mask_plan,
+    get_mask_plan_for_path,
+)
+from moonshine_server.video_temporal_enhancement import _blend_in_mask
+
+
+def textured_frame(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, size=(120, 160, 3), dtype=np.uint8)
+
+
+def watermark_mask() -> np.ndarray:
+    mask = np.zeros((120, 160), dtype=np.uint8)
+    mask[40:60, 50:90] = 255
+    return mask
+
+
+class MaskPlanTests(unittest.TestCase):
+    def test_color_stabilization_matches_uncached_analysis(self):
+        mask = watermark_mask()
+        plan = MaskPlan(mask)
+        flat_image = np.full((120, 160, 3), 90, dtype=np.uint8)
+        filled, decision = try_flat_background_fill(flat_image, mask, "auto")
+        planned_filled, planned_decision = try_flat_background_fill(
+            flat_image, mask, "auto", mask_plan=plan
+        )
+        self.assertEqual(decision, planned_decision)
+        np.testing.assert_array_equal(filled, planned_filled)
+
+        image = textured_frame(1)
+        result = textured_frame(2)
+        stabilized, decision = apply_inpaint_color_stabilization(image, mask, result, "enhanced")
+        planned, planned_decision = apply_inpaint_color_stabilization(
+            image, mask, result, "enhanced", mask_plan=plan
+        )
+        self.assertEqual(decision, planned_decision)
+        np.testing.assert_array_equal(stabilized, planned)
+
+    def test_temporal_blend_weight_matches_uncached_blend(self):
+        mask = watermark_mask()
+        plan = MaskPlan(mask)
+        current = textured_frame(3)
+        reference = textured_frame(4)
+
+        expected = _blend_in_mask(current, reference, mask, 0.6)
+        actual = _blend_in_mask(current, reference, mask, 0.6, mask_weight=plan.blend_weight())
+
+        np.testing.assert_array_equal(expected, actual)
+
+    def test_path_plan_is_reused_until_the_mask_file_changes(self):
+        clear_mask_plan_cache()
+        with tempfile.TemporaryDirectory(prefix="moonshine-mask-plan-") as root:
+            mask_path = Path(root) / "mask.png"
+            cv2.imwrite(str(mask_path), watermark_mask())
+            loader = mock.Mock(side_effect=lambda: cv2.imread(str(mask_path), cv2.IMREAD_GRAYSCALE))
+
+            first = get_mask_plan_for_path(str(mask_path), loader, target_shape=(120, 160))
+            second = get_mask_plan_for_path(str(mask_path), loader, target_shape=(120, 160))
+            resized = get_mask_plan_for_path(str(mask_path), loader, target_shape=(60, 80))
+
+            self.assertIs(first, second)
+            self.assertEqual(resized.shape, (60, 80))
+            self.assertEqual(loader.call_count, 2)
+            self.assertEqual(first.masked_pixels, 20 * 40)
+        clear_mask_plan_cache()
+
+    def test_cache_drops_the_oldest_plans_past_its_byte_budget(self):
+        clear_mask_plan_cache()
+        masks = []
+        for index in range(3):
+            mask = watermark_mask()
+            mask[0, index] = 255
+            masks.append(mask)
+        plans = [get_mask_plan(mask) for mask in masks[:2]]
+        plans[0].blend_weight()
+        budget = plans[0].nbytes + plans[1].nbytes
+        self.assertGreater(plans[0].nbytes, plans[1].nbytes)
+
+        with mock.patch.object(mask_plan_module, "MASK_PLAN_CACHE_BYTES", budget):
+            get_mask_plan(masks[2])
+            self.assertIsNot(get_mask_plan(masks[0]), plans[0])
+            self.assertIs(get_mask_plan(masks[2]), get_mask_plan(masks[2]))
+        clear_mask_plan_cache()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.api import Api
+from moonshine_server.mask_plan import clear_mask_plan_cache, get_mask_plan_for_path
+from moonshine_server.mask_tracks import (
+    MASK_TRACK_BITS,
+    MASK_TRACK_EMPTY,
+    MASK_TRACK_RLE,
+    MaskTrackStore,
+    close_mask_tracks,
+    decode_track_frame,
+    encode_track_frame,
+    open_mask_track,
+    parse_mask_track_ref,
+    read_mask_track_ref,
+)
+from moonshine_server.path_io import read_image_file
+from moonshine_server.schema import VideoBatchInpaintRequest
+from moonshine_server.video_temporal_enhancement import _read_binary_mask_from_path
+
+
+def blob_mask(height: int, width: int, frame_index: int) -> np.ndarray:
+    mask = np.zeros((height, width), dtype=np.uint8)
+    left = 4 + frame_index * 3
+    mask[10:30, left:left + 25] = 255
+    return mask
+
+
+class MaskTrackEncodingTests(unittest.TestCase):
+    def test_frames_round_trip_and_pick_the_smaller_encoding(self):
+        rng = np.random.default_rng(7)
+        noisy = np.where(rng.random((48, 64)) > 0.5, 255, 0).astype(np.uint8)
+        full = np.full((48, 64), 255, dtype=np.uint8)
+        cases = [
+            (np.zeros((48, 64), dtype=np.uint8), MASK_TRACK_EMPTY),
+            (blob_mask(48, 64, 0), MASK_TRACK_RLE),
+            (full, MASK_TRACK_RLE),
+            (noisy, MASK_TRACK_BITS),
+        ]
+        for mask, expected_encoding in cases:
+            encoding, payload = encode_track_frame(mask)
+            self.assertEqual(encoding, expected_encoding)
+            decoded = decode_track_frame(encoding, payload, 48, 64)
+            np.testing.assert_array_equal(decoded, mask)
+
+    def test_plain_paths_are_not_track_references(self):
+        self.assertIsNone(parse_mask_track_ref("C:/masks/mask_f000001_o001.jpg"))
+        self.assertIsNone(parse_mask_track_ref("/tmp/frame#12.png"))
+        self.assertIsNone(read_mask_track_ref("/tmp/mask.png"))
+        self.assertEqual(
+            parse_mask_track_ref("/tmp/run/mask_track_x_o001.mtrk#12"),
+            (Path("/tmp/run/mask_track_x_o001.mtrk"), 12),
+        )
+
+
+class MaskTrackStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.temp_dir.name)
+        clear_mask_plan_cache()
+
+    def tearDown(self):
+        close_mask_tracks()
+        self.temp_dir.cleanup()
+
+    def write_reverse_track(self, frame_count: int = 6):
+        store = MaskTrackStore(self.output_dir, 64, 48, run_id="test")
+        entries = {}
+        # Reverse propagation appends frames in descending order.
+        for frame_index in reversed(range(frame_count)):
+            for object_id in (1, 2):
+                mask = blob_mask(48, 64, frame_index + object_id)
+                entries[(frame_index, object_id)] = store.append(frame_index, object_id, mask)
+        store.close()
+        return entries
+
+    def test_one_file_per_object_with_random_access_by_frame(self):
+        entries = self.write_reverse_track()
+
+        track_files = sorted(path.name for path in self.output_dir.iterdir())
+        self.assertEqual(
+            track_files,
+            [
+                "mask_track_test_o001.mtrk",
+                "mask_track_test_o001.mtrk.idx",
+                "mask_track_test_o002.mtrk",
+                "mask_track_test_o002.mtrk.idx",
+            ],
+        )
+        entry = entries[(3, 2)]
+        self.assertEqual(entry["objectId"], 2)
+        self.assertEqual(entry["maskFrame"], 3)
+        self.assertTrue(entry["maskPath"].endswith("mask_track_test_o002.mtrk#3"))
+        self.assertTrue(entry["maskAssetId"].endswith(":3:2"))
+
+        reader = open_mask_track(entry["maskTrack"])
+        self.assertEqual(reader.frame_indexes(), list(range(6)))
+        for frame_index in (0, 5, 2):
+            np.testing.assert_array_equal(
+                read_mask_track_ref(entries[(frame_index, 1)]["maskPath"]),
+                blob_mask(48, 64, frame_index + 1),
+            )
+        with self.assertRaises(FileNotFoundError):
+            read_mask_track_ref(f"{entry['maskTrack']}#99")
+
+    def test_reader_picks_up_frames_appended_later(self):
+        store = MaskTrackStore(self.output_dir, 64, 48, run_id="grow")
+        first = store.append(0, 1, blob_mask(48, 64, 0))
+        store.flush()
+        self.assertEqual(len(open_mask_track(first["maskTrack"])), 1)
+
+        second = store.append(1, 1, blob_mask(48, 64, 1))
+        store.close()
+        np.testing.assert_array_equal(
+            read_mask_track_ref(second["maskPath"]), blob_mask(48, 64, 1)
+        )
+
+    def test_mask_plans_and_temporal_reads_accept_track_references(self):
+        entries = self.write_reverse_track()
+        mask_path = entries[(4, 1)]["maskPath"]
+        expected = blob_mask(48, 64, 5)
+
+        plan = get_mask_plan_for_path(mask_path, lambda: read_mask_track_ref(mask_path))
+        np.testing.assert_array_equal(plan.mask, expected)
+        other = get_mask_plan_for_path(
+            entries[(2, 1)]["maskPath"],
+            lambda: read_mask_track_ref(entries[(2, 1)]["maskPath"]),
+        )
+        self.assertIsNot(plan, other)
+        # Each reference names one frame, so its plan is not kept in the cache.
+        again = get_mask_plan_for_path(mask_path, lambda: read_mask_track_ref(mask_path))
+        self.assertIsNot(plan, again)
+
+        np.testing.assert_array_equal(_read_binary_mask_from_path(mask_path, (48, 64)), expected)
+        resized = _read_binary_mask_from_path(mask_path, (96, 128))
+        self.assertEqual(resized.shape, (96, 128))
+        self.assertIsNone(_read_binary_mask_from_path(f"{entries[(4, 1)]['maskTrack']}#77", (48, 64)))
+
+    def test_failure_snapshot_decodes_track_references(self):
+        entries = self.write_reverse_track()
+        req = VideoBatchInpaintRequest(
+            frames=[
+                {
+                    "frame_index": frame_index,
+                    "image_path": str(self.output_dir / f"missing_{frame_index}.png"),
+                    "mask_path": entries[(frame_index, 1)]["maskPath"],
+                    "output_path": str(self.output_dir / f"out_{frame_index}.png"),
+                }
+                for frame_index in (2, 3)
+            ],
+            options={"batch_id": "tracks", "failure_root": str(self.output_dir / "failures")},
+        )
+
+        snapshot_dir = Api.__new__(Api)._dump_failed_batch_snapshot(
+            req=req, failed_items=[{"frame_index": 3, "error": "boom"}], batch_start_time=1.0
+        )
+
+        masks_dir = Path(snapshot_dir) / "masks"
+        self.assertEqual(
+            sorted(path.name for path in masks_dir.iterdir()),
+            ["mask_track_test_o001_000002.png", "mask_track_test_o001_000003.png"],
+        )
+        np.testing.assert_array_equal(
+            read_image_file(masks_dir / "mask_track_test_o001_000003.png", 0),
+            blob_mask(48, 64, 4),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
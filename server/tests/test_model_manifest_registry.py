@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import sys
@@ -15,9 +16,12 @@ if str(SERVER_ROOT) not in sys.path:
     sys.path.insert(0, str(SERVER_ROOT))
 
 from moonshine_server.moonshine.model_registry import (
+    CHECKSUM_CACHE_FILENAME,
     ModelDownloadTaskManager,
     _device_compatible,
+    _sha256_file,
     build_model_status,
+    clear_checksum_cache,
     get_model_manifest_metadata,
 )
 from moonshine_server.moonshine.sam_service import SamService, SamServiceError
@@ -181,6 +185,40 @@ class SignedModelManifestTests(unittest.TestCase):
         self.assertFalse(model["runtimeReady"])
         self.assertFalse(model["ready"])
 
+    def test_checksum_cache_skips_rehash_until_file_changes_or_forced(self):
+        payload = b"moonshine"
+        manifest = [{
+            "id": "lama",
+            "type": "image",
+            "family": "lama",
+            "files": [{"path": "big-lama.pt", "sha256": hashlib.sha256(payload).hexdigest()}],
+        }]
+        with tempfile.TemporaryDirectory(prefix="moonshine-checksum-cache-") as root, mock.patch(
+            "moonshine_server.moonshine.model_registry._active_model_manifest",
+            return_value=(manifest, {}),
+        ):
+            model_path = Path(root) / "big-lama.pt"
+            model_path.write_bytes(payload)
+            clear_checksum_cache()
+            with mock.patch(
+                "moonshine_server.moonshine.model_registry._sha256_file",
+                wraps=_sha256_file,
+            ) as sha256_file:
+                self.assertTrue(build_model_status(Path(root))[0]["verified"])
+                clear_checksum_cache()
+                self.assertTrue(build_model_status(Path(root))[0]["verified"])
+                self.assertEqual(sha256_file.call_count, 1)
+                self.assertTrue((Path(root) / CHECKSUM_CACHE_FILENAME).is_file())
+
+                build_model_status(Path(root), force_verify=True)
+                self.assertEqual(sha256_file.call_count, 2)
+
+                model_path.write_bytes(b"corrupt!!")
+                model = build_model_status(Path(root))[0]
+                self.assertEqual(sha256_file.call_count, 3)
+                self.assertEqual(model["fileStatus"], "corrupt")
+            clear_checksum_cache()
+
     def test_sam1_prepares_on_cpu_while_sam2_and_sam3_remain_cuda_only(self):
         service = SamService(Path.cwd(), "cpu")
         installed = lambda family: {
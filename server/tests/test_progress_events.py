@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server import progress_events
+from moonshine_server.moonshine.sam_video_tasks import SamVideoTaskManager
+from moonshine_server.progress_events import ProgressPublisher, sam_video_room
+
+
+class FakeSio:
+    def __init__(self):
+        self.handlers = {}
+        self.emits = []
+        self.rooms = []
+
+    def on(self, event, handler=None):
+        self.handlers[event] = handler
+
+    def enter_room(self, sid, room):
+        self.rooms.append((sid, room))
+
+    def leave_room(self, sid, room):
+        self.rooms.remove((sid, room))
+
+    async def emit(self, event, data=None, to=None, room=None):
+        self.emits.append({"event": event, "data": data, "to": to, "room": room})
+
+
+class ProgressPublisherTests(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.sio = FakeSio()
+        self.publisher = ProgressPublisher(interval_s=0.05)
+        self.publisher.attach(self.sio)
+        self.publisher.bind_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+
+    def settle(self, seconds: float = 0.15):
+        time.sleep(seconds)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), self.loop).result(timeout=5)
+
+    def test_rapid_updates_are_coalesced_and_final_is_sent_immediately(self):
+        room = sam_video_room("task")
+        for current in range(1, 201):
+            self.publisher.publish(room, "sam_video_progress", {"current": current})
+        self.settle()
+
+        emitted = [item["data"]["current"] for item in self.sio.emits]
+        self.assertLessEqual(len(emitted), 3)
+        self.assertEqual(emitted[-1], 200)
+        self.assertGreater(self.publisher.coalesced, 150)
+
+        self.publisher.publish(room, "sam_video_progress", {"current": 201})
+        self.publisher.publish(room, "sam_video_progress", {"status": "completed"}, final=True)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), self.loop).result(timeout=5)
+        self.assertEqual(self.sio.emits[-1]["data"], {"status": "completed"})
+        self.assertEqual(self.sio.emits[-1]["room"], room)
+
+    def test_subscribe_joins_the_room_and_replays_the_latest_update(self):
+        room = sam_video_room("task")
+        self.publisher.publish(room, "sam_video_progress", {"current": 3})
+        self.settle()
+
+        ack = asyncio.run_coroutine_threadsafe(
+            self.sio.handlers["subscribe"]("sid-1", {"taskId": "task"}), self.loop
+        ).result(timeout=5)
+
+        self.assertEqual(ack, {"ok": True, "room": room})
+        self.assertIn(("sid-1", room), self.sio.rooms)
+        self.assertEqual(self.sio.emits[-1]["to"], "sid-1")
+        self.assertEqual(self.sio.emits[-1]["data"], {"current": 3})
+
+    def test_emit_times_are_pruned_with_the_snapshots(self):
+        with mock.patch.object(progress_events, "PROGRESS_SNAPSHOT_LIMIT", 2):
+            for task_id in ("a", "b", "c"):
+                self.publisher.publish(
+                    sam_video_room(task_id), "sam_video_progress", {"current": 1}
+                )
+            self.settle()
+
+        self.assertEqual(
+            list(self.publisher._snapshots), [sam_video_room("b"), sam_video_room("c")]
+        )
+        self.assertNotIn(sam_video_room("a"), self.publisher._last_emit_at)
+
+    def test_publish_without_a_bound_loop_is_a_no_op(self):
+        publisher = ProgressPublisher()
+        publisher.attach(FakeSio())
+        publisher.publish("room", "event", {"current": 1})
+        self.assertEqual(publisher.emitted, 0)
+
+
+class SamVideoTaskListenerTests(unittest.TestCase):
+    def test_task_state_changes_notify_listeners(self):
+        manager = SamVideoTaskManager()
+        snapshots = []
+        manager.add_listener(snapshots.append)
+
+        task = manager.create_task(request=None)
+        manager.update_progress(task.task_id, status="propagating", current=2, total=4)
+        manager.finish_task(task.task_id, {"frames": []})
+        manager.update_progress(task.task_id, status="propagating", current=3, total=4)
+
+        self.assertEqual(
+            [(item["status"], item["progress"]) for item in snapshots],
+            [("queued", 0.0), ("propagating", 0.5), ("completed", 1.0)],
+        )
+        self.assertEqual(snapshots[0]["progressRoom"], sam_video_room(task.task_id))
+        self.assertNotIn("result", snapshots[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
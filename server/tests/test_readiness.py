@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.readiness import ReadinessTracker
+
+
+class ReadinessTrackerTests(unittest.TestCase):
+    def test_components_report_state_and_timing_until_all_settle(self):
+        tracker = ReadinessTracker(("plugins", "model", "modelWarmup"))
+        snapshot = tracker.snapshot()
+        self.assertEqual(snapshot["status"], "starting")
+        self.assertFalse(snapshot["ready"])
+        self.assertEqual(snapshot["components"]["model"], {"state": "pending"})
+
+        self.assertTrue(tracker.run("plugins", lambda: {"plugins": ["RemoveBG"]}))
+        self.assertTrue(tracker.run("model", lambda: None))
+        tracker.skip("modelWarmup", "lama is not installed")
+
+        snapshot = tracker.snapshot()
+        self.assertEqual(snapshot["status"], "ready")
+        self.assertTrue(snapshot["ready"])
+        plugins = snapshot["components"]["plugins"]
+        self.assertEqual(plugins["state"], "ready")
+        self.assertEqual(plugins["plugins"], ["RemoveBG"])
+        self.assertGreaterEqual(plugins["elapsedMs"], 0)
+        self.assertEqual(snapshot["components"]["modelWarmup"]["state"], "skipped")
+        self.assertNotIn("elapsedMs", snapshot["components"]["modelWarmup"])
+
+    def test_failed_step_is_recorded_and_marks_the_server_degraded(self):
+        tracker = ReadinessTracker(("model",))
+
+        def broken_load():
+            raise RuntimeError("checkpoint is truncated")
+
+        self.assertFalse(tracker.run("model", broken_load))
+        snapshot = tracker.snapshot()
+        self.assertEqual(snapshot["status"], "degraded")
+        self.assertFalse(snapshot["ready"])
+        self.assertEqual(snapshot["components"]["model"]["error"], "checkpoint is truncated")
+
+    def test_wait_blocks_until_the_component_settles(self):
+        tracker = ReadinessTracker(("plugins",))
+        self.assertFalse(tracker.wait("plugins", timeout=0.01))
+
+        loading = threading.Event()
+        release = threading.Event()
+
+        def slow_build():
+            loading.set()
+            release.wait(timeout=5)
+
+        worker = threading.Thread(target=tracker.run, args=("plugins", slow_build))
+        worker.start()
+        loading.wait(timeout=5)
+        self.assertEqual(tracker.snapshot()["components"]["plugins"]["state"], "loading")
+        release.set()
+        self.assertTrue(tracker.wait("plugins", timeout=5))
+        worker.join(timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import base64
+import io
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.sam_service import SamService
+
+
+def _box_cxcywh_to_xyxy(boxes):
+    cx, cy, w, h = boxes.unbind(-1)
+    return torch.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], dim=-1)
+
+
+def fake_sam3_modules() -> dict:
+    sam3 = types.ModuleType("sam3")
+    model = types.ModuleType("sam3.model")
+    box_ops = types.ModuleType("sam3.model.box_ops")
+    box_ops.box_cxcywh_to_xyxy = _box_cxcywh_to_xyxy
+    data_misc = types.ModuleType("sam3.model.data_misc")
+    data_misc.FindStage = SimpleNamespace
+    data_misc.interpolate = F.interpolate
+    model.box_ops = box_ops
+    model.data_misc = data_misc
+    sam3.model = model
+    return {
+        "sam3": sam3,
+        "sam3.model": model,
+        "sam3.model.box_ops": box_ops,
+        "sam3.model.data_misc": data_misc,
+    }
+
+
+class FakeSam3Model:
+    """Finds a target only for texts containing ``cat``."""
+
+    def __init__(self):
+        self.grounding_calls = []
+        self.backbone = SimpleNamespace(forward_text=self.forward_text)
+
+    def forward_text(self, texts, device="cpu"):
+        return {"texts": list(texts)}
+
+    def _get_dummy_prompt(self, num_prompts=1):
+        return num_prompts
+
+    def forward_grounding(self, backbone_out, find_input, geometric_prompt, find_target):
+        texts = [backbone_out["texts"][int(index)] for index in find_input.text_ids]
+        self.grounding_calls.append(texts)
+        count = len(texts)
+        logits = torch.full((count, 2, 1), -10.0)
+        for index, text in enumerate(texts):
+            if "cat" in text:
+                logits[index, 0, 0] = 10.0
+        return {
+            "pred_logits": logits,
+            "presence_logit_dec": torch.full((count, 1), 10.0),
+            "pred_boxes": torch.tensor([0.5, 0.5, 0.5, 0.5]).repeat(count, 2, 1),
+            "pred_masks": torch.full((count, 2, 4, 4), 10.0),
+        }
+
+
+class FakeSam3Processor:
+    def __init__(self):
+        self.model = FakeSam3Model()
+        self.device = "cpu"
+        self.confidence_threshold = 0.5
+        self.text_prompts = []
+
+    def set_image(self, image):
+        width, height = image.size
+        return {"backbone_out": {}, "original_height": height, "original_width": width}
+
+    def reset_all_prompts(self, state):
+        state["backbone_out"].pop("texts", None)
+
+    def set_text_prompt(self, prompt, state):
+        self.text_prompts.append(prompt)
+        output = self.model.forward_grounding(
+            {"texts": [prompt]}, SimpleNamespace(text_ids=torch.tensor([0])), 1, None
+        )
+        keep = output["pred_logits"][0, :, 0] > 0
+        return {
+            "masks": torch.ones((int(keep.sum()), 1, state["original_height"], state["original_width"]), dtype=torch.bool),
+            "boxes": torch.zeros((int(keep.sum()), 4)),
+            "scores": torch.ones(int(keep.sum())),
+        }
+
+
+class Sam3TextBatchTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="moonshine-sam3-")
+        self.service = SamService(Path(self._temp_dir.name), "cpu")
+        self.processor = FakeSam3Processor()
+        self.service._get_text_predictor = lambda model_id: self.processor
+        buffer = io.BytesIO()
+        Image.fromarray(np.full((12, 16, 3), 120, dtype=np.uint8)).save(buffer, format="PNG")
+        self.image = base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def predict_batch(self):
+        return self.service.predict_text_batch(
+            image=self.image,
+            image_type="base64",
+            model_id="sam3",
+            queries=[
+                {"text": "cat", "language": "en"},
+                {"text": "dog", "language": "en"},
+                {"text": "红色 cat", "language": "zh"},
+            ],
+        )
+
+    def test_candidate_prompts_share_one_grounding_forward(self):
+        with mock.patch.dict(sys.modules, fake_sam3_modules()):
+            result = self.predict_batch()
+
+        self.assertEqual(self.processor.model.grounding_calls, [["cat", "dog", "红色 cat", "red cat"]])
+        self.assertEqual(self.processor.text_prompts, [])
+        counts = [len(item["candidates"]) for item in result["results"]]
+        self.assertEqual(counts, [1, 0, 1])
+        self.assertEqual(result["results"][2]["diagnostics"]["usedPrompt"]["text"], "红色 cat")
+        self.assertEqual(result["results"][0]["candidates"][0]["box"]["x1"], 12)
+        self.assertEqual(result["performance"]["batchedPrompts"], 4)
+
+    def test_missing_batched_inputs_fall_back_to_one_prompt_at_a_time(self):
+        with mock.patch.dict(sys.modules, {"sam3": None}):
+            result = self.predict_batch()
+
+        # "红色 cat" already returns masks, so its "red cat" fallback never runs.
+        self.assertEqual(self.processor.text_prompts, ["cat", "dog", "红色 cat"])
+        counts = [len(item["candidates"]) for item in result["results"]]
+        self.assertEqual(counts, [1, 0, 1])
+        self.assertEqual(result["performance"]["batchedPrompts"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+import torch
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.sam_embedding_cache import (
+    SamEmbeddingCache,
+    capture_predictor_state,
+    restore_predictor_state,
+)
+
+
+class FakeSam2Predictor:
+    def __init__(self):
+        self._features = None
+        self._orig_hw = None
+        self._is_image_set = False
+        self._is_batch = False
+        self.encoded = 0
+
+    def set_image(self, value: float):
+        self.encoded += 1
+        self._features = {
+            "image_embed": torch.full((1, 4, 8, 8), value),
+            "high_res_feats": [torch.full((1, 2, 16, 16), value)],
+        }
+        self._orig_hw = [(64, 64)]
+        self._is_image_set = True
+
+
+def embedding_bytes() -> int:
+    return (4 * 8 * 8 + 2 * 16 * 16) * 4
+
+
+class SamEmbeddingCacheTests(unittest.TestCase):
+    def test_flipping_between_images_restores_the_embedding(self):
+        predictor = FakeSam2Predictor()
+        cache = SamEmbeddingCache(max_bytes=embedding_bytes() * 4)
+        for key, value in (("a", 1.0), ("b", 2.0)):
+            predictor.set_image(value)
+            cache.put(key, capture_predictor_state(predictor))
+
+        restore_predictor_state(predictor, cache.get("a"), "cpu")
+
+        self.assertEqual(predictor.encoded, 2)
+        self.assertEqual(float(predictor._features["image_embed"].mean()), 1.0)
+        self.assertEqual(float(predictor._features["high_res_feats"][0].mean()), 1.0)
+        self.assertIsNone(cache.get("c"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["bytes"], embedding_bytes() * 2)
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        predictor = FakeSam2Predictor()
+        cache = SamEmbeddingCache(max_bytes=embedding_bytes() * 2, hot_entries=1)
+        for key, value in (("a", 1.0), ("b", 2.0)):
+            predictor.set_image(value)
+            cache.put(key, capture_predictor_state(predictor))
+        cache.get("a")
+        predictor.set_image(3.0)
+        cache.put("c", capture_predictor_state(predictor))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["offloadedEntries"], 1)
+
+    def test_discard_drops_entries_for_one_model(self):
+        cache = SamEmbeddingCache()
+        predictor = FakeSam2Predictor()
+        predictor.set_image(1.0)
+        cache.put(("sam1", "cpu", "a"), capture_predictor_state(predictor))
+        cache.put(("sam2", "cpu", "a"), capture_predictor_state(predictor))
+
+        self.assertEqual(cache.discard(lambda key: key[0] == "sam1"), 1)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.sam_service import SamImageNotCachedError
+from sam_fakes import FakeSamPredictor, make_fake_sam_service
+
+
+class SamImageIdentityTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="moonshine-sam-")
+        self.predictor = FakeSamPredictor()
+        self.service = make_fake_sam_service(self._temp_dir.name, self.predictor)
+        self.image_path = Path(self._temp_dir.name) / "image.png"
+        Image.fromarray(np.full((24, 32, 3), 90, dtype=np.uint8)).save(self.image_path)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def predict(self, **kwargs):
+        return self.service.predict(
+            image_type="path",
+            model_id="sam_vit_b",
+            points=[{"x": 4, "y": 4, "label": 1}],
+            box=None,
+            multimask_output=False,
+            **kwargs,
+        )
+
+    def test_path_identity_tracks_size_and_mtime(self):
+        first = self.service._image_identity(str(self.image_path), "path")
+        self.assertEqual(first, self.service._image_identity(str(self.image_path), "path"))
+        content = self.service._image_identity(str(self.image_path), "path", mode="content")
+
+        stat = self.image_path.stat()
+        os.utime(self.image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertNotEqual(first, self.service._image_identity(str(self.image_path), "path"))
+        self.assertEqual(
+            content, self.service._image_identity(str(self.image_path), "path", mode="content")
+        )
+
+    def test_hash_only_request_reuses_the_prepared_embedding(self):
+        first = self.predict(image=str(self.image_path))
+        self.predictor.set_image(np.zeros((8, 8, 3), dtype=np.uint8))
+        self.service._image_cache.clear()
+
+        second = self.predict(image="", image_hash=first["imageHash"])
+
+        self.assertEqual(self.predictor.encoded, 2)
+        self.assertEqual((second["width"], second["height"]), (32, 24))
+        self.assertTrue(second["performance"]["embeddingCacheHit"])
+
+    def test_hash_only_request_for_unknown_image_asks_for_the_image(self):
+        with self.assertRaises(SamImageNotCachedError):
+            self.predict(image="", image_hash="0" * 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.sam_mask_encoding import (
+    decode_mask,
+    encode_mask_bitmap,
+    encode_mask_rle,
+)
+from moonshine_server.moonshine.sam_service import SamServiceError
+from sam_fakes import FakeSamPredictor, make_fake_sam_service
+
+
+class SamMaskEncodingTests(unittest.TestCase):
+    def test_rle_uses_coco_column_major_counts(self):
+        mask = np.array([[0, 1], [1, 1]], dtype=bool)
+
+        encoded = encode_mask_rle(mask)
+
+        self.assertEqual(encoded["counts"], [1, 3])
+        self.assertEqual(encode_mask_rle(np.ones((2, 2), dtype=bool))["counts"], [0, 4])
+        self.assertEqual(encoded["bbox"], [0, 0, 2, 2])
+
+    def test_encodings_round_trip(self):
+        rng = np.random.default_rng(7)
+        masks = [
+            rng.random((37, 53)) > 0.6,
+            np.zeros((9, 11), dtype=bool),
+            np.ones((4, 9), dtype=bool),
+        ]
+        for mask in masks:
+            for encoder in (encode_mask_rle, encode_mask_bitmap):
+                with self.subTest(encoder=encoder.__name__, shape=mask.shape, area=int(mask.sum())):
+                    np.testing.assert_array_equal(decode_mask(encoder(mask)), mask)
+
+    def test_predict_returns_requested_encoding(self):
+        with tempfile.TemporaryDirectory(prefix="moonshine-sam-") as temp_dir:
+            service = make_fake_sam_service(temp_dir, FakeSamPredictor(np.s_[3:9, 5:20]))
+            image_path = Path(temp_dir) / "image.png"
+            Image.fromarray(np.zeros((24, 32, 3), dtype=np.uint8)).save(image_path)
+            request = {
+                "image": str(image_path),
+                "image_type": "path",
+                "model_id": "sam_vit_b",
+                "points": [{"x": 4, "y": 4, "label": 1}],
+                "box": None,
+                "multimask_output": False,
+            }
+
+            result = service.predict(**request, mask_encoding="bitmap")
+            png_result = service.predict(**request)
+            with self.assertRaises(SamServiceError):
+                service.predict(**request, mask_encoding="jpeg")
+
+        encoded = result["candidates"][0]["mask"]
+        self.assertEqual(result["maskEncoding"], "bitmap")
+        self.assertEqual(encoded["bbox"], [5, 3, 15, 6])
+        self.assertEqual(int(decode_mask(encoded).sum()), 6 * 15)
+        self.assertTrue(png_result["candidates"][0]["mask"].startswith("data:image/png;base64,"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.gpu_arbiter import GPU_PRIORITY_BULK, gpu_arbiter
+from moonshine_server.moonshine.sam_prepare import SamImagePrepareQueue
+from sam_fakes import FakeSamPredictor, make_fake_sam_service
+
+
+class FakeVideoPredictor:
+    def __init__(self, events: list):
+        self.events = events
+        self.paused = threading.Event()
+        self.resume = threading.Event()
+
+    def init_state(self, frame_dir, **kwargs):
+        return {"video_width": 8, "video_height": 8}
+
+    def add_new_points_or_box(self, state, **kwargs):
+        pass
+
+    def propagate_in_video(self, state, **kwargs):
+        for frame_index in range(3):
+            if frame_index == 1:
+                self.paused.set()
+                self.resume.wait(5)
+            self.events.append(f"frame {frame_index}")
+            yield frame_index, [1], torch.ones((1, 1, 4, 4))
+
+
+class SamPrepareImageTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="moonshine-sam-")
+        self.predictor = FakeSamPredictor()
+        self.service = make_fake_sam_service(self._temp_dir.name, self.predictor)
+        self.image_paths = []
+        for index in range(3):
+            path = Path(self._temp_dir.name) / f"image-{index}.png"
+            Image.fromarray(np.full((24, 32, 3), 40 * index, dtype=np.uint8)).save(path)
+            self.image_paths.append(str(path))
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_prepared_image_skips_the_encoder_on_first_click(self):
+        prepared = self.service.prepare_image(
+            image=self.image_paths[0], image_type="path", model_id="sam_vit_b"
+        )
+        self.service.prepare_image(image=self.image_paths[1], image_type="path", model_id="sam_vit_b")
+
+        result = self.service.predict(
+            image=self.image_paths[0],
+            image_type="path",
+            model_id="sam_vit_b",
+            points=[{"x": 4, "y": 4, "label": 1}],
+            box=None,
+            multimask_output=False,
+        )
+        again = self.service.prepare_image(
+            image=self.image_paths[0], image_type="path", model_id="sam_vit_b"
+        )
+
+        self.assertFalse(prepared["cached"])
+        self.assertEqual(result["imageHash"], prepared["imageHash"])
+        self.assertTrue(result["performance"]["embeddingCacheHit"])
+        self.assertTrue(again["cached"])
+        self.assertEqual(self.predictor.encoded, 2)
+
+    def test_offload_keeps_prepared_embeddings_on_cpu(self):
+        prepared = self.service.prepare_image(
+            image=self.image_paths[0], image_type="path", model_id="sam_vit_b"
+        )
+
+        released = self.service.offload()
+        again = self.service.prepare_image(
+            image=self.image_paths[0], image_type="path", model_id="sam_vit_b"
+        )
+        self.assertEqual(released["embeddingCache"], 0)
+        self.assertEqual(released["embeddingOffloaded"], 1)
+        self.assertTrue(again["cached"])
+        self.assertEqual(again["imageHash"], prepared["imageHash"])
+
+        released = self.service.release()
+        again = self.service.prepare_image(
+            image=self.image_paths[0], image_type="path", model_id="sam_vit_b"
+        )
+        self.assertEqual(released["embeddingCache"], 1)
+        self.assertFalse(again["cached"])
+        self.assertEqual(self.predictor.encoded, 2)
+
+    def test_click_runs_between_frames_of_a_running_propagation(self):
+        events = []
+        video_predictor = FakeVideoPredictor(events)
+        self.service._get_video_model_status = lambda model_id: {"family": "sam2"}
+        self.service._get_video_predictor = lambda model_id: video_predictor
+        frame_dir = Path(self._temp_dir.name) / "frames"
+        frame_dir.mkdir()
+        for index in range(3):
+            frame = Image.fromarray(np.zeros((8, 8, 3), dtype=np.uint8))
+            frame.save(frame_dir / f"{index:05d}.jpg")
+        original_predict = self.predictor.predict
+
+        def predict(**kwargs):
+            events.append("click")
+            return original_predict(**kwargs)
+
+        self.predictor.predict = predict
+        propagation = threading.Thread(
+            target=self.service.propagate_video,
+            kwargs={
+                "frame_dir": str(frame_dir),
+                "model_id": "sam2.1_hiera_tiny",
+                "frame_index": 0,
+                "object_id": 1,
+                "points": [{"x": 2, "y": 2, "label": 1}],
+                "box": None,
+                "max_frames": None,
+                "reverse": False,
+                "offload_video_to_cpu": True,
+                "offload_state_to_cpu": True,
+            },
+        )
+        propagation.start()
+        self.assertTrue(video_predictor.paused.wait(5))
+        click = threading.Thread(
+            target=self.service.predict,
+            kwargs={
+                "image": self.image_paths[0],
+                "image_type": "path",
+                "model_id": "sam_vit_b",
+                "points": [{"x": 4, "y": 4, "label": 1}],
+                "box": None,
+                "multimask_output": False,
+            },
+        )
+        click.start()
+        deadline = time.monotonic() + 5
+        while gpu_arbiter.stats()["devices"]["cpu"]["waiting"]["interactive"] != 1:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        video_predictor.resume.set()
+        click.join(timeout=5)
+        propagation.join(timeout=5)
+
+        self.assertFalse(click.is_alive())
+        self.assertFalse(propagation.is_alive())
+        self.assertEqual(events, ["frame 0", "frame 1", "click", "frame 2"])
+
+    def test_click_passes_a_prepare_queued_behind_bulk_work(self):
+        stop = threading.Event()
+        holding = threading.Event()
+
+        def video_batch():
+            with gpu_arbiter.acquire("cpu", GPU_PRIORITY_BULK, "video_batch") as lease:
+                holding.set()
+                while not stop.wait(0.02):
+                    lease.yield_point()
+
+        batch = threading.Thread(target=video_batch)
+        batch.start()
+        try:
+            self.assertTrue(holding.wait(5))
+            prepare = threading.Thread(
+                target=self.service.prepare_image,
+                kwargs={"image": self.image_paths[1], "image_type": "path", "model_id": "sam_vit_b"},
+            )
+            prepare.start()
+            deadline = time.monotonic() + 5
+            while gpu_arbiter.stats()["devices"]["cpu"]["waiting"]["bulk"] != 1:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            results = []
+            click = threading.Thread(
+                target=lambda: results.append(
+                    self.service.predict(
+                        image=self.image_paths[0],
+                        image_type="path",
+                        model_id="sam_vit_b",
+                        points=[{"x": 4, "y": 4, "label": 1}],
+                        box=None,
+                        multimask_output=False,
+                    )
+                )
+            )
+            click.start()
+            click.join(timeout=5)
+
+            self.assertFalse(click.is_alive())
+            self.assertEqual(len(results), 1)
+            # The click got in at a yield point while the batch was still running.
+            self.assertTrue(batch.is_alive())
+        finally:
+            stop.set()
+            batch.join(timeout=5)
+        prepare.join(timeout=5)
+        self.assertFalse(prepare.is_alive())
+        self.assertEqual(self.predictor.encoded, 2)
+
+    def test_new_submission_supersedes_queued_images(self):
+        release = threading.Event()
+        prepared = []
+
+        class BlockingService:
+            def prepare_image(self, *, image, image_type, model_id, image_id=None):
+                release.wait(5)
+                prepared.append(image)
+                return {"setImageMs": 1.0}
+
+        queue = SamImagePrepareQueue()
+        service = BlockingService()
+        items = [
+            {"image": path, "imageType": "path", "imageHash": f"hash-{index}"}
+            for index, path in enumerate(self.image_paths)
+        ]
+        queue.submit(service, "sam_vit_b", items[:2])
+        deadline = time.monotonic() + 5
+        while queue.status(["hash-0"])["items"][0]["status"] != "running":
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        queue.submit(service, "sam_vit_b", items[2:])
+        release.set()
+        while queue.status()["pending"] or queue.status(["hash-2"])["items"][0]["status"] != "ready":
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        statuses = [item["status"] for item in queue.status(["hash-0", "hash-1", "hash-2", "x"])["items"]]
+        self.assertEqual(statuses, ["ready", "superseded", "ready", "unknown"])
+        self.assertEqual(prepared, [self.image_paths[0], self.image_paths[2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
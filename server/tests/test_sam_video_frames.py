@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.sam_video_frames import (
+    SAM2_IMG_MEAN,
+    SAM2_IMG_STD,
+    StreamingVideoFrameLoader,
+    count_video_frames,
+)
+from moonshine_server.plugins.segment_anything2.utils.misc import (
+    _load_img_as_tensor,
+    load_video_frames,
+)
+
+FRAME_COUNT = 30
+INTER_FRAME_COUNT = 60
+
+
+def frame_value(index: int) -> int:
+    return 10 + index * 8
+
+
+class StreamingVideoFrameLoaderTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="moonshine-sam2-frames-")
+        self.video_path = Path(self._temp_dir.name) / "clip.avi"
+        writer = cv2.VideoWriter(
+            str(self.video_path), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (40, 24)
+        )
+        for index in range(FRAME_COUNT):
+            frame = np.full((24, 40, 3), frame_value(index), dtype=np.uint8)
+            frame[:, :20, 0] = 255 - frame_value(index)
+            writer.write(frame)
+        writer.release()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def write_inter_coded_clip(self) -> Path:
+        path = Path(self._temp_dir.name) / "clip.mp4"
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10.0, (48, 32))
+        if not writer.isOpened():
+            self.skipTest("OpenCV cannot write MPEG-4 video here")
+        for index in range(INTER_FRAME_COUNT):
+            writer.write(np.full((32, 48, 3), 10 + index * 4, dtype=np.uint8))
+        writer.release()
+        return path
+
+    def open_loader(
+        self, lookahead: int = 4, video_path: Path | None = None, **kwargs
+    ) -> StreamingVideoFrameLoader:
+        loader = StreamingVideoFrameLoader(
+            video_path or self.video_path,
+            image_size=16,
+            offload_video_to_cpu=True,
+            compute_device="cpu",
+            lookahead=lookahead,
+            **kwargs,
+        )
+        self.addCleanup(loader.close)
+        return loader
+
+    def decoded_value(self, tensor: torch.Tensor) -> int:
+        std = torch.tensor(SAM2_IMG_STD)[:, None, None]
+        mean = torch.tensor(SAM2_IMG_MEAN)[:, None, None]
+        rgb = (tensor * std + mean) * 255
+        return int(round(float(rgb[1].mean())))
+
+    def test_frames_match_the_jpeg_staging_path(self):
+        loader = self.open_loader()
+        capture = cv2.VideoCapture(str(self.video_path))
+        capture.read()
+        ok, frame_bgr = capture.read()
+        capture.release()
+        self.assertTrue(ok)
+        staged_path = Path(self._temp_dir.name) / "000001.png"
+        Image.fromarray(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)).save(staged_path)
+        expected, height, width = _load_img_as_tensor(str(staged_path), 16)
+        expected = (expected.float() - torch.tensor(SAM2_IMG_MEAN)[:, None, None]) / torch.tensor(
+            SAM2_IMG_STD
+        )[:, None, None]
+
+        torch.testing.assert_close(loader[1], expected, rtol=0, atol=1e-5)
+        self.assertEqual((loader.video_height, loader.video_width), (height, width))
+        self.assertEqual(len(loader), count_video_frames(self.video_path))
+
+    def test_reverse_walk_stays_bounded_and_decodes_in_windows(self):
+        loader = self.open_loader(lookahead=4)
+
+        values = [self.decoded_value(loader[index]) for index in reversed(range(FRAME_COUNT))]
+        forward = [self.decoded_value(loader[index]) for index in range(FRAME_COUNT)]
+
+        expected = [frame_value(index) for index in reversed(range(FRAME_COUNT))]
+        for actual, wanted in zip(values + forward[::-1], expected * 2):
+            self.assertLessEqual(abs(actual - wanted), 2)
+        self.assertLessEqual(len(loader._frames), loader.capacity)
+        self.assertLess(loader.stats()["seeks"], FRAME_COUNT // 2)
+
+    def test_reverse_walk_on_inter_coded_clip_reads_buffered_chunks(self):
+        video_path = self.write_inter_coded_clip()
+        loader = self.open_loader(lookahead=4, video_path=video_path, buffer_mb=0)
+
+        values = [self.decoded_value(loader[index]) for index in reversed(range(INTER_FRAME_COUNT))]
+
+        self.assertEqual(len(loader), INTER_FRAME_COUNT)
+        for index, actual in zip(reversed(range(INTER_FRAME_COUNT)), values):
+            self.assertLessEqual(abs(actual - (10 + index * 4)), 2, index)
+        stats = loader.stats()
+        self.assertLessEqual(stats["bufferedFrames"], loader.buffer_frames)
+        self.assertLessEqual(stats["seeks"], INTER_FRAME_COUNT // loader.buffer_frames + 1)
+
+    def test_seek_that_misses_the_frame_falls_back_to_skipping_forward(self):
+        video_path = self.write_inter_coded_clip()
+        loader = self.open_loader(lookahead=4, video_path=video_path, buffer_mb=0)
+        loader[INTER_FRAME_COUNT - 1]
+
+        class KeyframeSeekingCapture:
+            """Reports the keyframe a real decoder may land on instead of the target."""
+
+            def __init__(self, capture):
+                self._capture = capture
+
+            def set(self, prop, value):
+                return self._capture.set(prop, max(0, value - 3))
+
+            def __getattr__(self, name):
+                return getattr(self._capture, name)
+
+        loader._capture = KeyframeSeekingCapture(loader._capture)
+        value = self.decoded_value(loader[20])
+
+        self.assertLessEqual(abs(value - (10 + 20 * 4)), 2)
+        self.assertEqual(loader.stats()["rewinds"], 1)
+
+    def test_sam2_loader_accepts_a_frame_source(self):
+        loader = self.open_loader()
+
+        images, height, width = load_video_frames(loader, 16, offload_video_to_cpu=True)
+
+        self.assertIs(images, loader)
+        self.assertEqual((height, width), (24, 40))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.mask_tracks import MaskTrackStore, open_mask_track
+from moonshine_server.moonshine.sam_video_tasks import SamVideoTaskManager
+
+
+def mask_result(frame_count: int) -> dict:
+    return {
+        "frames": [
+            {"frameIndex": index, "masks": [{"objectId": 1, "mask": "data:image/png;base64," + "A" * 64}]}
+            for index in range(frame_count)
+        ]
+    }
+
+
+class SamVideoTaskRetentionTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.spill_dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_manager(self, **kwargs) -> SamVideoTaskManager:
+        options = {"spill_bytes": 4096, "spill_dir": str(self.spill_dir)}
+        options.update(kwargs)
+        return SamVideoTaskManager(**options)
+
+    def finish(self, manager: SamVideoTaskManager, frame_count: int):
+        task = manager.create_task(request=None)
+        manager.finish_task(task.task_id, mask_result(frame_count))
+        return task
+
+    def test_large_results_are_spilled_and_small_ones_stay_in_memory(self):
+        manager = self.make_manager()
+        small = self.finish(manager, 2)
+        large = self.finish(manager, 200)
+
+        self.assertIsNotNone(small.result)
+        self.assertIsNone(small.result_path)
+        self.assertIsNone(large.result)
+        self.assertEqual(json.loads(Path(large.result_path).read_text("utf-8")), mask_result(200))
+        self.assertTrue(large.to_dict()["resultSpilled"])
+
+        stats = manager.stats()
+        self.assertEqual(stats["inMemoryResultCount"], 1)
+        self.assertEqual(stats["inMemoryResultBytes"], small.result_bytes)
+        self.assertEqual(stats["spilledResultCount"], 1)
+        self.assertEqual(stats["spilledResultBytes"], Path(large.result_path).stat().st_size)
+
+    def test_finished_tasks_are_evicted_by_count_and_age(self):
+        manager = self.make_manager(max_finished=2, retention_seconds=60)
+        spilled = self.finish(manager, 200)
+        middle = self.finish(manager, 1)
+        active = manager.create_task(request=None)
+        newest = self.finish(manager, 1)
+
+        self.assertIsNone(manager.get_task(spilled.task_id))
+        self.assertFalse(Path(spilled.result_path).exists())
+        self.assertIsNotNone(manager.get_task(middle.task_id))
+
+        newest.completed_at -= 120
+        middle.completed_at -= 120
+        stats = manager.stats()
+        self.assertIsNone(manager.get_task(middle.task_id))
+        self.assertIsNone(manager.get_task(newest.task_id))
+        self.assertIs(manager.get_task(active.task_id), active)
+        self.assertEqual(stats["evictedTaskCount"], 3)
+        self.assertEqual(stats["activeTaskCount"], 1)
+
+    def test_only_expired_spills_of_other_processes_are_removed(self):
+        other_dir = self.spill_dir / "4242-earlier"
+        other_dir.mkdir()
+        stale_path = other_dir / "stale-task.json"
+        live_path = other_dir / "live-task.json"
+        legacy_path = self.spill_dir / "legacy-task.json"
+        unrelated_path = self.spill_dir / "notes.txt"
+        for path in (stale_path, live_path, legacy_path, unrelated_path):
+            path.write_text("{}", encoding="utf-8")
+        expired = time.time() - 120
+        for path in (stale_path, legacy_path):
+            os.utime(path, (expired, expired))
+
+        manager = self.make_manager(retention_seconds=60)
+        self.assertTrue(stale_path.exists())
+        own = self.finish(manager, 200)
+        os.utime(own.result_path, (expired, expired))
+
+        self.assertEqual(manager.clear_stale_spills(), 2)
+        self.assertFalse(stale_path.exists())
+        self.assertFalse(legacy_path.exists())
+        self.assertTrue(live_path.exists())
+        self.assertTrue(unrelated_path.exists())
+        self.assertTrue(Path(own.result_path).exists())
+        self.assertNotEqual(self.make_manager().spill_dir, manager.spill_dir)
+
+    def test_running_tasks_report_the_size_of_their_frames(self):
+        manager = self.make_manager()
+        task = manager.create_task(request=None)
+        callback = manager.make_progress_callback(task.task_id)
+
+        callback(status="propagating", current=1, total=4)
+        self.assertEqual(manager.stats()["inFlightResultBytes"], 0)
+        callback(status="propagating", current=2, total=4, result_bytes=5000)
+        self.assertEqual(manager.stats()["inFlightResultBytes"], 5000)
+        self.assertEqual(task.to_dict()["pendingResultBytes"], 5000)
+
+        manager.finish_task(task.task_id, mask_result(1))
+        self.assertEqual(manager.stats()["inFlightResultBytes"], 0)
+
+    def test_evicting_a_track_task_closes_its_track_readers(self):
+        track_dir = self.spill_dir / "tracks"
+        store = MaskTrackStore(track_dir, 16, 8, run_id="evict")
+        entry = store.append(0, 1, np.full((8, 16), 255, dtype=np.uint8))
+        store.close()
+        reader = open_mask_track(entry["maskTrack"])
+        self.assertIs(open_mask_track(entry["maskTrack"]), reader)
+
+        manager = self.make_manager(max_finished=0)
+        task = manager.create_task(request=None)
+        manager.finish_task(
+            task.task_id,
+            {"frames": [], "input": {"responseType": "track", "maskOutputDir": str(track_dir)}},
+        )
+
+        self.assertIsNone(manager.get_task(task.task_id))
+        self.assertIsNot(open_mask_track(entry["maskTrack"]), reader)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch import nn
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.slbr_runner import SlbrRunner
+
+
+class TinySlbr(nn.Module):
+    """Shape-compatible stand-in for the SLBR network."""
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.image = nn.Conv2d(3, 3, 3, padding=1)
+        self.mask = nn.Conv2d(3, 1, 3, padding=1)
+
+    def forward(self, batch):
+        return [torch.sigmoid(self.image(batch))], [torch.sigmoid(self.mask(batch))], None
+
+
+class TinySlbrRunner(SlbrRunner):
+    def _load_model(self):
+        if self._model is None:
+            self._model = TinySlbr().to(self.device).eval()
+        return self._model
+
+
+class SlbrPrecisionTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="moonshine-slbr-")
+        self.runner = TinySlbrRunner(self._temp_dir.name, device="cpu")
+        rng = np.random.default_rng(7)
+        self.images = [
+            rng.integers(0, 255, size=(180, 240, 3), dtype=np.uint8),
+            np.full((200, 200, 3), 127, dtype=np.uint8),
+        ]
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_fp16_falls_back_to_fp32_on_cpu(self):
+        self.assertEqual(self.runner.resolve_precision("fp16"), "fp32")
+        self.assertEqual(self.runner.resolve_precision("unknown"), "fp32")
+
+    def test_reduced_precision_stays_close_to_fp32(self):
+        report = self.runner.check_precision_parity(self.images, "bf16", tile_size=256)
+
+        self.assertEqual(report["precision"], self.runner.resolve_precision("bf16"))
+        self.assertEqual(len(report["images"]), 2)
+        self.assertTrue(report["passed"], report)
+        if report["precision"] == "bf16":
+            # The one model is converted in place, so fp32 forwards share its weights.
+            self.assertTrue(
+                self.runner._model.image.weight.is_contiguous(memory_format=torch.channels_last)
+            )
+
+    def test_local_diagnostics_report_precision(self):
+        mask = np.zeros((180, 240), dtype=np.uint8)
+        mask[20:60, 30:90] = 255
+
+        _, diagnostics = self.runner.infer_bgr_local(
+            self.images[0], mask, tile_size=256, precision="fp16"
+        )
+
+        self.assertEqual(diagnostics["precision"], "fp32")
+
+
+if __name__ == "__main__":
+    unittest.main()
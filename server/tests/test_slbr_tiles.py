@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import torch
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine.slbr_runner import (
+    SlbrRunner,
+    _blend_weight,
+    _pad_center_black,
+    _tile_positions,
+    get_overlap_for_tile_size,
+)
+
+
+class InvertingRunner(SlbrRunner):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.forward_sizes = []
+
+    def _forward(self, batch: torch.Tensor, precision: str = "fp32"):
+        self.forward_sizes.append(int(batch.shape[0]))
+        batch = batch.to(self.device).float()
+        return 1.0 - batch, batch[:, :1]
+
+
+def reference_blend(image_bgr: np.ndarray, tile_size: int):
+    """Per-tile CPU accumulation the runner used before moving sums on device."""
+    overlap = get_overlap_for_tile_size(tile_size)
+    stride = tile_size - overlap
+    canvas_bgr, (top, left, height, width) = _pad_center_black(image_bgr, tile_size, overlap, 16)
+    canvas = torch.from_numpy(canvas_bgr[:, :, ::-1].astype(np.float32).transpose(2, 0, 1) / 255.0)
+    weight = _blend_weight(tile_size, overlap)
+    clean_sum = torch.zeros_like(canvas)
+    weight_sum = torch.zeros_like(canvas[:1])
+    for y in _tile_positions(canvas.shape[1], tile_size, stride):
+        for x in _tile_positions(canvas.shape[2], tile_size, stride):
+            tile = canvas[:, y:y + tile_size, x:x + tile_size]
+            clean_sum[:, y:y + tile_size, x:x + tile_size] += (1.0 - tile) * weight
+            weight_sum[:, y:y + tile_size, x:x + tile_size] += weight
+    clean = (clean_sum / weight_sum.clamp_min(1e-6))[:, top:top + height, left:left + width]
+    clean = (clean.clamp(0, 1).numpy().transpose(1, 2, 0) * 255.0).round().astype(np.uint8)
+    return np.ascontiguousarray(clean[:, :, ::-1])
+
+
+class SlbrTileAccumulationTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="moonshine-slbr-")
+        self.runner = InvertingRunner(self._temp_dir.name, device="cpu")
+        self.image = np.random.default_rng(11).integers(0, 255, size=(300, 420, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_full_grid_matches_per_tile_accumulation(self):
+        clean_bgr, mask_bgr = self.runner.infer_bgr(self.image, tile_size=256, tile_batch=3)
+
+        expected = reference_blend(self.image, 256)
+        self.assertEqual(clean_bgr.shape, self.image.shape)
+        self.assertLessEqual(int(np.abs(clean_bgr.astype(int) - expected.astype(int)).max()), 1)
+        np.testing.assert_array_equal(mask_bgr[:, :, 0], self.image[:, :, 2])
+
+    def test_selected_tiles_match_full_grid_where_covered(self):
+        overlap = get_overlap_for_tile_size(256)
+        canvas, _ = _pad_center_black(self.image, 256, overlap, 16)
+        stride = 256 - overlap
+        positions = [
+            (y, x)
+            for y in _tile_positions(canvas.shape[0], 256, stride)
+            for x in _tile_positions(canvas.shape[1], 256, stride)
+        ]
+
+        selected = self.runner.infer_bgr_selected_tiles(self.image, positions, tile_size=256)
+        full, _ = self.runner.infer_bgr(self.image, tile_size=256)
+
+        np.testing.assert_array_equal(selected, full)
+
+    def test_images_share_forwards_without_changing_results(self):
+        rng = np.random.default_rng(5)
+        second = rng.integers(0, 255, size=(200, 260, 3), dtype=np.uint8)
+        mask = np.zeros(second.shape[:2], dtype=np.uint8)
+        mask[40:90, 60:120] = 255
+
+        expected_full, _ = self.runner.infer_bgr(self.image, tile_size=256, tile_batch=3)
+        expected_local, expected_diagnostics = self.runner.infer_bgr_local(
+            second, mask, tile_size=256, tile_batch=3
+        )
+        single_forwards = len(self.runner.forward_sizes)
+        self.runner.forward_sizes.clear()
+
+        (full, no_diagnostics), (local, diagnostics) = self.runner.infer_bgr_many(
+            [(self.image, None), (second, mask)], tile_size=256, tile_batch=3
+        )
+
+        np.testing.assert_array_equal(full, expected_full)
+        np.testing.assert_array_equal(local, expected_local)
+        self.assertIsNone(no_diagnostics)
+        self.assertEqual(diagnostics, expected_diagnostics)
+        self.assertEqual(single_forwards, 3)
+        self.assertEqual(self.runner.forward_sizes, [3, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import torch
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.moonshine import slbr_tuning
+from moonshine_server.moonshine.slbr_runner import SlbrRunner, get_overlap_for_tile_size
+from moonshine_server.moonshine.slbr_tuning import (
+    SlbrTuningStore,
+    calibrate_slbr_tiles,
+    device_profile_key,
+)
+
+
+class LimitedMemoryRunner(SlbrRunner):
+    max_tiles = 2
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.forward_sizes = []
+
+    def _forward(self, batch: torch.Tensor, precision: str = "fp32"):
+        if batch.shape[0] > self.max_tiles:
+            raise RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB")
+        self.forward_sizes.append(int(batch.shape[0]))
+        batch = batch.to(self.device).float()
+        return 1.0 - batch, batch[:, :1]
+
+
+class SlbrCalibrationTests(unittest.TestCase):
+    def test_probe_keeps_the_fastest_batch_that_fits(self):
+        clock = [0.0]
+
+        def forward(batch: torch.Tensor):
+            if batch.shape[0] > 8:
+                raise RuntimeError("CUDA out of memory")
+            clock[0] += 0.002 + 0.0005 * batch.shape[0]
+
+        fake_time = SimpleNamespace(perf_counter=lambda: clock[0], time=time.time)
+        with mock.patch.object(slbr_tuning, "time", fake_time):
+            profile = calibrate_slbr_tiles(
+                forward, torch.device("cpu"), get_overlap_for_tile_size, tile_sizes=(256, 384)
+            )
+
+        self.assertEqual(set(profile["tile_sizes"]), {"256", "384"})
+        self.assertEqual(profile["tile_sizes"]["256"]["tile_batch"], 8)
+        # Equal tiles/sec favours the size that covers more pixels per tile.
+        self.assertEqual(profile["tile_size"], 384)
+        self.assertEqual(profile["tile_batch"], 8)
+
+    def test_store_round_trips_profiles_per_device(self):
+        with tempfile.TemporaryDirectory(prefix="moonshine-slbr-") as temp_dir:
+            store = SlbrTuningStore(Path(temp_dir) / "slbr_tuning.json")
+            store.save("cuda:A:8192mb", {"version": 1, "tile_size": 384, "tile_batch": 6})
+
+            self.assertEqual(store.load("cuda:A:8192mb")["tile_batch"], 6)
+            self.assertIsNone(SlbrTuningStore(store.path).load("cuda:B:4096mb"))
+
+
+class SlbrOutOfMemoryBackoffTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="moonshine-slbr-")
+        self.runner = LimitedMemoryRunner(self._temp_dir.name, device="cpu")
+        self.image = np.random.default_rng(3).integers(0, 255, size=(300, 420, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_oom_halves_the_batch_and_keeps_the_result(self):
+        clean_bgr, _ = self.runner.infer_bgr(self.image, tile_size=256, tile_batch=8)
+        expected, _ = self.runner.infer_bgr(self.image, tile_size=256, tile_batch=1)
+
+        np.testing.assert_array_equal(clean_bgr, expected)
+        self.assertEqual(max(self.runner.forward_sizes), 2)
+        self.assertEqual(self.runner.resolve_tile_params(256, 8), (256, 2))
+        self.assertEqual(self.runner.resolve_tile_params(384, 8), (384, 8))
+
+    def test_auto_uses_the_saved_profile_for_this_device(self):
+        SlbrTuningStore(Path(self._temp_dir.name) / "slbr_tuning.json").save(
+            device_profile_key(torch.device("cpu")),
+            {"version": 1, "tile_size": 512, "tile_batch": 3, "oom_batch_caps": {"512": 2}},
+        )
+
+        self.assertEqual(self.runner.resolve_tile_params("auto", 4), (512, 2))
+
+    def test_profiles_and_oom_caps_are_kept_per_precision(self):
+        store = SlbrTuningStore(Path(self._temp_dir.name) / "slbr_tuning.json")
+        device_key = device_profile_key(torch.device("cpu"))
+        store.save(device_key, {"version": 1, "tile_size": 384, "tile_batch": 4})
+        store.save(f"{device_key}:fp16", {"version": 1, "tile_size": 512, "tile_batch": 8})
+        self.runner._record_batch_cap(256, 2, "fp16")
+
+        self.assertEqual(self.runner.resolve_tile_params("auto", 1), (384, 4))
+        self.assertEqual(self.runner.resolve_tile_params("auto", 1, "fp16"), (512, 8))
+        self.assertEqual(self.runner.resolve_tile_params(256, 8), (256, 8))
+        self.assertEqual(self.runner.resolve_tile_params(256, 8, "fp16"), (256, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from moonshine_server.video_pipeline import VideoFramePipeline
+
+
+class VideoFramePipelineTests(unittest.TestCase):
+    def test_prefetched_frames_are_returned_by_index(self):
+        pipeline = VideoFramePipeline(prefetch_frames=3, writer_workers=0)
+        try:
+            for index in range(3):
+                pipeline.prefetch(index, lambda value: value * 10, index)
+            self.assertEqual([pipeline.take(index, lambda value: -1, index) for index in range(3)], [0, 10, 20])
+            self.assertEqual(pipeline.take(5, lambda value: value * 10, 5), 50)
+            stats = pipeline.stats()
+        finally:
+            pipeline.close()
+
+        self.assertEqual(stats["max_prefetch_depth"], 3)
+        self.assertIn("decode", stats["stage_ms"])
+
+    def test_writes_are_bounded_and_errors_reach_the_caller(self):
+        pipeline = VideoFramePipeline(prefetch_frames=0, writer_workers=1)
+        release = threading.Event()
+        written = []
+        errors = []
+
+        def write(value):
+            release.wait(timeout=5)
+            if value == 2:
+                raise OSError("disk busy")
+            written.append(value)
+
+        try:
+            for value in range(2):
+                pipeline.write(write, value, on_error=errors.append)
+            release.set()
+            for value in range(2, 5):
+                pipeline.write(write, value, on_error=errors.append)
+            pipeline.drain()
+            stats = pipeline.stats()
+        finally:
+            pipeline.close()
+
+        self.assertEqual(written, [0, 1, 3, 4])
+        self.assertEqual([str(error) for error in errors], ["disk busy"])
+        self.assertLessEqual(stats["max_write_queue_depth"], pipeline.max_pending_writes + 1)
+
+    def test_zero_workers_run_every_stage_inline(self):
+        pipeline = VideoFramePipeline(prefetch_frames=0, writer_workers=0)
+        caller = threading.get_ident()
+        threads = []
+        errors = []
+        try:
+            pipeline.prefetch(0, lambda: threads.append(threading.get_ident()))
+            self.assertEqual(threads, [])
+            pipeline.take(0, lambda: threads.append(threading.get_ident()))
+            pipeline.write(lambda: threads.append(threading.get_ident()), on_error=errors.append)
+        finally:
+            pipeline.close()
+
+        self.assertEqual(threads, [caller, caller])
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
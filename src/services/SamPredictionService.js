@@ -1,5 +1,6 @@
 import { api } from "src/boot/axios";
 import { classifyMoonshineError } from "src/services/ErrorClassifier";
+import { hydrateSamMaskCandidates } from "src/utils/samMaskEncoding";
 
 const normalizeImagePayload = (image, imageType = "base64") => {
   if (!image || typeof image !== "string") {
@@ -87,13 +88,15 @@ export const predictSamMask = async (request = {}) => {
       points: normalizePoints(request.points),
       box: normalizeBox(request.box),
       multimask_output: request.multimask_output ?? request.multimaskOutput ?? true,
+      mask_encoding: request.mask_encoding || request.maskEncoding || "rle",
     };
 
-    return await api.post("/api/v1/moonshine/sam/predict", payload, {
+    const result = await api.post("/api/v1/moonshine/sam/predict", payload, {
       headers: {
         "Content-Type": "application/json",
       },
     });
+    return hydrateSamMaskCandidates(result);
   } catch (error) {
     if (error.response || error.request) {
       throw new Error(classifyMoonshineError(error, "SAM 智能选区失败").message);
@@ -197,12 +200,14 @@ export const predictSamText = async (request = {}) => {
       prompt_source: request.prompt_source || request.promptSource || "manual",
       prompt_color: request.prompt_color || request.promptColor || null,
       prompt_noun: request.prompt_noun || request.promptNoun || null,
+      mask_encoding: request.mask_encoding || request.maskEncoding || "rle",
     };
-    return await api.post("/api/v1/moonshine/sam/text/predict", payload, {
+    const result = await api.post("/api/v1/moonshine/sam/text/predict", payload, {
       headers: {
         "Content-Type": "application/json",
       },
     });
+    return hydrateSamMaskCandidates(result);
   } catch (error) {
     if (error.response || error.request) {
       throw new Error(classifyMoonshineError(error, "SAM3 文本智能选区失败").message);
@@ -0,0 +1,83 @@
+// Same overlay colour the backend uses for PNG data URL masks.
+const SAM_MASK_OVERLAY_RGBA = [255, 203, 0, 186];
+
+const decodeBase64Bytes = (value) => {
+  const binary = atob(value || "");
+  const bytes = new Uint8Array(binary.length);
+  for (let index = 0; index < binary.length; index += 1) {
+    bytes[index] = binary.charCodeAt(index);
+  }
+  return bytes;
+};
+
+// Returns a row-major Uint8Array with 1 for every selected pixel.
+const decodeSamMaskBits = (encoded) => {
+  const [height, width] = encoded.size;
+  const bits = new Uint8Array(width * height);
+
+  if (encoded.encoding === "rle") {
+    // COCO RLE counts run down the columns and start with a run of zeros.
+    let position = 0;
+    encoded.counts.forEach((count, runIndex) => {
+      if (runIndex % 2 === 1) {
+        for (let offset = position; offset < position + count; offset += 1) {
+          const x = Math.floor(offset / height);
+          const y = offset - x * height;
+          bits[y * width + x] = 1;
+        }
+      }
+      position += count;
+    });
+    return bits;
+  }
+
+  const [left, top, cropWidth, cropHeight] = encoded.bbox;
+  if (!cropWidth || !cropHeight) return bits;
+  const bytes = decodeBase64Bytes(encoded.data);
+  for (let row = 0; row < cropHeight; row += 1) {
+    const rowOffset = row * encoded.rowBytes;
+    const targetOffset = (top + row) * width + left;
+    for (let column = 0; column < cropWidth; column += 1) {
+      if ((bytes[rowOffset + (column >> 3)] >> (7 - (column & 7))) & 1) {
+        bits[targetOffset + column] = 1;
+      }
+    }
+  }
+  return bits;
+};
+
+const samMaskToDataUrl = (mask) => {
+  if (!mask || typeof mask === "string") return mask;
+  const [height, width] = mask.size;
+  const canvas = document.createElement("canvas");
+  canvas.width = width;
+  canvas.height = height;
+  const context = canvas.getContext("2d");
+  const imageData = context.createImageData(width, height);
+  const bits = decodeSamMaskBits(mask);
+  const [red, green, blue, alpha] = SAM_MASK_OVERLAY_RGBA;
+  for (let pixel = 0; pixel < bits.length; pixel += 1) {
+    if (!bits[pixel]) continue;
+    const index = pixel * 4;
+    imageData.data[index] = red;
+    imageData.data[index + 1] = green;
+    imageData.data[index + 2] = blue;
+    imageData.data[index + 3] = alpha;
+  }
+  context.putImageData(imageData, 0, 0);
+  return canvas.toDataURL("image/png");
+};
+
+// Turns compact (rle/bitmap) candidate masks back into overlay data URLs.
+const hydrateSamMaskCandidates = (result) => {
+  if (!result || !Array.isArray(result.candidates)) return result;
+  return {
+    ...result,
+    candidates: result.candidates.map((candidate) => ({
+      ...candidate,
+      mask: samMaskToDataUrl(candidate.mask),
+    })),
+  };
+};
+
+export { decodeSamMaskBits, hydrateSamMaskCandidates, samMaskToDataUrl };